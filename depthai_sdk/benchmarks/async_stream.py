@@ -0,0 +1,96 @@
+"""
+Benchmark of end-to-end latency of packets consumed by asyncio code: oak.queue() (QueuePacketHandler) compared
+against oak.stream() (AsyncQueuePacketHandler).
+
+A thread feeds packets to the handler at `--fps`, the way the XLink callback thread does. Latency is the time from
+the handler receiving the packet to the coroutine getting it. With queue(), asyncio code either polls the queue
+(like oak.poll()) or waits for it on a thread of the default executor.
+
+Usage:
+    python benchmarks/async_stream.py [--fps 60] [--seconds 3]
+"""
+import argparse
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from queue import Empty
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packet_handlers import AsyncQueuePacketHandler, QueuePacketHandler
+from depthai_sdk.classes.packets import FramePacket
+
+
+def produce(handler, fps: float, count: int):
+    start = time.perf_counter()
+    for seq in range(count):
+        delay = start + seq / fps - time.perf_counter()
+        if 0 < delay:
+            time.sleep(delay)
+        frame = dai.ImgFrame()
+        frame.setSequenceNum(seq)
+        frame.setTimestamp(timedelta(seconds=seq / fps))
+        packet = FramePacket('color', frame)
+        packet.sent = time.perf_counter()
+        handler._new_packet_callback(packet)
+
+
+async def consume_polling(handler: QueuePacketHandler, count: int):
+    queue, latencies = handler.get_queue(), []
+    while len(latencies) < count:
+        try:
+            packet = queue.get_nowait()
+        except Empty:
+            await asyncio.sleep(0.001)
+            continue
+        latencies.append(time.perf_counter() - packet.sent)
+    return latencies
+
+
+async def consume_executor(handler: QueuePacketHandler, count: int):
+    queue, latencies, loop = handler.get_queue(), [], asyncio.get_running_loop()
+    while len(latencies) < count:
+        packet = await loop.run_in_executor(None, queue.get)
+        latencies.append(time.perf_counter() - packet.sent)
+    return latencies
+
+
+async def consume_stream(handler: AsyncQueuePacketHandler, count: int):
+    latencies = []
+    async for packet in handler:
+        latencies.append(time.perf_counter() - packet.sent)
+        if len(latencies) == count:
+            break
+    return latencies
+
+
+async def run(name: str, fps: float, count: int):
+    handler = AsyncQueuePacketHandler([], max_size=30) if name == 'stream()' else QueuePacketHandler([], max_size=30)
+    consume = {'queue(), polling': consume_polling,
+               'queue(), executor': consume_executor,
+               'stream()': consume_stream}[name]
+
+    threading.Thread(target=produce, args=(handler, fps, count), daemon=True).start()
+    cpu = time.process_time()
+    latencies = await consume(handler, count)
+    return np.array(latencies) * 1e3, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fps', type=float, default=60)
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+    count = int(args.fps * args.seconds)
+
+    print(f'{"consumer":>18} {"p50 ms":>8} {"p99 ms":>8} {"max ms":>8} {"CPU s":>6}')
+    for name in ['queue(), polling', 'queue(), executor', 'stream()']:
+        latencies, cpu = asyncio.run(run(name, args.fps, count))
+        print(f'{name:>18} {np.median(latencies):>8.3f} {np.percentile(latencies, 99):>8.3f} '
+              f'{latencies.max():>8.3f} {cpu:>6.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark of RANSAC plane fitting used by BoxEstimator (fitting the top side of the box), compared against the
+previous implementation (one hypothesis per Python loop iteration). Also compares free plane fitting (used
+for ground plane calibration) against open3d's segment_plane, if open3d is installed.
+
+Uses synthetic box scenes: box top and side walls (in the ground-aligned frame, as in BoxEstimator.get_box_top),
+with depth noise and 5% outliers.
+
+Usage:
+    python benchmarks/box_ransac.py [--scenes 20] [--points 20000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from depthai_sdk.classes.ransac import PlaneRansac
+
+
+def create_box_scene(rnd: np.random.Generator, n_points: int):
+    """
+    Returns points of a box (top at z = -height, floor at z = 0) and its height.
+    """
+    length, width, height = rnd.uniform(200, 600, 3)
+    n_top = n_points // 2
+    n_side = n_points - n_top
+    top = np.column_stack([rnd.uniform(0, length, n_top), rnd.uniform(0, width, n_top), np.full(n_top, -height)])
+
+    # Two visible side walls
+    side_x = np.column_stack([rnd.uniform(0, length, n_side // 2), np.zeros(n_side // 2),
+                              -rnd.uniform(0, height, n_side // 2)])
+    n = n_side - n_side // 2
+    side_y = np.column_stack([np.zeros(n), rnd.uniform(0, width, n), -rnd.uniform(0, height, n)])
+    points = np.concatenate([top, side_x, side_y])
+    points += rnd.normal(0, 1.5, points.shape)
+
+    outliers = rnd.random(len(points)) < 0.05
+    points[outliers] += rnd.normal(0, 100, (outliers.sum(), 3))
+    return points, height
+
+
+def create_ground_scene(rnd: np.random.Generator, n_points: int):
+    """
+    Returns points of a tilted ground plane (80% of points) with clutter, and the plane normal.
+    """
+    normal = np.array([rnd.uniform(-0.3, 0.3), rnd.uniform(-0.3, 0.3), 1])
+    normal /= np.linalg.norm(normal)
+    xy = rnd.uniform(-1000, 1000, (n_points, 2))
+    z = (1500 - normal[0] * xy[:, 0] - normal[1] * xy[:, 1]) / normal[2]
+    points = np.column_stack([xy, z + rnd.normal(0, 3, n_points)])
+    clutter = rnd.random(n_points) < 0.2
+    points[clutter, 2] -= rnd.uniform(50, 800, clutter.sum())
+    return points, normal
+
+
+def legacy_fit_plane_vec_constraint(norm_vec, pts, thresh=0.05, n_iterations=300):
+    """
+    Previous BoxEstimator.fit_plane_vec_constraint().
+    """
+
+    def get_plane_inliers(plane_eq, pts, thresh):
+        dist_pt = (plane_eq[0] * pts[:, 0] + plane_eq[1] * pts[:, 1] + plane_eq[2] * pts[:, 2] + plane_eq[3]) \
+                  / np.sqrt(plane_eq[0] ** 2 + plane_eq[1] ** 2 + plane_eq[2] ** 2)
+        return np.where(np.abs(dist_pt) <= thresh)[0]
+
+    best_eq = []
+    best_inliers = []
+    n_points = pts.shape[0]
+    for _ in range(n_iterations):
+        point = pts[random.sample(range(0, n_points), 1)]
+        d = -np.sum(np.multiply(norm_vec, point))
+        plane_eq = [*norm_vec, d]
+        pt_id_inliers = get_plane_inliers(plane_eq, pts, thresh)
+        if len(pt_id_inliers) > len(best_inliers):
+            best_eq = plane_eq
+            best_inliers = pt_id_inliers
+    return best_eq, best_inliers
+
+
+def timed(fn):
+    start = time.perf_counter()
+    ret = fn()
+    return ret, time.perf_counter() - start
+
+
+def print_row(name, durations, errors, inliers):
+    print(f'{name:>36} {np.mean(durations) * 1e3:>8.2f} {np.mean(errors):>10.3f} {np.mean(inliers):>9.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenes', type=int, default=20)
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--threshold', type=float, default=3, help='Inlier threshold in mm')
+    args = parser.parse_args()
+
+    random.seed(0)
+    rnd = np.random.default_rng(0)
+    box_scenes = [create_box_scene(rnd, args.points) for _ in range(args.scenes)]
+
+    print(f'{"box top (fixed normal)":>36} {"ms":>8} {"height err":>10} {"inliers":>9}')
+    runs = [
+        ('previous loop, 300 iterations', lambda pts: legacy_fit_plane_vec_constraint([0, 0, 1], pts,
+                                                                                     args.threshold, 300)),
+        ('previous loop, 30 iterations', lambda pts: legacy_fit_plane_vec_constraint([0, 0, 1], pts,
+                                                                                    args.threshold, 30)),
+        ('PlaneRansac, 300 max iterations', lambda pts: PlaneRansac(args.threshold, 300, normal=[0, 0, 1],
+                                                                    seed=0).fit(pts)),
+        ('PlaneRansac, 300 without early stop', lambda pts: PlaneRansac(args.threshold, 300, normal=[0, 0, 1],
+                                                                        confidence=1, seed=0).fit(pts)),
+    ]
+    for name, fit in runs:
+        durations, errors, inliers = [], [], []
+        for points, height in box_scenes:
+            (eq, idx), duration = timed(lambda: fit(points))
+            durations.append(duration)
+            errors.append(abs(abs(eq[3]) - height))
+            inliers.append(len(idx))
+        print_row(name, durations, errors, inliers)
+
+    ground_scenes = [create_ground_scene(rnd, args.points) for _ in range(args.scenes)]
+    runs = [('PlaneRansac', lambda pts: PlaneRansac(args.threshold, 300, seed=0).fit(pts))]
+    try:
+        import open3d as o3d
+
+        def segment_plane(pts):
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(pts)
+            eq, inliers = pcd.segment_plane(args.threshold, 3, 300)
+            return np.asarray(eq), inliers
+
+        runs.insert(0, ('open3d segment_plane', segment_plane))
+    except ImportError:
+        pass
+
+    print(f'\n{"ground plane (free normal)":>36} {"ms":>8} {"angle err":>10} {"inliers":>9}')
+    for name, fit in runs:
+        durations, errors, inliers = [], [], []
+        for points, normal in ground_scenes:
+            (eq, idx), duration = timed(lambda: fit(points))
+            durations.append(duration)
+            cos = abs(np.dot(eq[:3], normal)) / np.linalg.norm(eq[:3])
+            errors.append(np.degrees(np.arccos(min(cos, 1))))
+            inliers.append(len(idx))
+        print_row(name, durations, errors, inliers)
+
+
+if __name__ == '__main__':
+    main()
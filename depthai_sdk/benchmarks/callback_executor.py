@@ -0,0 +1,76 @@
+"""
+Benchmark of a slow callback (eg. analytics) next to a fast one (eg. visualization) on the same XLink callback
+thread: callbacks called inline (previous behavior) compared against the slow callback running on a
+CallbackExecutor.
+
+A single thread delivers packets of both streams at `--fps`, the way depthai calls output queue callbacks.
+Reported latency is the time from the packet arriving to the callback finishing.
+
+Usage:
+    python benchmarks/callback_executor.py [--fps 30] [--seconds 3] [--slow-ms 80] [--workers 2]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from depthai_sdk.oak_outputs.callback_executor import CallbackExecutor
+
+
+class Callback:
+    def __init__(self, work: float):
+        self.work = work
+        self.latencies = []
+
+    def __call__(self, packet):
+        if self.work:
+            time.sleep(self.work)  # Releases the GIL, like cv2/numpy/NN inference on the host
+        self.latencies.append(time.perf_counter() - packet.arrived)
+
+
+def run(fps: float, seconds: float, slow: float, workers: int, executor: bool):
+    fast_cb, slow_cb = Callback(0.0005), Callback(slow)
+    slow_submit = slow_cb
+    pool = None
+    if executor:
+        pool = CallbackExecutor(slow_cb, max_workers=workers, max_pending=1, ordered=False)
+        slow_submit = pool.submit
+
+    frames = int(fps * seconds)
+    start = time.perf_counter()
+    for i in range(frames):
+        deadline = start + i / fps
+        delay = deadline - time.perf_counter()
+        if 0 < delay:
+            time.sleep(delay)
+        # Device queue is non-blocking (maxSize=1), frames that arrived while the thread was busy are lost
+        if time.perf_counter() - deadline > 1 / fps:
+            continue
+        fast_cb(SimpleNamespace(name='fast', arrived=time.perf_counter()))
+        slow_submit(SimpleNamespace(name='slow', arrived=time.perf_counter()))
+
+    if pool is not None:
+        pool.wait_idle()
+        pool.close()
+    return frames, fast_cb.latencies, slow_cb.latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--slow-ms', type=float, default=80)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f'{"mode":>10} {"fast FPS":>9} {"fast p50 ms":>12} {"fast p99 ms":>12} {"slow FPS":>9} {"slow p50 ms":>12}')
+    for name, executor in [('inline', False), ('executor', True)]:
+        frames, fast, slow = run(args.fps, args.seconds, args.slow_ms / 1e3, args.workers, executor)
+        fast, slow = np.array(fast) * 1e3, np.array(slow) * 1e3
+        print(f'{name:>10} {len(fast) / args.seconds:>9.1f} {np.median(fast):>12.2f} {np.percentile(fast, 99):>12.2f} '
+              f'{len(slow) / args.seconds:>9.1f} {np.median(slow):>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark of disparity/depth colorization (DisparityPacket.get_colorized_frame), compared against the previous
+implementation (floating-point normalization of the whole frame, then cv2.applyColorMap).
+
+Colorizes synthetic frames at 400P, 800P and 1200P:
+
+- disparity: uint8, 0..95 (default stereo output),
+- subpixel: uint16 disparity with 3 fractional bits,
+- depth: uint16 depth in mm, converted to disparity.
+
+For each, measures the first call on a packet (lookup tables already computed), the same call colorizing straight
+into a reusable output buffer (as the OpenCV visualizer does), and repeated calls on the same packet (memoized).
+
+Usage:
+    python benchmarks/disparity_colorization.py [--repeat 20]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import cv2
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packets import DisparityDepthPacket, DisparityPacket
+from depthai_sdk.visualize.configs import StereoColor, VisConfig
+
+RESOLUTIONS = {'400P': (640, 400), '800P': (1280, 800), '1200P': (1920, 1200)}
+DEPTH_FACTOR = 880 * 7.5 * 10  # Focal length (px) * baseline (mm)
+VISUALIZER = SimpleNamespace(config=VisConfig())
+
+
+def create_frames(rnd: np.random.Generator, width: int, height: int):
+    """
+    Returns disparity (uint8), subpixel disparity (uint16) and depth (uint16) of a slanted plane with noise
+    and invalid pixels.
+    """
+    ramp = np.linspace(5, 90, width)[None, :] + rnd.normal(0, 1, (height, width))
+    ramp[rnd.random((height, width)) < 0.05] = 0
+    disparity = np.clip(ramp, 0, 95).astype(np.uint8)
+    subpixel = np.clip(ramp * 8, 0, 95 * 8).astype(np.uint16)
+    with np.errstate(divide='ignore'):
+        depth = np.where(ramp <= 0, 0, np.clip(DEPTH_FACTOR / ramp, 0, 65535)).astype(np.uint16)
+    return disparity, subpixel, depth
+
+
+def depth_frame(depth: np.ndarray) -> dai.ImgFrame:
+    frame = dai.ImgFrame()
+    frame.setType(dai.ImgFrame.Type.RAW16)
+    frame.setWidth(depth.shape[1])
+    frame.setHeight(depth.shape[0])
+    frame.setData(depth.view(np.uint8).ravel())
+    return frame
+
+
+# Previous implementation (DisparityPacket.get_colorized_frame and DisparityDepthPacket.get_disparity, RGB)
+
+def legacy_colorize(frame: np.ndarray, multiplier: float, colormap: np.ndarray) -> np.ndarray:
+    colorized_disp = frame * multiplier
+    return cv2.applyColorMap(colorized_disp.astype(np.uint8), colormap)
+
+
+def legacy_depth_disparity(depth: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore'):
+        disparity = DEPTH_FACTOR / depth
+    disparity[disparity == np.inf] = 0
+    return disparity
+
+
+def create_packet(kind: str, frame: np.ndarray, multiplier: float):
+    if kind == 'depth':
+        return DisparityDepthPacket('depth', depth_frame(frame), colorize=StereoColor.RGB,
+                                    disp_scale_factor=DEPTH_FACTOR)
+    return DisparityPacket(kind, dai.ImgFrame(), multiplier, disparity_map=frame, colorize=StereoColor.RGB)
+
+
+def timed(fn, repeat):
+    fn()  # Warm up (lookup tables, buffers)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    colormap = VISUALIZER.config.stereo.colormap
+    colormap[0] = [0, 0, 0]
+
+    print(f'{"":>16} {"previous ms":>12} {"new ms":>8} {"buffer ms":>10} {"memo ms":>8} {"speedup":>8} {"max diff":>9}')
+    for resolution, (width, height) in RESOLUTIONS.items():
+        disparity, subpixel, depth = create_frames(rnd, width, height)
+        frames = {'disparity': (disparity, 255 / 95), 'subpixel': (subpixel, 255 / 95 / 8), 'depth': (depth, 255 / 95)}
+        for kind, (frame, multiplier) in frames.items():
+            if kind == 'depth':
+                legacy = lambda: legacy_colorize(legacy_depth_disparity(frame), multiplier, colormap)
+            else:
+                legacy = lambda: legacy_colorize(frame, multiplier, colormap)
+            new = lambda: create_packet(kind, frame, multiplier).get_colorized_frame(VISUALIZER)
+            out = np.empty((height, width, 3), dtype=np.uint8)
+            buffered = lambda: create_packet(kind, frame, multiplier).get_colorized_frame(VISUALIZER, out=out)
+            packet = create_packet(kind, frame, multiplier)
+            memoized = lambda: packet.get_colorized_frame(VISUALIZER)
+
+            legacy_time = timed(legacy, args.repeat)
+            new_time = timed(new, args.repeat)
+            buffered_time = timed(buffered, args.repeat)
+            memo_time = timed(memoized, args.repeat)
+            # Max difference of the colors; subpixel disparity is rounded (previously truncated), so it can differ
+            # by one colormap step, which is up to ~5 BGR levels
+            diff = np.abs(legacy().astype(int) - new().astype(int)).max()
+            print(f'{resolution + " " + kind:>16} {legacy_time * 1e3:>12.2f} {new_time * 1e3:>8.2f} '
+                  f'{buffered_time * 1e3:>10.2f} {memo_time * 1e3:>8.3f} {legacy_time / buffered_time:>7.1f}x '
+                  f'{diff:>9}')
+
+
+if __name__ == '__main__':
+    main()
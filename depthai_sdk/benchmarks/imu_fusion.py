@@ -0,0 +1,115 @@
+"""
+Benchmark of orientation fusion of IMU packets (OrientationFilter, used by XoutIMU), compared against the previous
+implementation (`ahrs` package filters, `updateIMU` for every sample).
+
+Uses a recorded IMU log if given (.csv or .npy, rows of gyroscope x, y, z [rad/s] and accelerometer x, y, z
+[m/s^2], sampled at --log-rate Hz), otherwise synthetic motion (slow rotations around all axes with sensor noise)
+sampled at 100, 400 and 1000 Hz. Samples are processed in batches of --batch samples, as IMUData messages
+arrive from the device.
+
+Accuracy is the max angle between orientations of the previous and the new implementation, after each sample.
+CPU load is the processing time as a share of the duration of the samples.
+
+Usage:
+    python benchmarks/imu_fusion.py [--seconds 20] [--batch 10] [--log imu.csv --log-rate 400]
+"""
+import argparse
+import time
+
+import numpy as np
+from ahrs.filters import Madgwick, Mahony
+
+from depthai_sdk.classes.orientation import OrientationFilter
+
+GRAVITY = 9.81
+
+
+def synthetic_imu(rnd: np.random.Generator, rate: float, seconds: float):
+    """
+    Returns gyroscope (rad/s) and accelerometer (m/s^2) samples of a sensor rotating around all axes.
+    """
+    t = np.arange(int(rate * seconds)) / rate
+    gyro = np.column_stack([0.8 * np.sin(2 * np.pi * 0.3 * t),
+                            0.5 * np.sin(2 * np.pi * 0.2 * t + 1),
+                            0.3 * np.cos(2 * np.pi * 0.1 * t)])
+
+    # Gravity in the sensor frame, integrated from the true rotation
+    q = np.array([1.0, 0, 0, 0])
+    accel = np.empty_like(gyro)
+    for i, (gx, gy, gz) in enumerate(gyro):
+        w, x, y, z = q
+        accel[i] = GRAVITY * np.array([2 * (x * z - w * y), 2 * (w * x + y * z), 1 - 2 * (x * x + y * y)])
+        q = q + 0.5 / rate * np.array([-x * gx - y * gy - z * gz, w * gx + y * gz - z * gy,
+                                       w * gy - x * gz + z * gx, w * gz + x * gy - y * gx])
+        q /= np.linalg.norm(q)
+
+    gyro += rnd.normal(0, 0.01, gyro.shape)
+    accel += rnd.normal(0, 0.05, accel.shape)
+    return gyro, accel
+
+
+def load_log(path: str):
+    data = np.loadtxt(path, delimiter=',') if path.endswith('.csv') else np.load(path)
+    return data[:, :3], data[:, 3:6]
+
+
+def previous_filter(algorithm: str, rate: float, gyro: np.ndarray, accel: np.ndarray, batch: int):
+    # Previous XoutIMU.new_msg: ahrs filter, one updateIMU call per sample
+    ahrs = Mahony(frequency=rate) if algorithm == 'mahony' else Madgwick(frequency=rate)
+    q = np.array([1, 0, 0, 0], dtype=np.float64)
+    out = np.empty((len(gyro), 4))
+    for start in range(0, len(gyro), batch):
+        for i in range(start, min(start + batch, len(gyro))):
+            q = ahrs.updateIMU(q, np.array(gyro[i]), np.array(accel[i]))
+            out[i] = q
+    return out
+
+
+def new_filter(algorithm: str, rate: float, gyro: np.ndarray, accel: np.ndarray, batch: int):
+    fusion = OrientationFilter(algorithm, frequency=rate)
+    return np.concatenate([fusion.update(gyro[start:start + batch], accel[start:start + batch])
+                           for start in range(0, len(gyro), batch)])
+
+
+def angle_error(q1: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """
+    Returns angles (degrees) between orientations.
+    """
+    dot = np.clip(np.abs(np.sum(q1 * q2, axis=1)), 0, 1)
+    return np.degrees(2 * np.arccos(dot))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    ret = fn()
+    return ret, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=20, help='Duration of synthetic motion')
+    parser.add_argument('--batch', type=int, default=10, help='Samples per IMUData message')
+    parser.add_argument('--log', type=str, default=None, help='Recorded IMU log (.csv or .npy)')
+    parser.add_argument('--log-rate', type=float, default=400, help='Sampling rate of the recorded log (Hz)')
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    if args.log:
+        datasets = [(f'log {args.log_rate:g} Hz', args.log_rate, *load_log(args.log))]
+    else:
+        datasets = [(f'{rate} Hz', rate, *synthetic_imu(rnd, rate, args.seconds)) for rate in (100, 400, 1000)]
+
+    print(f'{"":>22} {"previous us":>12} {"new us":>8} {"speedup":>8} {"max err deg":>12} {"cpu load":>12}')
+    for name, rate, gyro, accel in datasets:
+        for algorithm in ('mahony', 'madgwick'):
+            expected, previous_time = timed(lambda: previous_filter(algorithm, rate, gyro, accel, args.batch))
+            result, new_time = timed(lambda: new_filter(algorithm, rate, gyro, accel, args.batch))
+            n = len(gyro)
+            seconds = n / rate
+            print(f'{name + " " + algorithm:>22} {previous_time / n * 1e6:>12.2f} {new_time / n * 1e6:>8.2f} '
+                  f'{previous_time / new_time:>7.1f}x {angle_error(expected, result).max():>12.2e} '
+                  f'{previous_time / seconds * 100:>5.1f}% -> {new_time / seconds * 100:.1f}%')
+
+
+if __name__ == '__main__':
+    main()
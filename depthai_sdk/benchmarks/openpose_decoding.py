@@ -0,0 +1,235 @@
+"""
+Benchmark of OpenPose decoding used by the openpose2 model handler (OpenPoseDecoder), compared against
+the previous implementation (getKeypoints/getValidPairs/getPersonwiseKeypoints, Python loops over keypoints,
+contours and candidate pairs).
+
+Uses recorded NN outputs if given (.npy of 1 x 57 x 32 x 57 float32 arrays, eg. saved from the handler with
+np.save), otherwise synthetic scenes with 1 to --people people.
+
+Usage:
+    python benchmarks/openpose_decoding.py [--people 6] [--scenes 10] [--outputs recorded.npy]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from depthai_sdk.classes.openpose import OpenPoseDecoder
+
+POSE_PAIRS = [[1, 2], [1, 5], [2, 3], [3, 4], [5, 6], [6, 7], [1, 8], [8, 9], [9, 10], [1, 11], [11, 12], [12, 13],
+              [1, 0], [0, 14], [14, 16], [0, 15], [15, 17], [2, 17], [5, 16]]
+MAP_IDX = [[31, 32], [39, 40], [33, 34], [35, 36], [41, 42], [43, 44], [19, 20], [21, 22], [23, 24], [25, 26],
+           [27, 28], [29, 30], [47, 48], [49, 50], [53, 54], [51, 52], [55, 56], [37, 38], [45, 46]]
+INPUT_SIZE = (456, 256)
+OUTPUT_SHAPE = (57, 32, 57)  # Channels, height, width
+
+# Keypoints of a standing person, relative to the nose, in units of person height
+SKELETON = np.array([[0, 0], [0, 0.15], [-0.12, 0.15], [-0.18, 0.33], [-0.2, 0.5], [0.12, 0.15], [0.18, 0.33],
+                     [0.2, 0.5], [-0.08, 0.5], [-0.09, 0.72], [-0.1, 0.95], [0.08, 0.5], [0.09, 0.72], [0.1, 0.95],
+                     [-0.06, -0.05], [0.06, -0.05], [-0.11, -0.02], [0.11, -0.02]])
+
+
+def create_scene(rnd: np.random.Generator, n_people: int):
+    """
+    Returns NN outputs (keypoint heatmaps and PAFs) of people standing next to each other, and their keypoints
+    (in heatmap cells).
+    """
+    channels, height, width = OUTPUT_SHAPE
+    outputs = np.zeros((1, channels, height, width), dtype=np.float32)
+    ys, xs = np.mgrid[:height, :width]
+    people = []
+    slot = width / n_people
+    for i in range(n_people):
+        size = rnd.uniform(0.6, 0.85) * height
+        nose = np.array([slot * (i + 0.5) + rnd.uniform(-0.1, 0.1) * slot, rnd.uniform(0.5, 1.5)])
+        keypoints = nose + SKELETON * size
+        people.append(keypoints)
+
+        for part, (x, y) in enumerate(keypoints):
+            heatmap = np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / (2 * 0.8 ** 2))
+            outputs[0, part] = np.maximum(outputs[0, part], heatmap)
+
+        for (a, b), (ch_x, ch_y) in zip(POSE_PAIRS, MAP_IDX):
+            d = keypoints[b] - keypoints[a]
+            length = np.linalg.norm(d)
+            unit = d / length
+            rx, ry = xs - keypoints[a][0], ys - keypoints[a][1]
+            along = rx * unit[0] + ry * unit[1]
+            across = np.abs(rx * unit[1] - ry * unit[0])
+            on_limb = (-0.5 <= along) & (along <= length + 0.5) & (across <= 1)
+            outputs[0, ch_x][on_limb] = unit[0]
+            outputs[0, ch_y][on_limb] = unit[1]
+
+    outputs += rnd.normal(0, 0.02, outputs.shape).astype(np.float32)
+    return outputs, people
+
+
+# Previous implementation (nn_models/_openpose2/handler.py)
+
+def getKeypoints(probMap, threshold=0.2):
+    mapSmooth = cv2.GaussianBlur(probMap, (3, 3), 0, 0)
+    mapMask = np.uint8(mapSmooth > threshold)
+    keypoints = []
+    contours, _ = cv2.findContours(mapMask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    for cnt in contours:
+        blobMask = np.zeros(mapMask.shape)
+        blobMask = cv2.fillConvexPoly(blobMask, cnt, 1)
+        maskedProbMap = mapSmooth * blobMask
+        _, maxVal, _, maxLoc = cv2.minMaxLoc(maskedProbMap)
+        keypoints.append(maxLoc + (probMap[maxLoc[1], maxLoc[0]],))
+    return keypoints
+
+
+def getValidPairs(outputs, w, h, detectedKeypoints):
+    validPairs = []
+    invalidPairs = []
+    nInterpSamples = 10
+    pafScoreTh = 0.2
+    confTh = 0.4
+    for k in range(len(MAP_IDX)):
+        pafA = cv2.resize(outputs[0, MAP_IDX[k][0], :, :], (w, h))
+        pafB = cv2.resize(outputs[0, MAP_IDX[k][1], :, :], (w, h))
+        candA = detectedKeypoints[POSE_PAIRS[k][0]]
+        candB = detectedKeypoints[POSE_PAIRS[k][1]]
+        nA = len(candA)
+        nB = len(candB)
+        if nA != 0 and nB != 0:
+            validPair = np.zeros((0, 3))
+            for i in range(nA):
+                maxJ = -1
+                maxScore = -1
+                found = 0
+                for j in range(nB):
+                    d_ij = np.subtract(candB[j][:2], candA[i][:2])
+                    norm = np.linalg.norm(d_ij)
+                    if norm:
+                        d_ij = d_ij / norm
+                    else:
+                        continue
+                    interp_coord = list(zip(np.linspace(candA[i][0], candB[j][0], num=nInterpSamples),
+                                            np.linspace(candA[i][1], candB[j][1], num=nInterpSamples)))
+                    pafInterp = []
+                    for k2 in range(len(interp_coord)):
+                        pafInterp.append([pafA[int(round(interp_coord[k2][1])), int(round(interp_coord[k2][0]))],
+                                          pafB[int(round(interp_coord[k2][1])), int(round(interp_coord[k2][0]))]])
+                    pafScores = np.dot(pafInterp, d_ij)
+                    avgPafScore = sum(pafScores) / len(pafScores)
+                    if (len(np.where(pafScores > pafScoreTh)[0]) / nInterpSamples) > confTh:
+                        if avgPafScore > maxScore:
+                            maxJ = j
+                            maxScore = avgPafScore
+                            found = 1
+                if found:
+                    validPair = np.append(validPair, [[candA[i][3], candB[maxJ][3], maxScore]], axis=0)
+            validPairs.append(validPair)
+        else:
+            invalidPairs.append(k)
+            validPairs.append([])
+    return validPairs, invalidPairs
+
+
+def getPersonwiseKeypoints(validPairs, invalidPairs, keypointsList):
+    personwiseKeypoints = -1 * np.ones((0, 19))
+    for k in range(len(MAP_IDX)):
+        if k not in invalidPairs:
+            partAs = validPairs[k][:, 0]
+            partBs = validPairs[k][:, 1]
+            indexA, indexB = np.array(POSE_PAIRS[k])
+            for i in range(len(validPairs[k])):
+                found = 0
+                personIdx = -1
+                for j in range(len(personwiseKeypoints)):
+                    if personwiseKeypoints[j][indexA] == partAs[i]:
+                        personIdx = j
+                        found = 1
+                        break
+                if found:
+                    personwiseKeypoints[personIdx][indexB] = partBs[i]
+                    personwiseKeypoints[personIdx][-1] += keypointsList[partBs[i].astype(int), 2] + \
+                                                          validPairs[k][i][2]
+                elif not found and k < 17:
+                    row = -1 * np.ones(19)
+                    row[indexA] = partAs[i]
+                    row[indexB] = partBs[i]
+                    row[-1] = sum(keypointsList[validPairs[k][i, :2].astype(int), 2]) + validPairs[k][i][2]
+                    personwiseKeypoints = np.vstack([personwiseKeypoints, row])
+    return personwiseKeypoints
+
+
+def legacy_decode(outputs, threshold=0.3):
+    w, h = INPUT_SIZE
+    detectedKeypoints = []
+    keypointsList = np.zeros((0, 3))
+    keypointId = 0
+    for part in range(18):
+        probMap = cv2.resize(outputs[0, part, :, :], (w, h))
+        keypoints = getKeypoints(probMap, threshold)
+        keypointsWithId = []
+        for i in range(len(keypoints)):
+            keypointsWithId.append(keypoints[i] + (keypointId,))
+            keypointsList = np.vstack([keypointsList, keypoints[i]])
+            keypointId += 1
+        detectedKeypoints.append(keypointsWithId)
+    validPairs, invalidPairs = getValidPairs(outputs, w, h, detectedKeypoints)
+    personwiseKeypoints = getPersonwiseKeypoints(validPairs, invalidPairs, keypointsList)
+    return detectedKeypoints, personwiseKeypoints, keypointsList
+
+
+def people_keypoints(result) -> list:
+    """
+    Returns sorted list of people, each as 18 x 2 array of keypoint coordinates (NaN if missing).
+    """
+    _, personwise, keypoints = result
+    people = []
+    for person in personwise:
+        ids = person[:18].astype(int)
+        coords = np.where((ids >= 0)[:, None], keypoints[ids, :2], np.nan)
+        people.append(coords)
+    return sorted(people, key=lambda p: np.nanmean(p[:, 0]))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ret = fn()
+    return ret, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--people', type=int, default=6, help='Max number of people in synthetic scenes')
+    parser.add_argument('--scenes', type=int, default=10, help='Synthetic scenes per number of people')
+    parser.add_argument('--outputs', type=str, default=None, help='Recorded NN outputs (.npy)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    if args.outputs:
+        recorded = np.load(args.outputs).astype(np.float32).reshape(-1, 1, *OUTPUT_SHAPE)
+        groups = [('recorded', list(recorded))]
+    else:
+        groups = [(f'{n} people', [create_scene(rnd, n)[0] for _ in range(args.scenes)])
+                  for n in range(1, args.people + 1)]
+
+    decoder = OpenPoseDecoder(POSE_PAIRS, MAP_IDX, INPUT_SIZE, threshold=0.3)
+    print(f'{"":>12} {"previous ms":>12} {"decoder ms":>12} {"speedup":>8} {"same people":>12} {"max err px":>11}')
+    for name, scenes in groups:
+        legacy_times, times, same, errors = [], [], 0, [0.0]
+        for outputs in scenes:
+            legacy, legacy_time = timed(lambda: legacy_decode(outputs), args.repeat)
+            result, duration = timed(lambda: decoder.decode(outputs), args.repeat)
+            legacy_times.append(legacy_time)
+            times.append(duration)
+
+            legacy_people, people = people_keypoints(legacy), people_keypoints(result)
+            if len(legacy_people) == len(people) and all(np.array_equal(np.isnan(a), np.isnan(b))
+                                                         for a, b in zip(legacy_people, people)):
+                same += 1
+                errors.extend(np.nanmax(np.abs(a - b)) for a, b in zip(legacy_people, people))
+        print(f'{name:>12} {np.mean(legacy_times) * 1e3:>12.2f} {np.mean(times) * 1e3:>12.2f} '
+              f'{np.mean(legacy_times) / np.mean(times):>7.1f}x {same:>7}/{len(scenes):<4} {max(errors):>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of host-side point cloud creation (XoutPointcloud), compared against the previous implementation
+(full-resolution xyz grid multiplied by the depth map).
+
+Uses a synthetic, slanted-plane depth map with noise and 10% invalid pixels.
+
+Usage:
+    python benchmarks/pointcloud.py [--width 1280] [--height 800] [--iterations 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from depthai_sdk.components.pointcloud_helper import PointcloudEngine
+
+
+def legacy_xyz(camera_matrix: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Projection grid as created by pointcloud_helper.create_xyz() (without reading calibration from the device).
+    """
+    xs = np.linspace(0, width - 1, width, dtype=np.float32)
+    ys = np.linspace(0, height - 1, height, dtype=np.float32)
+    points_2d = np.stack(np.meshgrid(xs, ys)).transpose(1, 2, 0)
+    x_coord = (points_2d[..., 0] - camera_matrix[0, 2]) / camera_matrix[0, 0]
+    y_coord = (points_2d[..., 1] - camera_matrix[1, 2]) / camera_matrix[1, 1]
+    xyz = np.stack([x_coord, y_coord], axis=-1)
+    return np.pad(xyz, ((0, 0), (0, 0), (0, 1)), "constant", constant_values=1.0)
+
+
+def create_depth(width: int, height: int, seed: int = 0) -> np.ndarray:
+    rnd = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    depth = (1000 + xs * 2 + ys * 1.5 + rnd.normal(0, 5, (height, width))).astype(np.uint16)
+    depth[rnd.random((height, width)) < 0.1] = 0
+    return depth
+
+
+def measure(fn, iterations: int) -> float:
+    fn()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=800)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    w, h = args.width, args.height
+    camera_matrix = np.array([[800.0, 0, w / 2], [0, 800.0, h / 2], [0, 0, 1]])
+    depth = create_depth(w, h)
+
+    xyz = legacy_xyz(camera_matrix, w, h)
+    results = [('legacy', measure(lambda: xyz * np.expand_dims(np.array(depth), axis=-1), args.iterations), w * h)]
+
+    for name, kwargs in [('organized', {}),
+                         ('organized, reused buffers', {'reuse_buffers': 3}),
+                         ('organized, 0.4-4m range', {'min_range': 400, 'max_range': 4000}),
+                         ('sparse', {'sparse': True}),
+                         ('sparse, 0.4-2m range', {'sparse': True, 'min_range': 400, 'max_range': 2000}),
+                         ('voxel 50mm', {'voxel_size': 50}),
+                         ('voxel 10mm', {'voxel_size': 10})]:
+        engine = PointcloudEngine(camera_matrix, **kwargs)
+        points, _ = engine.process(depth)
+        results.append((name, measure(lambda: engine.process(depth), args.iterations), len(points.reshape(-1, 3))))
+
+    print(f'{"mode":>28} {"ms/frame":>9} {"points":>9}')
+    for name, duration, points in results:
+        print(f'{name:>28} {duration * 1e3:>9.2f} {points:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of handing frames to another process: multiprocessing.Queue (pickled, as a QueuePacketHandler queue would
+be shared between processes) compared against SharedMemoryPublisher / SharedMemorySubscriber.
+
+Frames are published at full speed, the consumer process reads every frame and reports per-frame latency
+(publish -> frame available as numpy array in the other process).
+
+Usage:
+    python benchmarks/shared_memory_frames.py [--width 3840] [--height 2160] [--frames 200]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from depthai_sdk.oak_outputs.shared_memory import SharedMemoryPublisher, SharedMemorySubscriber
+
+
+def queue_consumer(queue, results, frames: int):
+    latencies = []
+    for _ in range(frames):
+        sent, frame = queue.get()
+        latencies.append(time.perf_counter() - sent)
+    results.put(latencies)
+
+
+def shm_consumer(name: str, results, frames: int, copy: bool):
+    latencies = []
+    with SharedMemorySubscriber(name) as sub:
+        results.put('ready')
+        while len(latencies) < frames:
+            packet = sub.next(timeout=10, copy=copy)
+            if packet is None:
+                break
+            latencies.append(time.perf_counter() - packet.timestamp.total_seconds())
+        results.put((latencies, sub.missed))
+
+
+def run_queue(frame: np.ndarray, frames: int):
+    ctx = multiprocessing.get_context('spawn')
+    queue, results = ctx.Queue(maxsize=4), ctx.Queue()
+    process = ctx.Process(target=queue_consumer, args=(queue, results, frames))
+    process.start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        queue.put((time.perf_counter(), frame))
+    latencies = results.get()
+    duration = time.perf_counter() - start
+    process.join()
+    return duration, latencies, 0
+
+
+def run_shm(frame: np.ndarray, frames: int, copy: bool):
+    ctx = multiprocessing.get_context('spawn')
+    name = f'benchmark_{os.getpid()}'
+    publisher = SharedMemoryPublisher(name, slot_size=frame.nbytes + 1024, num_slots=8)
+    results = ctx.Queue()
+    process = ctx.Process(target=shm_consumer, args=(name, results, frames, copy))
+    process.start()
+    results.get()
+    start = time.perf_counter()
+    for _ in range(frames):
+        publisher.publish({'frame': frame}, {'timestamp': time.perf_counter()})
+        time.sleep(0.001)  # Don't lap the reader, consumer on the device side runs at camera FPS
+    latencies, missed = results.get()
+    duration = time.perf_counter() - start
+    publisher.close()
+    process.join()
+    return duration, latencies, missed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    results = [('multiprocessing.Queue', *run_queue(frame, args.frames)),
+               ('shared memory, copy', *run_shm(frame, args.frames, copy=True)),
+               ('shared memory, zero-copy', *run_shm(frame, args.frames, copy=False))]
+
+    print(f'{"transport":>26} {"FPS":>8} {"median ms":>10} {"p99 ms":>8} {"missed":>7}')
+    for name, duration, latencies, missed in results:
+        latencies = np.array(latencies) * 1e3
+        print(f'{name:>26} {len(latencies) / duration:>8.1f} {np.median(latencies):>10.2f} '
+              f'{np.percentile(latencies, 99):>8.2f} {missed:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of TimestampSync, compared against the previous (linear scan + sort) implementation.
+
+Simulates N streams at 30 FPS with a bit of timestamp jitter, where every stream occasionally drops a frame.
+
+Usage:
+    python benchmarks/timestamp_sync.py [--frames 5000]
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from typing import Any, Dict
+
+from depthai_sdk.oak_outputs.syncing import TimestampSync
+
+
+class LegacyTimestampSync:
+    """
+    TimestampSync implementation prior to sorted buffers, kept here for comparison.
+    """
+
+    def __init__(self, stream_num: int, ms_threshold: int):
+        self.msgs: Dict[str, Any] = dict()
+        self.stream_num: int = stream_num
+        self.ms_threshold = ms_threshold
+
+    def sync(self, timestamp, name: str, msg):
+        if name not in self.msgs:
+            self.msgs[name] = []
+
+        self.msgs[name].append((timestamp, msg))
+
+        synced = {}
+        for name, arr in self.msgs.items():
+            diffs = []
+            for i, (msg_ts, msg) in enumerate(arr):
+                diffs.append(abs(msg_ts - timestamp))
+            if len(diffs) == 0:
+                break
+            diffs_sorted = diffs.copy()
+            diffs_sorted.sort()
+            dif = diffs_sorted[0]
+
+            if dif < timedelta(milliseconds=self.ms_threshold):
+                synced[name] = diffs.index(dif)
+
+        if len(synced) == self.stream_num:
+            for name, i in synced.items():
+                self.msgs[name] = self.msgs[name][i:]
+            ret = {}
+            for name, arr in self.msgs.items():
+                ts, synced_msg = arr.pop(0)
+                ret[name] = synced_msg
+            return ret
+        return None
+
+
+def generate_messages(stream_num: int, frames: int, fps: float = 30, drop_rate: float = 0.02, seed: int = 0):
+    rnd = random.Random(seed)
+    msgs = []
+    for i in range(frames):
+        for s in range(stream_num):
+            if rnd.random() < drop_rate:
+                continue
+            ts = timedelta(seconds=i / fps + rnd.uniform(-0.002, 0.002))
+            msgs.append((ts, f'stream_{s}', i))
+    return msgs
+
+
+def run(sync, msgs) -> (float, int):
+    synced = 0
+    start = time.perf_counter()
+    for ts, name, msg in msgs:
+        if sync.sync(ts, name, msg) is not None:
+            synced += 1
+    return time.perf_counter() - start, synced
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=5000, help='Number of frames per stream')
+    args = parser.parse_args()
+
+    print(f'{"streams":>8} {"impl":>8} {"us/msg":>8} {"synced":>8}')
+    for stream_num in [2, 4, 8]:
+        msgs = generate_messages(stream_num, args.frames)
+        for impl, sync in [('legacy', LegacyTimestampSync(stream_num, 17)),
+                           ('nearest', TimestampSync(stream_num, 17, 'nearest')),
+                           ('earliest', TimestampSync(stream_num, 17, 'earliest')),
+                           ('latest', TimestampSync(stream_num, 17, 'latest'))]:
+            duration, synced = run(sync, msgs)
+            print(f'{stream_num:>8} {impl:>8} {duration / len(msgs) * 1e6:>8.2f} {synced:>8}')
+
+
+if __name__ == '__main__':
+    main()
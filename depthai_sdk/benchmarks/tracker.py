@@ -0,0 +1,151 @@
+"""
+Benchmark of host-side tracking (Kalman filtering, speed estimation and history of XoutTracker), compared against the
+previous implementation (a KalmanFilter per tracked object, unbounded history, speed calculated over the whole
+history).
+
+Uses synthetic spatial tracklets moving at a constant velocity, with measurement noise.
+
+Usage:
+    python benchmarks/tracker.py [--tracks 10 100 500] [--frames 300]
+"""
+import argparse
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packets import TrackingDetection
+from depthai_sdk.oak_outputs.xout.xout_tracker import TrackedObjects
+from depthai_sdk.tracking import KalmanFilter
+from depthai_sdk.visualize.bbox import BoundingBox
+
+BASELINE, FOCAL = 75, 440
+
+
+class LegacyTrackedObject:
+    """
+    Previous TrackedObject implementation (spatial tracklets only).
+    """
+
+    def __init__(self):
+        self.kalman_3d = None
+        self.kalman_2d = None
+        self.previous_detections: List[TrackingDetection] = []
+
+    def new_tracklet(self, tracklet: dai.Tracklet, ts: timedelta):
+        det = TrackingDetection(img_detection=tracklet.srcImgDetection, label_str='', confidence=0,
+                                color=(255, 255, 255), bbox=BoundingBox(tracklet.srcImgDetection), angle=None,
+                                tracklet=tracklet, ts=ts, filtered_2d=self._kalman_2d(tracklet, ts),
+                                filtered_3d=self._kalman_3d(tracklet, ts), speed=None)
+        self.previous_detections.append(det)
+        det.speed = self.calc_speed(ts)
+
+    def calc_speed(self, ts: timedelta) -> float:
+        def get_coords(det):
+            return det.filtered_3d or det.tracklet.spatialCoordinates
+
+        speeds = []
+        for i in range(len(self.previous_detections) - 1):
+            d1 = self.previous_detections[i]
+            if (ts - d1.ts).total_seconds() > 1:
+                continue
+            d2 = self.previous_detections[i + 1]
+            p1, p2 = get_coords(d1), get_coords(d2)
+            distance = np.sqrt((p2.x - p1.x) ** 2 + (p2.y - p1.y) ** 2 + (p2.z - p1.z) ** 2) / 1000
+            speeds.append(distance / (d2.ts - d1.ts).total_seconds())
+        if len(speeds) == 0:
+            return 0.0
+        window = np.hanning(3)
+        window /= window.sum()
+        return np.mean(np.convolve(speeds, window, mode='same'))
+
+    def _kalman_3d(self, tracklet: dai.Tracklet, ts: timedelta):
+        c = tracklet.spatialCoordinates
+        meas = np.array([[c.x], [c.y], [c.z]])
+        if self.kalman_3d is None:
+            self.kalman_3d = KalmanFilter(10, 0.1, meas, ts)
+            return None
+        self.kalman_3d.predict((ts - self.kalman_3d.time).total_seconds())
+        self.kalman_3d.update(meas)
+        self.kalman_3d.time = ts
+        self.kalman_3d.meas_std = c.z ** 2 / (BASELINE * FOCAL)
+        x = self.kalman_3d.x
+        return dai.Point3f(x[0, 0], x[1, 0], x[2, 0])
+
+    def _kalman_2d(self, tracklet: dai.Tracklet, ts: timedelta):
+        bb = BoundingBox(tracklet.srcImgDetection)
+        x_mid, y_mid = bb.get_centroid().to_tuple()
+        meas = np.array([[x_mid], [y_mid], [bb.width], [bb.height]])
+        if self.kalman_2d is None:
+            self.kalman_2d = KalmanFilter(10, 0.1, meas, ts)
+            return None
+        self.kalman_2d.predict((ts - self.kalman_2d.time).total_seconds())
+        self.kalman_2d.update(meas)
+        self.kalman_2d.time = ts
+        x = self.kalman_2d.x
+        return BoundingBox([x[0][0] - x[2][0] / 2, x[1][0] - x[3][0] / 2,
+                            x[0][0] + x[2][0] / 2, x[1][0] + x[3][0] / 2])
+
+
+def create_frames(n_tracks: int, n_frames: int, fps: int = 30) -> List[List[dai.Tracklet]]:
+    rnd = np.random.default_rng(0)
+    pos = rnd.uniform([-1000, -1000, 1000], [1000, 1000, 5000], (n_tracks, 3))
+    vel = rnd.normal(0, 500, (n_tracks, 3)) / fps
+    frames = []
+    for f in range(n_frames):
+        tracklets = []
+        for i, (p, c) in enumerate(zip(pos + vel * f + rnd.normal(0, 10, (n_tracks, 3)), rnd.random(n_tracks))):
+            det = dai.ImgDetection()
+            det.xmin, det.ymin = c * 0.8, c * 0.7
+            det.xmax, det.ymax = det.xmin + 0.1, det.ymin + 0.2
+            t = dai.Tracklet()
+            t.id = i
+            t.status = dai.Tracklet.TrackingStatus.TRACKED
+            t.srcImgDetection = det
+            t.spatialCoordinates = dai.Point3f(*p)
+            tracklets.append(t)
+        frames.append(tracklets)
+    return frames
+
+
+def run_legacy(frames: List[List[dai.Tracklet]], fps: int = 30) -> float:
+    objects: Dict[int, LegacyTrackedObject] = {}
+    start = time.perf_counter()
+    for f, tracklets in enumerate(frames):
+        ts = timedelta(seconds=f / fps)
+        for t in tracklets:
+            objects.setdefault(t.id, LegacyTrackedObject()).new_tracklet(t, ts)
+        packet = {obj_id: list(obj.previous_detections) for obj_id, obj in objects.items()}
+    return (time.perf_counter() - start) / len(frames)
+
+
+def run_batched(frames: List[List[dai.Tracklet]], history_length: int, fps: int = 30) -> float:
+    tracker = TrackedObjects(BASELINE, FOCAL, apply_kalman=True, calculate_speed=True,
+                             history_length=history_length)
+    start = time.perf_counter()
+    for f, tracklets in enumerate(frames):
+        tracker.update(tracklets, timedelta(seconds=f / fps))
+        packet = {obj_id: list(obj.previous_detections) for obj_id, obj in tracker.objects.items()}
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tracks', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--history', type=int, default=100, help='History length of the batched tracker')
+    parser.add_argument('--skip-legacy', action='store_true', help='Legacy tracker is slow with many tracks')
+    args = parser.parse_args()
+
+    print(f'{"tracks":>7} {"legacy ms/frame":>16} {"batched ms/frame":>17}')
+    for n in args.tracks:
+        frames = create_frames(n, args.frames)
+        legacy = float('nan') if args.skip_legacy else run_legacy(frames) * 1e3
+        batched = run_batched(frames, args.history) * 1e3
+        print(f'{n:>7} {legacy:>16.2f} {batched:>17.2f}')
+
+
+if __name__ == '__main__':
+    main()
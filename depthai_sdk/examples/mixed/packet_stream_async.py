@@ -0,0 +1,40 @@
+import asyncio
+
+from depthai_sdk import OakCamera
+from depthai_sdk.classes.packets import DetectionPacket, FramePacket
+
+
+async def print_detections(stream):
+    async for packet in stream:  # Ends when the OakCamera gets closed
+        packet: DetectionPacket
+        labels = [det.label_str for det in packet.detections]
+        print(f'{packet.get_timestamp()}: {labels}')
+
+
+async def print_fps(stream):
+    frames, start = 0, asyncio.get_running_loop().time()
+    async for packet in stream:
+        packet: FramePacket
+        frames += 1
+        if frames % 30 == 0:
+            print(f'Color FPS: {frames / (asyncio.get_running_loop().time() - start):.1f}')
+
+
+async def main():
+    async with OakCamera() as oak:
+        color = oak.create_camera('color')
+        nn = oak.create_nn('mobilenet-ssd', color)
+
+        # Only the latest detections are kept if the consumer falls behind
+        detections = oak.stream(nn, max_size=1)
+        frames = oak.stream(color, max_size=4)
+
+        await oak.astart()  # Uploads the pipeline without blocking the event loop
+        await asyncio.wait_for(asyncio.gather(print_detections(detections), print_fps(frames)), timeout=30)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except asyncio.TimeoutError:
+        pass
@@ -0,0 +1,9 @@
+from depthai_sdk import OakCamera
+
+with OakCamera() as oak:
+    color = oak.create_camera('color', resolution='1080p', encode='h264', fps=30)
+    color.config_encoder_h26x(keyframe_freq=30)  # New clients start playing on the next keyframe
+
+    # Play it with eg. `ffplay rtsp://localhost:8554/color` or VLC
+    oak.stream_rtsp(color.out.encoded.set_name('color'), port=8554)
+    oak.start(blocking=True)
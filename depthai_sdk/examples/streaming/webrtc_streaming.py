@@ -0,0 +1,10 @@
+from depthai_sdk import OakCamera
+
+with OakCamera() as oak:
+    color = oak.create_camera('color', resolution='1080p', encode='h264', fps=30)
+    color.config_encoder_h26x(keyframe_freq=30)  # New (or congested) peers continue on the next keyframe
+    nn = oak.create_nn('mobilenet-ssd', color)
+
+    # Open http://localhost:8080/ in a browser, detections are drawn on top of the video
+    oak.stream_webrtc(color.out.encoded.set_name('color'), overlays=nn.out.main, port=8080)
+    oak.start(blocking=True)
@@ -34,6 +34,7 @@ setup(
                    'mcap-ros1-support==0.0.8',
                    'rosbags==0.9.11'],
         "record": ['av'],
+        "webrtc": ['aiortc'],
         "test": ['pytest']
     },
     project_urls={
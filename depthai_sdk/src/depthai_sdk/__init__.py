@@ -1,5 +1,5 @@
 from depthai_sdk.args_parser import ArgsParser
-from depthai_sdk.classes.enum import ResizeMode
+from depthai_sdk.classes.enum import BackpressurePolicy, PointcloudEncoding, ResizeMode, SyncPolicy
 from depthai_sdk.constants import CV2_HAS_GUI_SUPPORT
 from depthai_sdk.logger import set_logging_level
 from depthai_sdk.oak_camera import OakCamera
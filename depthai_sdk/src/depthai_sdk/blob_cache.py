@@ -0,0 +1,359 @@
+"""
+Local, content-addressed cache of compiled MyriadX blobs, so models can be resolved without network access
+(eg. on air-gapped devices, after the cache was pre-populated with `depthai_sdk blobs prefetch` or
+`depthai_sdk blobs import`).
+
+Blobs are stored as `<sha256>.blob` files and looked up through an on-disk index (`index.json`), keyed by model
+name, OpenVINO version and number of shaves. The index also stores hash and size of each blob, which are verified
+before a cached blob is used, and time of the last use, used to evict the least recently used blobs once the cache
+exceeds its size limit. Blobs are compiled with the input shape of the model, so the shape isn't part of the key -
+OpenVINO IR is keyed by the hash of its files.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import depthai as dai
+
+from depthai_sdk.logger import LOGGER
+
+__all__ = ['BlobCache', 'get_blob_cache', 'from_zoo', 'from_openvino', 'from_model_config', 'DEFAULT_OPENVINO_VERSION']
+
+# Version used by blobconverter when none is specified. Pinned, so cache keys don't depend on blobconverter version
+DEFAULT_OPENVINO_VERSION = '2022.1'
+DEFAULT_CACHE_DIR = Path.home() / '.depthai_sdk' / 'blobs'
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3  # 2 GB
+
+_INDEX_FILE = 'index.json'
+
+
+def normalize_version(version: Union[None, str, dai.OpenVINO.Version]) -> str:
+    """
+    Converts OpenVINO version (eg. `dai.OpenVINO.Version.VERSION_2021_4`, 'VERSION_2021_4', '2021_4') into the
+    format used by blobconverter ('2021.4').
+    """
+    if version is None:
+        return DEFAULT_OPENVINO_VERSION
+    if isinstance(version, dai.OpenVINO.Version):
+        version = version.name
+    version = str(version)
+    if version.startswith('VERSION_'):
+        version = version[8:]
+    if '_' in version:
+        vals = version.split('_')
+        version = f'{vals[0]}.{vals[1]}'
+    return version
+
+
+def hash_files(*paths: Union[str, Path]) -> str:
+    """
+    Returns sha256 of the content of all files (eg. OpenVINO IR), to be used as part of the model name.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobCache:
+    """
+    Content-addressed cache of compiled blobs with an on-disk index and LRU eviction. Safe to use from multiple
+    threads; the index is written atomically, so concurrent processes can't corrupt it (but may lose each other's
+    last-use updates).
+    """
+
+    def __init__(self, path: Union[None, str, Path] = None, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Args:
+            path: Cache directory. Defaults to `DEPTHAI_SDK_BLOB_CACHE` environment variable, or ~/.depthai_sdk/blobs.
+            max_size: Max total size of cached blobs in bytes, least recently used blobs are evicted above it.
+        """
+        if path is None:
+            path = os.environ.get('DEPTHAI_SDK_BLOB_CACHE', DEFAULT_CACHE_DIR)
+        self.path = Path(path)
+        self.max_size = max_size
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(name: str,
+            version: Union[None, str, dai.OpenVINO.Version] = None,
+            shaves: Optional[int] = None) -> str:
+        version = normalize_version(version) if version is not None else '-'
+        return f'{name}|{version}|{shaves if shaves is not None else "-"}'
+
+    def get(self,
+            name: str,
+            version: Union[None, str, dai.OpenVINO.Version] = None,
+            shaves: Optional[int] = None) -> Optional[Path]:
+        """
+        Returns path to the cached blob, or None if it's not cached (or the cached file is corrupted).
+        Version and shaves can be None for blobs that aren't compiled by blobconverter (eg. downloaded from url).
+        """
+        key = self.key(name, version, shaves)
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+
+            blob_path = self.path / entry['file']
+            if not self._verify(blob_path, entry):
+                LOGGER.warning(f'Cached blob for {name} is corrupted, removing it from the cache.')
+                index.pop(key)
+                self._remove_unreferenced(index, entry['file'])
+                self._write_index(index)
+                return None
+
+            entry['last_used'] = time.time()
+            self._write_index(index)
+            return blob_path
+
+    def put(self,
+            blob: Union[str, Path],
+            name: str,
+            version: Union[None, str, dai.OpenVINO.Version] = None,
+            shaves: Optional[int] = None) -> Path:
+        """
+        Copies the blob into the cache and returns the path of the cached copy.
+        """
+        sha256 = hash_files(blob)
+        file_name = f'{sha256}.blob'
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            blob_path = self.path / file_name
+            if not blob_path.exists():
+                # Copy to a temporary file first, so a partially written blob is never visible under its hash
+                fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+                os.close(fd)
+                shutil.copyfile(blob, tmp)
+                os.replace(tmp, blob_path)
+
+            index = self._read_index()
+            now = time.time()
+            index[self.key(name, version, shaves)] = {
+                'file': file_name,
+                'sha256': sha256,
+                'size': blob_path.stat().st_size,
+                'name': name,
+                'version': normalize_version(version) if version is not None else None,
+                'shaves': shaves,
+                'created': now,
+                'last_used': now,
+            }
+            self._evict(index, keep=file_name)
+            self._write_index(index)
+            return blob_path
+
+    def resolve(self,
+                fetch: Callable[[], Union[str, Path]],
+                name: str,
+                version: Union[None, str, dai.OpenVINO.Version] = None,
+                shaves: Optional[int] = None) -> Path:
+        """
+        Returns the cached blob, or calls `fetch()` (eg. blobconverter download) and caches its result.
+        """
+        cached = self.get(name, version, shaves)
+        if cached is not None:
+            LOGGER.debug(f'Using cached blob {cached} for {name}')
+            return cached
+        return self.put(fetch(), name, version, shaves)
+
+    def entries(self) -> Dict[str, Dict]:
+        """
+        Returns the index: {key: entry}.
+        """
+        with self._lock:
+            return self._read_index()
+
+    def size(self) -> int:
+        """
+        Returns total size of cached blobs in bytes.
+        """
+        files = {e['file']: e['size'] for e in self.entries().values()}
+        return sum(files.values())
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            index = self._read_index()
+            entry = index.pop(key, None)
+            if entry is None:
+                return False
+            self._remove_unreferenced(index, entry['file'])
+            self._write_index(index)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._read_index()):
+                self.remove(key)
+
+    def export(self, archive: Union[str, Path]) -> int:
+        """
+        Writes all cached blobs and their index into a tar archive, which can be imported into a cache on another
+        machine. Returns number of exported entries.
+        """
+        with self._lock:
+            index = self._read_index()
+            with tarfile.open(archive, 'w') as tar:
+                for file_name in sorted({e['file'] for e in index.values()}):
+                    tar.add(self.path / file_name, arcname=file_name)
+                data = json.dumps(index, indent=2).encode()
+                info = tarfile.TarInfo(_INDEX_FILE)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+            return len(index)
+
+    def import_(self, archive: Union[str, Path]) -> int:
+        """
+        Imports blobs exported with export(). Blobs whose hash doesn't match the index are skipped.
+        Returns number of imported entries.
+        """
+        imported = 0
+        with tempfile.TemporaryDirectory() as tmp, tarfile.open(archive, 'r') as tar:
+            tmp = Path(tmp)
+            members = [m for m in tar.getmembers() if m.isfile() and '/' not in m.name and '..' not in m.name]
+            for member in members:
+                tar.extract(member, tmp)
+
+            index = json.loads((tmp / _INDEX_FILE).read_text())
+            for key, entry in index.items():
+                blob = tmp / entry['file']
+                if not self._verify(blob, entry):
+                    LOGGER.warning(f'Skipping {entry["name"]}, blob in the archive is missing or corrupted.')
+                    continue
+                self.put(blob, entry['name'], entry['version'], entry['shaves'])
+                imported += 1
+        return imported
+
+    @staticmethod
+    def _verify(blob_path: Path, entry: Dict) -> bool:
+        try:
+            if blob_path.stat().st_size != entry['size']:
+                return False
+        except OSError:
+            return False
+        return hash_files(blob_path) == entry['sha256']
+
+    def _evict(self, index: Dict[str, Dict], keep: str) -> None:
+        """
+        Removes least recently used blobs until the cache fits into max_size. Blob `keep` is never evicted.
+        """
+        files: Dict[str, Tuple[float, int]] = {}
+        for entry in index.values():
+            last_used, _ = files.get(entry['file'], (0, 0))
+            files[entry['file']] = (max(last_used, entry['last_used']), entry['size'])
+
+        total = sum(size for _, size in files.values())
+        for file_name, (_, size) in sorted(files.items(), key=lambda f: f[1][0]):
+            if total <= self.max_size:
+                break
+            if file_name == keep:
+                continue
+            for key in [k for k, e in index.items() if e['file'] == file_name]:
+                LOGGER.debug(f'Evicting {key} from the blob cache')
+                index.pop(key)
+            self._unlink(self.path / file_name)
+            total -= size
+
+    def _remove_unreferenced(self, index: Dict[str, Dict], file_name: str) -> None:
+        if all(e['file'] != file_name for e in index.values()):
+            self._unlink(self.path / file_name)
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            return json.loads((self.path / _INDEX_FILE).read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            LOGGER.warning(f'Blob cache index {self.path / _INDEX_FILE} is corrupted, starting with an empty cache.')
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.path / _INDEX_FILE)
+
+
+_default_cache: Optional[BlobCache] = None
+
+
+def get_blob_cache() -> BlobCache:
+    """
+    Returns the cache used by NNComponent and BlobManager.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BlobCache()
+    return _default_cache
+
+
+def from_zoo(name: str,
+             shaves: int = 6,
+             version: Union[None, str, dai.OpenVINO.Version] = None,
+             zoo_type: str = 'intel',
+             cache: Optional[BlobCache] = None) -> Path:
+    """
+    Returns blob of a model from the OpenVINO/DepthAI model zoo, downloading it with blobconverter only if
+    it isn't cached.
+    """
+    import blobconverter
+    version = normalize_version(version)
+    cache = cache or get_blob_cache()
+    cache_name = name if zoo_type == 'intel' else f'{zoo_type}/{name}'
+    return cache.resolve(lambda: blobconverter.from_zoo(name, zoo_type=zoo_type, shaves=shaves, version=version),
+                         cache_name, version, shaves)
+
+
+def from_openvino(xml: Union[str, Path],
+                  bin: Union[str, Path],
+                  shaves: int = 6,
+                  version: Union[None, str, dai.OpenVINO.Version] = None,
+                  data_type: str = 'FP16',
+                  cache: Optional[BlobCache] = None) -> Path:
+    """
+    Returns blob compiled from OpenVINO IR, compiling it with blobconverter only if it isn't cached. Cache key
+    includes hash of the IR, so changed models get recompiled.
+    """
+    import blobconverter
+    version = normalize_version(version)
+    cache = cache or get_blob_cache()
+    name = f'{Path(xml).stem}-{hash_files(xml, bin)[:16]}-{data_type}'
+    return cache.resolve(lambda: blobconverter.from_openvino(xml=str(xml), bin=str(bin), data_type=data_type,
+                                                             shaves=shaves, version=version),
+                         name, version, shaves)
+
+
+def from_model_config(model: Dict[str, Any],
+                      version: Union[None, str, dai.OpenVINO.Version] = None,
+                      cache: Optional[BlobCache] = None) -> Path:
+    """
+    Returns blob for the `model` section of the SDK model config (zoo model, or OpenVINO IR).
+    Number of shaves can be set with `shaves` inside the section, defaults to 6.
+    """
+    shaves = int(model.get('shaves', 6))
+    if 'model_name' in model:
+        return from_zoo(model['model_name'], shaves=shaves, version=version, zoo_type=model.get('zoo', 'intel'),
+                        cache=cache)
+    if 'xml' in model and 'bin' in model:
+        return from_openvino(model['xml'], model['bin'], shaves=shaves, version=version, cache=cache)
+    raise ValueError("Specified `model` values in json config files are incorrect!")
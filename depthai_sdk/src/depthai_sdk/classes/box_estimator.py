@@ -1,21 +1,23 @@
 import numpy as np
 import cv2
-import random
-from typing import Tuple
+from typing import Tuple, Union
 import open3d as o3d
 import json
+from depthai_sdk.classes.ransac import PlaneRansac
 from depthai_sdk.logger import LOGGER
 
 N_POINTS_SAMPLED_PLANE = 3
 MAX_ITER_PLANE = 300
 
 class BoxEstimator:
-    def __init__(self, median_window=3, calib_json_path: str = None, threshold=50):
+    def __init__(self, median_window=3, calib_json_path: str = None, threshold=50,
+                 seed: Union[None, int, np.random.Generator] = None):
         """
         Box estimator helper class. Currently it's applicable for scanning only one box at a time.
 
         Args:
             threshold (int, optional): Distance threshold for plane fitting. Defaults to 50 mm.
+            seed (int, optional): Seed for RANSAC sampling, for deterministic results.
         """
         self.top_side_pcl = None
 
@@ -39,6 +41,7 @@ class BoxEstimator:
         self.box_pcd = o3d.geometry.PointCloud()
 
         self.corners = None
+        self.rng = np.random.default_rng(seed)
 
         # Try to find plane_eq.json file (where user executed script)
         if calib_json_path is None:
@@ -266,21 +269,12 @@ class BoxEstimator:
         return box_points
 
     def fit_plane_vec_constraint(self, norm_vec, pts, thresh=0.05, n_iterations=300):
-        best_eq = []
-        best_inliers = []
-
-        n_points = pts.shape[0]
-        for _ in range(n_iterations):
-            id_sample = random.sample(range(0, n_points), 1)
-            point = pts[id_sample]
-            d = -np.sum(np.multiply(norm_vec, point))
-            plane_eq = [*norm_vec, d]
-            pt_id_inliers = self.get_plane_inliers(plane_eq, pts, thresh)
-            if len(pt_id_inliers) > len(best_inliers):
-                best_eq = plane_eq
-                best_inliers = pt_id_inliers
-
-        return best_eq, best_inliers
+        """
+        Fits a plane with the normal `norm_vec` to the points with RANSAC. Stops before `n_iterations`
+        once the best plane was found with 99.9% confidence.
+        """
+        ransac = PlaneRansac(thresh, n_iterations, normal=norm_vec, seed=self.rng)
+        return ransac.fit(pts)
 
     def get_plane_inliers(self, plane_eq, pts, thresh=0.05):
         dist_pt = self.get_pts_distances_plane(plane_eq, pts)
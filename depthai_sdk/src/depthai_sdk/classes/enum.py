@@ -31,3 +31,76 @@ class ResizeMode(IntEnum):
         else:
             raise ValueError(f"Unknown resize mode {mode}! 'Options (case insensitive):" \
                              "STRETCH, CROP, LETTERBOX. Using default LETTERBOX mode.")
+
+
+class SyncPolicy(IntEnum):
+    """
+    Policy used by TimestampSync to select which buffered message of each stream gets matched to the
+    newest message, when multiple buffered messages are within the sync threshold.
+    """
+    NEAREST = 0  # Message with the timestamp closest to the newest message
+    EARLIEST = 1  # Oldest message within the threshold, minimizes number of discarded messages
+    LATEST = 2  # Newest message within the threshold, minimizes latency
+
+    @staticmethod
+    def parse(policy: Union[str, 'SyncPolicy']) -> 'SyncPolicy':
+        if isinstance(policy, SyncPolicy):
+            return policy
+
+        policy = policy.lower()
+        if policy == "nearest":
+            return SyncPolicy.NEAREST
+        elif policy == "earliest":
+            return SyncPolicy.EARLIEST
+        elif policy == "latest":
+            return SyncPolicy.LATEST
+        else:
+            raise ValueError(f"Unknown sync policy {policy}! Options (case insensitive): "
+                             "NEAREST, EARLIEST, LATEST.")
+
+
+class BackpressurePolicy(IntEnum):
+    """
+    What to do with a new message when a bounded queue (eg. recording queue of a stream) is full.
+    """
+    BLOCK = 0  # Wait until there's space in the queue. Nothing gets lost, but the producer (callback thread) stalls
+    DROP_OLDEST = 1  # Discard the oldest queued message, minimizes latency
+    DROP_NEWEST = 2  # Discard the new message
+
+    @staticmethod
+    def parse(policy: Union[str, 'BackpressurePolicy']) -> 'BackpressurePolicy':
+        if isinstance(policy, BackpressurePolicy):
+            return policy
+
+        policy = policy.lower()
+        if policy == "block":
+            return BackpressurePolicy.BLOCK
+        elif policy == "drop_oldest":
+            return BackpressurePolicy.DROP_OLDEST
+        elif policy == "drop_newest":
+            return BackpressurePolicy.DROP_NEWEST
+        else:
+            raise ValueError(f"Unknown backpressure policy {policy}! Options (case insensitive): "
+                             "BLOCK, DROP_OLDEST, DROP_NEWEST.")
+
+
+class PointcloudEncoding(IntEnum):
+    """
+    How point coordinates are stored in recorded point clouds (PointCloud2 messages).
+    """
+    FLOAT32 = 0  # float32 meters, standard layout which ROS tools (RViz, Foxglove Studio) display as-is
+    INT16 = 1  # int16 millimeters (+-32.7 m), half the size of FLOAT32 with 1 mm precision
+
+    @staticmethod
+    def parse(encoding: Union[str, 'PointcloudEncoding']) -> 'PointcloudEncoding':
+        if isinstance(encoding, PointcloudEncoding):
+            return encoding
+
+        encoding = encoding.lower()
+        if encoding == "float32":
+            return PointcloudEncoding.FLOAT32
+        elif encoding == "int16":
+            return PointcloudEncoding.INT16
+        else:
+            raise ValueError(f"Unknown pointcloud encoding {encoding}! Options (case insensitive): "
+                             "FLOAT32, INT16.")
@@ -0,0 +1,298 @@
+"""
+Synchronization of IMU samples with frames (or with each other), eg. accelerometer values at the gyroscope timestamps,
+or IMU state at the timestamp of a frame.
+
+Samples of each IMU report (accelerometer, gyroscope, rotation vector) are kept in time-ordered ring buffers of fixed
+capacity. Lookups are binary searches, and all requested timestamps are interpolated at once: accelerometer and
+gyroscope linearly, rotation with spherical linear interpolation (slerp).
+"""
+import threading
+from datetime import timedelta
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+import depthai as dai
+import numpy as np
+
+__all__ = ['ImuBuffer', 'ImuSamples', 'ImuSeries', 'slerp']
+
+Timestamps = Union[float, timedelta, Iterable[float], Iterable[timedelta], np.ndarray]
+
+
+def _seconds(timestamps: Timestamps) -> np.ndarray:
+    """
+    Returns timestamps (float seconds, timedelta, or sequence of either) as 1D float64 array of seconds.
+    """
+    if isinstance(timestamps, timedelta):
+        return np.array([timestamps.total_seconds()])
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype(np.float64, copy=False).reshape(-1)
+    if isinstance(timestamps, (int, float)):
+        return np.array([timestamps], dtype=np.float64)
+    return np.array([t.total_seconds() if isinstance(t, timedelta) else t for t in timestamps], dtype=np.float64)
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """
+    Spherical linear interpolation between unit quaternions, row by row.
+
+    Args:
+        q0: N x 4 quaternions at t = 0.
+        q1: N x 4 quaternions at t = 1.
+        t: N interpolation factors.
+
+    Returns:
+        N x 4 unit quaternions, component order of the inputs.
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[:, None]
+
+    dot = np.sum(q0 * q1, axis=1, keepdims=True)
+    # q and -q are the same rotation, interpolate along the shorter arc
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.abs(dot)
+
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    close = sin_theta < 1e-6  # Nearly identical rotations, fall back to linear interpolation
+    safe_sin = np.where(close, 1.0, sin_theta)
+    w0 = np.where(close, 1.0 - t, np.sin((1.0 - t) * theta) / safe_sin)
+    w1 = np.where(close, t, np.sin(t * theta) / safe_sin)
+
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+class ImuSeries:
+    """
+    Ring buffer of timestamped samples of a single IMU report. Samples are stored twice (at index i and
+    i + capacity), so the buffered window is always a contiguous, time-sorted view, searchable without copying.
+    """
+
+    def __init__(self, capacity: int, width: int, rotation: bool = False):
+        """
+        Args:
+            capacity: Max number of buffered samples, older samples are overwritten.
+            width: Number of values of each sample (3 for vectors, 4 for quaternions).
+            rotation: Values are quaternions, interpolated with slerp instead of linearly.
+        """
+        if capacity < 2:
+            raise ValueError('Capacity of IMU buffer must be at least 2 samples')
+        self.capacity = capacity
+        self.rotation = rotation
+        self._timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros((2 * capacity, width), dtype=np.float64)
+        self._start = 0  # Index of the oldest sample
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        Timestamps (seconds) of buffered samples, oldest first. Read-only view.
+        """
+        view = self._timestamps[self._start:self._start + self._count]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Buffered samples, oldest first. Read-only view.
+        """
+        view = self._values[self._start:self._start + self._count]
+        view.flags.writeable = False
+        return view
+
+    def clear(self) -> None:
+        self._start = 0
+        self._count = 0
+
+    def extend(self, timestamps: Timestamps, values: np.ndarray) -> int:
+        """
+        Appends samples. Samples that aren't newer than the last buffered sample (eg. repeated reports) are skipped.
+
+        Returns:
+            Number of appended samples.
+        """
+        timestamps = _seconds(timestamps)
+        values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), -1)
+        if self._count:
+            newer = timestamps > self._timestamps[self._start + self._count - 1]
+            timestamps, values = timestamps[newer], values[newer]
+        if len(timestamps) > 1:
+            increasing = np.concatenate([[True], np.maximum.accumulate(timestamps)[:-1] < timestamps[1:]])
+            timestamps, values = timestamps[increasing], values[increasing]
+        if len(timestamps) > self.capacity:
+            timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+
+        n = len(timestamps)
+        if n == 0:
+            return 0
+        end = (self._start + self._count) % self.capacity
+        idx = (end + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self._timestamps[idx + offset] = timestamps
+            self._values[idx + offset] = values
+
+        overflow = max(0, self._count + n - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+        return n
+
+    def interpolate(self, timestamps: Timestamps) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolates samples at timestamps (any order). Timestamps outside the buffered window get the oldest/newest
+        sample.
+
+        Returns:
+            Interpolated values (N x width) and mask of timestamps within the buffered window.
+        """
+        timestamps = _seconds(timestamps)
+        buffered_t = self.timestamps
+        buffered = self.values
+        if self._count == 0:
+            return np.full((len(timestamps), buffered.shape[1]), np.nan), np.zeros(len(timestamps), dtype=bool)
+
+        valid = (buffered_t[0] <= timestamps) & (timestamps <= buffered_t[-1])
+        if self._count == 1:
+            return np.repeat(buffered, len(timestamps), axis=0), valid
+
+        # Index of the sample after each timestamp, O(log n)
+        right = np.clip(np.searchsorted(buffered_t, timestamps, side='right'), 1, self._count - 1)
+        left = right - 1
+        t0, t1 = buffered_t[left], buffered_t[right]
+        alpha = np.clip((timestamps - t0) / (t1 - t0), 0.0, 1.0)
+
+        if self.rotation:
+            return slerp(buffered[left], buffered[right], alpha), valid
+        return buffered[left] + (buffered[right] - buffered[left]) * alpha[:, None], valid
+
+    def between(self, start: Union[float, timedelta], end: Union[float, timedelta]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns buffered samples with timestamps in (start, end], eg. samples between two consecutive frames.
+
+        Returns:
+            Timestamps and values (copies).
+        """
+        buffered_t = self.timestamps
+        lo, hi = np.searchsorted(buffered_t, _seconds([start, end]), side='right')
+        return buffered_t[lo:hi].copy(), self.values[lo:hi].copy()
+
+
+class ImuSamples(NamedTuple):
+    """
+    IMU state interpolated at requested timestamps. Values of reports that weren't received are NaN.
+    """
+    timestamps: np.ndarray  # N, seconds
+    accelerometer: np.ndarray  # N x 3, m/s^2
+    gyroscope: np.ndarray  # N x 3, rad/s
+    rotation: np.ndarray  # N x 4, quaternion (w, x, y, z)
+    valid: np.ndarray  # N, all received reports are within the buffered window (interpolated, not extrapolated)
+
+
+class ImuBuffer:
+    """
+    Buffers IMU packets and returns IMU state aligned to arbitrary timestamps, eg. of frames:
+
+    .. code-block:: python
+
+        imu_buffer = ImuBuffer()
+        oak.callback(imu.out.main, callback=imu_buffer.add)
+
+        def callback(packet: FramePacket):
+            samples = imu_buffer.at(packet.get_timestamp())
+
+    Timestamps are device timestamps (`getTimestampDevice()`), the same clock as `FramePacket.get_timestamp()`.
+    Adding and querying is thread-safe.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity: Max number of buffered samples of each report, eg. 1000 samples is 2.5 seconds at 400 Hz.
+        """
+        self.accelerometer = ImuSeries(capacity, 3)
+        self.gyroscope = ImuSeries(capacity, 3)
+        self.rotation = ImuSeries(capacity, 4, rotation=True)
+        self._lock = threading.Lock()
+
+    def add(self, packet) -> None:
+        """
+        Adds IMU packet(s): `IMUPacket` (SDK), `dai.IMUPacket`, `dai.IMUData`, or a list of packets.
+        """
+        if isinstance(packet, dai.IMUData):
+            packets = packet.packets
+        elif isinstance(packet, (list, tuple)):
+            packets = packet
+        else:
+            packets = [packet]
+
+        accel, gyro, rotation = [], [], []
+        for p in packets:
+            report = p.acceleroMeter
+            if report.getTimestampDevice() != timedelta(0):
+                accel.append((report.getTimestampDevice().total_seconds(), report.x, report.y, report.z))
+            report = p.gyroscope
+            if report.getTimestampDevice() != timedelta(0):
+                gyro.append((report.getTimestampDevice().total_seconds(), report.x, report.y, report.z))
+            report = p.rotationVector
+            ts = report.getTimestampDevice()
+            if ts == timedelta(0) and 'IMUReportRotationVectorWAcc' in getattr(p, 'available_reports', {}):
+                ts = p.get_timestamp()  # Rotation computed on the host (XoutIMU), timestamp of the packet
+            if ts != timedelta(0):
+                rotation.append((ts.total_seconds(), report.real, report.i, report.j, report.k))
+
+        with self._lock:
+            for series, samples in ((self.accelerometer, accel), (self.gyroscope, gyro), (self.rotation, rotation)):
+                if samples:
+                    samples = np.array(samples, dtype=np.float64)
+                    series.extend(samples[:, 0], samples[:, 1:])
+
+    def interpolate(self, timestamps: Timestamps) -> ImuSamples:
+        """
+        Returns IMU state at timestamps (seconds or timedelta, any order).
+        """
+        timestamps = _seconds(timestamps)
+        valid = np.ones(len(timestamps), dtype=bool)
+        values = []
+        with self._lock:
+            for series in (self.accelerometer, self.gyroscope, self.rotation):
+                series_values, series_valid = series.interpolate(timestamps)
+                values.append(series_values)
+                if len(series):
+                    valid &= series_valid
+        return ImuSamples(timestamps, *values, valid=valid)
+
+    def at(self, timestamp: Union[float, timedelta]) -> ImuSamples:
+        """
+        Returns IMU state at a single timestamp (eg. of a frame), arrays of length 1.
+        """
+        return self.interpolate(timestamp)
+
+    def between(self,
+                start: Union[float, timedelta],
+                end: Union[float, timedelta],
+                report: str = 'gyroscope') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns received samples of a report ('accelerometer', 'gyroscope' or 'rotation') with timestamps
+        in (start, end], eg. samples between two consecutive frames.
+        """
+        with self._lock:
+            return getattr(self, report).between(start, end)
+
+    def latest_timestamp(self) -> Optional[float]:
+        """
+        Returns timestamp (seconds) until which all received reports are buffered, or None if nothing was received.
+        """
+        with self._lock:
+            latest = [series.timestamps[-1] for series in (self.accelerometer, self.gyroscope, self.rotation)
+                      if len(series)]
+        return min(latest) if latest else None
+
+    def clear(self) -> None:
+        with self._lock:
+            for series in (self.accelerometer, self.gyroscope, self.rotation):
+                series.clear()
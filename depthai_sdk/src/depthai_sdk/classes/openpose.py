@@ -0,0 +1,206 @@
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class OpenPoseDecoder:
+    """
+    Decodes OpenPose outputs (keypoint heatmaps followed by part affinity fields) into keypoints and people.
+    Decoding is vectorized with NumPy/OpenCV:
+
+    - keypoints are peaks of the smoothed heatmaps (local maxima of a fixed-size max filter) above the threshold,
+    - all keypoint pairs of a limb are scored at once, by sampling PAFs along the lines between them,
+    - people are assembled limb by limb, matching all pairs of a limb to the already assembled people at once.
+
+    Output has the same format as the previous (loop-based) decoding of the openpose handlers.
+    """
+
+    def __init__(self,
+                 pose_pairs: Sequence[Sequence[int]],
+                 paf_indices: Sequence[Sequence[int]],
+                 input_size: Tuple[int, int],
+                 threshold: float = 0.3,
+                 peak_window: int = 3,
+                 interp_samples: int = 10,
+                 paf_score_threshold: float = 0.2,
+                 conf_threshold: float = 0.4):
+        """
+        Args:
+            pose_pairs: Keypoint indices of each limb.
+            paf_indices: Output channels of the PAF (x, y) of each limb.
+            input_size: NN input size (width, height). Keypoints are returned in these coordinates.
+            threshold: Min keypoint confidence.
+            peak_window: Size (in heatmap cells) of the max filter used for peak detection.
+            interp_samples: Number of PAF samples along each limb.
+            paf_score_threshold: Min PAF score of a sample.
+            conf_threshold: Min ratio of samples above paf_score_threshold for a valid limb.
+        """
+        self.pose_pairs = np.array(pose_pairs)
+        self.paf_indices = np.array(paf_indices)
+        self.input_size = tuple(input_size)
+        self.threshold = threshold
+        self.interp_samples = interp_samples
+        self.paf_score_threshold = paf_score_threshold
+        self.conf_threshold = conf_threshold
+
+        self.n_points = int(self.pose_pairs.max()) + 1
+        self._samples = np.arange(interp_samples) / (interp_samples - 1)  # Same as np.linspace(0, 1)
+        self._kernel = np.ones((peak_window, peak_window), dtype=np.uint8)
+
+    def decode(self, outputs: np.ndarray) -> Tuple[List[List[tuple]], np.ndarray, np.ndarray]:
+        """
+        Args:
+            outputs: NN output (1 x C x H x W), heatmaps of the keypoints followed by PAFs.
+
+        Returns:
+            Detected keypoints of each keypoint type ([(x, y, confidence, id)]), keypoints of each person
+            (P x (n_points + 1) array of keypoint ids, -1 if missing, the last column is the score of the person),
+            and all keypoints (N x 3 array of x, y, confidence, indexed by id).
+        """
+        keypoints, parts = self.get_keypoints(outputs)
+        valid_pairs, invalid_pairs = self.get_valid_pairs(outputs, keypoints, parts)
+        personwise_keypoints = self.get_personwise_keypoints(valid_pairs, invalid_pairs, keypoints)
+
+        rows = list(zip(keypoints[:, 0].astype(int).tolist(), keypoints[:, 1].astype(int).tolist(),
+                        keypoints[:, 2].tolist(), range(len(keypoints))))
+        bounds = np.searchsorted(parts, np.arange(self.n_points + 1))  # Keypoints are sorted by type
+        detected_keypoints = [rows[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        return detected_keypoints, personwise_keypoints, keypoints
+
+    def get_keypoints(self, outputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns keypoints (N x 3 array of x, y, confidence), sorted by keypoint type, and their types.
+
+        Peaks are found on the heatmaps (max filter), then located in the heatmaps resized to the input size and
+        smoothed (3x3 Gaussian), as in the previous decoding. Only a patch of one heatmap cell around each peak
+        is resized/smoothed, instead of whole heatmaps.
+        """
+        heatmaps = outputs[0, :self.n_points]
+        height, width = heatmaps.shape[1:]
+        maxima = cv2.dilate(np.ascontiguousarray(heatmaps.transpose(1, 2, 0), dtype=np.float32), self._kernel)
+        parts, cy, cx = np.nonzero((self.threshold < heatmaps) & (heatmaps == maxima.reshape(height, width, -1)
+                                                                   .transpose(2, 0, 1)))
+
+        # Patch (with 1 pixel margin for smoothing) around the peak, in pixels of the input
+        w, h = self.input_size
+        radius = int(np.ceil(w / width))
+        offsets = np.arange(-radius - 1, radius + 2)
+        xs = np.round((cx + 0.5) * (w / width) - 0.5).astype(int)[:, None] + offsets  # P x patch
+        ys = np.round((cy + 0.5) * (h / height) - 0.5).astype(int)[:, None] + offsets
+        # Smoothing reflects the image at its borders (cv2.BORDER_REFLECT_101)
+        rx = np.abs(xs)
+        rx = np.where(rx > w - 1, 2 * (w - 1) - rx, rx)
+        ry = np.abs(ys)
+        ry = np.where(ry > h - 1, 2 * (h - 1) - ry, ry)
+
+        patches = self._sample(heatmaps, parts[:, None, None], rx[:, None, :], ry[:, :, None])  # P x patch x patch
+        smooth = 0.25 * patches[:, :-2] + 0.5 * patches[:, 1:-1] + 0.25 * patches[:, 2:]
+        smooth = 0.25 * smooth[:, :, :-2] + 0.5 * smooth[:, :, 1:-1] + 0.25 * smooth[:, :, 2:]
+        inside_y = (0 <= ys[:, 1:-1]) & (ys[:, 1:-1] < h)
+        inside_x = (0 <= xs[:, 1:-1]) & (xs[:, 1:-1] < w)
+        inside = inside_y[:, :, None] & inside_x[:, None]
+        smooth = np.where(inside, smooth, -np.inf).reshape(len(parts), (2 * radius + 1) ** 2)
+
+        best = smooth.argmax(axis=1)
+        iy, ix = np.divmod(best, 2 * radius + 1)
+        idx = np.arange(len(parts))
+        peak_x, peak_y = xs[idx, ix + 1], ys[idx, iy + 1]
+        valid = self.threshold < smooth[idx, best]
+
+        # Neighbouring peaks of equal value (plateau) end up at the same pixel
+        keypoints = np.column_stack([parts, peak_x, peak_y, patches[idx, iy + 1, ix + 1]])[valid]
+        _, first = np.unique(keypoints[:, :3], axis=0, return_index=True)
+        keypoints = keypoints[np.sort(first)]  # Sorted by type, then y, x of the heatmap peak
+        return keypoints[:, 1:].astype(np.float64), keypoints[:, 0].astype(int)
+
+    def get_valid_pairs(self, outputs: np.ndarray, keypoints: np.ndarray, parts: np.ndarray
+                        ) -> Tuple[List, List[int]]:
+        """
+        Returns, for each limb, array of valid pairs (keypoint id A, keypoint id B, PAF score), at most one pair
+        for each keypoint A. Limbs without keypoints of either type are invalid (their pairs are an empty list).
+        Pairs of all limbs are scored at once.
+        """
+        ids = [np.flatnonzero(parts == part) for part in range(self.n_points)]
+        invalid_pairs = [k for k, (a, b) in enumerate(self.pose_pairs) if len(ids[a]) == 0 or len(ids[b]) == 0]
+
+        # All candidate pairs: limb, keypoint A, keypoint B
+        candidates = [(np.full(len(ids[a]) * len(ids[b]), k), np.repeat(ids[a], len(ids[b])),
+                       np.tile(ids[b], len(ids[a]))) for k, (a, b) in enumerate(self.pose_pairs)]
+        limbs, ids_a, ids_b = (np.concatenate(arr) for arr in zip(*candidates))
+
+        a = keypoints[ids_a, :2]
+        d = keypoints[ids_b, :2] - a
+        norm = np.linalg.norm(d, axis=-1)
+        unit = d / np.where(norm == 0, 1, norm)[:, None]
+
+        points = np.round(a[:, None] + d[:, None] * self._samples[:, None])  # pairs x samples x 2
+        channels = self.paf_indices[limbs].T[:, :, None]  # 2 x pairs x 1
+        paf = self._sample(outputs[0], channels, points[None, ..., 0], points[None, ..., 1])
+        scores = paf[0] * unit[:, 0, None] + paf[1] * unit[:, 1, None]
+        avg_scores = scores.mean(axis=-1)
+        valid = (norm != 0) \
+                & (self.conf_threshold < (self.paf_score_threshold < scores).sum(axis=-1) / self.interp_samples) \
+                & (-1 < avg_scores)
+
+        # Best valid pair (first one, if equal) for each keypoint A of each limb
+        order = np.lexsort((-np.where(valid, avg_scores, -np.inf), ids_a, limbs))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (np.diff(limbs[order]) != 0) | (np.diff(ids_a[order]) != 0)
+        best = order[first]
+        best = best[valid[best]]
+
+        pairs = np.column_stack([ids_a[best], ids_b[best], avg_scores[best]]).astype(np.float64)
+        bounds = np.searchsorted(limbs[best], np.arange(len(self.pose_pairs) + 1))
+        valid_pairs = [[] if k in invalid_pairs else pairs[start:end]
+                       for k, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+        return valid_pairs, invalid_pairs
+
+    def _sample(self, maps: np.ndarray, channels: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Samples (bilinear) low resolution maps at pixels (x, y) of the input, same values as sampling the maps
+        resized to the input size with cv2.resize. Channels are broadcast against the pixels.
+        """
+        height, width = maps.shape[1:]
+        sx = np.clip((x + 0.5) * (width / self.input_size[0]) - 0.5, 0, width - 1)
+        sy = np.clip((y + 0.5) * (height / self.input_size[1]) - 0.5, 0, height - 1)
+        x0 = sx.astype(int)
+        y0 = sy.astype(int)
+        x1 = np.minimum(x0 + 1, width - 1)
+        y1 = np.minimum(y0 + 1, height - 1)
+        fx = sx - x0
+        fy = sy - y0
+        return maps[channels, y0, x0] * (1 - fx) * (1 - fy) + maps[channels, y0, x1] * fx * (1 - fy) \
+               + maps[channels, y1, x0] * (1 - fx) * fy + maps[channels, y1, x1] * fx * fy
+
+    def get_personwise_keypoints(self, valid_pairs: List, invalid_pairs: List[int], keypoints: np.ndarray
+                                 ) -> np.ndarray:
+        """
+        Assembles people from valid pairs, greedily, limb by limb. Pair is added to the first person that already
+        contains its keypoint A, otherwise it starts a new person.
+        """
+        persons = -1 * np.ones((0, self.n_points + 1))
+        # Last two limbs (ears to shoulders) are redundant, they only complete already found people
+        new_person_limbs = len(self.pose_pairs) - 2
+
+        for k, (part_a, part_b) in enumerate(self.pose_pairs):
+            if k in invalid_pairs or len(valid_pairs[k]) == 0:
+                continue
+            pairs = valid_pairs[k]
+
+            # Keypoints A of a limb are unique, so each person gets matched by at most one pair
+            match = persons[None, :, part_a] == pairs[:, 0, None]
+            found = match.any(axis=1)
+            if found.any():
+                rows = match[found].argmax(axis=1)
+                persons[rows, part_b] = pairs[found, 1]
+                persons[rows, -1] += keypoints[pairs[found, 1].astype(int), 2] + pairs[found, 2]
+
+            if k < new_person_limbs:
+                new = pairs[~found]
+                rows = -1 * np.ones((len(new), self.n_points + 1))
+                rows[:, part_a] = new[:, 0]
+                rows[:, part_b] = new[:, 1]
+                rows[:, -1] = keypoints[new[:, :2].astype(int), 2].sum(axis=1) + new[:, 2]
+                persons = np.vstack([persons, rows])
+        return persons
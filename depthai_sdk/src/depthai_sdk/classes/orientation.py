@@ -0,0 +1,134 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+__all__ = ['OrientationFilter']
+
+
+class OrientationFilter:
+    """
+    Orientation (AHRS) filter fusing gyroscope and accelerometer samples, Mahony or Madgwick algorithm. Same updates
+    as the filters of the `ahrs` package (`Mahony.updateIMU`, `Madgwick.updateIMU`), but a whole IMU batch is
+    processed in a single call: the batch is prepared with NumPy (accelerometer normalization, skipped samples),
+    and the filter recursion runs on plain floats, without allocating NumPy arrays for every sample.
+
+    Orientation is kept between batches. Quaternions are in (w, x, y, z) order.
+    """
+
+    def __init__(self,
+                 algorithm: str = 'mahony',
+                 frequency: float = 100.0,
+                 k_p: float = 1.0,
+                 k_i: float = 0.3,
+                 gain: float = 0.033,
+                 q0: Optional[np.ndarray] = None):
+        """
+        Args:
+            algorithm: 'mahony' or 'madgwick'.
+            frequency: Sampling frequency (Hz) of the IMU, time step of each sample is 1 / frequency.
+            k_p: Proportional gain of the Mahony filter.
+            k_i: Integral gain of the Mahony filter. As in `ahrs.filters.Mahony`, the bias isn't accumulated,
+                so it acts as an additional proportional gain.
+            gain: Gain (beta) of the Madgwick filter.
+            q0: Initial orientation, defaults to identity.
+        """
+        algorithm = algorithm.lower()
+        if algorithm not in ('mahony', 'madgwick'):
+            raise ValueError(f"Unknown orientation filter '{algorithm}', should be 'mahony' or 'madgwick'")
+        self.algorithm = algorithm
+        self.frequency = frequency
+        self.dt = 1.0 / frequency
+        self.k_p = k_p
+        self.k_i = k_i
+        self.gain = gain
+        self.q = np.array(q0 if q0 is not None else [1.0, 0.0, 0.0, 0.0], dtype=np.float64)
+
+    def reset(self, q0: Optional[np.ndarray] = None) -> None:
+        self.q = np.array(q0 if q0 is not None else [1.0, 0.0, 0.0, 0.0], dtype=np.float64)
+
+    def update(self, gyro: np.ndarray, accel: np.ndarray) -> np.ndarray:
+        """
+        Updates the orientation with a batch of samples.
+
+        Args:
+            gyro: N x 3 angular velocities (rad/s).
+            accel: N x 3 accelerations (any unit, only the direction is used).
+
+        Returns:
+            N x 4 orientation after each sample.
+        """
+        gyro = np.asarray(gyro, dtype=np.float64).reshape(-1, 3)
+        accel = np.asarray(accel, dtype=np.float64).reshape(-1, 3)
+        moving = np.linalg.norm(gyro, axis=1) > 0  # Samples without rotation keep the orientation
+        accel_norm = np.linalg.norm(accel, axis=1)
+        valid_accel = accel_norm > 0
+        accel = accel / np.where(valid_accel, accel_norm, 1)[:, None]
+
+        update = self._mahony if self.algorithm == 'mahony' else self._madgwick
+        if len(gyro) == 0:
+            return np.empty((0, 4))
+        out = np.array(update(self.q.tolist(), gyro.tolist(), accel.tolist(), moving.tolist(), valid_accel.tolist()))
+        self.q = out[-1].copy()
+        return out
+
+    def _mahony(self, q, gyro, accel, moving, valid_accel):
+        qw, qx, qy, qz = q
+        k = self.k_p + self.k_i
+        half_dt = 0.5 * self.dt
+        out = []
+        for (gx, gy, gz), (ax, ay, az), is_moving, has_accel in zip(gyro, accel, moving, valid_accel):
+            if is_moving:
+                if has_accel:
+                    # Expected direction of gravity, third row of the rotation matrix
+                    vx = 2.0 * (qx * qz - qw * qy)
+                    vy = 2.0 * (qw * qx + qy * qz)
+                    vz = 1.0 - 2.0 * (qx * qx + qy * qy)
+                    # Error between measured and expected gravity (cross product), corrects the gyroscope
+                    gx += k * (ay * vz - az * vy)
+                    gy += k * (az * vx - ax * vz)
+                    gz += k * (ax * vy - ay * vx)
+
+                qw, qx, qy, qz = (qw + half_dt * (-qx * gx - qy * gy - qz * gz),
+                                  qx + half_dt * (qw * gx + qy * gz - qz * gy),
+                                  qy + half_dt * (qw * gy - qx * gz + qz * gx),
+                                  qz + half_dt * (qw * gz + qx * gy - qy * gx))
+                norm = math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+                qw, qx, qy, qz = qw / norm, qx / norm, qy / norm, qz / norm
+            out.append((qw, qx, qy, qz))
+        return out
+
+    def _madgwick(self, q, gyro, accel, moving, valid_accel):
+        qw, qx, qy, qz = q
+        gain = self.gain
+        dt = self.dt
+        out = []
+        for (gx, gy, gz), (ax, ay, az), is_moving, has_accel in zip(gyro, accel, moving, valid_accel):
+            if is_moving:
+                # Rate of change of the quaternion from the gyroscope
+                dw = 0.5 * (-qx * gx - qy * gy - qz * gz)
+                dx = 0.5 * (qw * gx + qy * gz - qz * gy)
+                dy = 0.5 * (qw * gy - qx * gz + qz * gx)
+                dz = 0.5 * (qw * gz + qx * gy - qy * gx)
+
+                if has_accel:
+                    # Gradient descent step towards the measured gravity (objective function f, Jacobian J)
+                    f0 = 2.0 * (qx * qz - qw * qy) - ax
+                    f1 = 2.0 * (qw * qx + qy * qz) - ay
+                    f2 = 2.0 * (0.5 - qx * qx - qy * qy) - az
+                    sw = -2.0 * qy * f0 + 2.0 * qx * f1
+                    sx = 2.0 * qz * f0 + 2.0 * qw * f1 - 4.0 * qx * f2
+                    sy = -2.0 * qw * f0 + 2.0 * qz * f1 - 4.0 * qy * f2
+                    sz = 2.0 * qx * f0 + 2.0 * qy * f1
+                    norm = math.sqrt(sw * sw + sx * sx + sy * sy + sz * sz)
+                    if norm > 0:
+                        dw -= gain * sw / norm
+                        dx -= gain * sx / norm
+                        dy -= gain * sy / norm
+                        dz -= gain * sz / norm
+
+                qw, qx, qy, qz = qw + dw * dt, qx + dx * dt, qy + dy * dt, qz + dz * dt
+                norm = math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+                qw, qx, qy, qz = qw / norm, qx / norm, qy / norm, qz / norm
+            out.append((qw, qx, qy, qz))
+        return out
@@ -1,15 +1,26 @@
 
+import asyncio
 import os
+import threading
+import time
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import Executor
 from queue import Queue, Empty
 from typing import Optional, Callable, List, Union, Dict
 
 import depthai as dai
 
-from depthai_sdk.classes.packets import BasePacket
+from depthai_sdk.classes.enum import BackpressurePolicy, SyncPolicy
+from depthai_sdk.classes.packets import BasePacket, FramePacket
 from depthai_sdk.components.component import Component, ComponentOutput
+from depthai_sdk.integrations.rtsp.server import RtspServer
 from depthai_sdk.logger import LOGGER
+from depthai_sdk.oak_outputs.callback_executor import CallbackExecutor
 from depthai_sdk.oak_outputs.fps import FPS
+from depthai_sdk.oak_outputs.frame_decoder import FrameDecoder
+from depthai_sdk.oak_outputs.shared_memory import SharedMemoryPublisher, packet_arrays
+from depthai_sdk.oak_outputs.stats import PipelineStats, StageStats
 from depthai_sdk.oak_outputs.syncing import TimestampSync
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, ReplayStream
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
@@ -22,13 +33,22 @@ from depthai_sdk.visualize.visualizer import Visualizer
 
 
 class BasePacketHandler:
+    # Whether packets need decoded frames; handlers that only pass the encoded bitstream on don't use FrameDecoder
+    decode_frames = True
+
     def __init__(self, main_thread=False):
         self.fps = FPS()
         self.queue = Queue(2) if main_thread else None
         self.outputs: List[ComponentOutput]
         self.sync = None
+        self.stats: Optional[PipelineStats] = None  # Assigned by OakCamera, if stats are enabled
+        self.decoder: Optional[FrameDecoder] = None  # Assigned by OakCamera, if decoding on a thread pool is enabled
+        self.executor: Optional[CallbackExecutor] = None  # See configure_executor()
 
         self._packet_names = {}  # Check for duplicate packet name, raise error if found (user error)
+        self._timed_queue = main_thread  # Internal queue (consumed by _poll) holds (enqueue time, packet)
+        self._handler_stats: Optional[StageStats] = None
+        self._handoff_stats: Optional[StageStats] = None
 
     @abstractmethod
     def setup(self, pipeline: dai.Pipeline, device: dai.Device, xout_streams: Dict[str, List]):
@@ -41,6 +61,10 @@ class BasePacketHandler:
         """
         Callback from XoutBase. Don't override it. Does FPS counting and calls new_packet().
         """
+        if self.stats is not None and self._handler_stats is None:
+            self._init_stats()
+        start = time.perf_counter() if self._handler_stats else 0
+
         if self.sync is not None:
             packet = self.sync.sync(packet.get_timestamp(), packet.name, packet)
             if packet is None:
@@ -49,26 +73,85 @@ class BasePacketHandler:
         self.fps.next_iter()
         if self.queue:
             if self.queue.full():
-                self.queue.get()  # Remove oldest packet
-            self.queue.put(packet)
+                try:
+                    self.queue.get_nowait()  # Remove oldest packet
+                    if self._handoff_stats:
+                        self._handoff_stats.add_drop()
+                except Empty:
+                    pass
+            self.queue.put((time.perf_counter(), packet) if self._timed_queue else packet)
+            if self._handoff_stats:
+                self._handoff_stats.add_depth(self.queue.qsize())
+        elif self.executor is not None:
+            self.executor.submit(packet)
         else:
             self.new_packet(packet)
+            if self._handler_stats:
+                self._handler_stats.add_processing(time.perf_counter() - start)
+
+    def _init_stats(self):
+        # All outputs are known by now, so stages are named after all streams of this handler
+        name = ';'.join(self._packet_names)
+        self._handler_stats = self.stats.stage(name, 'handler')
+        if self.queue is not None or self.executor is not None:
+            self._handoff_stats = self.stats.stage(name, 'handoff')
+        if self.executor is not None:
+            self.executor.handoff_stats = self._handoff_stats
+            self.executor.handler_stats = self._handler_stats
+
+    def configure_executor(self,
+                           max_workers: int = 1,
+                           max_in_flight: Optional[int] = None,
+                           max_pending: int = 1,
+                           policy: Union[str, BackpressurePolicy] = BackpressurePolicy.DROP_OLDEST,
+                           ordered: bool = True,
+                           executor: Optional[Executor] = None,
+                           prepare: Optional[Callable] = None) -> 'BasePacketHandler':
+        """
+        Process packets on a pool of threads (or processes) instead of the XLink callback thread, so a slow handler
+        doesn't stall the other streams. See CallbackExecutor for details.
+
+        Args:
+            max_workers: Number of threads of the pool, if `executor` isn't passed.
+            max_in_flight: Max number of packets processed at once, defaults to `max_workers`.
+            max_pending: Max number of packets of a single stream waiting to be processed. 1 (default) with
+                'drop_oldest' policy processes only the latest packet of each stream.
+            policy: What to do when `max_pending` packets are already waiting: 'drop_oldest', 'drop_newest'
+                or 'block'.
+            ordered: Whether packets of a stream are processed one after another, in order.
+            executor: Custom executor, eg. ProcessPoolExecutor.
+            prepare: Converts packets into (picklable) arguments of the callback, needed for process pools.
+        """
+        if self.queue is not None:
+            raise ValueError('Handler already passes packets to the main thread (or to a queue), '
+                             'it can\'t use an executor.')
+        self.executor = CallbackExecutor(self._executor_target(), max_workers, max_in_flight, max_pending, policy,
+                                         ordered, executor, prepare)
+        return self
+
+    def _executor_target(self) -> Callable:
+        """
+        Function called by the executor with each packet.
+        """
+        return self.new_packet
 
     def configure_syncing(self,
                           enable_sync: bool = True,
-                          threshold_ms: int = 17):
+                          threshold_ms: int = 17,
+                          policy: Union[str, SyncPolicy] = SyncPolicy.NEAREST):
         """
         If multiple outputs are used, then PacketHandler can do timestamp syncing of multiple packets
         before calling new_packet().
         Args:
             enable_sync: If True, then syncing is enabled.
             threshold_ms: Maximum time difference between packets in milliseconds.
+            policy: Which packet to select if multiple packets are within the threshold: 'nearest', 'earliest' or 'latest'.
         """
         if enable_sync:
             if len(self.outputs) < 2:
                 LOGGER.error('Syncing requires at least 2 outputs! Skipping syncing.')
                 return
-            self.sync = TimestampSync(len(self.outputs), threshold_ms)
+            self.sync = TimestampSync(len(self.outputs), threshold_ms, policy)
 
     def _poll(self):
         """
@@ -76,10 +159,17 @@ class BasePacketHandler:
         """
         if self.queue:
             try:
-                packet = self.queue.get_nowait()
-                self.new_packet(packet)
+                queued_at, packet = self.queue.get_nowait()
             except Empty:
-                pass
+                return
+
+            if self._handoff_stats is None:
+                self.new_packet(packet)
+                return
+            start = time.perf_counter()
+            self._handoff_stats.add_latency(start - queued_at)
+            self.new_packet(packet)
+            self._handler_stats.add_processing(time.perf_counter() - start)
 
     @abstractmethod
     def new_packet(self, packet):
@@ -120,6 +210,10 @@ class BasePacketHandler:
 
         # Assign which callback to call when packet is prepared
         xout.new_packet_callback = custom_callback or self._new_packet_callback
+        if self.stats is not None:
+            xout.stats = self.stats.stage(name, 'xout')
+        if self.decoder is not None and self.decode_frames:
+            xout.decoder = self.decoder
 
         for xstream in xout.xstreams():
             if xstream.name not in xout_streams:
@@ -177,6 +271,8 @@ class VisualizePacketHandler(BasePacketHandler):
 
 
 class RecordPacketHandler(BasePacketHandler):
+    decode_frames = False
+
     def __init__(self, outputs, recorder: Record):
         self._save_outputs(outputs)
         self.recorder = recorder
@@ -212,6 +308,9 @@ class CallbackPacketHandler(BasePacketHandler):
     def new_packet(self, packet):
         self.callback(packet)
 
+    def _executor_target(self) -> Callable:
+        return self.callback  # Picklable (if it's a module-level function), unlike the handler
+
 
 class QueuePacketHandler(BasePacketHandler):
     def __init__(self, outputs, max_size: int):
@@ -229,15 +328,17 @@ class QueuePacketHandler(BasePacketHandler):
 
     def configure_syncing(self,
                           enable_sync: bool = True,
-                          threshold_ms: int = 17) -> 'QueuePacketHandler':
+                          threshold_ms: int = 17,
+                          policy: Union[str, SyncPolicy] = SyncPolicy.NEAREST) -> 'QueuePacketHandler':
         """
         If multiple outputs are used, then PacketHandler can do timestamp syncing of multiple packets
         before calling new_packet().
         Args:
             enable_sync: If True, then syncing is enabled.
             threshold_ms: Maximum time difference between packets in milliseconds.
+            policy: Which packet to select if multiple packets are within the threshold: 'nearest', 'earliest' or 'latest'.
         """
-        super().configure_syncing(enable_sync, threshold_ms)
+        super().configure_syncing(enable_sync, threshold_ms, policy)
         return self
 
     def new_packet(self, packet):
@@ -245,7 +346,237 @@ class QueuePacketHandler(BasePacketHandler):
         pass
 
 
+class AsyncQueuePacketHandler(BasePacketHandler):
+    """
+    Passes packets to asyncio code, consumed with `async for packet in handler` (or `await handler.get()`).
+    Packets are handed over from the XLink callback thread to the event loop with `loop.call_soon_threadsafe`,
+    so no extra thread sits between the device and the coroutine.
+
+    At most `max_size` packets wait to be consumed. If the consumer falls behind, `policy` decides whether
+    the oldest or the newest packet gets dropped, or whether the XLink callback thread waits ('block').
+    """
+
+    def __init__(self,
+                 outputs,
+                 max_size: int = 4,
+                 policy: Union[str, BackpressurePolicy] = BackpressurePolicy.DROP_OLDEST,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__()
+        self._save_outputs(outputs)
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self.max_size = max_size
+        self.policy = BackpressurePolicy.parse(policy)
+        self.drops = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Accessed only from the event loop
+        self._buffer = deque()  # (enqueue time, packet)
+        self._waiters = deque()  # Futures of consumers waiting in get(), one is woken per packet
+        # Free space in the buffer, producer waits for it with 'block' policy
+        self._space = threading.Semaphore(max_size) if self.policy == BackpressurePolicy.BLOCK else None
+        self._closing = False  # No more packets are accepted
+        self._closed = False  # Set in the event loop, after packets that were already handed over
+
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:  # Created outside of the event loop, bound when started/consumed
+                pass
+        if loop is not None:
+            self.bind(loop)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Sets the event loop packets get delivered to.
+        """
+        if self._loop is not None and self._loop is not loop:
+            raise RuntimeError('Stream is already bound to a different event loop')
+        self._loop = loop
+
+    def setup(self, pipeline: dai.Pipeline, device: dai.Device, xout_streams: Dict[str, List]):
+        for output in self.outputs:
+            xout = output(device)
+            self._create_xout(pipeline, xout, xout_streams)
+
+    def _init_stats(self):
+        super()._init_stats()
+        self._handoff_stats = self.stats.stage(';'.join(self._packet_names), 'handoff')
+
+    def new_packet(self, packet):
+        # XLink callback thread
+        if self._loop is None or self._closing:
+            self._drop()
+            return
+        if self._space is not None:
+            while not self._space.acquire(timeout=0.1):
+                if self._closing:
+                    return
+        try:
+            self._loop.call_soon_threadsafe(self._put, time.perf_counter(), packet)
+        except RuntimeError:  # Event loop closed
+            self._drop()
+
+    def _drop(self) -> None:
+        self.drops += 1
+        if self._handoff_stats is not None:
+            self._handoff_stats.add_drop()
+
+    def _put(self, queued_at: float, packet) -> None:
+        if self._closed:
+            return
+        if self.max_size <= len(self._buffer):  # Never with 'block' policy, semaphore limits the buffer
+            self._drop()
+            if self.policy == BackpressurePolicy.DROP_NEWEST:
+                return
+            self._buffer.popleft()
+        self._buffer.append((queued_at, packet))
+        if self._handoff_stats is not None:
+            self._handoff_stats.add_depth(len(self._buffer))
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _wake_all(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def get(self):
+        """
+        Returns the next packet, waiting for it if needed. Returns None once the stream is closed
+        (OakCamera closed) and all packets were consumed. Multiple consumers can wait at once, each packet is
+        returned to only one of them.
+        """
+        if self._loop is None:
+            self.bind(asyncio.get_running_loop())
+        while not self._buffer:
+            if self._closed:
+                return None
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled() and self._buffer:
+                    self._wake()  # Woken for a packet, but cancelled before taking it
+                else:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+
+        queued_at, packet = self._buffer.popleft()
+        if self._space is not None:
+            self._space.release()
+        if self._handoff_stats is not None:
+            self._handoff_stats.add_latency(time.perf_counter() - queued_at)
+        return packet
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    def __aiter__(self) -> 'AsyncQueuePacketHandler':
+        return self
+
+    async def __anext__(self):
+        packet = await self.get()
+        if packet is None:
+            raise StopAsyncIteration
+        return packet
+
+    def close(self):
+        """
+        Ends the stream, consumers get the remaining packets and then stop. Can be called from any thread.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._space is not None:
+            self._space.release()  # Wake up a waiting producer
+        if self._loop is None:
+            self._closed = True
+            return
+        try:
+            # After the packets already passed to the loop
+            self._loop.call_soon_threadsafe(self._set_closed)
+        except RuntimeError:  # Event loop closed
+            self._closed = True
+
+    def _set_closed(self) -> None:
+        self._closed = True
+        self._wake_all()
+
+
+class SharedMemoryPacketHandler(BasePacketHandler):
+    """
+    Publishes frames (or depth, point clouds) of component outputs to shared memory, for consumers in other processes
+    (see SharedMemorySubscriber). Each output gets its own segment, named `<prefix>_<packet name>`, with a ring of
+    `num_slots` slots. Packets are copied into shared memory once, without pickling, and readers never block
+    the device callback thread.
+    """
+
+    def __init__(self, outputs, prefix: str = 'oak', num_slots: int = 4, slot_size: Optional[int] = None):
+        """
+        Args:
+            outputs: Component output(s) to publish.
+            prefix: Prefix of shared memory segment names.
+            num_slots: Number of slots of each segment.
+            slot_size: Max size (bytes) of a single packet. By default, 1.5x the size of the first packet of the output
+                (sparse point clouds vary in size).
+        """
+        self._save_outputs(outputs)
+        self.prefix = prefix
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        self.publishers: Dict[str, SharedMemoryPublisher] = {}
+        super().__init__()
+
+    def setup(self, pipeline: dai.Pipeline, device: dai.Device, xout_streams: Dict[str, List]):
+        for output in self.outputs:
+            xout = output(device)
+            self._create_xout(pipeline, xout, xout_streams)
+
+    def get_segment_names(self) -> List[str]:
+        return [f'{self.prefix}_{name}' for name in self._packet_names]
+
+    def new_packet(self, packet: Union[BasePacket, Dict[str, BasePacket]]):
+        packets = packet.values() if isinstance(packet, dict) else [packet]  # Synced packets
+        for packet in packets:
+            arrays = packet_arrays(packet)
+            if arrays is None:
+                continue
+
+            publisher = self.publishers.get(packet.name)
+            if publisher is None:
+                size = self.slot_size or int(1.5 * sum(arr.nbytes for arr in arrays.values()))
+                publisher = SharedMemoryPublisher(f'{self.prefix}_{packet.name}', size, self.num_slots)
+                self.publishers[packet.name] = publisher
+
+            timestamp = packet.get_timestamp()
+            publisher.publish(arrays, {
+                'name': packet.name,
+                'type': packet.__class__.__name__,
+                'timestamp': timestamp.total_seconds() if timestamp is not None else None,
+                'sequence_num': packet.get_sequence_num()
+            })
+
+    def close(self):
+        for publisher in self.publishers.values():
+            publisher.close()
+        self.publishers.clear()
+
+
 class RosPacketHandler(BasePacketHandler):
+    decode_frames = False
+
     def __init__(self, outputs):
         super().__init__()
         self._save_outputs(outputs)
@@ -333,15 +664,64 @@ class TriggerActionPacketHandler(BasePacketHandler):
     def new_packet(self, packet):
         pass
 
+    def close(self):
+        if isinstance(self.action, RecordAction):
+            self.action.close()  # Waits until triggered recordings are written
+
 
 class StreamPacketHandler(BasePacketHandler):
     """
-    TODO. API:
-    oak.stream_rtsp([color, left, right], port=8888)
-    oak.stream_webrtc(color, port=8881)
-
-    Creates a server and just sends forward
-    the frames. Doesn't use any queues.
+    Streams encoded (H.264/H.265) component outputs over the network (eg. RTSP, WebRTC). Encoded frames are
+    forwarded as they are, without decoding or re-encoding, and the server sends them to clients on its own threads,
+    so the device callback thread is never blocked by the network.
 
+    Optionally, visualizer objects of overlay outputs (eg. detections) are serialized and sent to clients
+    alongside the video, if the server supports it (`send_overlay`).
     """
-    pass
+    decode_frames = False
+
+    def __init__(self, outputs, server, overlays=None):
+        if not isinstance(outputs, List):
+            outputs = [outputs]
+        if overlays is not None and not isinstance(overlays, List):
+            overlays = [overlays]
+        overlays = overlays or []
+        if overlays and not hasattr(server, 'send_overlay'):
+            raise ValueError(f'{server.__class__.__name__} doesn\'t support overlays!')
+
+        # Stream encoded output of components (eg. CameraComponent) instead of their default (main) output
+        streams = [o.out.encoded if isinstance(o, Component) and hasattr(o.out, 'encoded') else o for o in outputs]
+        self._save_outputs(streams + overlays)
+        self._num_streams = len(streams)
+        self._overlay_names = set()
+        self.server = server
+        self.visualizer = Visualizer() if overlays else None
+        super().__init__()
+
+    def setup(self, pipeline: dai.Pipeline, device: dai.Device, xout_streams: Dict[str, List]):
+        for i, output in enumerate(self.outputs):
+            xout = output(device)
+            if i >= self._num_streams:
+                self._create_xout(pipeline, xout, xout_streams)
+                self._overlay_names.add(xout.get_packet_name())
+                continue
+            if not xout.is_h26x():
+                raise ValueError(f'Only H.264/H.265 encoded outputs can be streamed, got "{xout.name}". '
+                                 'Create the camera with encode="h264" or encode="h265".')
+            self._create_xout(pipeline, xout, xout_streams)
+            self.server.add_stream(xout.get_packet_name(), h265=xout.is_h265())
+
+        self.server.start()
+
+    def new_packet(self, packet: BasePacket):
+        if packet.name in self._overlay_names:
+            if isinstance(packet, FramePacket):
+                width, height = packet.get_size()
+                self.visualizer.frame_shape = (height, width)
+            packet.prepare_visualizer_objects(self.visualizer)
+            self.server.send_overlay(self.visualizer.serialize())
+            return
+        self.server.send(packet.name, packet.msg.getData(), packet.get_timestamp())
+
+    def close(self):
+        self.server.close()
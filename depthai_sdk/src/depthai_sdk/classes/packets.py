@@ -8,6 +8,7 @@ import numpy as np
 from depthai_sdk.classes import ImgLandmarks, SemanticSegmentation
 from depthai_sdk.classes.nn_results import Detection, TrackingDetection, TwoStageDetection
 from depthai_sdk.visualize.bbox import BoundingBox
+from depthai_sdk.visualize.colorization import disparity_colorizer
 from depthai_sdk.visualize.configs import StereoColor, TextPosition
 from depthai_sdk.visualize.visualizer import Visualizer
 
@@ -71,14 +72,20 @@ class FramePacket(BasePacket):
         self.msg = msg
         self._get_codec = None
         self.__frame = None
+        self._decoded = False  # Whether the frame was already decoded (eg. by FrameDecoder), even if None
         super().__init__(name)
 
     @property
     def frame(self):
-        if self.__frame is None:
+        if self.__frame is None and not self._decoded:
             self.__frame = self.decode()
         return self.__frame
 
+    @frame.setter
+    def frame(self, frame: Optional[np.ndarray]):
+        self.__frame = frame
+        self._decoded = True
+
     def get_timestamp(self) -> timedelta:
         return self.msg.getTimestampDevice(dai.CameraExposureOffset.MIDDLE)
 
@@ -131,6 +138,7 @@ class DisparityPacket(FramePacket):
         self.multiplier = multiplier
         self.colorize = colorize
         self.colormap = colormap
+        self._colorized: Optional[Tuple[tuple, np.ndarray]] = None  # (colorization settings, colorized frame)
 
         self.confidence_map = confidence_map
         self.depth_score = None
@@ -143,17 +151,30 @@ class DisparityPacket(FramePacket):
         if self.disparity_map is not None:
             return self.disparity_map
         else:
-            self.msg.getFrame()
+            return self.msg.getFrame()
 
-    def get_colorized_frame(self, visualizer) -> np.ndarray:
+    def _colorization_input(self) -> Tuple[np.ndarray, Optional[float]]:
+        """
+        Returns frame to be colorized and depth factor (None, frame is disparity).
+        """
         frame = self.get_disparity()
-        colorized_disp = frame * self.multiplier
+        if frame.ndim == 3:  # Decoded (MJPEG) disparity
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame, None
 
-        try:
-            aligned_frame = self.aligned_frame.getCvFrame()
-        except AttributeError:
-            aligned_frame = None
+    def get_colorized_frame(self, visualizer, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns disparity colorized with lookup tables (see DisparityColorizer), as configured by the packet or
+        by the stereo config of the visualizer. Result is memoized, so multiple visualizers/callbacks reading
+        the same packet colorize it only once; without `out` the memoized frame is returned, so it shouldn't be
+        modified.
 
+        Args:
+            visualizer: Visualizer, its stereo config is used if colorization isn't set on the packet.
+            out: Reusable output buffer owned by the caller, which can be drawn on. The frame is colorized
+                straight into it (copied, if it's already memoized). If its shape doesn't match, a new array
+                is returned.
+        """
         stereo_config = visualizer.config.stereo
 
         colorize = self.colorize or stereo_config.colorize
@@ -163,18 +184,39 @@ class DisparityPacket(FramePacket):
             colormap = stereo_config.colormap
             colormap[0] = [0, 0, 0]  # Invalidate pixels 0 to be black
 
-        if aligned_frame is not None and colorized_disp.ndim == 2 and aligned_frame.ndim == 3:
-            colorized_disp = colorized_disp[..., np.newaxis]
-
+        if colorize == StereoColor.RGBD and self.aligned_frame is None:
+            colorize = StereoColor.RGB
+
+        key = (colorize, colormap.tobytes() if isinstance(colormap, np.ndarray) else colormap)
+        if self._colorized is not None and self._colorized[0] == key:
+            colorized = self._colorized[1]
+            if out is None:
+                return colorized
+            if out.shape != colorized.shape or out.dtype != colorized.dtype:
+                return colorized.copy()
+            np.copyto(out, colorized)
+            return out
+
+        if out is not None:
+            # Colorized straight into the buffer of the caller. It isn't memoized, the caller draws on it
+            return self._colorize(colorize, colormap, out)
+        colorized = self._colorize(colorize, colormap)
+        self._colorized = (key, colorized)
+        return colorized
+
+    def _colorize(self, colorize: StereoColor, colormap, out: Optional[np.ndarray] = None) -> np.ndarray:
+        frame, depth_factor = self._colorization_input()
         if colorize == StereoColor.GRAY:
-            pass
+            return disparity_colorizer.normalize(frame, self.multiplier, depth_factor, out)
         elif colorize == StereoColor.RGB:
-            colorized_disp = cv2.applyColorMap(colorized_disp.astype(np.uint8), colormap)
-        elif colorize == StereoColor.RGBD:
-            colorized_disp = cv2.applyColorMap(
-                (colorized_disp + aligned_frame * 0.5).astype(np.uint8), colormap
-            )
-        return colorized_disp
+            return disparity_colorizer.colorize(frame, self.multiplier, colormap, depth_factor, out)
+        else:  # RGBD
+            aligned_frame = self.aligned_frame.getCvFrame()
+            if aligned_frame.ndim == 3:
+                aligned_frame = cv2.cvtColor(aligned_frame, cv2.COLOR_BGR2GRAY)
+            normalized = disparity_colorizer.normalize(frame, self.multiplier, depth_factor)
+            blended = cv2.addWeighted(normalized, 1, aligned_frame, 0.5, 0)
+            return disparity_colorizer.apply_colormap(blended, colormap, out)
 
 
 class DepthPacket(FramePacket):
@@ -208,10 +250,16 @@ class DisparityDepthPacket(DisparityPacket):
         self.disp_scale_factor = disp_scale_factor
 
     def get_disparity(self) -> np.ndarray:
-        with np.errstate(divide='ignore'):
-            disparity = self.disp_scale_factor / self.msg.getFrame()
-        disparity[disparity == np.inf] = 0
-        return disparity
+        if self.disparity_map is None:
+            with np.errstate(divide='ignore'):
+                disparity = self.disp_scale_factor / self.msg.getFrame()
+            disparity[disparity == np.inf] = 0
+            self.disparity_map = disparity
+        return self.disparity_map
+
+    def _colorization_input(self) -> Tuple[np.ndarray, Optional[float]]:
+        # Depth is converted to disparity by the lookup table, without floating-point division of the frame
+        return self.msg.getFrame(), self.disp_scale_factor
 
     # def get_colorized_frame(self, visualizer) -> np.ndarray:
     # Convert depth to disparity for nicer visualization
@@ -222,9 +270,19 @@ class PointcloudPacket(BasePacket):
                  name: str,
                  points: np.ndarray,
                  depth_map: dai.ImgFrame,
-                 colorize_frame: Optional[dai.ImgFrame]):
+                 colorize_frame: Optional[dai.ImgFrame],
+                 indices: Optional[np.ndarray] = None):
+        """
+        Args:
+            name: Packet name.
+            points: Organized (HxWx3) or sparse (Nx3) point cloud.
+            depth_map: Depth frame from which the point cloud was computed.
+            colorize_frame: Color frame (aligned to depth), if point cloud is colorized.
+            indices: For sparse point clouds, flat index (y * width + x) of the depth pixel of each point.
+        """
         super().__init__(name=name)
         self.points = points
+        self.indices = indices
         self.colorize_frame = colorize_frame.getCvFrame() if colorize_frame is not None else None
         self.depth_map = depth_map
 
@@ -234,14 +292,29 @@ class PointcloudPacket(BasePacket):
     def get_timestamp(self) -> timedelta:
         return self.depth_map.getTimestampDevice()
 
+    def get_colors(self) -> Optional[np.ndarray]:
+        """
+        Returns color (BGR) of each point, or None if point cloud isn't colorized.
+        """
+        if self.colorize_frame is None:
+            return None
+        colors = self.colorize_frame.reshape(-1, 3)
+        return colors if self.indices is None else colors[self.indices]
+
     def crop_points(self, bb: BoundingBox) -> np.ndarray:
         """
         Crop points to the bounding box
 
         Returns: Cropped section of the point cloud
         """
-        x1, y1, x2, y2 = bb.to_tuple(self.points.shape)
-        return self.points[y1:y2, x1:x2]
+        if self.indices is None:
+            x1, y1, x2, y2 = bb.to_tuple(self.points.shape)
+            return self.points[y1:y2, x1:x2]
+
+        height, width = self.depth_map.getHeight(), self.depth_map.getWidth()
+        x1, y1, x2, y2 = bb.to_tuple((height, width))
+        ys, xs = np.divmod(self.indices, width)
+        return self.points[(x1 <= xs) & (xs < x2) & (y1 <= ys) & (ys < y2)]
 
 
 class SpatialBbMappingPacket(DisparityDepthPacket):
@@ -0,0 +1,115 @@
+import math
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class PlaneRansac:
+    """
+    RANSAC plane fitting. Hypotheses are generated and scored in batches with NumPy, and the search stops as soon
+    as enough hypotheses were tried to find the best plane with the requested confidence (adaptive RANSAC:
+    the required number of iterations shrinks as the inlier ratio of the best plane grows).
+
+    If `normal` is given, only planes with that normal are considered, so a single point defines a hypothesis.
+    """
+
+    def __init__(self,
+                 threshold: float,
+                 max_iterations: int = 300,
+                 normal: Optional[Sequence[float]] = None,
+                 confidence: float = 0.999,
+                 batch_size: int = 32,
+                 seed: Union[None, int, np.random.Generator] = None):
+        """
+        Args:
+            threshold: Max distance of an inlier from the plane.
+            max_iterations: Max number of hypotheses.
+            normal: Fixed plane normal, optional.
+            confidence: Probability that the best plane was found, at which the search stops early. Set to 1 to
+                always evaluate `max_iterations` hypotheses.
+            batch_size: Number of hypotheses scored at once.
+            seed: Seed (or numpy Generator) for sampling, for deterministic results.
+        """
+        self.threshold = threshold
+        self.max_iterations = max_iterations
+        self.normal = None if normal is None else np.asarray(normal, dtype=np.float64)
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+        self.iterations = 0  # Hypotheses evaluated by the last fit()
+
+    def fit(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fits a plane to the points (Nx3).
+
+        Returns:
+            Plane equation [A, B, C, D] (Ax + By + Cz + D = 0, normal as given, or of unit length) and indices
+            of the inliers.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        n_points = len(points)
+        sample_size = 1 if self.normal is not None else 3
+        self.iterations = 0
+        if n_points < sample_size:
+            return np.zeros(4), np.empty(0, dtype=np.intp)
+
+        if self.normal is not None:
+            # Distance of a point from a hypothesis is a difference of their projections on the normal, so
+            # inliers of all hypotheses can be counted with a binary search over sorted projections
+            unit_normal = self.normal / np.linalg.norm(self.normal)
+            proj = points @ unit_normal
+            sorted_proj = np.sort(proj)
+
+        best_count, best_eq = 0, None
+        required = self.max_iterations
+        while self.iterations < min(required, self.max_iterations):
+            batch = min(self.batch_size, self.max_iterations - self.iterations)
+            self.iterations += batch
+
+            if self.normal is not None:
+                eqs = np.empty((batch, 4))
+                eqs[:, :3] = unit_normal
+                eqs[:, 3] = -proj[self.rng.integers(0, n_points, batch)]
+                counts = np.searchsorted(sorted_proj, self.threshold - eqs[:, 3], 'right') - \
+                         np.searchsorted(sorted_proj, -self.threshold - eqs[:, 3], 'left')
+            else:
+                eqs = self._plane_hypotheses(points, batch)
+                counts = np.count_nonzero(np.abs(points @ eqs[:, :3].T + eqs[:, 3]) <= self.threshold, axis=0)
+
+            if len(counts) and best_count < counts.max():
+                i = int(np.argmax(counts))
+                best_count, best_eq = counts[i], eqs[i]
+                required = self._required_iterations(best_count / n_points, sample_size)
+
+        if best_eq is None:
+            return np.zeros(4), np.empty(0, dtype=np.intp)
+        inliers = np.flatnonzero(np.abs(points @ best_eq[:3] + best_eq[3]) <= self.threshold)
+        if self.normal is not None:
+            best_eq = best_eq * np.linalg.norm(self.normal)  # Keep the given normal
+        return best_eq, inliers
+
+    def _plane_hypotheses(self, points: np.ndarray, batch: int) -> np.ndarray:
+        """
+        Planes (with unit normals) through random triplets of points, degenerate (collinear) triplets are skipped.
+        """
+        p = points[self.rng.integers(0, len(points), (batch, 3))]
+        normals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms > 1e-9
+        normals = normals[valid] / norms[valid, np.newaxis]
+        d = -np.einsum('ij,ij->i', normals, p[valid, 0])
+        return np.column_stack([normals, d])
+
+    def _required_iterations(self, inlier_ratio: float, sample_size: int) -> int:
+        """
+        Number of hypotheses after which an all-inlier sample was drawn with probability `confidence`.
+        """
+        if self.confidence >= 1:
+            return self.max_iterations
+        p_good = inlier_ratio ** sample_size
+        if p_good >= 1:
+            return 0
+        if p_good <= 0:
+            return self.max_iterations
+        return math.ceil(math.log(1 - self.confidence) / math.log(1 - p_good))
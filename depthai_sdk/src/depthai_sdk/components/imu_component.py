@@ -18,6 +18,7 @@ class IMUComponent(Component):
         self.imu_name: str = device.getConnectedIMU()
         self.node = pipeline.createIMU()
         self.fps = 100
+        self.fusion = {'algorithm': 'mahony'}  # Orientation filter settings, see config_fusion()
         self.config_imu()  # Default settings, component won't work without them
 
     def get_imu_name(self) -> str:
@@ -51,10 +52,22 @@ class IMUComponent(Component):
 
         self.fps = report_rate
 
+    def config_fusion(self, algorithm: str = 'mahony', **params) -> None:
+        """
+        Configure the orientation filter that computes rotation of IMU packets on the host, from the gyroscope
+        and accelerometer.
+
+        Args:
+            algorithm: 'mahony' or 'madgwick'.
+            **params: Filter parameters, see OrientationFilter (eg. k_p, k_i for Mahony, gain for Madgwick).
+        """
+        self.fusion = {'algorithm': algorithm, **params}
+
     class Out:
         class ImuOut(ComponentOutput):
             def __call__(self, device: dai.Device):
-                return XoutIMU(StreamXout(self._comp.node.out, name='imu'), self._comp.fps).set_comp_out(self)
+                return XoutIMU(StreamXout(self._comp.node.out, name='imu'), self._comp.fps,
+                               self._comp.fusion).set_comp_out(self)
 
         def __init__(self, imu_component: 'IMUComponent'):
             self.main = self.ImuOut(imu_component)
@@ -4,6 +4,7 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Callable, Union, List, Dict
 
+from depthai_sdk import blob_cache
 from depthai_sdk.types import NNNode
 from depthai_sdk.visualize.bbox import BoundingBox
 
@@ -74,6 +75,7 @@ class NNComponent(Component):
         self.apply_tracking_filter = True  # Enable by default
         self.calculate_speed = True
         self.forget_after_n_frames = None
+        self.tracker_history_length = 100
 
         # Private properties
         self._ar_resize_mode: ResizeMode = ResizeMode.LETTERBOX  # Default
@@ -240,17 +242,18 @@ class NNComponent(Component):
                 self._parse_config(model)
         else:  # SDK supported model
             models = getSupportedModels(printModels=False)
-            zoo_models = blobconverter.zoo_list()
 
             if str(model) in models:
                 model = models[str(model)] / 'config.json'
                 self._parse_config(model)
-            elif str(model) in zoo_models:
+            # Check the blob cache first, listing zoo models requires network access
+            elif blob_cache.get_blob_cache().get(str(model), blob_cache.DEFAULT_OPENVINO_VERSION, 6) is not None or \
+                    str(model) in blobconverter.zoo_list():
                 LOGGER.warning(
                     'Models from the OpenVINO Model Zoo do not carry any metadata'
                     ' (e.g., label map, decoding logic). Please keep this in mind when using models from Zoo.'
                 )
-                self._blob = dai.OpenVINO.Blob(blobconverter.from_zoo(str(model), shaves=6))
+                self._blob = dai.OpenVINO.Blob(blob_cache.from_zoo(str(model), shaves=6))
                 self._forced_version = self._blob.version
             else:
                 raise ValueError(f"Specified model '{str(model)}' is not supported by DepthAI SDK.\n"
@@ -334,34 +337,12 @@ class NNComponent(Component):
             if nn_family:
                 self._parse_node_type(nn_family)
 
-    def _blob_from_config(self, model: Dict, version: Union[None, str, dai.OpenVINO.Version] = None) -> str:
+    def _blob_from_config(self, model: Dict, version: Union[None, str, dai.OpenVINO.Version] = None) -> Path:
         """
-        Gets the blob from the config file.
+        Gets the blob from the config file. Blobs are served from the local blob cache, blobconverter is only
+        used (network access) if the blob isn't cached yet.
         """
-        if isinstance(version, dai.OpenVINO.Version):
-            version = str(version)
-        if isinstance(version, str):
-            if version.startswith('VERSION_'):
-                version = version[8:]
-            if '_' in version:
-                vals = version.split('_')
-                version = f'{vals[0]}.{vals[1]}'
-
-        if 'model_name' in model:  # Use blobconverter to download the model
-            zoo_type = model.get("zoo", 'intel')
-            return blobconverter.from_zoo(model['model_name'],
-                                          zoo_type=zoo_type,
-                                          shaves=6,  # TODO: Calculate ideal shave amount
-                                          version=version)
-
-        if 'xml' in model and 'bin' in model:
-            return blobconverter.from_openvino(xml=model['xml'],
-                                               bin=model['bin'],
-                                               data_type="FP16",  # Myriad X
-                                               shaves=6,  # TODO: Calculate ideal shave amount
-                                               version=version)
-
-        raise ValueError("Specified `model` values in json config files are incorrect!")
+        return blob_cache.from_model_config(model, version)
 
     def _change_resize_mode(self, mode: ResizeMode) -> None:
         """
@@ -447,7 +428,8 @@ class NNComponent(Component):
                        threshold: Optional[float] = None,
                        apply_tracking_filter: Optional[bool] = None,
                        forget_after_n_frames: Optional[int] = None,
-                       calculate_speed: Optional[bool] = None
+                       calculate_speed: Optional[bool] = None,
+                       history_length: Optional[int] = None
                        ) -> None:
         """
         Configure Object Tracker node (if it's enabled).
@@ -461,6 +443,7 @@ class NNComponent(Component):
             apply_tracking_filter (bool, optional): Set whether to apply Kalman filter to the tracked objects. Done on the host.
             forget_after_n_frames (int, optional): Set how many frames to track an object before forgetting it.
             calculate_speed (bool, optional): Set whether to calculate object speed. Done on the host.
+            history_length (int, optional): Set how many past detections of each tracked object are kept on the host. Default: 100
         """
 
         if self.tracker is None:
@@ -495,6 +478,11 @@ class NNComponent(Component):
         if calculate_speed is not None:
             self.calculate_speed = calculate_speed
 
+        if history_length is not None:
+            if history_length < 1:
+                raise ValueError("Tracker history length must be at least 1!")
+            self.tracker_history_length = history_length
+
     def config_yolo_from_metadata(self, metadata: Dict) -> None:
         """
         Configures (Spatial) Yolo Detection Network node with a dictionary. Calls config_yolo().
@@ -739,6 +727,7 @@ class NNComponent(Component):
                                    apply_kalman=self._comp.apply_tracking_filter,
                                    forget_after_n_frames=self._comp.forget_after_n_frames,
                                    calculate_speed=self._comp.calculate_speed,
+                                   history_length=self._comp.tracker_history_length,
                                    ).set_comp_out(self)
 
         class EncodedOut(MainOut):
@@ -5,29 +5,35 @@ from typing import Dict, Union
 
 import requests
 
+from depthai_sdk.blob_cache import get_blob_cache
+
 BLOBS_PATH = Path.home() / Path('.cache/blobs')
 
 
 def getBlob(url: str) -> Path:
     """
-    Download the blob path from the url. If blob is cached, serve that. TODO: compute hash, check server hash,
-    as there will likely be many `model.blob`s.
+    Download the blob path from the url. Downloaded blobs are kept in the blob cache (keyed by the url, with
+    integrity hash), so the blob is downloaded only once.
 
     @param url: Url to the blob
     @return: Local path to the blob
     """
-    fileName = Path(url).name
-    filePath = BLOBS_PATH / fileName
-    if filePath.exists():
-        return filePath
-    BLOBS_PATH.mkdir(parents=True, exist_ok=True)
 
-    r = requests.get(url)
-    with open(filePath, 'wb') as f:
-        f.write(r.content)
-        print('Downloaded', fileName)
+    def download() -> Path:
+        fileName = Path(url).name
+        filePath = BLOBS_PATH / fileName
+        if filePath.exists():  # Downloaded before the blob cache was used
+            return filePath
+        BLOBS_PATH.mkdir(parents=True, exist_ok=True)
+
+        r = requests.get(url)
+        r.raise_for_status()
+        with open(filePath, 'wb') as f:
+            f.write(r.content)
+            print('Downloaded', fileName)
+        return filePath
 
-    return filePath
+    return get_blob_cache().resolve(download, url)
 
 
 # Copied from utils.py - remove that once DepthAI Demo is deprecated
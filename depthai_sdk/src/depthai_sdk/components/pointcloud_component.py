@@ -1,4 +1,4 @@
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Dict
 
 import depthai as dai
 
@@ -6,7 +6,7 @@ from depthai_sdk.components.camera_component import CameraComponent
 from depthai_sdk.components.component import Component, ComponentOutput
 from depthai_sdk.components.stereo_component import StereoComponent
 from depthai_sdk.components.tof_component import ToFComponent
-from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
+from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout, ReplayStream
 from depthai_sdk.oak_outputs.xout.xout_pointcloud import XoutPointcloud
 from depthai_sdk.replay import Replay
 
@@ -34,6 +34,15 @@ class PointcloudComponent(Component):
         self.colorize_comp: Optional[CameraComponent] = colorize
 
         self._replay: Optional[Replay] = replay
+        self._postprocessing: Dict[str, Any] = {}
+
+        # Point clouds recorded by the Record (MCAP/ROS bag) are replayed as they are, without depth on the device
+        self._recorded_stream: Optional[str] = None
+        if depth_input is None and replay is not None:
+            self._recorded_stream = replay.get_pointcloud_stream()
+        if self._recorded_stream is not None:
+            self.colorize_comp = None  # Recorded colors are used
+            return
 
         # Depth aspect
         if depth_input is None:
@@ -71,21 +80,46 @@ class PointcloudComponent(Component):
         elif isinstance(depth_input, dai.Node.Output):
             self.depth = depth_input
 
-    def config_postprocessing(self) -> None:
+    def config_postprocessing(self,
+                              min_range: Optional[int] = None,
+                              max_range: Optional[int] = None,
+                              voxel_size: Optional[float] = None,
+                              sparse: bool = False,
+                              reuse_buffers: int = 0
+                              ) -> None:
         """
-        Configures postprocessing options.
+        Configures host-side postprocessing of the point cloud.
+
+        Args:
+            min_range: Discard points closer than this (in mm).
+            max_range: Discard points further than this (in mm).
+            voxel_size: Downsample the point cloud to one point per voxel of this size (in mm).
+            sparse: Output only valid points (Nx3) instead of organized (HxWx3) point cloud. Enabled by voxel_size.
+            reuse_buffers: Number of output buffers to reuse between frames instead of allocating new ones. Points
+                of a packet are then only valid until this many newer packets arrive.
         """
-        raise NotImplementedError("config_postprocessing() not yet implemented")
+        self._postprocessing = {
+            'min_range': min_range,
+            'max_range': max_range,
+            'voxel_size': voxel_size,
+            'sparse': sparse,
+            'reuse_buffers': reuse_buffers
+        }
 
     class Out:
         class PointcloudOut(ComponentOutput):
             def __call__(self, device: dai.Device) -> XoutBase:
+                if self._comp._recorded_stream is not None:
+                    return XoutPointcloud(device,
+                                          ReplayStream(self._comp._recorded_stream),
+                                          recorded=True).set_comp_out(self)
                 colorize = None
                 if self._comp.colorize_comp is not None:
                     colorize = StreamXout(self._comp.colorize_comp.stream, name="Color")
                 return XoutPointcloud(device,
                                       StreamXout(self._comp.depth),
-                                      color_frames=colorize).set_comp_out(self)
+                                      color_frames=colorize,
+                                      postprocessing=self._comp._postprocessing).set_comp_out(self)
 
         def __init__(self, component: 'PointcloudComponent'):
             self.pointcloud = self.PointcloudOut(component)
@@ -1,6 +1,18 @@
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Union
+
 import depthai as dai
 import numpy as np
 
+from depthai_sdk.classes.enum import PointcloudEncoding
+
+# sensor_msgs/PointField datatypes
+POINT_FIELD_INT16 = 3
+POINT_FIELD_UINT32 = 6
+POINT_FIELD_FLOAT32 = 7
+POINT_FIELD_FLOAT64 = 8
+_POINT_FIELD_DTYPES = {1: '<i1', 2: '<u1', 3: '<i2', 4: '<u2', 5: '<i4', 6: '<u4', 7: '<f4', 8: '<f8'}
+
 
 def create_xyz(device: dai.Device, width: int, height: int):
     calibData = device.readCalibration()
@@ -30,3 +42,402 @@ def create_xyz(device: dai.Device, width: int, height: int):
 
     xyz = np.stack([x_coord, y_coord], axis=-1)
     return np.pad(xyz, ((0, 0), (0, 0), (0, 1)), "constant", constant_values=1.0)
+
+
+# Voxel grids with up to this many cells (bounding box of the point cloud) are downsampled with dense counting,
+# larger ones are grouped by sorting the voxel keys
+_DENSE_VOXEL_LIMIT = 1 << 22
+
+
+@lru_cache(maxsize=8)
+def _projection_rays(width: int, height: int,
+                     fx: float, fy: float, cx: float, cy: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cached projection grid, as a row (1xW) of X and a column (Hx1) of Y ray coordinates (at Z=1), which
+    broadcast to the full HxW grid. Multiplying them by depth gives X and Y coordinates of each pixel.
+    """
+    xs = ((np.arange(width, dtype=np.float32) - np.float32(cx)) / np.float32(fx))[np.newaxis, :]
+    ys = ((np.arange(height, dtype=np.float32) - np.float32(cy)) / np.float32(fy))[:, np.newaxis]
+    xs.flags.writeable = False  # Shared between engines
+    ys.flags.writeable = False
+    return xs, ys
+
+
+class PointcloudEngine:
+    """
+    Builds point clouds from depth maps. Projection grid is cached per resolution and camera intrinsics, and
+    intermediate buffers are preallocated and reused between frames.
+
+    By default, the output is an organized (HxWx3) point cloud, where invalid pixels are (0, 0, 0). If `sparse`
+    is set (or voxel downsampling is enabled), only valid points are computed and returned (Nx3), together with
+    flat indices of their pixels, so they can be matched with pixels of the (aligned) color frame.
+    """
+
+    def __init__(self,
+                 camera_matrix: np.ndarray,
+                 min_range: Optional[int] = None,
+                 max_range: Optional[int] = None,
+                 voxel_size: Optional[float] = None,
+                 sparse: bool = False,
+                 reuse_buffers: int = 0):
+        """
+        Args:
+            camera_matrix: 3x3 intrinsic matrix of the camera to which depth is aligned, at depth resolution.
+            min_range: Points closer than this (in depth units, usually mm) are discarded.
+            max_range: Points further than this (in depth units, usually mm) are discarded.
+            voxel_size: If set, points are downsampled to one point (centroid) per voxel of this size (depth units).
+                Off by default, downsampling costs several times more than building the sparse point cloud.
+            sparse: Return only valid points (Nx3) instead of an organized (HxWx3) point cloud.
+            reuse_buffers: Number of organized output buffers that are allocated once and then reused in a round-robin
+                fashion, so points of a frame are only valid until `reuse_buffers` newer frames are processed.
+                0 allocates a new output buffer for every frame.
+        """
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.min_range = min_range
+        self.max_range = max_range
+        self.voxel_size = voxel_size
+        self.sparse = sparse or voxel_size is not None
+        self.reuse_buffers = reuse_buffers
+
+        self._shape: Optional[Tuple[int, int]] = None
+        self._xs: Optional[np.ndarray] = None
+        self._ys: Optional[np.ndarray] = None
+        self._z: Optional[np.ndarray] = None  # Depth as float32
+        self._x: Optional[np.ndarray] = None
+        self._y: Optional[np.ndarray] = None
+        self._outputs: List[np.ndarray] = []
+        self._output_idx = 0
+
+    @property
+    def shape(self) -> Optional[Tuple[int, int]]:
+        """
+        (height, width) of the last processed depth map.
+        """
+        return self._shape
+
+    def process(self, depth: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Args:
+            depth: HxW depth map (uint16).
+
+        Returns:
+            Tuple of points (HxWx3 or Nx3, float32) and flat pixel indices of the points (None if organized).
+        """
+        self._prepare(depth.shape[0], depth.shape[1])
+        if self.sparse:
+            return self._process_sparse(depth)
+        return self._process_organized(depth), None
+
+    def _prepare(self, height: int, width: int) -> None:
+        if self._shape == (height, width):
+            return
+
+        m = self.camera_matrix
+        self._shape = (height, width)
+        self._xs, self._ys = _projection_rays(width, height, float(m[0, 0]), float(m[1, 1]), float(m[0, 2]),
+                                              float(m[1, 2]))
+        self._z = np.empty((height, width), dtype=np.float32)
+        if self.sparse:
+            self._x = np.empty((height, width), dtype=np.float32)
+            self._y = np.empty((height, width), dtype=np.float32)
+        self._outputs = [np.empty((height, width, 3), dtype=np.float32) for _ in range(self.reuse_buffers)]
+        self._output_idx = 0
+
+    def _valid_mask(self, depth: np.ndarray) -> np.ndarray:
+        valid = depth > (self.min_range - 1 if self.min_range else 0)
+        if self.max_range is not None:
+            valid &= depth <= self.max_range
+        return valid
+
+    def _process_organized(self, depth: np.ndarray) -> np.ndarray:
+        if self._outputs:
+            out = self._outputs[self._output_idx]
+            self._output_idx = (self._output_idx + 1) % len(self._outputs)
+        else:
+            out = np.empty((*self._shape, 3), dtype=np.float32)
+
+        z = self._z
+        np.copyto(z, depth, casting='unsafe')
+        if self.min_range is not None or self.max_range is not None:
+            np.multiply(z, self._valid_mask(depth), out=z)
+
+        # Per-plane broadcasting is ~2x faster than multiplying the full HxWx3 grid
+        np.multiply(self._xs, z, out=out[..., 0])
+        np.multiply(self._ys, z, out=out[..., 1])
+        out[..., 2] = z
+        return out
+
+    def _process_sparse(self, depth: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        indices = np.flatnonzero(self._valid_mask(depth))
+
+        np.copyto(self._z, depth, casting='unsafe')
+        np.multiply(self._xs, self._z, out=self._x)
+        np.multiply(self._ys, self._z, out=self._y)
+        # Gathering valid points from contiguous planes is much faster than indexing the Nx3 grid
+        planes = [plane.reshape(-1).take(indices) for plane in (self._x, self._y, self._z)]
+
+        if self.voxel_size is not None:
+            return _voxel_downsample_planes(planes, self.voxel_size, indices)
+
+        points = np.empty((len(indices), 3), dtype=np.float32)
+        for axis, plane in enumerate(planes):
+            points[:, axis] = plane
+        return points, indices
+
+
+def voxel_downsample(points: np.ndarray,
+                     voxel_size: float,
+                     indices: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Downsamples Nx3 points to the centroid of the points in each occupied voxel.
+
+    Args:
+        points: Nx3 points.
+        voxel_size: Size of the voxel (same units as points).
+        indices: Optional per-point values (eg. pixel indices). One of them is kept for each voxel.
+
+    Returns:
+        Tuple of downsampled points (Mx3, float32) and kept indices (M, or None).
+    """
+    planes = [np.ascontiguousarray(points[:, axis], dtype=np.float32) for axis in range(3)]
+    return _voxel_downsample_planes(planes, voxel_size, indices)
+
+
+def _voxel_downsample_planes(planes: List[np.ndarray],
+                             voxel_size: float,
+                             indices: Optional[np.ndarray]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    if len(planes[0]) == 0:
+        return np.empty((0, 3), dtype=np.float32), indices
+
+    scale = np.float32(1.0 / voxel_size)
+    cells, dims = [], []
+    for plane in planes:
+        # Shift to a voxel-aligned origin, so values are positive and truncation (astype) equals floor
+        cell = plane * scale
+        cell -= np.floor(cell.min())
+        cells.append(cell)
+        dims.append(int(cell.max()) + 1)
+
+    num_cells = dims[0] * dims[1] * dims[2]
+    dtype = np.int32 if num_cells < np.iinfo(np.int32).max else np.int64
+    cells = [cell.astype(dtype) for cell in cells]
+    keys = cells[0]
+    keys *= dims[1]
+    keys += cells[1]
+    keys *= dims[2]
+    keys += cells[2]
+
+    if num_cells <= _DENSE_VOXEL_LIMIT:
+        # Count points per cell directly, no sorting required
+        counts = np.bincount(keys, minlength=num_cells)
+        occupied = np.flatnonzero(counts)
+        lut = np.empty(num_cells, dtype=np.int32)
+        lut[occupied] = np.arange(len(occupied), dtype=np.int32)
+        inverse = lut.take(keys)
+        counts = counts[occupied]
+
+        num_voxels = len(counts)
+        centroids = np.empty((num_voxels, 3), dtype=np.float32)
+        for axis, plane in enumerate(planes):
+            centroids[:, axis] = np.bincount(inverse, weights=plane, minlength=num_voxels) / counts
+
+        kept = None
+        if indices is not None:
+            kept = np.empty(num_voxels, dtype=indices.dtype)
+            kept[inverse] = indices  # Any pixel of the voxel
+        return centroids, kept
+
+    # Sparse grid: points are grouped by sorting their keys. Key and point number are packed into a single int64,
+    # as sorting values is ~2x faster than argsort (and than np.unique with return_inverse)
+    num_points = len(keys)
+    bits = max(num_points - 1, 1).bit_length()
+    if num_cells < 1 << (63 - bits):
+        packed = keys.astype(np.int64)
+        packed <<= bits
+        packed |= np.arange(num_points, dtype=np.int64)
+        packed.sort()
+        order = packed & ((1 << bits) - 1)
+        packed >>= bits
+        sorted_keys = packed
+    else:
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys.take(order)
+
+    # Voxel number of each point, points of the same voxel are adjacent in the sorted order
+    new_voxel = np.empty(num_points, dtype=bool)
+    new_voxel[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=new_voxel[1:])
+    voxels = np.cumsum(new_voxel, dtype=np.int32)
+    voxels -= 1
+    inverse = np.empty(num_points, dtype=np.int32)
+    inverse[order] = voxels
+    first = np.flatnonzero(new_voxel)
+    counts = np.diff(np.append(first, num_points))
+
+    num_voxels = len(first)
+    centroids = np.empty((num_voxels, 3), dtype=np.float32)
+    for axis, plane in enumerate(planes):
+        centroids[:, axis] = np.bincount(inverse, weights=plane, minlength=num_voxels) / counts
+
+    kept = indices.take(order.take(first)) if indices is not None else None  # First pixel of the voxel
+    return centroids, kept
+
+
+class EncodedPointcloud(NamedTuple):
+    """
+    Point cloud in PointCloud2 layout (unorganized, little-endian, one row of `width` points).
+    """
+    fields: List[Tuple[str, int, int]]  # (name, offset, PointField datatype) of each field
+    point_step: int  # Bytes per point
+    width: int  # Number of points
+    data: bytes
+
+
+class PointcloudEncoder:
+    """
+    Encodes point clouds for recording (PointCloud2 messages of MCAP/rosbag recordings). Invalid points are
+    dropped, the cloud can be decimated/voxel downsampled, and coordinates quantized to int16 millimeters, which
+    makes recorded clouds up to ~10x smaller than organized float32 clouds.
+    """
+
+    def __init__(self,
+                 encoding: Union[str, PointcloudEncoding] = PointcloudEncoding.FLOAT32,
+                 decimation: int = 1,
+                 voxel_size: Optional[float] = None,
+                 colorize: bool = True):
+        """
+        Args:
+            encoding: How coordinates are stored, FLOAT32 (meters) or INT16 (millimeters).
+            decimation: Keep every n-th point (every n-th row and column of organized point clouds).
+            voxel_size: If set, points are downsampled to one point per voxel of this size (in mm).
+            colorize: Whether to store color (rgb field) of the points, if point cloud is colorized.
+        """
+        if decimation < 1:
+            raise ValueError('Decimation must be at least 1!')
+        self.encoding = PointcloudEncoding.parse(encoding)
+        self.decimation = decimation
+        self.voxel_size = voxel_size
+        self.colorize = colorize
+
+        self._engine: Optional[PointcloudEngine] = None
+
+    def encode(self, points: np.ndarray, colors: Optional[np.ndarray] = None) -> EncodedPointcloud:
+        """
+        Args:
+            points: Organized (HxWx3) or sparse (Nx3) point cloud, in mm. Points at (0, 0, 0) are invalid.
+            colors: Optional BGR color of each point (HxWx3, or Nx3/(H*W)x3).
+        """
+        if not self.colorize:
+            colors = None
+        if colors is not None:
+            colors = colors.reshape(points.shape)
+
+        d = self.decimation
+        if 1 < d:
+            points = points[::d, ::d] if points.ndim == 3 else points[::d]
+            colors = None if colors is None else (colors[::d, ::d] if colors.ndim == 3 else colors[::d])
+
+        points = points.reshape(-1, 3)
+        valid = points[:, 2] != 0
+        points = points[valid]
+        colors = None if colors is None else colors.reshape(-1, 3)[valid]
+
+        if self.voxel_size:
+            indices = None if colors is None else np.arange(len(points))
+            points, indices = voxel_downsample(points, self.voxel_size, indices)
+            colors = None if colors is None else colors[indices]
+
+        if self.encoding == PointcloudEncoding.INT16:
+            xyz_format, xyz_datatype = '<i2', POINT_FIELD_INT16
+            xyz = np.clip(np.rint(points), -32768, 32767)
+        else:
+            xyz_format, xyz_datatype = '<f4', POINT_FIELD_FLOAT32
+            xyz = points / 1000.0  # To meters
+
+        names, formats = ['x', 'y', 'z'], [xyz_format] * 3
+        if colors is not None:
+            names.append('rgb')  # Packed 0x00RRGGBB, as used by PCL/RViz/Foxglove Studio
+            formats.append('<u4')
+        cloud = np.empty(len(points), dtype=np.dtype({'names': names, 'formats': formats}))
+        for axis, name in enumerate('xyz'):
+            cloud[name] = xyz[:, axis]
+        if colors is not None:
+            colors = colors.astype(np.uint32)
+            cloud['rgb'] = (colors[:, 2] << 16) | (colors[:, 1] << 8) | colors[:, 0]
+
+        fields = [(name, cloud.dtype.fields[name][1], xyz_datatype) for name in 'xyz']
+        if colors is not None:
+            fields.append(('rgb', cloud.dtype.fields['rgb'][1], POINT_FIELD_UINT32))
+        return EncodedPointcloud(fields, cloud.dtype.itemsize, len(cloud), cloud.tobytes())
+
+    def encode_depth(self, depth: np.ndarray, calib: dai.CalibrationHandler) -> EncodedPointcloud:
+        """
+        Projects the depth map (aligned to the right mono camera) to a point cloud and encodes it.
+        """
+        height, width = depth.shape
+        if self._engine is None or self._engine.shape != (height, width):
+            camera_matrix = calib.getCameraIntrinsics(dai.CameraBoardSocket.RIGHT, dai.Size2f(width, height))
+            self._engine = PointcloudEngine(np.array(camera_matrix), sparse=True)
+        points, _ = self._engine.process(depth)
+        return self.encode(points)
+
+
+def decode_pointcloud(fields: List[Tuple[str, int, int]],
+                      point_step: int,
+                      data: bytes,
+                      count: Optional[int] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Decodes PointCloud2 data (little-endian, float or int16 coordinates).
+
+    Args:
+        fields: (name, offset, PointField datatype) of each field.
+        point_step: Bytes per point.
+        data: Point data.
+        count: Number of points, defaults to all points in `data`.
+
+    Returns:
+        Nx3 float32 points in mm, and Nx3 uint8 BGR colors (or None if the point cloud has no rgb field).
+    """
+    fields = {name: (offset, datatype) for name, offset, datatype in fields}
+    names = [name for name in ('x', 'y', 'z', 'rgb') if name in fields]
+    if count is None:
+        count = len(data) // point_step
+    cloud = np.frombuffer(data, count=count, dtype=np.dtype({
+        'names': names,
+        'formats': [_POINT_FIELD_DTYPES[fields[name][1]] for name in names],
+        'offsets': [fields[name][0] for name in names],
+        'itemsize': point_step
+    }))
+
+    points = np.empty((count, 3), dtype=np.float32)
+    for axis, name in enumerate('xyz'):
+        points[:, axis] = cloud[name]
+    if fields['x'][1] in (POINT_FIELD_FLOAT32, POINT_FIELD_FLOAT64):
+        points *= 1000  # Meters to mm
+
+    colors = None
+    if 'rgb' in fields:
+        rgb = cloud['rgb'].view(np.uint32) if fields['rgb'][1] == POINT_FIELD_FLOAT32 else cloud['rgb']
+        rgb = rgb.astype(np.uint32)
+        colors = np.stack([rgb & 0xFF, (rgb >> 8) & 0xFF, (rgb >> 16) & 0xFF], axis=-1).astype(np.uint8)
+    return points, colors
+
+
+def to_pointcloud_frame(points: np.ndarray, colors: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Packs decoded points (and colors) into a single array, as readers return recorded point clouds: Nx3 float32
+    (xyz in mm), or Nx6 float32 (xyz in mm, BGR color) if the point cloud is colorized.
+    """
+    if colors is None:
+        return points
+    return np.concatenate([points, colors.astype(np.float32)], axis=1)
+
+
+def from_pointcloud_frame(frame: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Inverse of to_pointcloud_frame(), returns Nx3 points and Nx3 uint8 BGR colors (or None).
+    """
+    frame = frame.reshape(-1, frame.shape[-1])
+    if frame.shape[1] == 6:
+        return frame[:, :3], frame[:, 3:].astype(np.uint8)
+    return frame, None
@@ -10,7 +10,7 @@ from depthai_sdk.components.camera_component import CameraComponent, ComponentOu
 from depthai_sdk.components.component import Component
 from depthai_sdk.components.parser import parse_median_filter, parse_encode, encoder_profile_to_fourcc
 from depthai_sdk.components.stereo_control import StereoControl
-from depthai_sdk.components.undistort import _get_mesh
+from depthai_sdk.components.undistort import _get_mesh, calibration_hash, get_mesh_cache
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
 from depthai_sdk.oak_outputs.xout.xout_depth import XoutDisparityDepth
@@ -108,6 +108,7 @@ class StereoComponent(Component):
         self.validate_calibration = False
 
         self._undistortion_offset: Optional[int] = None
+        self._mesh_step = 16
 
         if not self._replay:
             # Live stream, check whether we have correct cameras
@@ -185,12 +186,11 @@ class StereoComponent(Component):
         if self._undistortion_offset is not None:
             calib_data = self._replay._calibData if self._replay else device.readCalibration()
             w_frame, h_frame = self._get_stream_size(self.left)
-            mapX_left, mapY_left, mapX_right, mapY_right = self._get_maps(w_frame, h_frame, calib_data)
-            mesh_l = _get_mesh(mapX_left, mapY_left)
-            mesh_r = _get_mesh(mapX_right, mapY_right)
-            mesh_left = list(mesh_l.tobytes())
-            mesh_right = list(mesh_r.tobytes())
-            self.node.loadMeshData(mesh_left, mesh_right)
+            key = get_mesh_cache().key(calibration_hash(calib_data), (w_frame, h_frame), self._mesh_step,
+                                       M2_offset=self._undistortion_offset)
+            meshes = get_mesh_cache().resolve(key, lambda: self._create_meshes(w_frame, h_frame, calib_data))
+            self.node.setMeshStep(self._mesh_step, self._mesh_step)
+            self.node.loadMeshData(list(meshes['left'].tobytes()), list(meshes['right'].tobytes()))
 
         if self._args:
             self._config_stereo_args(self._args)
@@ -234,8 +234,17 @@ class StereoComponent(Component):
         else:
             return None
 
-    def config_undistortion(self, M2_offset: int = 0):
+    def config_undistortion(self, M2_offset: int = 0, mesh_step: int = 16):
+        """
+        Undistorts (and rectifies) stereo frames with meshes computed on the host. Meshes are cached on disk
+        (see MeshCache), so they are computed only once per device calibration, resolution and configuration.
+
+        Args:
+            M2_offset: Offset added to the focal length of the rectified cameras.
+            mesh_step: Distance (in pixels) between mesh points.
+        """
         self._undistortion_offset = M2_offset
+        self._mesh_step = mesh_step
 
     def _config_stereo_args(self, args: Dict):
         if not isinstance(args, Dict):
@@ -417,6 +426,11 @@ class StereoComponent(Component):
         disp_levels = self.node.getMaxDisparity() / 95
         return baseline * focal_length * disp_levels
 
+    def _create_meshes(self, width: int, height: int, calib: dai.CalibrationHandler) -> Dict[str, np.ndarray]:
+        mapX_left, mapY_left, mapX_right, mapY_right = self._get_maps(width, height, calib)
+        return {'left': _get_mesh(mapX_left, mapY_left, self._mesh_step),
+                'right': _get_mesh(mapX_right, mapY_right, self._mesh_step)}
+
     def _get_maps(self, width: int, height: int, calib: dai.CalibrationHandler):
         image_size = (width, height)
         M1 = np.array(calib.getCameraIntrinsics(calib.getStereoLeftCameraId(), width, height))
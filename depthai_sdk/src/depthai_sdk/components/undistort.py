@@ -1,33 +1,138 @@
+"""
+Warp meshes for undistortion/rectification on the device (eg. `StereoDepth.loadMeshData`).
+
+Meshes depend only on the calibration, resolution and mesh step, so they are cached on disk (keyed by hash of
+the calibration, resolution, mesh step and any extra parameters) and pipeline restarts on the same device skip
+computing the undistortion maps and meshes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import depthai as dai
 import numpy as np
 
+from depthai_sdk.logger import LOGGER
+
+__all__ = ['MeshCache', 'get_mesh_cache', 'calibration_hash']
+
+DEFAULT_CACHE_DIR = Path.home() / '.depthai_sdk' / 'meshes'
+
+
+def _get_mesh(mapX: np.ndarray, mapY: np.ndarray, mesh_cell_size: int = 16) -> np.ndarray:
+    """
+    Creates subsampled mesh which will be loaded on to device to undistort the image. Mesh contains (y, x) source
+    coordinates of every `mesh_cell_size`-th pixel of each row and column, including the last row/column (pixels
+    past the edge use the edge pixels). Rows are padded with a (0, 0) point if the width modulo cell size is odd.
+
+    Returns:
+        float32 array, (rows, 2 * points per row).
+    """
+    height, width = mapX.shape
+    ys = np.minimum(np.arange(0, height + 1, mesh_cell_size), height - 1)
+    xs = np.minimum(np.arange(0, width + 1, mesh_cell_size), width - 1)
+
+    mesh = np.empty((len(ys), len(xs), 2), dtype=np.float32)
+    mesh[..., 0] = mapY[np.ix_(ys, xs)]
+    mesh[..., 1] = mapX[np.ix_(ys, xs)]
+    mesh = mesh.reshape(len(ys), -1)
+    if (width % mesh_cell_size) % 2 != 0:
+        mesh = np.pad(mesh, ((0, 0), (0, 2)))
+    return mesh
+
+
+def calibration_hash(calib: dai.CalibrationHandler) -> str:
+    """
+    Returns sha256 of the calibration data (EEPROM content), identifying the device's calibration.
+    """
+    data = json.dumps(calib.eepromToJson(), sort_keys=True).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+class MeshCache:
+    """
+    On-disk cache of warp meshes. Each entry is a `.npz` file with named meshes (eg. left and right), written
+    atomically, so concurrent processes never read a partially written file.
+    """
+
+    def __init__(self, path: Union[None, str, Path] = None):
+        """
+        Args:
+            path: Cache directory. Defaults to `DEPTHAI_SDK_MESH_CACHE` environment variable, or ~/.depthai_sdk/meshes.
+        """
+        if path is None:
+            path = os.environ.get('DEPTHAI_SDK_MESH_CACHE', DEFAULT_CACHE_DIR)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(calib_hash: str, resolution: Tuple[int, int], step: int, **params) -> str:
+        """
+        Returns cache key of meshes of the calibration (see calibration_hash), resolution (width, height),
+        mesh step and extra parameters that affect the meshes (eg. focal length offset).
+        """
+        extra = json.dumps(params, sort_keys=True)
+        key = f'{calib_hash}|{resolution[0]}x{resolution[1]}|{step}|{extra}'
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Returns cached meshes, or None if they aren't cached (or the cached file can't be read).
+        """
+        file = self.path / f'{key}.npz'
+        if not file.exists():
+            return None
+        try:
+            with np.load(file) as data:
+                return {name: data[name] for name in data.files}
+        except Exception as e:
+            LOGGER.warning(f'Cached mesh {file} can\'t be read ({e}), removing it from the cache.')
+            file.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, meshes: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **meshes)
+            os.replace(tmp, self.path / f'{key}.npz')
+
+    def resolve(self, key: str, create: Callable[[], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """
+        Returns cached meshes, or calls `create()` and caches its result. Caching errors (eg. read-only home
+        directory) are logged, meshes are still returned.
+        """
+        meshes = self.get(key)
+        if meshes is not None:
+            LOGGER.debug(f'Using cached meshes {key}')
+            return meshes
+
+        meshes = create()
+        try:
+            self.put(key, meshes)
+        except OSError as e:
+            LOGGER.warning(f'Meshes couldn\'t be cached: {e}')
+        return meshes
+
+    def clear(self) -> None:
+        with self._lock:
+            for file in self.path.glob('*.npz'):
+                file.unlink(missing_ok=True)
+
+
+_mesh_cache: Optional[MeshCache] = None
+
 
-def _get_mesh(mapX: np.ndarray, mapY: np.ndarray):
-    mesh_cell_size = 16
-    mesh0 = []
-    # Creates subsampled mesh which will be loaded on to device to undistort the image
-    for y in range(mapX.shape[0] + 1):  # iterating over height of the image
-        if y % mesh_cell_size == 0:
-            row_left = []
-            for x in range(mapX.shape[1] + 1):  # iterating over width of the image
-                if x % mesh_cell_size == 0:
-                    if y == mapX.shape[0] and x == mapX.shape[1]:
-                        row_left.append(mapY[y - 1, x - 1])
-                        row_left.append(mapX[y - 1, x - 1])
-                    elif y == mapX.shape[0]:
-                        row_left.append(mapY[y - 1, x])
-                        row_left.append(mapX[y - 1, x])
-                    elif x == mapX.shape[1]:
-                        row_left.append(mapY[y, x - 1])
-                        row_left.append(mapX[y, x - 1])
-                    else:
-                        row_left.append(mapY[y, x])
-                        row_left.append(mapX[y, x])
-            if (mapX.shape[1] % mesh_cell_size) % 2 != 0:
-                row_left.append(0)
-                row_left.append(0)
-
-            mesh0.append(row_left)
-
-    mesh0 = np.array(mesh0)
-    # mesh = list(map(tuple, mesh0))
-    return mesh0
+def get_mesh_cache() -> MeshCache:
+    """
+    Returns the default (process-wide) mesh cache.
+    """
+    global _mesh_cache
+    if _mesh_cache is None:
+        _mesh_cache = MeshCache()
+    return _mesh_cache
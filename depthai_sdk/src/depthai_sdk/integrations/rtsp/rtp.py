@@ -0,0 +1,128 @@
+import random
+import struct
+from typing import Iterator, List, Tuple, Union
+
+import numpy as np
+
+RTP_CLOCK_RATE = 90000  # Video RTP clock, RFC 6184 / RFC 7798
+RTP_PAYLOAD_TYPE = 96  # First dynamic payload type
+DEFAULT_MTU = 1400  # Max RTP payload size, leaves room for IP/UDP/RTP headers
+
+_RTP_HEADER = struct.Struct('!BBHII')
+
+H264_FU_A = 28
+H265_FU = 49
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def split_nal_units(data: Buffer) -> List[memoryview]:
+    """
+    Splits an Annex-B bitstream (as produced by the VideoEncoder) into NAL units, without start codes.
+    Returned NAL units are views into `data`, nothing gets copied.
+    """
+    view = memoryview(data).cast('B')
+    arr = np.frombuffer(view, dtype=np.uint8)
+    # Emulation prevention guarantees that 00 00 01 only occurs as a start code
+    ones = np.flatnonzero(arr[2:] == 1)
+    codes = ones[(arr[ones] == 0) & (arr[ones + 1] == 0)]
+
+    nals = []
+    for i, code in enumerate(codes):
+        start = int(code) + 3
+        end = int(codes[i + 1]) if i + 1 < len(codes) else len(arr)
+        if i + 1 < len(codes) and arr[end - 1] == 0:
+            end -= 1  # 4-byte start code (00 00 00 01), the leading zero belongs to the next start code
+        if start < end:
+            nals.append(view[start:end])
+    return nals
+
+
+def h264_nal_type(nal: Buffer) -> int:
+    return nal[0] & 0x1F
+
+
+def h265_nal_type(nal: Buffer) -> int:
+    return (nal[0] >> 1) & 0x3F
+
+
+def is_keyframe(nals: List[memoryview], h265: bool) -> bool:
+    """
+    Whether the access unit can be decoded on its own (contains an IDR/IRAP picture), so a new client can
+    start decoding from it.
+    """
+    if h265:
+        return any(16 <= h265_nal_type(nal) <= 21 for nal in nals)
+    return any(h264_nal_type(nal) == 5 for nal in nals)
+
+
+class RtpPacketizer:
+    """
+    Packetizes H.264 (RFC 6184) or H.265 (RFC 7798) access units into RTP packets. NAL units that don't fit
+    into a single packet are split into fragmentation units (FU-A / FU). Payloads are memoryview slices of the
+    encoded frame, so the bitstream is never copied; only the (12-15 byte) headers are created per packet.
+    """
+
+    def __init__(self, h265: bool = False, mtu: int = DEFAULT_MTU, ssrc: int = None):
+        """
+        Args:
+            h265: True for H.265 (HEVC) bitstream, False for H.264.
+            mtu: Maximum RTP payload size in bytes.
+            ssrc: RTP synchronization source identifier, random if not specified.
+        """
+        self.h265 = h265
+        self.mtu = mtu
+        self.ssrc = random.getrandbits(32) if ssrc is None else ssrc
+        self.seq = random.getrandbits(16)
+
+    def packetize(self, nals: List[memoryview], timestamp: int) -> Iterator[Tuple[bytes, Buffer]]:
+        """
+        Yields RTP packets of a single access unit (frame), each as a tuple of buffers that should be sent
+        together (eg. with `socket.sendmsg`). Marker bit is set on the last packet of the access unit.
+
+        Args:
+            nals: NAL units of the access unit, without start codes.
+            timestamp: RTP timestamp (90kHz clock).
+        """
+        timestamp &= 0xFFFFFFFF
+        for i, nal in enumerate(nals):
+            last_nal = i == len(nals) - 1
+            if len(nal) <= self.mtu:
+                yield self._header(timestamp, last_nal), nal
+            elif self.h265:
+                yield from self._fragment_h265(nal, timestamp, last_nal)
+            else:
+                yield from self._fragment_h264(nal, timestamp, last_nal)
+
+    def _fragment_h264(self, nal: memoryview, timestamp: int, marker: bool):
+        indicator = (nal[0] & 0xE0) | H264_FU_A
+        nal_type = nal[0] & 0x1F
+        payload = nal[1:]
+        size = self.mtu - 2
+        for offset in range(0, len(payload), size):
+            start = offset == 0
+            end = len(payload) <= offset + size
+            fu_header = (0x80 if start else 0) | (0x40 if end else 0) | nal_type
+            yield self._header(timestamp, marker and end) + bytes((indicator, fu_header)), \
+                payload[offset:offset + size]
+
+    def _fragment_h265(self, nal: memoryview, timestamp: int, marker: bool):
+        payload_header = bytes(((nal[0] & 0x81) | (H265_FU << 1), nal[1]))
+        nal_type = h265_nal_type(nal)
+        payload = nal[2:]
+        size = self.mtu - 3
+        for offset in range(0, len(payload), size):
+            start = offset == 0
+            end = len(payload) <= offset + size
+            fu_header = (0x80 if start else 0) | (0x40 if end else 0) | nal_type
+            yield self._header(timestamp, marker and end) + payload_header + bytes((fu_header,)), \
+                payload[offset:offset + size]
+
+    def _header(self, timestamp: int, marker: bool) -> bytes:
+        header = _RTP_HEADER.pack(0x80,  # Version 2, no padding, no extension, no CSRC
+                                  (0x80 if marker else 0) | RTP_PAYLOAD_TYPE,
+                                  self.seq,
+                                  timestamp,
+                                  self.ssrc)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return header
@@ -0,0 +1,466 @@
+import base64
+import random
+import socket
+import struct
+import threading
+from datetime import timedelta
+from queue import Queue, Empty, Full
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from depthai_sdk.integrations.rtsp.rtp import (
+    RTP_CLOCK_RATE,
+    RTP_PAYLOAD_TYPE,
+    DEFAULT_MTU,
+    Buffer,
+    RtpPacketizer,
+    split_nal_units,
+    h264_nal_type,
+    h265_nal_type,
+    is_keyframe
+)
+from depthai_sdk.logger import LOGGER
+
+_SERVER_NAME = 'depthai-sdk'
+_SESSION_TIMEOUT = 60  # Seconds, advertised to clients
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')  # Not available on Windows
+
+# NAL unit types of parameter sets, which are announced in the SDP
+_H264_PARAMETER_SETS = {7: 'sps', 8: 'pps'}
+_H265_PARAMETER_SETS = {32: 'vps', 33: 'sps', 34: 'pps'}
+
+
+def _send(sock: socket.socket, buffers: List[Buffer], address: Optional[Tuple[str, int]] = None) -> None:
+    """
+    Sends buffers as a single datagram (UDP) or contiguously (TCP). Uses scatter/gather IO where available,
+    so the payload doesn't have to be copied into a single buffer first.
+    """
+    if _HAS_SENDMSG:
+        if address is not None:
+            sock.sendmsg(buffers, (), 0, address)
+            return
+        size = sum(len(b) for b in buffers)
+        sent = sock.sendmsg(buffers)
+        if sent == size:
+            return
+        data = b''.join(buffers)[sent:]  # Partial send, rare
+    else:
+        data = b''.join(buffers)
+
+    if address is not None:
+        sock.sendto(data, address)
+    else:
+        sock.sendall(data)
+
+
+class RtspClient:
+    """
+    A single playing RTSP session. Frames are handed over through a bounded queue and sent on the client's own
+    thread, so a slow client only drops its own frames and never blocks the device callback thread. After a drop,
+    frames are skipped until the next keyframe, so the client's decoder doesn't get a broken reference chain.
+    """
+
+    def __init__(self,
+                 session_id: str,
+                 h265: bool,
+                 sock: socket.socket,
+                 send_lock: threading.Lock,
+                 address: Optional[Tuple[str, int]] = None,
+                 channel: int = 0,
+                 max_queue_size: int = 30,
+                 mtu: int = DEFAULT_MTU):
+        """
+        Args:
+            session_id: RTSP session ID.
+            h265: Whether the stream is H.265 (HEVC).
+            sock: UDP socket (if `address` is set) or RTSP TCP connection (interleaved RTP).
+            send_lock: Lock that guards writes to the RTSP TCP connection.
+            address: Client's RTP address for UDP transport, None for interleaved TCP transport.
+            channel: Interleaved RTP channel for TCP transport.
+            max_queue_size: Maximum number of frames queued for the client before frames get dropped.
+            mtu: Maximum RTP payload size.
+        """
+        self.session_id = session_id
+        self.packetizer = RtpPacketizer(h265, mtu)
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+
+        self._sock = sock
+        self._send_lock = send_lock
+        self._address = address
+        self._channel = channel
+        self._queue = Queue(maxsize=max_queue_size)
+        self._wait_keyframe = True  # Start with a keyframe
+        self._thread = threading.Thread(target=self._send_loop, name=f'RtspClient-{session_id}', daemon=True)
+
+    def start(self) -> None:
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def close(self) -> None:
+        self.closed = True
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def push(self, nals: List[memoryview], timestamp: int, keyframe: bool) -> None:
+        """
+        Queues a frame for sending. Never blocks.
+        """
+        if self._wait_keyframe:
+            if not keyframe:
+                return
+            self._wait_keyframe = False
+
+        try:
+            self._queue.put_nowait((nals, timestamp))
+        except Full:
+            self.dropped += 1
+            self._wait_keyframe = True
+
+    def _send_loop(self) -> None:
+        while not self.closed:
+            try:
+                nals, timestamp = self._queue.get(timeout=0.1)
+            except Empty:
+                continue
+
+            try:
+                for header, payload in self.packetizer.packetize(nals, timestamp):
+                    self._send_packet(header, payload)
+                self.sent += 1
+            except OSError as e:
+                LOGGER.debug(f'RTSP session {self.session_id} closed: {e}')
+                self.closed = True
+
+    def _send_packet(self, header: bytes, payload: Buffer) -> None:
+        if self._address is not None:
+            _send(self._sock, [header, payload], self._address)
+        else:
+            # RFC 2326, section 10.12: '$', channel, 2-byte length, RTP packet
+            frame = struct.pack('!cBH', b'$', self._channel, len(header) + len(payload))
+            with self._send_lock:
+                _send(self._sock, [frame, header, payload])
+
+
+class RtspStream:
+    """
+    Single H.264/H.265 stream, available at rtsp://host:port/<name>.
+    """
+
+    def __init__(self, name: str, h265: bool = False):
+        self.name = name
+        self.h265 = h265
+        self.parameter_sets: Dict[str, bytes] = {}
+        self.clients: Dict[str, RtspClient] = {}
+        self._lock = threading.Lock()
+
+    def add_client(self, client: RtspClient) -> None:
+        with self._lock:
+            self.clients[client.session_id] = client
+
+    def remove_client(self, session_id: str) -> Optional[RtspClient]:
+        with self._lock:
+            return self.clients.pop(session_id, None)
+
+    def send(self, data: Buffer, timestamp: int) -> None:
+        """
+        Forwards an encoded frame (Annex-B access unit) to all playing clients.
+
+        Args:
+            data: Encoded frame.
+            timestamp: RTP timestamp (90kHz clock).
+        """
+        nals = split_nal_units(data)
+        if not nals:
+            return
+        self._update_parameter_sets(nals)
+
+        with self._lock:
+            clients = list(self.clients.values())
+        keyframe = is_keyframe(nals, self.h265)
+        for client in clients:
+            if client.closed:
+                self.remove_client(client.session_id)
+                continue
+            client.push(nals, timestamp, keyframe)
+
+    def sdp(self, host: str) -> str:
+        lines = [
+            'v=0',
+            f'o=- {random.getrandbits(32)} 1 IN IP4 {host}',
+            f's={self.name}',
+            'c=IN IP4 0.0.0.0',
+            't=0 0',
+            'a=control:*',
+            f'm=video 0 RTP/AVP {RTP_PAYLOAD_TYPE}',
+        ]
+        b64 = {k: base64.b64encode(v).decode() for k, v in self.parameter_sets.items()}
+        if self.h265:
+            lines.append(f'a=rtpmap:{RTP_PAYLOAD_TYPE} H265/{RTP_CLOCK_RATE}')
+            if len(b64) == len(_H265_PARAMETER_SETS):
+                lines.append(f"a=fmtp:{RTP_PAYLOAD_TYPE} sprop-vps={b64['vps']};sprop-sps={b64['sps']};"
+                             f"sprop-pps={b64['pps']}")
+        else:
+            lines.append(f'a=rtpmap:{RTP_PAYLOAD_TYPE} H264/{RTP_CLOCK_RATE}')
+            fmtp = f'a=fmtp:{RTP_PAYLOAD_TYPE} packetization-mode=1'
+            if len(b64) == len(_H264_PARAMETER_SETS):
+                profile = self.parameter_sets['sps'][1:4].hex()
+                fmtp += f";profile-level-id={profile};sprop-parameter-sets={b64['sps']},{b64['pps']}"
+            lines.append(fmtp)
+        lines.append('a=control:trackID=0')
+        return '\r\n'.join(lines) + '\r\n'
+
+    def _update_parameter_sets(self, nals: List[memoryview]) -> None:
+        # Encoder repeats parameter sets before each keyframe, so they are only a few bytes to copy
+        for nal in nals:
+            if self.h265:
+                key = _H265_PARAMETER_SETS.get(h265_nal_type(nal))
+            else:
+                key = _H264_PARAMETER_SETS.get(h264_nal_type(nal))
+            if key is not None:
+                self.parameter_sets[key] = bytes(nal)
+
+
+class RtspServer:
+    """
+    Minimal RTSP server (RFC 2326) that serves H.264/H.265 streams over RTP, either via UDP or interleaved in
+    the RTSP TCP connection. Encoded frames are forwarded as they are, without decoding or re-encoding.
+
+    Each RTSP connection is handled on its own thread, and each playing client has its own sending thread.
+    """
+
+    def __init__(self, port: int = 8554, host: str = '0.0.0.0', max_queue_size: int = 30, mtu: int = DEFAULT_MTU):
+        """
+        Args:
+            port: RTSP (TCP) port.
+            host: Interface to listen on.
+            max_queue_size: Maximum number of frames queued per client. Slow clients drop frames above this limit.
+            mtu: Maximum RTP payload size.
+        """
+        self.port = port
+        self.host = host
+        self.max_queue_size = max_queue_size
+        self.mtu = mtu
+        self.streams: Dict[str, RtspStream] = {}
+
+        self._sock: Optional[socket.socket] = None
+        self._udp_sock: Optional[socket.socket] = None
+        self._connections: List[socket.socket] = []
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._lock = threading.Lock()
+
+    def add_stream(self, name: str, h265: bool = False) -> RtspStream:
+        """
+        Adds a stream, which will be available at rtsp://host:port/<name> (case-insensitive).
+        """
+        key = name.lower()
+        if key in self.streams:
+            raise ValueError(f'RTSP stream "{name}" already exists!')
+        self.streams[key] = RtspStream(name, h265)
+        return self.streams[key]
+
+    def send(self, name: str, data: Buffer, timestamp: timedelta) -> None:
+        """
+        Forwards an encoded frame to all clients of the stream.
+
+        Args:
+            name: Stream name.
+            data: Encoded frame (Annex-B access unit), eg. ImgFrame.getData() of the VideoEncoder bitstream.
+            timestamp: Frame timestamp, converted to the 90kHz RTP clock.
+        """
+        self.streams[name.lower()].send(data, int(timestamp.total_seconds() * RTP_CLOCK_RATE))
+
+    def get_urls(self) -> List[str]:
+        host = 'localhost' if self.host in ('0.0.0.0', '') else self.host
+        return [f'rtsp://{host}:{self.port}/{stream.name}' for stream in self.streams.values()]
+
+    def start(self) -> None:
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen()
+        self.port = self._sock.getsockname()[1]  # In case port 0 (any free port) was requested
+
+        self._udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp_sock.bind((self.host, 0))
+
+        self._running = True
+        self._start_thread(self._accept_loop, 'RtspServer')
+        for url in self.get_urls():
+            LOGGER.info(f'RTSP stream available at {url}')
+
+    def close(self) -> None:
+        self._running = False
+        with self._lock:
+            sockets = [self._sock, self._udp_sock] + self._connections
+        for sock in sockets:
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        for stream in self.streams.values():
+            for session_id in list(stream.clients):
+                stream.remove_client(session_id).close()
+
+    def _start_thread(self, target, name: str, args=()) -> None:
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                conn, address = self._sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._connections.append(conn)
+            self._start_thread(self._connection_loop, f'RtspConnection-{address[0]}:{address[1]}', (conn, address))
+
+    def _connection_loop(self, conn: socket.socket, address: Tuple[str, int]) -> None:
+        send_lock = threading.Lock()
+        sessions: Dict[str, Tuple[RtspStream, RtspClient]] = {}  # Sessions created on this connection
+        reader = conn.makefile('rb')
+        try:
+            while self._running:
+                request = self._read_request(reader)
+                if request is None:
+                    break
+                method, url, headers = request
+                status, response_headers, body, play = self._handle(method, url, headers, conn, address,
+                                                                    send_lock, sessions)
+                self._respond(conn, send_lock, status, headers.get('cseq', '0'), response_headers, body)
+                if play is not None:
+                    play.start()
+        except (OSError, ValueError) as e:
+            LOGGER.debug(f'RTSP connection {address} closed: {e}')
+        finally:
+            for stream, client in sessions.values():
+                stream.remove_client(client.session_id)
+                client.close()
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            reader.close()
+            conn.close()
+
+    @staticmethod
+    def _read_request(reader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+        while True:
+            first = reader.peek(1)[:1]
+            if not first:
+                return None
+            if first == b'$':
+                # Interleaved data sent by the client (RTCP receiver reports), skip it
+                header = reader.read(4)
+                if len(header) < 4:
+                    return None
+                reader.read(struct.unpack('!H', header[2:4])[0])
+                continue
+            line = reader.readline()
+            if not line:
+                return None
+            if line.strip():
+                break
+
+        method, url, _ = line.decode().strip().split(' ', 2)
+        headers = {}
+        while True:
+            line = reader.readline().decode().strip()
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length:
+            reader.read(length)  # Body isn't used by any of the supported methods
+        return method.upper(), url, headers
+
+    def _handle(self, method: str, url: str, headers: Dict[str, str], conn: socket.socket,
+                address: Tuple[str, int], send_lock: threading.Lock, sessions: Dict):
+        """
+        Returns (status, headers, body, client to start).
+        """
+        if method == 'OPTIONS':
+            return '200 OK', {'Public': 'OPTIONS, DESCRIBE, SETUP, PLAY, TEARDOWN, GET_PARAMETER'}, None, None
+        if method in ('GET_PARAMETER', 'SET_PARAMETER'):
+            return '200 OK', {}, None, None  # Keep-alive
+
+        stream = self._find_stream(url)
+        if method == 'DESCRIBE':
+            if stream is None:
+                return '404 Not Found', {}, None, None
+            base = url if url.endswith('/') else url + '/'
+            return '200 OK', {'Content-Base': base, 'Content-Type': 'application/sdp'}, \
+                stream.sdp(conn.getsockname()[0]), None
+
+        if method == 'SETUP':
+            if stream is None:
+                return '404 Not Found', {}, None, None
+            transport = headers.get('transport', '')
+            session_id = headers.get('session', '').split(';')[0] or f'{random.getrandbits(32):08X}'
+            params = dict(p.partition('=')[::2] for p in transport.split(';'))
+            if 'interleaved' in params:
+                channel = int(params['interleaved'].split('-')[0])
+                client = RtspClient(session_id, stream.h265, conn, send_lock, None, channel,
+                                    self.max_queue_size, self.mtu)
+                reply = f'RTP/AVP/TCP;unicast;interleaved={channel}-{channel + 1}'
+            elif 'client_port' in params:
+                rtp_port = int(params['client_port'].split('-')[0])
+                client = RtspClient(session_id, stream.h265, self._udp_sock, send_lock, (address[0], rtp_port), 0,
+                                    self.max_queue_size, self.mtu)
+                server_port = self._udp_sock.getsockname()[1]
+                reply = f"RTP/AVP;unicast;client_port={params['client_port']};" \
+                        f"server_port={server_port}-{server_port + 1}"
+            else:
+                return '461 Unsupported Transport', {}, None, None
+            reply += f';ssrc={client.packetizer.ssrc:08X}'
+            sessions[session_id] = (stream, client)
+            return '200 OK', {'Transport': reply, 'Session': f'{session_id};timeout={_SESSION_TIMEOUT}'}, None, None
+
+        session_id = headers.get('session', '').split(';')[0]
+        if session_id not in sessions:
+            return '454 Session Not Found', {}, None, None
+        stream, client = sessions[session_id]
+
+        if method == 'PLAY':
+            stream.add_client(client)
+            rtp_info = f'url={url};seq={client.packetizer.seq}'
+            return '200 OK', {'Session': session_id, 'Range': 'npt=0.000-', 'RTP-Info': rtp_info}, None, client
+        if method == 'TEARDOWN':
+            stream.remove_client(session_id)
+            client.close()
+            del sessions[session_id]
+            return '200 OK', {'Session': session_id}, None, None
+
+        return '405 Method Not Allowed', {}, None, None
+
+    def _find_stream(self, url: str) -> Optional[RtspStream]:
+        path = urlparse(url).path.strip('/').lower()
+        if path.endswith('trackid=0'):
+            path = path[:-len('trackid=0')].rstrip('/')
+        return self.streams.get(path)
+
+    @staticmethod
+    def _respond(conn: socket.socket, send_lock: threading.Lock, status: str, cseq: str,
+                 headers: Dict[str, str], body: Optional[str]) -> None:
+        lines = [f'RTSP/1.0 {status}', f'CSeq: {cseq}', f'Server: {_SERVER_NAME}']
+        lines += [f'{k}: {v}' for k, v in headers.items()]
+        payload = body.encode() if body else b''
+        if payload:
+            lines.append(f'Content-Length: {len(payload)}')
+        data = ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+        with send_lock:
+            conn.sendall(data)
@@ -0,0 +1,85 @@
+"""
+Preview page served by WebRtcServer at http://host:port/. Shows every stream and draws detections received on
+the 'overlays' data channel (Visualizer.serialize() JSON) on top of the video.
+"""
+
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>DepthAI SDK - WebRTC preview</title>
+<style>
+  body { background: #222; color: #ddd; font-family: sans-serif; margin: 0; }
+  .stream { position: relative; display: inline-block; margin: 8px; }
+  .stream video, .stream canvas { display: block; max-width: 100%; }
+  .stream canvas { position: absolute; left: 0; top: 0; pointer-events: none; }
+</style>
+</head>
+<body>
+<div id="streams"></div>
+<script>
+async function start() {
+  const names = await (await fetch('streams')).json();
+  const pc = new RTCPeerConnection();
+  const canvases = [];
+
+  for (const name of names) {
+    pc.addTransceiver('video', {direction: 'recvonly'});
+    const div = document.createElement('div');
+    div.className = 'stream';
+    div.innerHTML = '<video autoplay muted playsinline></video><canvas></canvas><div>' + name + '</div>';
+    document.getElementById('streams').appendChild(div);
+  }
+  const videos = document.querySelectorAll('.stream video');
+  document.querySelectorAll('.stream canvas').forEach(c => canvases.push(c));
+
+  pc.ontrack = (event) => {
+    const index = pc.getTransceivers().indexOf(event.transceiver);
+    videos[index].srcObject = new MediaStream([event.track]);
+  };
+
+  const overlays = pc.createDataChannel('overlays');
+  overlays.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    const shape = data.frame_shape;
+    canvases.forEach((canvas, i) => {
+      const video = videos[i];
+      canvas.width = video.clientWidth;
+      canvas.height = video.clientHeight;
+      const ctx = canvas.getContext('2d');
+      ctx.clearRect(0, 0, canvas.width, canvas.height);
+      if (!shape) return;
+      const sx = canvas.width / shape[1], sy = canvas.height / shape[0];
+      ctx.lineWidth = 2;
+      ctx.font = '14px sans-serif';
+      for (const obj of data.objects) {
+        if (obj.type !== 'detections') continue;
+        for (const det of obj.detections) {
+          const [x1, y1, x2, y2] = det.bbox;
+          const c = det.color || [0, 255, 0];
+          ctx.strokeStyle = ctx.fillStyle = 'rgb(' + c[2] + ',' + c[1] + ',' + c[0] + ')';  // BGR
+          ctx.strokeRect(x1 * sx, y1 * sy, (x2 - x1) * sx, (y2 - y1) * sy);
+          if (det.label) ctx.fillText(det.label, x1 * sx + 4, y1 * sy + 16);
+        }
+      }
+    });
+  };
+
+  await pc.setLocalDescription(await pc.createOffer());
+  // Wait for ICE candidates, server doesn't support trickle ICE
+  await new Promise((resolve) => {
+    if (pc.iceGatheringState === 'complete') return resolve();
+    pc.onicegatheringstatechange = () => pc.iceGatheringState === 'complete' && resolve();
+  });
+  const response = await fetch('offer', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({sdp: pc.localDescription.sdp, type: pc.localDescription.type})
+  });
+  await pc.setRemoteDescription(await response.json());
+}
+start();
+</script>
+</body>
+</html>
+"""
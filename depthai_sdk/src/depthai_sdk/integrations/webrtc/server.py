@@ -0,0 +1,394 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from fractions import Fraction
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import av
+from aiortc import (
+    MediaStreamTrack,
+    RTCConfiguration,
+    RTCIceServer,
+    RTCPeerConnection,
+    RTCRtpSender,
+    RTCSessionDescription
+)
+
+from depthai_sdk.integrations.rtsp.rtp import RTP_CLOCK_RATE, Buffer, is_keyframe, split_nal_units
+from depthai_sdk.integrations.webrtc.page import INDEX_HTML
+from depthai_sdk.logger import LOGGER
+
+_TIME_BASE = Fraction(1, RTP_CLOCK_RATE)
+_OVERLAY_CHANNEL = 'overlays'
+
+
+class EncodedVideoTrack(MediaStreamTrack):
+    """
+    Video track of a single peer that sends H.264 access units as they are (aiortc packetizes `av.Packet`s without
+    re-encoding them). Frames are queued per peer, so a slow peer only drops its own frames. After a drop, frames
+    are skipped until the next keyframe, so the peer's decoder doesn't get a broken reference chain.
+    """
+    kind = 'video'
+
+    def __init__(self, max_queue_size: int = 30):
+        super().__init__()
+        self.keyframes_only = False  # Set by congestion control of the peer
+        self.sent = 0
+        self.dropped = 0
+        self._queue = asyncio.Queue(max_queue_size)
+        self._wait_keyframe = True  # Start with a keyframe
+        self._started = False
+
+    def backlog(self) -> float:
+        """
+        Returns fill level of the queue (0..1).
+        """
+        return self._queue.qsize() / self._queue.maxsize
+
+    def push(self, data: bytes, pts: int, keyframe: bool) -> None:
+        """
+        Queues a frame for sending. Called from the event loop of the server, never blocks.
+        """
+        if self._wait_keyframe or self.keyframes_only:
+            if not keyframe:
+                if self._started:  # Frames before the first keyframe aren't counted as dropped
+                    self.dropped += 1
+                    self._wait_keyframe = True  # Following frames reference the dropped one
+                return
+            self._wait_keyframe = False
+            self._started = True
+
+        if self._queue.full():
+            self.dropped += 1
+            self._wait_keyframe = True
+            return
+        self._queue.put_nowait((data, pts))
+
+    async def recv(self) -> av.Packet:
+        data, pts = await self._queue.get()
+        packet = av.Packet(data)
+        packet.pts = pts
+        packet.time_base = _TIME_BASE
+        self.sent += 1
+        return packet
+
+
+class WebRtcPeer:
+    """
+    A single connected peer (eg. browser tab), with a track for each stream and an optional data channel for
+    overlays.
+
+    Congestion control: receiver reports of each track (packet loss) and the fill level of its queue are checked
+    every `stats_interval` seconds. When the peer is congested, only keyframes are forwarded to it (the device
+    encoder is shared by all peers, so its bitrate can't be lowered for a single peer). Full frame rate is restored
+    after `recover_intervals` intervals without congestion.
+    """
+
+    def __init__(self,
+                 pc: RTCPeerConnection,
+                 max_loss: float = 0.1,
+                 stats_interval: float = 1.0,
+                 recover_intervals: int = 3,
+                 max_overlay_buffer: int = 256 * 1024):
+        """
+        Args:
+            pc: Peer connection.
+            max_loss: Fraction of lost packets (as reported by the peer) above which the peer is congested.
+            stats_interval: Interval (seconds) of congestion checks.
+            recover_intervals: Number of intervals without congestion before full frame rate is restored.
+            max_overlay_buffer: Overlays are dropped while more than this many bytes are buffered on the data channel.
+        """
+        self.pc = pc
+        self.tracks: Dict[str, EncodedVideoTrack] = {}
+        self.senders: Dict[str, RTCRtpSender] = {}
+        self.overlay_channel = None
+        self.max_loss = max_loss
+        self.stats_interval = stats_interval
+        self.recover_intervals = recover_intervals
+        self.max_overlay_buffer = max_overlay_buffer
+        self.fraction_lost = 0.0
+        self.round_trip_time: Optional[float] = None
+        self.dropped_overlays = 0
+        self._congested: Dict[str, int] = {}  # Stream name -> intervals since the last congestion
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def add_track(self, name: str, track: EncodedVideoTrack, sender: RTCRtpSender) -> None:
+        self.tracks[name] = track
+        self.senders[name] = sender
+        self._congested[name] = self.recover_intervals
+
+    def start(self) -> None:
+        self._monitor_task = asyncio.ensure_future(self._monitor())
+
+    async def close(self) -> None:
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+        for track in self.tracks.values():
+            track.stop()
+        await self.pc.close()
+
+    def send_overlay(self, message: str) -> None:
+        channel = self.overlay_channel
+        if channel is None or channel.readyState != 'open':
+            return
+        if channel.bufferedAmount > self.max_overlay_buffer:
+            self.dropped_overlays += 1
+            return
+        channel.send(message)
+
+    def update_congestion(self, name: str, fraction_lost: float, backlog: float) -> bool:
+        """
+        Updates congestion state of a track from the fraction of lost packets and queue fill level (0..1).
+
+        Returns:
+            Whether only keyframes are forwarded to the peer.
+        """
+        track = self.tracks[name]
+        if fraction_lost > self.max_loss or backlog >= 0.5:
+            self._congested[name] = 0
+        elif fraction_lost <= self.max_loss / 2 and backlog == 0:
+            self._congested[name] += 1
+
+        keyframes_only = self._congested[name] < self.recover_intervals
+        if keyframes_only != track.keyframes_only:
+            LOGGER.debug(f'WebRTC peer {id(self):x}, stream {name}: '
+                         f'{"congested, forwarding keyframes only" if keyframes_only else "recovered"} '
+                         f'(loss {fraction_lost:.2f}, backlog {backlog:.2f})')
+        track.keyframes_only = keyframes_only
+        return keyframes_only
+
+    def get_stats(self) -> Dict:
+        return {
+            'fraction_lost': self.fraction_lost,
+            'round_trip_time': self.round_trip_time,
+            'dropped_overlays': self.dropped_overlays,
+            'streams': {name: {'sent': track.sent, 'dropped': track.dropped, 'keyframes_only': track.keyframes_only}
+                        for name, track in self.tracks.items()}
+        }
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            for name, sender in self.senders.items():
+                fraction_lost = 0.0
+                for stats in (await sender.getStats()).values():
+                    if stats.type == 'remote-inbound-rtp':
+                        fraction_lost = stats.fractionLost / 256  # 8-bit fixed point (RFC 3550)
+                        self.round_trip_time = stats.roundTripTime
+                self.fraction_lost = fraction_lost
+                self.update_congestion(name, fraction_lost, self.tracks[name].backlog())
+
+
+class WebRtcServer:
+    """
+    Serves H.264 streams over WebRTC, for low-latency preview in a browser. Encoded frames are forwarded to peers as
+    they are, without decoding or re-encoding. Overlays (eg. serialized Visualizer objects) are sent to peers on a
+    data channel.
+
+    Peers connect by POSTing an SDP offer ({"sdp": ..., "type": "offer"}) to http://host:port/offer, which returns
+    the answer. A preview page is served at http://host:port/. WebRTC runs on its own event loop thread, signaling
+    on an HTTP server thread.
+    """
+
+    def __init__(self,
+                 port: int = 8080,
+                 host: str = '0.0.0.0',
+                 max_queue_size: int = 30,
+                 max_loss: float = 0.1,
+                 stats_interval: float = 1.0,
+                 ice_servers: Optional[List[str]] = None):
+        """
+        Args:
+            port: HTTP (signaling) port.
+            host: Interface to listen on.
+            max_queue_size: Maximum number of frames queued per peer. Slow peers drop frames above this limit.
+            max_loss: Fraction of lost packets above which a peer only gets keyframes, see WebRtcPeer.
+            stats_interval: Interval (seconds) of congestion checks of each peer.
+            ice_servers: STUN/TURN server URLs, eg. ['stun:stun.l.google.com:19302']. Not needed on a local network.
+        """
+        self.port = port
+        self.host = host
+        self.max_queue_size = max_queue_size
+        self.max_loss = max_loss
+        self.stats_interval = stats_interval
+        self.ice_servers = ice_servers or []
+        self.streams: Dict[str, str] = {}  # Lowercase key -> stream name
+        self.peers: List[WebRtcPeer] = []
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._http: Optional[ThreadingHTTPServer] = None
+        self._http_thread: Optional[threading.Thread] = None
+
+    def add_stream(self, name: str, h265: bool = False) -> None:
+        """
+        Adds a stream. Each connected peer gets a video track for every stream, in the order of adding.
+        """
+        if h265:
+            raise ValueError(f'WebRTC streaming supports only H.264, stream "{name}" is H.265. '
+                             'Create the camera with encode="h264".')
+        if name.lower() in self.streams:
+            raise ValueError(f'WebRTC stream "{name}" already exists!')
+        self.streams[name.lower()] = name
+
+    def send(self, name: str, data: Buffer, timestamp: timedelta) -> None:
+        """
+        Forwards an encoded frame to all peers. Thread-safe, never blocks.
+
+        Args:
+            name: Stream name.
+            data: Encoded frame (Annex-B access unit), eg. ImgFrame.getData() of the VideoEncoder bitstream.
+            timestamp: Frame timestamp, converted to the 90kHz RTP clock.
+        """
+        if self._loop is None or not self.peers:
+            return
+        nals = split_nal_units(data)
+        if not nals:
+            return
+        # Single copy of the frame, shared by all peers
+        self._loop.call_soon_threadsafe(self._push, self.streams[name.lower()], bytes(data),
+                                        int(timestamp.total_seconds() * RTP_CLOCK_RATE), is_keyframe(nals, False))
+
+    def send_overlay(self, message: str) -> None:
+        """
+        Sends a message (eg. Visualizer.serialize()) to all peers on the overlay data channel. Thread-safe.
+        """
+        if self._loop is not None and self.peers:
+            self._loop.call_soon_threadsafe(self._push_overlay, message)
+
+    def get_urls(self) -> List[str]:
+        host = 'localhost' if self.host in ('0.0.0.0', '') else self.host
+        return [f'http://{host}:{self.port}/']
+
+    def start(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name='WebRtcServer', daemon=True)
+        self._loop_thread.start()
+
+        self._http = ThreadingHTTPServer((self.host, self.port), self._create_request_handler())
+        self._http.daemon_threads = True
+        self.port = self._http.server_address[1]  # In case port 0 (any free port) was requested
+        self._http_thread = threading.Thread(target=self._http.serve_forever, name='WebRtcSignaling', daemon=True)
+        self._http_thread.start()
+        for url in self.get_urls():
+            LOGGER.info(f'WebRTC preview available at {url}')
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http_thread.join()
+            self._http = None
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_peers(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def handle_offer(self, sdp: str, type: str = 'offer', timeout: float = 30) -> RTCSessionDescription:
+        """
+        Creates a peer from its SDP offer and returns the answer. Thread-safe, blocks until ICE candidates
+        are gathered.
+        """
+        return asyncio.run_coroutine_threadsafe(self.offer(RTCSessionDescription(sdp, type)), self._loop) \
+            .result(timeout=timeout)
+
+    async def offer(self, offer: RTCSessionDescription) -> RTCSessionDescription:
+        """
+        Creates a peer from its SDP offer and returns the answer. Runs on the event loop of the server.
+        The offer should have a (receive-only) video transceiver for each stream, and may have a data channel
+        labeled 'overlays'.
+        """
+        config = RTCConfiguration([RTCIceServer(url) for url in self.ice_servers]) if self.ice_servers else None
+        pc = RTCPeerConnection(config)
+        peer = WebRtcPeer(pc, self.max_loss, self.stats_interval)
+
+        @pc.on('datachannel')
+        def on_datachannel(channel):
+            if channel.label == _OVERLAY_CHANNEL:
+                peer.overlay_channel = channel
+
+        @pc.on('connectionstatechange')
+        async def on_connectionstatechange():
+            if pc.connectionState in ('failed', 'closed'):
+                await self._remove_peer(peer)
+
+        # Transceivers are created before applying the offer, so codecs are negotiated with H.264 preference
+        h264 = [codec for codec in RTCRtpSender.getCapabilities('video').codecs
+                if codec.mimeType in ('video/H264', 'video/rtx')]
+        for name in self.streams.values():
+            track = EncodedVideoTrack(self.max_queue_size)
+            transceiver = pc.addTransceiver(track, direction='sendonly')
+            transceiver.setCodecPreferences(h264)  # Device bitstream is H.264, it can't be re-encoded
+            peer.add_track(name, track, transceiver.sender)
+
+        await pc.setRemoteDescription(offer)
+        await pc.setLocalDescription(await pc.createAnswer())
+        self.peers.append(peer)
+        peer.start()
+        return pc.localDescription
+
+    def _push(self, name: str, data: bytes, pts: int, keyframe: bool) -> None:
+        for peer in self.peers:
+            track = peer.tracks.get(name)
+            if track is not None:
+                track.push(data, pts, keyframe)
+
+    def _push_overlay(self, message: str) -> None:
+        for peer in self.peers:
+            peer.send_overlay(message)
+
+    async def _remove_peer(self, peer: WebRtcPeer) -> None:
+        if peer in self.peers:
+            self.peers.remove(peer)
+        await peer.close()
+
+    async def _close_peers(self) -> None:
+        for peer in list(self.peers):
+            await self._remove_peer(peer)
+
+    def _create_request_handler(self):
+        server = self
+
+        class SignalingHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/':
+                    self._respond(200, INDEX_HTML.encode(), 'text/html')
+                elif self.path == '/streams':
+                    self._respond(200, json.dumps(list(server.streams.values())).encode())
+                else:
+                    self._respond(404, b'')
+
+            def do_POST(self):
+                if self.path != '/offer':
+                    self._respond(404, b'')
+                    return
+                try:
+                    params = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    answer = server.handle_offer(params['sdp'], params.get('type', 'offer'))
+                except Exception as e:
+                    LOGGER.warning(f'WebRTC offer from {self.client_address[0]} failed: {e}')
+                    self._respond(400, json.dumps({'error': str(e)}).encode())
+                    return
+                self._respond(200, json.dumps({'sdp': answer.sdp, 'type': answer.type}).encode())
+
+            def do_OPTIONS(self):
+                self._respond(204, b'')
+
+            def _respond(self, status: int, body: bytes, content_type: str = 'application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                # Allow offers from custom pages, eg. an operator dashboard on another host
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                LOGGER.debug(f'WebRTC signaling: {format % args}')
+
+        return SignalingHandler
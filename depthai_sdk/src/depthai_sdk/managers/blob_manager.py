@@ -4,6 +4,8 @@ import blobconverter
 from difflib import get_close_matches
 import depthai as dai
 
+from depthai_sdk import blob_cache
+
 
 class BlobManager:
     """
@@ -68,7 +70,8 @@ class BlobManager:
         """
         This function is responsible for returning a ready to use MyriadX blob once requested.
         It will compile the model automatically using our online blobconverter tool. The compilation process will be
-        ran only once, each subsequent call will return a path to previously compiled blob
+        ran only once, each subsequent call will return a path to previously compiled blob (from the local blob
+        cache, without network access)
 
         Args:
             shaves (int, Optional): Specify how many shaves the model will use. Range 1-16
@@ -90,11 +93,11 @@ class BlobManager:
             version = "2021.4" #FIXME
         if self._useZoo:
             try:
-                self._blobPath = blobconverter.from_zoo(
+                self._blobPath = blob_cache.from_zoo(
                     name=self._zooName,
                     shaves=shaves,
                     version=version,
-                    zoo_type=zooType
+                    zoo_type=zooType or 'intel'
                 )
                 self._useBlob = True
                 return self._blobPath
@@ -113,12 +116,15 @@ class BlobManager:
                     raise
         elif self._configPath is not None:
             name = self._configPath.parent.stem
-            self._blobPath = blobconverter.from_config(
-                name=name,
-                path=self._configPath,
-                version=version,
-                data_type="FP16",
-                shaves=shaves,
+            self._blobPath = blob_cache.get_blob_cache().resolve(
+                lambda: blobconverter.from_config(
+                    name=name,
+                    path=self._configPath,
+                    version=version,
+                    data_type="FP16",
+                    shaves=shaves,
+                ),
+                f'{name}-{blob_cache.hash_files(self._configPath)[:16]}', version, shaves
             )
             self._useBlob = True
             return self._blobPath
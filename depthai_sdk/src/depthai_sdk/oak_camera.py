@@ -1,3 +1,4 @@
+import asyncio
 import time
 import warnings
 from pathlib import Path
@@ -17,14 +18,18 @@ import depthai as dai
 
 from depthai_sdk.trigger_action.actions.abstract_action import Action
 from depthai_sdk.args_parser import ArgsParser
+from depthai_sdk.classes.enum import BackpressurePolicy
 from depthai_sdk.classes.packet_handlers import (
+    AsyncQueuePacketHandler,
     BasePacketHandler,
     QueuePacketHandler,
+    SharedMemoryPacketHandler,
     RosPacketHandler,
     TriggerActionPacketHandler,
     RecordPacketHandler,
     CallbackPacketHandler,
-    VisualizePacketHandler
+    VisualizePacketHandler,
+    StreamPacketHandler
 )
 # RecordConfig, OutputConfig, SyncConfig, RosStreamConfig, TriggerActionConfig
 from depthai_sdk.components.camera_component import CameraComponent
@@ -40,6 +45,17 @@ from depthai_sdk.components.parser import (
 )
 from depthai_sdk.components.stereo_component import StereoComponent
 from depthai_sdk.components.pointcloud_component import PointcloudComponent
+from depthai_sdk.integrations.rtsp.server import RtspServer
+from depthai_sdk.oak_outputs.frame_decoder import FrameDecoder
+from depthai_sdk.oak_outputs.bandwidth import (
+    BandwidthPlan,
+    BandwidthProfiler,
+    BandwidthWarning,
+    StreamBandwidth,
+    message_size,
+    plan_bandwidth,
+)
+from depthai_sdk.oak_outputs.stats import PipelineStats, StageStats
 from depthai_sdk.record import RecordType, Record
 from depthai_sdk.replay import Replay
 from depthai_sdk.trigger_action.triggers.abstract_trigger import Trigger
@@ -124,6 +140,20 @@ class OakCamera:
         self._components: List[Component] = []  # List of components
         self._packet_handlers: List[BasePacketHandler] = []
 
+        # Latency/throughput statistics of the packet pipeline, see config_stats()
+        self.stats: Optional[PipelineStats] = PipelineStats()
+        self._stats_log_interval: Optional[float] = None
+        self._xlink_stats: Dict[str, StageStats] = {}
+        # XLink traffic of device output streams, see config_bandwidth()
+        self.bandwidth: Optional[BandwidthProfiler] = BandwidthProfiler()
+        self.bandwidth_plan: Optional[BandwidthPlan] = None
+        self._bandwidth_check = True
+        self._bandwidth_streams: Dict[str, StreamBandwidth] = {}
+        self._decoder_config: Optional[Dict] = None  # See config_decoding()
+        self.decoder: Optional[FrameDecoder] = None
+
+        self._poll_task: Optional[asyncio.Future] = None  # See astart()
+
         self._rotation = rotation
         if replay is not None:
             self.replay = Replay(replay)
@@ -463,28 +493,119 @@ class OakCamera:
         if ov_version is not None:
             self.pipeline.setOpenVINOVersion(ov_version)
 
+    def config_stats(self, enable: bool = True, log_interval: Optional[float] = None):
+        """
+        Configures latency/throughput statistics of the packet pipeline (device queue -> Xout -> packet handler ->
+        user code). Statistics are enabled by default, they are available at `oak.stats`.
+
+        Args:
+            enable: Whether to collect statistics.
+            log_interval: If set, summary of the statistics gets logged every `log_interval` seconds.
+        """
+        self.stats = PipelineStats() if enable else None
+        self._stats_log_interval = log_interval if enable else None
+
+    def config_bandwidth(self, profile: bool = True, check: bool = True, window: float = 2.0):
+        """
+        Configures XLink bandwidth profiling and planning.
+
+        Args:
+            profile: Whether to measure bytes/messages per second of each device output stream, available
+                at `oak.bandwidth`.
+            check: Whether to estimate bandwidth of the pipeline when starting it (available at `oak.bandwidth_plan`),
+                and warn if it exceeds the budget of the link (USB2/USB3/PoE) the device is connected with.
+            window: Rates are measured over the last `window` seconds.
+        """
+        self.bandwidth = BandwidthProfiler(window) if profile else None
+        self._bandwidth_check = check
+
+    def _check_bandwidth(self) -> None:
+        """
+        Estimates bandwidth of the pipeline and warns if it exceeds the link budget. The estimate is only advisory,
+        so failures (eg. unexpected nodes or device info) don't prevent the pipeline from starting.
+        """
+        try:
+            self.bandwidth_plan = plan_bandwidth(self.pipeline, self.device)
+        except Exception as e:
+            LOGGER.warning(f'Bandwidth estimation failed, skipping the bandwidth check: {e}')
+            return
+        LOGGER.debug(self.bandwidth_plan.summary())
+        if self.bandwidth_plan.exceeded:
+            warnings.warn(f'{self.bandwidth_plan.summary()}\n'
+                          'Estimated bandwidth exceeds the link budget, expect FPS drops. Lower resolution/FPS, '
+                          'encode the streams or send fewer streams to the host.', BandwidthWarning)
+
+    def config_decoding(self,
+                        enable: bool = True,
+                        max_workers: Optional[int] = None,
+                        max_pending: int = 4,
+                        thread_type: Optional[str] = None,
+                        thread_count: int = 0):
+        """
+        Configures decoding of encoded (MJPEG/H.264/H.265) outputs on a thread pool. When enabled, frames are decoded
+        before packets reach the callbacks/visualizer, and multiple encoded streams get decoded in parallel. Otherwise
+        (default) frames are decoded lazily, on the thread that first accesses `packet.frame`.
+        Decode latency of each stream is reported in `oak.stats` (`decode` stage).
+
+        Args:
+            enable: Whether to decode frames on a thread pool.
+            max_workers: Number of decoding threads, defaults to the number of CPU cores (at most 4).
+            max_pending: Max number of frames of a single stream waiting to be decoded.
+            thread_type: Threading of each codec: 'SLICE', 'FRAME' or 'AUTO'. None keeps the FFmpeg default.
+            thread_count: Number of threads of each codec, 0 to let FFmpeg decide.
+        """
+        self._decoder_config = dict(max_workers=max_workers, max_pending=max_pending,
+                                    thread_type=thread_type, thread_count=thread_count) if enable else None
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
         self.close()
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.aclose()
+
     def close(self):
         LOGGER.info("Closing OAK camera")
         if self.replay:
             self.replay.close()
 
+        if self.decoder is not None:
+            self.decoder.close()  # Before handlers, so no more packets get delivered to them
+
         for handler in self._packet_handlers:
+            if handler.executor is not None:
+                handler.executor.close()  # Finish running callbacks before the handler gets closed
             handler.close()
 
+        if self.stats is not None:
+            self.stats.stop_logging()
+
         self.device.close()
 
     def _new_oak_msg(self, q_name: str, msg):
         if self._stop:
             return
         if q_name in self._new_msg_callbacks:
+            bandwidth = self._bandwidth_streams.get(q_name)
+            if bandwidth is not None:
+                bandwidth.add(message_size(msg))
+
+            stats = self._xlink_stats.get(q_name)
+            if stats is None:
+                for callback in self._new_msg_callbacks[q_name]:
+                    callback(q_name, msg)
+                return
+
+            start = time.perf_counter()
+            stats.add_device_msg(msg)
             for callback in self._new_msg_callbacks[q_name]:
                 callback(q_name, msg)
+            stats.add_processing(time.perf_counter() - start)
 
     def start(self, blocking=False):
         """
@@ -497,12 +618,30 @@ class OakCamera:
             if isinstance(node, dai.node.XLinkOut):
                 self._new_msg_callbacks[node.getStreamName()] = []
 
+        if self._decoder_config is not None:
+            self.decoder = FrameDecoder(**self._decoder_config, stats=self.stats)
+
         for handler in self._packet_handlers:
             # Setup PacketHandlers. This will:
             # - Initialize all submodules (eg. Recording, Trigger/Actions, Visualizer)
             # - Create XLinkIn nodes for all components/streams
+            handler.stats = self.stats
+            handler.decoder = self.decoder
             handler.setup(self.pipeline, self.device, self._new_msg_callbacks)
 
+        if self.stats is not None:
+            self._xlink_stats = {name: self.stats.stage(name, 'xlink') for name in self._new_msg_callbacks}
+            if self._stats_log_interval:
+                self.stats.start_logging(self._stats_log_interval)
+
+        xlink_streams = [node.getStreamName() for node in self.pipeline.getAllNodes()
+                         if isinstance(node, dai.node.XLinkOut)]
+        if self.bandwidth is not None:
+            # Replayed streams don't come over XLink
+            self._bandwidth_streams = {name: self.bandwidth.stream(name) for name in xlink_streams}
+        if self._bandwidth_check:
+            self._check_bandwidth()
+
         # Upload the pipeline to the device and start it
         self.device.startPipeline(self.pipeline)
 
@@ -537,6 +676,44 @@ class OakCamera:
             while self.running():
                 self.poll()
 
+    async def astart(self, poll_interval: float = 0.01):
+        """
+        Start the application from asyncio code. The pipeline is uploaded to the device on the default executor,
+        so the event loop isn't blocked, and polling (see `poll()`) continues as a task of the loop.
+        Packets are consumed through streams created with `oak.stream()`.
+
+        Args:
+            poll_interval: Seconds between polls of main-thread callbacks and of the device state.
+        """
+        loop = asyncio.get_running_loop()
+        for handler in self._packet_handlers:
+            if isinstance(handler, AsyncQueuePacketHandler):
+                handler.bind(loop)
+        await loop.run_in_executor(None, self.start)
+        self._poll_task = asyncio.ensure_future(self._apoll(poll_interval))
+
+    async def _apoll(self, interval: float) -> None:
+        while not self._stop:
+            for poll in self._polling:
+                poll()
+            if (self.replay and self.replay._stop) or self.device.isClosed():
+                self._stop = True
+            await asyncio.sleep(interval)
+        # End all streams, so `async for` loops over them finish
+        for handler in self._packet_handlers:
+            if isinstance(handler, AsyncQueuePacketHandler):
+                handler.close()
+
+    async def aclose(self):
+        """
+        Close the OAK camera from asyncio code, without blocking the event loop.
+        """
+        self._stop = True
+        if self._poll_task is not None:
+            await self._poll_task
+            self._poll_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
     def running(self) -> bool:
         """
         Check if camera is running.
@@ -586,18 +763,27 @@ class OakCamera:
     def record(self,
                outputs: Union[ComponentOutput, List[ComponentOutput]],
                path: str,
-               record_type: RecordType = RecordType.VIDEO
+               record_type: RecordType = RecordType.VIDEO,
+               max_queue_size: int = 20,
+               backpressure: Union[str, BackpressurePolicy] = BackpressurePolicy.BLOCK
                ) -> RecordPacketHandler:
         """
         Record component outputs. This handles syncing multiple streams (eg. left, right, color, depth) and saving
         them to the computer in desired format (raw, mp4, mcap, bag..).
 
+        Each stream is written from its own thread, through its own queue. Number of written/dropped frames and
+        write throughput of each stream are logged when recording ends.
+
         Args:
             outputs (Component/Component output): Component output(s) to be recorded.
             path: Folder path where to save these streams.
             record_type: Record type.
+            max_queue_size: Max number of frames queued for writing, per stream.
+            backpressure: What to do when a queue is full: block the callback thread (default, no frames are lost
+                on the host), or drop the oldest/newest frame.
         """
-        handler = RecordPacketHandler(outputs, Record(Path(path).resolve(), record_type))
+        recorder = Record(Path(path).resolve(), record_type, max_queue_size, backpressure)
+        handler = RecordPacketHandler(outputs, recorder)
         self._packet_handlers.append(handler)
         return handler
 
@@ -665,6 +851,43 @@ class OakCamera:
         self._packet_handlers.append(handler)
         return handler
 
+    def stream(self,
+               output: Union[ComponentOutput, Component, List],
+               max_size: int = 4,
+               policy: Union[str, BackpressurePolicy] = BackpressurePolicy.DROP_OLDEST) -> AsyncQueuePacketHandler:
+        """
+        Create an asyncio stream of the component output(s), consumed with `async for packet in oak.stream(output)`
+        after `await oak.astart()`. Packets are passed from the device callback thread to the event loop directly.
+
+        Args:
+            output: Component output(s) to be streamed. If component is passed, its default output is streamed.
+            max_size: Max number of packets waiting to be consumed.
+            policy: What to do with a new packet when `max_size` packets are waiting: 'drop_oldest' (default),
+                'drop_newest' or 'block' (device callback thread waits, new messages get dropped by the device queue).
+        """
+        handler = AsyncQueuePacketHandler(output, max_size, policy)
+        self._packet_handlers.append(handler)
+        return handler
+
+    def shared_memory(self,
+                      output: Union[ComponentOutput, Component, List],
+                      prefix: str = 'oak',
+                      num_slots: int = 4,
+                      slot_size: Optional[int] = None) -> SharedMemoryPacketHandler:
+        """
+        Publish frames of component output(s) to shared memory, for consumers in other processes. Each output is
+        available to SharedMemorySubscriber('<prefix>_<output name>'). Supports frame, depth and point cloud outputs.
+
+        Args:
+            output: Component output(s) to be published. If component is passed, its default output is published.
+            prefix: Prefix of shared memory segment names.
+            num_slots: Number of slots (packets) in the ring of each output.
+            slot_size: Max size (bytes) of a single packet, by default 1.5x the size of the first packet.
+        """
+        handler = SharedMemoryPacketHandler(output, prefix, num_slots, slot_size)
+        self._packet_handlers.append(handler)
+        return handler
+
     def callback(self,
                  output: Union[List, Callable, Component],
                  callback: Callable,
@@ -677,6 +900,9 @@ class OakCamera:
             output: Component output(s) to be visualized. If component is passed, SDK will visualize its default output.
             callback: Handler function to which the Packet will be sent.
             main_thread: Whether to run the callback in the main thread. If False, it will call the callback in a separate thread, so some functions (eg. cv2.imshow) won't work.
+
+        To run a slow callback on a thread pool, without stalling other outputs, use
+        `oak.callback(output, callback).configure_executor(max_workers=2)`.
         """
         handler = CallbackPacketHandler(output, callback=callback, main_thread=main_thread)
         if main_thread:
@@ -692,6 +918,59 @@ class OakCamera:
         self._packet_handlers.append(handler)
         return handler
 
+    def stream_rtsp(self,
+                    outputs: Union[ComponentOutput, Component, List],
+                    port: int = 8554,
+                    host: str = '0.0.0.0',
+                    max_queue_size: int = 30
+                    ) -> StreamPacketHandler:
+        """
+        Stream H.264/H.265 encoded component output(s) over RTSP. Encoded frames are forwarded to clients as they are,
+        without decoding or re-encoding. Each output is available at rtsp://host:port/<output name>.
+
+        Args:
+            outputs: Encoded component output(s) to be streamed, eg. oak.create_camera('color', encode='h264').
+            port: RTSP server port.
+            host: Interface on which the RTSP server listens.
+            max_queue_size: Maximum number of frames queued per client. Slow clients drop frames above this limit.
+        """
+        handler = StreamPacketHandler(outputs, RtspServer(port, host, max_queue_size))
+        self._packet_handlers.append(handler)
+        return handler
+
+    def stream_webrtc(self,
+                      outputs: Union[ComponentOutput, Component, List],
+                      overlays: Union[ComponentOutput, Component, List, None] = None,
+                      port: int = 8080,
+                      host: str = '0.0.0.0',
+                      max_queue_size: int = 30,
+                      max_loss: float = 0.1,
+                      ice_servers: Optional[List[str]] = None
+                      ) -> StreamPacketHandler:
+        """
+        Stream H.264 encoded component output(s) over WebRTC, for low-latency preview in a browser at
+        http://host:port/. Encoded frames are forwarded to peers as they are, without decoding or re-encoding.
+
+        Args:
+            outputs: Encoded component output(s) to be streamed, eg. oak.create_camera('color', encode='h264').
+            overlays: Component output(s) (eg. NN detections) whose visualizer objects are sent to peers on a data
+                channel, as Visualizer.serialize() JSON.
+            port: HTTP port of the preview page and signaling (POST /offer).
+            host: Interface on which the server listens.
+            max_queue_size: Maximum number of frames queued per peer. Slow peers drop frames above this limit.
+            max_loss: Fraction of lost packets (reported by a peer) above which the peer only gets keyframes.
+            ice_servers: STUN/TURN server URLs, not needed on a local network.
+        """
+        try:
+            from depthai_sdk.integrations.webrtc.server import WebRtcServer
+        except ImportError:
+            raise ImportError('WebRTC streaming requires aiortc. Please install it with `pip install aiortc`')
+
+        server = WebRtcServer(port, host, max_queue_size, max_loss, ice_servers=ice_servers)
+        handler = StreamPacketHandler(outputs, server, overlays)
+        self._packet_handlers.append(handler)
+        return handler
+
     def trigger_action(self, trigger: Trigger, action: Union[Action, Callable]) -> None:
         self._packet_handlers.append(TriggerActionPacketHandler(trigger, action))
 
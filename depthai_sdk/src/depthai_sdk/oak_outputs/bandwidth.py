@@ -0,0 +1,374 @@
+"""
+XLink bandwidth of the device output streams: BandwidthProfiler measures the actual traffic of each stream on the
+host, estimate_bandwidth() / plan_bandwidth() estimate it from the pipeline before it gets uploaded to the device,
+so a saturated USB2/USB3/PoE link gets noticed before frames start to drop.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import depthai as dai
+
+# Usable throughput of each link in bits/s. Measured throughput is well below the nominal link speed,
+# because of protocol overhead and the host USB/network stack.
+LINK_BUDGETS = {
+    'usb2': 280e6,  # High speed, 480 Mbps nominal
+    'usb3': 3.2e9,  # Super speed, 5 Gbps nominal
+    'usb3.2': 6.4e9,  # Super speed plus, 10 Gbps nominal
+    'poe': 700e6,  # 1 Gbps ethernet
+}
+
+_USB_LINKS = {
+    dai.UsbSpeed.HIGH: 'usb2',
+    dai.UsbSpeed.SUPER: 'usb3',
+    dai.UsbSpeed.SUPER_PLUS: 'usb3.2',
+}
+
+# Estimated size of messages without image data (detections, tracklets, IMU reports, ...)
+_METADATA_BYTES = 1024
+# Bits per pixel of H.26x streams when the bitrate is left to the encoder (0 kbps)
+_H26X_BITS_PER_PIXEL = {
+    dai.VideoEncoderProperties.Profile.H264_BASELINE: 0.1,
+    dai.VideoEncoderProperties.Profile.H264_HIGH: 0.1,
+    dai.VideoEncoderProperties.Profile.H264_MAIN: 0.1,
+    dai.VideoEncoderProperties.Profile.H265_MAIN: 0.07,
+}
+# Passthrough outputs and the inputs they forward
+_PASSTHROUGH_INPUTS = {
+    'passthrough': 'in',
+    'passthroughDepth': 'inputDepth',
+    'passthroughInputImage': 'inputImage',
+    'passthroughTrackerFrame': 'inputTrackerFrame',
+    'passthroughDetectionFrame': 'inputDetectionFrame',
+    'passthroughDetections': 'inputDetections',
+}
+
+
+class BandwidthWarning(UserWarning):
+    pass
+
+
+def message_size(msg) -> int:
+    """
+    Returns the payload size (bytes) of a device message. Messages without raw data (eg. IMU, detections)
+    have a size of 0; their serialized metadata isn't counted.
+    """
+    try:
+        return msg.getData().nbytes  # View into the message, no copy
+    except AttributeError:
+        return 0
+
+
+class StreamBandwidth:
+    """
+    Traffic of a single XLink stream: totals, and rates over a sliding window of the last `window` seconds.
+    """
+
+    def __init__(self, stream: str, window: float = 2.0):
+        self.stream = stream
+        self.window = window
+        self.count = 0
+        self.total_bytes = 0
+        self._samples = deque()  # (time, bytes) of messages inside the window
+        self._window_bytes = 0
+        self._start: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            self.count += 1
+            self.total_bytes += nbytes
+            self._samples.append((now, nbytes))
+            self._window_bytes += nbytes
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        samples = self._samples
+        while samples and samples[0][0] < now - self.window:
+            self._window_bytes -= samples.popleft()[1]
+
+    def rates(self, now: Optional[float] = None) -> Tuple[float, float]:
+        """
+        Returns (bytes per second, messages per second) over the window.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._start is None:
+                return 0.0, 0.0
+            self._trim(now)
+            span = min(self.window, now - self._start)
+            if span <= 0:
+                return 0.0, 0.0
+            return self._window_bytes / span, len(self._samples) / span
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        bytes_per_sec, msgs_per_sec = self.rates(now)
+        return {
+            'bytes_per_sec': bytes_per_sec,
+            'msgs_per_sec': msgs_per_sec,
+            'mbps': bytes_per_sec * 8 / 1e6,
+            'count': self.count,
+            'total_bytes': self.total_bytes,
+        }
+
+    def reset(self) -> None:
+        self.__init__(self.stream, self.window)
+
+
+class BandwidthProfiler:
+    """
+    Measures bytes and messages per second of each XLink stream, from the sizes of messages received on the host.
+    """
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self.streams: Dict[str, StreamBandwidth] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, name: str) -> StreamBandwidth:
+        """
+        Returns (and creates, if needed) the traffic counter of the stream.
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            with self._lock:
+                stream = self.streams.setdefault(name, StreamBandwidth(name, self.window))
+        return stream
+
+    def add(self, name: str, msg) -> None:
+        self.stream(name).add(message_size(msg))
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Returns {stream: stats} snapshot: bytes_per_sec, msgs_per_sec, mbps (megabits per second), count
+        and total_bytes.
+        """
+        return {name: stream.snapshot(now) for name, stream in list(self.streams.items())}
+
+    def get_total(self, now: Optional[float] = None) -> float:
+        """
+        Returns current traffic of all streams in bits per second.
+        """
+        return sum(stream.rates(now)[0] for stream in list(self.streams.values())) * 8
+
+    def summary(self, budget: Optional[float] = None, now: Optional[float] = None) -> str:
+        total = self.get_total(now)
+        line = f'XLink bandwidth: {total / 1e6:.1f} Mbps'
+        if budget:
+            line += f' ({100 * total / budget:.0f}% of {budget / 1e6:.0f} Mbps)'
+        lines = [line]
+        for name, stats in sorted(self.get_stats(now).items()):
+            lines.append(f'  {name}: {stats["mbps"]:.1f} Mbps, {stats["msgs_per_sec"]:.1f} msg/s')
+        return '\n'.join(lines)
+
+    def reset(self) -> None:
+        for stream in list(self.streams.values()):
+            stream.reset()
+
+
+@dataclass
+class StreamEstimate:
+    """
+    Estimated traffic of an XLink stream. Sizes of encoded frames are rough (they depend on the scene),
+    `msg_bytes` is None if the size of messages couldn't be estimated.
+    """
+    stream: str
+    fps: Optional[float]
+    msg_bytes: Optional[float]
+    description: str
+
+    @property
+    def bytes_per_sec(self) -> Optional[float]:
+        if self.fps is None or self.msg_bytes is None:
+            return None
+        return self.fps * self.msg_bytes
+
+
+@dataclass
+class BandwidthPlan:
+    streams: List[StreamEstimate]
+    link: Optional[str] = None  # Key of LINK_BUDGETS, None if unknown
+    budget: Optional[float] = None  # Bits per second
+    unknown: List[str] = field(default_factory=list)  # Streams that couldn't be estimated
+
+    @property
+    def total(self) -> float:
+        """
+        Estimated traffic of all streams in bits per second.
+        """
+        return sum(s.bytes_per_sec or 0 for s in self.streams) * 8
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.budget < self.total
+
+    def summary(self) -> str:
+        line = f'Estimated XLink bandwidth: {self.total / 1e6:.1f} Mbps'
+        if self.budget is not None:
+            line += f' ({100 * self.total / self.budget:.0f}% of {self.link} budget, {self.budget / 1e6:.0f} Mbps)'
+        lines = [line]
+        for s in sorted(self.streams, key=lambda s: -(s.bytes_per_sec or 0)):
+            rate = '?' if s.bytes_per_sec is None else f'{s.bytes_per_sec * 8 / 1e6:.1f}'
+            lines.append(f'  {s.stream}: {rate} Mbps ({s.description})')
+        return '\n'.join(lines)
+
+
+class _Output(NamedTuple):
+    fps: Optional[float]
+    size: Optional[Tuple[int, int]]  # Width, height of frames
+    msg_bytes: Optional[float]
+    description: str
+
+
+def _frame(fps: float, size: Tuple[int, int], bytes_per_pixel: float, description: str) -> _Output:
+    width, height = size
+    return _Output(fps, (width, height), width * height * bytes_per_pixel, f'{description} {width}x{height}')
+
+
+def _encoded_bytes(encoder: dai.node.VideoEncoder, fps: Optional[float], size: Tuple[int, int]) -> Tuple[float, str]:
+    width, height = size
+    profile = encoder.getProfile()
+    if profile == dai.VideoEncoderProperties.Profile.MJPEG:
+        if encoder.getLossless():
+            return width * height * 0.75, 'lossless MJPEG'
+        # ~1.5 bits per pixel at quality 95, dropping quickly with lower quality
+        quality = encoder.getQuality()
+        return width * height * 1.6 * (quality / 100) ** 2 / 8, f'MJPEG q{quality}'
+
+    codec = 'H.265' if profile == dai.VideoEncoderProperties.Profile.H265_MAIN else 'H.264'
+    bitrate = encoder.getBitrateKbps() * 1000
+    if bitrate <= 0:
+        bitrate = width * height * (fps or encoder.getFrameRate()) * _H26X_BITS_PER_PIXEL[profile]
+    return bitrate / 8 / (fps or encoder.getFrameRate()), f'{codec} {bitrate / 1e6:.1f} Mbps'
+
+
+class _PipelineGraph:
+    def __init__(self, pipeline: dai.Pipeline):
+        self.nodes = {node.id: node for node in pipeline.getAllNodes()}
+        self.sources = {(c.inputId, c.inputName): (c.outputId, c.outputName) for c in pipeline.getConnections()}
+
+    def input(self, node: dai.Node, name: str) -> Optional[_Output]:
+        source = self.sources.get((node.id, name))
+        return None if source is None else self.output(*source)
+
+    def output(self, node_id: int, name: str) -> Optional[_Output]:
+        node = self.nodes[node_id]
+
+        if isinstance(node, dai.node.ColorCamera):
+            fps = node.getFps()
+            if name == 'video':
+                return _frame(fps, node.getVideoSize(), 1.5, 'NV12')
+            if name == 'preview':
+                return _frame(fps, node.getPreviewSize(), 6 if node.getFp16() else 3, 'RGB')
+            if name == 'isp':
+                return _frame(fps, node.getIspSize(), 1.5, 'YUV420')
+            if name == 'raw':
+                return _frame(fps, node.getResolutionSize(), 1.25, 'RAW10')
+            if name == 'still':
+                return _frame(0, node.getStillSize(), 1.5, 'NV12 still')
+        elif isinstance(node, dai.node.MonoCamera):
+            fps, size = node.getFps(), node.getResolutionSize()
+            return _frame(fps, size, 1.25, 'RAW10') if name == 'raw' else _frame(fps, size, 1, 'GRAY8')
+        elif isinstance(node, dai.node.Camera):
+            fps = node.getFps()
+            if name == 'video':
+                return _frame(fps, node.getVideoSize(), 1.5, 'NV12')
+            if name == 'preview':
+                return _frame(fps, node.getPreviewSize(), 3, 'RGB')
+            if name == 'isp':
+                return _frame(fps, node.getSize(), 1.5, 'YUV420')
+            if name == 'still':
+                return _frame(0, node.getStillSize(), 1.5, 'NV12 still')
+        elif isinstance(node, dai.node.VideoEncoder):
+            frames = self.input(node, 'in')
+            if frames is None or frames.size is None:
+                return None
+            msg_bytes, description = _encoded_bytes(node, frames.fps, frames.size)
+            return _Output(frames.fps, frames.size, msg_bytes, f'{description} {frames.size[0]}x{frames.size[1]}')
+        elif isinstance(node, dai.node.StereoDepth):
+            mono = self.input(node, 'left')
+            if mono is None or mono.size is None:
+                return None
+            config = node.initialConfig.get().algorithmControl
+            if name == 'depth':
+                return _frame(mono.fps, mono.size, 2, 'depth')
+            if name == 'disparity':
+                return _frame(mono.fps, mono.size, 2 if config.enableSubpixel else 1, 'disparity')
+            if name in ('rectifiedLeft', 'rectifiedRight', 'syncedLeft', 'syncedRight', 'confidenceMap'):
+                return _frame(mono.fps, mono.size, 1, name)
+        elif isinstance(node, dai.node.ImageManip):
+            frames = self.input(node, 'inputImage')
+            if frames is None:
+                return None
+            config = node.initialConfig
+            size = (config.getResizeWidth(), config.getResizeHeight())
+            if 0 in size or frames.size is None:
+                return frames._replace(description=f'ImageManip of {frames.description}')
+            bytes_per_pixel = frames.msg_bytes / (frames.size[0] * frames.size[1]) if frames.msg_bytes else 1.5
+            return _frame(frames.fps, size, bytes_per_pixel, 'ImageManip')
+
+        if name in _PASSTHROUGH_INPUTS:
+            # NN / tracker / spatial calculator forwards its input
+            frames = self.input(node, _PASSTHROUGH_INPUTS[name])
+            if frames is None or name != 'passthroughDetections':
+                return frames
+            return _Output(frames.fps, None, _METADATA_BYTES, 'detections')
+        if isinstance(node, (dai.node.DetectionNetwork, dai.node.SpatialDetectionNetwork, dai.node.ObjectTracker,
+                             dai.node.SpatialLocationCalculator, dai.node.FeatureTracker, dai.node.AprilTag)):
+            # Metadata of each frame of the first connected input
+            for input_name in ('in', 'inputTrackerFrame', 'inputDepth', 'inputImage'):
+                frames = self.input(node, input_name)
+                if frames is not None:
+                    return _Output(frames.fps, None, _METADATA_BYTES, f'{type(node).__name__} metadata')
+        return None
+
+
+def estimate_bandwidth(pipeline: dai.Pipeline) -> List[StreamEstimate]:
+    """
+    Estimates traffic of each XLinkOut stream of the pipeline, from resolution, FPS and encoder settings of the
+    nodes the stream comes from (camera -> [ImageManip / StereoDepth / VideoEncoder / NN passthrough] -> XLinkOut).
+    """
+    graph = _PipelineGraph(pipeline)
+    estimates = []
+    for node in graph.nodes.values():
+        if not isinstance(node, dai.node.XLinkOut):
+            continue
+        output = graph.input(node, 'in')
+        if output is None:
+            estimates.append(StreamEstimate(node.getStreamName(), None, None, 'unknown'))
+            continue
+
+        fps = output.fps
+        fps_limit = node.getFpsLimit()
+        if fps is not None and 0 < fps_limit < fps:
+            fps = fps_limit
+        msg_bytes = _METADATA_BYTES if node.getMetadataOnly() else output.msg_bytes
+        estimates.append(StreamEstimate(node.getStreamName(), fps, msg_bytes, f'{output.description} @ {fps:g} FPS'
+                                        if fps is not None else output.description))
+    return estimates
+
+
+def link_budget(device: dai.Device) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Returns the link the device is connected with (key of LINK_BUDGETS) and its budget in bits/s,
+    or (None, None) if it's unknown.
+    """
+    if device.getDeviceInfo().protocol == dai.XLinkProtocol.X_LINK_TCP_IP:
+        link = 'poe'
+    else:
+        link = _USB_LINKS.get(device.getUsbSpeed())
+    return link, LINK_BUDGETS.get(link)
+
+
+def plan_bandwidth(pipeline: dai.Pipeline, device: Optional[dai.Device] = None) -> BandwidthPlan:
+    """
+    Estimates traffic of the pipeline and compares it against the budget of the link the device is connected with.
+    """
+    estimates = estimate_bandwidth(pipeline)
+    link, budget = link_budget(device) if device is not None else (None, None)
+    return BandwidthPlan(estimates, link, budget, unknown=[s.stream for s in estimates if s.bytes_per_sec is None])
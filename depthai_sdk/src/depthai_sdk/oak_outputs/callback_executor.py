@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from depthai_sdk.classes.enum import BackpressurePolicy
+from depthai_sdk.logger import LOGGER
+from depthai_sdk.oak_outputs.stats import StageStats
+
+
+class _CallbackStream:
+    """
+    Packets of a single stream waiting for the callback.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pending: Deque[Tuple[float, Any]] = deque()  # (enqueue time, packet)
+        self.running = 0
+
+
+class CallbackExecutor:
+    """
+    Runs callbacks of a packet handler on a pool of threads (or processes), so a slow callback doesn't stall the
+    XLink callback thread, and with it all the other streams (visualization, recording, ...).
+
+    - At most `max_in_flight` callbacks of the handler run at once.
+    - Each stream has at most `max_pending` packets waiting for a free slot; when it's full, `policy` decides which
+      packet gets dropped (or whether the XLink callback thread waits). `max_pending=1` with DROP_OLDEST (default)
+      keeps only the latest packet of each stream.
+    - If `ordered`, packets of a stream are passed to the callback one after another, in order. Otherwise packets of
+      the same stream may be processed in parallel; they are still started in order, but may finish out of order.
+
+    Any `concurrent.futures.Executor` can be used. With a ProcessPoolExecutor, the callback has to be picklable
+    (a module-level function) and so do its arguments; packets hold depthai messages, which aren't, so pass
+    `prepare` that converts a packet into picklable data (eg. `lambda packet: packet.frame`).
+    """
+
+    def __init__(self,
+                 callback: Callable,
+                 max_workers: int = 1,
+                 max_in_flight: Optional[int] = None,
+                 max_pending: int = 1,
+                 policy: Union[str, BackpressurePolicy] = BackpressurePolicy.DROP_OLDEST,
+                 ordered: bool = True,
+                 executor: Optional[Executor] = None,
+                 prepare: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            callback: Function called with each packet (or with `prepare(packet)`).
+            max_workers: Number of threads of the pool, if `executor` isn't passed.
+            max_in_flight: Max number of callbacks running at once, defaults to `max_workers`.
+            max_pending: Max number of packets of a single stream waiting for the callback.
+            policy: What to do when `max_pending` packets of the stream are already waiting: 'drop_oldest',
+                'drop_newest' or 'block' (the XLink callback thread waits).
+            ordered: Whether packets of a stream are processed one after another.
+            executor: Executor to run callbacks on. It isn't shut down by close().
+            prepare: Converts packets before they get submitted to the executor.
+        """
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        self.callback = callback
+        self.max_in_flight = max_in_flight or max_workers
+        self.max_pending = max_pending
+        self.policy = BackpressurePolicy.parse(policy)
+        self.ordered = ordered
+        self.prepare = prepare
+        self.drops = 0
+
+        # Assigned by the packet handler, if stats are enabled
+        self.handoff_stats: Optional[StageStats] = None
+        self.handler_stats: Optional[StageStats] = None
+
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers, thread_name_prefix='CallbackExecutor')
+        self._streams: Dict[str, _CallbackStream] = {}
+        self._order: List[_CallbackStream] = []  # Streams in round-robin order
+        self._next = 0
+        self._in_flight = 0
+        self._futures = set()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def submit(self, packet) -> None:
+        """
+        Queues the packet for the callback. Called from the XLink callback thread.
+        """
+        name = ';'.join(packet) if isinstance(packet, dict) else packet.name  # Synced packets
+        with self._cond:
+            if self._closed:
+                return
+            stream = self._streams.get(name)
+            if stream is None:
+                stream = self._streams[name] = _CallbackStream(name)
+                self._order.append(stream)
+
+            if self.max_pending <= len(stream.pending):
+                if self.policy == BackpressurePolicy.BLOCK:
+                    while self.max_pending <= len(stream.pending) and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                else:
+                    if self.policy == BackpressurePolicy.DROP_OLDEST:
+                        stream.pending.popleft()
+                    self._drop()
+                    if self.policy == BackpressurePolicy.DROP_NEWEST:
+                        return
+
+            stream.pending.append((time.perf_counter(), packet))
+            if self.handoff_stats is not None:
+                self.handoff_stats.add_depth(len(stream.pending))
+            jobs = self._take_jobs()
+        self._start(jobs)
+
+    def _drop(self) -> None:
+        self.drops += 1
+        if self.handoff_stats is not None:
+            self.handoff_stats.add_drop()
+
+    def _take_jobs(self) -> List[Tuple[_CallbackStream, float, Any]]:
+        """
+        Takes packets that can be started now, round-robin over streams. Called with the lock held.
+        """
+        jobs = []
+        idle = 0  # Streams in a row without a packet that could be started
+        while self._in_flight < self.max_in_flight and self._order and idle < len(self._order):
+            stream = self._order[self._next % len(self._order)]
+            self._next = (self._next + 1) % len(self._order)
+            if not stream.pending or (self.ordered and stream.running):
+                idle += 1
+                continue
+            idle = 0
+            queued_at, packet = stream.pending.popleft()
+            stream.running += 1
+            self._in_flight += 1
+            jobs.append((stream, queued_at, packet))
+        if jobs:
+            self._cond.notify_all()  # Space in pending queues
+        return jobs
+
+    def _start(self, jobs: List[Tuple[_CallbackStream, float, Any]]) -> None:
+        # Submitted without the lock held, as a done callback of an already finished future runs right away
+        for stream, queued_at, packet in jobs:
+            start = time.perf_counter()
+            if self.handoff_stats is not None:
+                self.handoff_stats.add_latency(start - queued_at)
+            try:
+                future = self._executor.submit(self.callback, self.prepare(packet) if self.prepare else packet)
+            except Exception as e:  # Executor shut down, or prepare() failed
+                LOGGER.error(f'Submitting callback of {stream.name} failed: {e}')
+                self._finish(stream)
+                continue
+            with self._cond:
+                self._futures.add(future)
+            future.add_done_callback(partial(self._done, stream, start))
+
+    def _done(self, stream: _CallbackStream, start: float, future: Future) -> None:
+        if self.handler_stats is not None:
+            self.handler_stats.add_processing(time.perf_counter() - start)
+        if not future.cancelled() and future.exception() is not None:
+            error = future.exception()
+            LOGGER.error(f'Callback of {stream.name} failed: {error!r}', exc_info=error)
+        with self._cond:
+            self._futures.discard(future)
+        self._finish(stream)
+
+    def _finish(self, stream: _CallbackStream) -> None:
+        with self._cond:
+            stream.running -= 1
+            self._in_flight -= 1
+            jobs = [] if self._closed else self._take_jobs()
+            self._cond.notify_all()
+        self._start(jobs)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until all queued packets were processed. Returns False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._in_flight == 0 and not any(s.pending for s in self._streams.values()), timeout)
+
+    def close(self, wait_running: bool = True) -> None:
+        """
+        Discards packets that weren't passed to the callback yet, and waits for the running callbacks.
+        """
+        with self._cond:
+            self._closed = True
+            for stream in self._streams.values():
+                stream.pending.clear()
+            futures = list(self._futures)
+            self._cond.notify_all()
+        if wait_running:
+            wait(futures)
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait_running)
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from depthai_sdk.classes.packets import BasePacket, FramePacket
+from depthai_sdk.logger import LOGGER
+from depthai_sdk.oak_outputs.stats import PipelineStats, StageStats
+
+
+class _DecodeStream:
+    """
+    Packets of a single Xout waiting to be decoded. Packets of a stream are decoded one after another (by any thread
+    of the pool), so the stream's codec context is never used by two threads at once, and packets are delivered
+    in order.
+    """
+
+    def __init__(self, name: str, stats: Optional[StageStats]):
+        self.name = name
+        self.stats = stats
+        self.pending: Deque[Tuple[float, List[BasePacket], Callable]] = deque()
+        self.scheduled = False  # Whether a pool thread is draining the stream
+        self.cond = threading.Condition()
+
+
+class FrameDecoder:
+    """
+    Decodes encoded frames (MJPEG, H.264, H.265) on a bounded pool of threads, before packets reach packet handlers,
+    so multiple encoded streams are decoded in parallel instead of one after another on the thread that first
+    accesses `FramePacket.frame` (usually the main/visualization thread).
+
+    Each stream keeps its own codec context (`XoutFrames.get_codec()`). PyAV releases the GIL while decoding and
+    converting frames to BGR, so decoding on the pool doesn't block the other Python threads.
+
+    Each stream has at most `max_pending` packets waiting to be decoded; if decoding can't keep up, the XLink callback
+    thread waits, so new frames get dropped by the non-blocking device queue (and show up as `xlink` drops in stats)
+    instead of piling up on the host.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_pending: int = 4,
+                 thread_type: Optional[str] = None,
+                 thread_count: int = 0,
+                 stats: Optional[PipelineStats] = None):
+        """
+        Args:
+            max_workers: Number of decoding threads. Defaults to the number of CPU cores, at most 4.
+            max_pending: Max number of packets of a single stream waiting to be decoded.
+            thread_type: Threading of the codec itself: 'SLICE' decodes slices of a frame in parallel (no added
+                latency, only helps if the encoder produces multiple slices), 'FRAME' decodes multiple frames
+                in parallel (adds latency of `thread_count` frames), 'AUTO'. None keeps the FFmpeg default.
+            thread_count: Number of threads of each codec context, 0 to let FFmpeg decide.
+            stats: Pipeline statistics, the `decode` stage of each stream gets added.
+        """
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.thread_type = thread_type.upper() if thread_type else None
+        self.thread_count = thread_count
+        self.stats = stats
+
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='FrameDecoder')
+        self._streams: Dict[int, _DecodeStream] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, xout, packets: List[BasePacket], deliver: Callable[[BasePacket], None]) -> None:
+        """
+        Decodes frames of the packets on the pool and then calls `deliver` for each packet (from the pool thread).
+        Blocks if `max_pending` packets of the Xout are already waiting.
+        """
+        stream = self._stream(xout)
+        with stream.cond:
+            while self.max_pending <= len(stream.pending) and not self._closed:
+                stream.cond.wait()
+            if self._closed:
+                return
+
+            stream.pending.append((time.perf_counter(), packets, deliver))
+            if stream.stats is not None:
+                stream.stats.add_depth(len(stream.pending))
+            if not stream.scheduled:
+                stream.scheduled = True
+                self._executor.submit(self._drain, stream)
+
+    def _stream(self, xout) -> _DecodeStream:
+        stream = self._streams.get(id(xout))
+        if stream is None:
+            with self._lock:
+                stream = self._streams.get(id(xout))
+                if stream is None:
+                    name = xout.get_packet_name()
+                    stats = self.stats.stage(name, 'decode') if self.stats is not None else None
+                    self._configure_codec(xout.get_codec())
+                    stream = self._streams[id(xout)] = _DecodeStream(name, stats)
+        return stream
+
+    def _configure_codec(self, codec) -> None:
+        # Has to be set before the codec context gets opened (first decoded packet)
+        if codec is None:
+            return
+        if self.thread_type is not None:
+            codec.thread_type = self.thread_type
+        if self.thread_count:
+            codec.thread_count = self.thread_count
+
+    def _drain(self, stream: _DecodeStream) -> None:
+        while True:
+            with stream.cond:
+                if not stream.pending or self._closed:
+                    stream.pending.clear()
+                    stream.scheduled = False
+                    stream.cond.notify_all()
+                    return
+                queued_at, packets, deliver = stream.pending.popleft()
+                stream.cond.notify_all()
+
+            start = time.perf_counter()
+            try:
+                for packet in packets:
+                    if isinstance(packet, FramePacket):
+                        packet.frame = packet.decode()
+            except Exception as e:
+                LOGGER.error(f'Decoding frame of {stream.name} failed: {e}')
+                continue
+            if stream.stats is not None:
+                stream.stats.add_latency(start - queued_at)
+                stream.stats.add_processing(time.perf_counter() - start)
+
+            try:
+                for packet in packets:
+                    deliver(packet)
+            except Exception as e:
+                LOGGER.error(f'Callback of {stream.name} failed: {e}')
+
+    def close(self) -> None:
+        """
+        Discards packets that weren't decoded yet and waits for the pool threads.
+        """
+        self._closed = True
+        for stream in list(self._streams.values()):
+            with stream.cond:
+                stream.cond.notify_all()
+        self._executor.shutdown(wait=True)
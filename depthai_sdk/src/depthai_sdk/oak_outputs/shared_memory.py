@@ -0,0 +1,380 @@
+"""
+Publishing packets (frames, depth, point clouds) to other processes through POSIX shared memory, without pickling.
+
+Each stream is a shared memory segment with a ring of fixed-size slots. A single publisher writes packets into the
+slots round-robin; any number of subscribers read them without locks. Every slot has a sequence number (seqlock):
+it is odd while the publisher writes the slot and even once the slot is complete, so a reader detects a slot
+that was overwritten while it was reading it and skips it.
+
+Segment layout (little-endian)::
+
+    header   64 B: magic, version, number of slots, slot size, published packets, closed flag
+    slot i:  32 B: sequence number, packet index, metadata size, data size
+             METADATA_SIZE B: JSON metadata (packet name, type, timestamp, arrays)
+             data: arrays, each 64 B aligned
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import timedelta
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from depthai_sdk.classes.packets import (
+    BasePacket,
+    DepthPacket,
+    DisparityDepthPacket,
+    DisparityPacket,
+    FramePacket,
+    PointcloudPacket
+)
+from depthai_sdk.logger import LOGGER
+
+__all__ = ['SharedMemoryPublisher', 'SharedMemorySubscriber', 'SharedPacket', 'packet_arrays']
+
+MAGIC = b'DAISHM01'
+VERSION = 1
+METADATA_SIZE = 4096
+_ALIGN = 64
+_HEADER = struct.Struct('<8sIIQQQ')  # magic, version, slots, slot size, published, closed
+_HEADER_SIZE = 64
+_SLOT_HEADER_SIZE = 32
+# Indices of uint64 header fields, after magic, version and number of slots
+_PUBLISHED = 1
+_CLOSED = 2
+
+
+def _align(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def packet_arrays(packet: BasePacket) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Returns arrays of a packet that are published: 'points' (and 'colors', 'indices', 'depth') of point clouds,
+    'depth' of depth packets, 'disparity' of disparity packets and 'frame' of other frame packets. None if the
+    packet has no frame (eg. encoded frame that couldn't be decoded yet).
+    """
+    if isinstance(packet, PointcloudPacket):
+        arrays = {'points': packet.points, 'depth': packet.depth_map.getFrame()}
+        if packet.colorize_frame is not None:
+            arrays['colors'] = packet.colorize_frame
+        if packet.indices is not None:
+            arrays['indices'] = packet.indices
+        return arrays
+    if isinstance(packet, DepthPacket):
+        return {'depth': packet.depth}
+    if isinstance(packet, DisparityDepthPacket):
+        return {'depth': packet.msg.getFrame()}
+    if isinstance(packet, DisparityPacket):
+        return {'disparity': packet.get_disparity()}
+    if isinstance(packet, FramePacket):
+        frame = packet.frame
+        return None if frame is None else {'frame': frame}
+    raise TypeError(f'Packets of type {packet.__class__.__name__} can\'t be published to shared memory')
+
+
+class SharedMemoryPublisher:
+    """
+    Writes packets into a ring of shared memory slots. Single writer; not thread-safe.
+    """
+
+    def __init__(self, name: str, slot_size: int, num_slots: int = 4):
+        """
+        Args:
+            name: Name of the shared memory segment, subscribers connect to it by this name.
+            slot_size: Max size (bytes) of arrays of a single packet. Larger packets are dropped.
+            num_slots: Number of slots. Subscribers that fall behind by more slots miss packets.
+        """
+        if num_slots < 2:
+            raise ValueError('Shared memory ring needs at least 2 slots')
+        self.name = name
+        self.num_slots = num_slots
+        self.data_size = _align(slot_size)
+        self.slot_size = _SLOT_HEADER_SIZE + METADATA_SIZE + self.data_size
+        self.published = 0
+        self.dropped = 0
+
+        size = _HEADER_SIZE + num_slots * self.slot_size
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left over by a publisher that didn't close (eg. crashed)
+            LOGGER.debug(f'Replacing stale shared memory segment "{name}"')
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+
+        buf = self._shm.buf
+        _HEADER.pack_into(buf, 0, MAGIC, VERSION, num_slots, self.slot_size, 0, 0)
+        self._header = np.ndarray(3, np.uint64, buf, offset=16)
+        # Sequence number, packet index, (metadata size, data size) of each slot
+        self._slots = [np.ndarray(4, np.uint64, buf, offset=_HEADER_SIZE + i * self.slot_size)
+                       for i in range(num_slots)]
+        for slot in self._slots:
+            slot[:] = 0
+
+    def publish(self, arrays: Dict[str, np.ndarray], metadata: Optional[Dict] = None) -> bool:
+        """
+        Copies arrays (and JSON serializable metadata) into the next slot.
+
+        Returns:
+            False if the packet didn't fit into a slot and was dropped.
+        """
+        layout, offset = [], 0
+        for key, arr in arrays.items():
+            arr = np.asarray(arr)
+            layout.append({'key': key, 'dtype': arr.dtype.str, 'shape': arr.shape, 'offset': offset})
+            offset += _align(arr.nbytes)
+        meta = json.dumps({**(metadata or {}), 'arrays': layout}).encode()
+        if offset > self.data_size or len(meta) > METADATA_SIZE:
+            self.dropped += 1
+            if self.dropped == 1:
+                LOGGER.warning(f'Packet of {offset} B doesn\'t fit into shared memory slots of "{self.name}" '
+                               f'({self.data_size} B), dropping it. Increase slot_size.')
+            return False
+
+        index = self.published
+        slot = self._slots[index % self.num_slots]
+        start = _HEADER_SIZE + (index % self.num_slots) * self.slot_size + _SLOT_HEADER_SIZE
+        buf = self._shm.buf
+
+        seq = int(slot[0])
+        slot[0] = seq + 1  # Odd: being written
+        buf[start:start + len(meta)] = meta
+        data_start = start + METADATA_SIZE
+        for (key, arr), entry in zip(arrays.items(), layout):
+            arr = np.asarray(arr)
+            dst = np.ndarray(arr.shape, arr.dtype, buf, offset=data_start + entry['offset'])
+            np.copyto(dst, arr)
+        slot[1] = index
+        slot[2] = len(meta)
+        slot[3] = offset
+        slot[0] = seq + 2  # Even: complete
+
+        self.published = index + 1
+        self._header[_PUBLISHED] = self.published
+        return True
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._header[_CLOSED] = 1
+        self._header = None
+        self._slots = []
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+class SharedPacket:
+    """
+    Packet read from shared memory. Arrays are accessible as attributes, eg. `packet.frame`, `packet.depth`,
+    `packet.points`.
+    """
+
+    def __init__(self, index: int, metadata: Dict, arrays: Dict[str, np.ndarray], subscriber=None, seq: int = 0):
+        self.index = index  # Index of the packet in the stream, gaps mean missed packets
+        self.name: str = metadata.get('name')
+        self.type: str = metadata.get('type')
+        self.timestamp = timedelta(seconds=metadata['timestamp']) if 'timestamp' in metadata else None
+        self.sequence_num: Optional[int] = metadata.get('sequence_num')
+        self.metadata = metadata
+        self.arrays = arrays
+        self._subscriber = subscriber
+        self._seq = seq
+
+    def __getattr__(self, key: str) -> np.ndarray:
+        arrays = self.__dict__.get('arrays', {})
+        if key in arrays:
+            return arrays[key]
+        raise AttributeError(f'{self.__class__.__name__} has no attribute or array "{key}"')
+
+    def is_valid(self) -> bool:
+        """
+        Whether arrays of a packet read with copy=False weren't overwritten by the publisher (yet). Check it after
+        using the arrays. Always True for copied packets.
+        """
+        if self._subscriber is None:
+            return True
+        return self._subscriber._slot_seq(self.index) == self._seq
+
+
+class _UntrackedSegment:
+    """
+    Existing POSIX segment mapped without registering it with the resource tracker. SharedMemory(name) registers it,
+    so the tracker would unlink the publisher's segment once the subscriber exits. Unregistering it afterwards isn't
+    enough: processes spawned by the publisher's process share its tracker, which would then lose the publisher's
+    own registration.
+    """
+
+    def __init__(self, name: str):
+        import _posixshmem
+        fd = _posixshmem.shm_open('/' + name, os.O_RDWR, mode=0o600)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self) -> None:
+        self.buf.release()  # BufferError while arrays still reference the segment
+        self._mmap.close()
+
+
+class SharedMemorySubscriber:
+    """
+    Reads packets published by SharedMemoryPublisher (eg. `oak.shared_memory(...)`) in another process. Lock-free,
+    the publisher is never blocked by subscribers.
+
+    .. code-block:: python
+
+        with SharedMemorySubscriber('oak_color') as sub:
+            for packet in sub:
+                print(packet.timestamp, packet.frame.shape)
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = 10.0, poll_interval: float = 0.001):
+        """
+        Args:
+            name: Name of the shared memory segment.
+            timeout: Seconds to wait for the publisher to create the segment, None waits forever.
+            poll_interval: Seconds between checks for new packets.
+        """
+        self.name = name
+        self.poll_interval = poll_interval
+        self.missed = 0  # Packets overwritten before they were read
+        self._shm = self._attach(name, timeout)
+
+        magic, version, self.num_slots, self.slot_size, _, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self._shm.close()
+            raise ValueError(f'Shared memory segment "{name}" wasn\'t created by SharedMemoryPublisher')
+        self._header = np.ndarray(3, np.uint64, self._shm.buf, offset=16)
+        self._slots = [np.ndarray(4, np.uint64, self._shm.buf, offset=_HEADER_SIZE + i * self.slot_size)
+                       for i in range(self.num_slots)]
+        self._next = int(self._header[_PUBLISHED])  # Start with the next published packet
+
+    @staticmethod
+    def _attach(name: str, timeout: Optional[float]):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if os.name == 'nt':  # No resource tracker on Windows
+                    return shared_memory.SharedMemory(name)
+                return _UntrackedSegment(name)
+            except FileNotFoundError:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f'Shared memory segment "{name}" wasn\'t created in {timeout} s')
+                time.sleep(0.05)
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the publisher closed the stream.
+        """
+        return self._shm is None or bool(self._header[_CLOSED])
+
+    def latest(self, copy: bool = True) -> Optional[SharedPacket]:
+        """
+        Returns the most recently published packet, or None if nothing was published yet.
+        """
+        while True:
+            published = int(self._header[_PUBLISHED])
+            if published == 0:
+                return None
+            packet = self._read(published - 1, copy)
+            if packet is not None:
+                self._next = published
+                return packet
+
+    def next(self, timeout: Optional[float] = None, copy: bool = True) -> Optional[SharedPacket]:
+        """
+        Returns the next packet, waiting for it to be published. If the subscriber fell behind, overwritten packets
+        are skipped (counted in `missed`).
+
+        Args:
+            timeout: Seconds to wait, None waits until a packet is published or the publisher closes.
+            copy: Copy arrays out of shared memory. Without copying, arrays are views into the slot, which get
+                overwritten once the publisher wraps around the ring; check `packet.is_valid()` after using them.
+
+        Returns:
+            Packet, or None on timeout or if the publisher closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            published = int(self._header[_PUBLISHED])
+            if self._next < published:
+                oldest = max(0, published - self.num_slots + 1)  # Slot after it might be being written
+                if self._next < oldest:
+                    self.missed += oldest - self._next
+                    self._next = oldest
+                packet = self._read(self._next, copy)
+                if packet is None:
+                    self.missed += 1
+                self._next += 1
+                if packet is not None:
+                    return packet
+                continue
+
+            if self.closed or (deadline is not None and time.monotonic() > deadline):
+                return None
+            time.sleep(self.poll_interval)
+
+    def __iter__(self) -> Iterator[SharedPacket]:
+        while True:
+            packet = self.next()
+            if packet is None:
+                return
+            yield packet
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._header = None
+        self._slots = []
+        try:
+            self._shm.close()
+        except BufferError:
+            # Arrays of packets read with copy=False are still in use, segment is unmapped once they are released
+            pass
+        self._shm = None
+
+    def __enter__(self) -> 'SharedMemorySubscriber':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _slot_seq(self, index: int) -> int:
+        return int(self._slots[index % self.num_slots][0])
+
+    def _read(self, index: int, copy: bool) -> Optional[SharedPacket]:
+        """
+        Reads packet `index` from its slot. Returns None if the slot is being written or already holds
+        a newer packet.
+        """
+        slot = self._slots[index % self.num_slots]
+        seq = int(slot[0])
+        if seq % 2 or int(slot[1]) != index:
+            return None
+
+        start = _HEADER_SIZE + (index % self.num_slots) * self.slot_size + _SLOT_HEADER_SIZE
+        buf = self._shm.buf
+        try:
+            metadata = json.loads(bytes(buf[start:start + int(slot[2])]))
+            arrays = {}
+            for entry in metadata.pop('arrays'):
+                arr = np.ndarray(entry['shape'], np.dtype(entry['dtype']), buf,
+                                 offset=start + METADATA_SIZE + entry['offset'])
+                arrays[entry['key']] = arr.copy() if copy else arr
+        except (ValueError, TypeError, KeyError):
+            return None  # Torn read of the metadata, slot was being overwritten
+
+        if int(slot[0]) != seq:
+            return None  # Overwritten while reading
+        return SharedPacket(index, metadata, arrays, None if copy else self, seq)
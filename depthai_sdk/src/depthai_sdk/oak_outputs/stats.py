@@ -0,0 +1,230 @@
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import depthai as dai
+
+from depthai_sdk.logger import LOGGER
+
+# Histogram bucket upper bounds (seconds): 1us .. ~60s, each bucket 25% wider than the previous one
+_BUCKET_BOUNDS = [1e-6 * 1.25 ** i for i in range(81)]
+
+
+class Histogram:
+    """
+    Log-bucketed histogram of durations in seconds. Adding a value is a single binary search over ~80 buckets,
+    so it's cheap enough to be called for every message. Percentiles are accurate to the bucket width (25%).
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_right(_BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.max < value:
+            self.max = value
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the value (upper bound of the bucket) below which `p` percent of values fall.
+        """
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if target <= cumulative and c:
+                bound = _BUCKET_BOUNDS[i] if i < len(_BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """
+        Returns non-empty buckets as (upper bound in seconds, count) pairs.
+        """
+        bounds = _BUCKET_BOUNDS + [float('inf')]
+        return [(bounds[i], c) for i, c in enumerate(self.counts) if c]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+class StageStats:
+    """
+    Statistics of a single stage of a single stream: latency (time a message spent waiting before the stage
+    picked it up), processing time, queue depth and number of dropped messages.
+
+    Updates are not locked; each stage is updated from a single thread, and readers only need approximate values.
+    """
+
+    def __init__(self, stream: str, stage: str):
+        self.stream = stream
+        self.stage = stage
+        self.latency = Histogram()
+        self.processing = Histogram()
+        self.drops = 0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_count = 0
+        self._last_seq: Optional[int] = None
+
+    def add_latency(self, seconds: float) -> None:
+        self.latency.add(seconds)
+
+    @property
+    def count(self) -> int:
+        """
+        Number of messages that passed through the stage.
+        """
+        return max(self.processing.count, self.latency.count)
+
+    def add_processing(self, seconds: float) -> None:
+        self.processing.add(seconds)
+
+    def add_depth(self, depth: int) -> None:
+        self._depth_total += depth
+        self._depth_count += 1
+        if self.max_depth < depth:
+            self.max_depth = depth
+
+    def add_drop(self, count: int = 1) -> None:
+        self.drops += count
+
+    def add_device_msg(self, msg: dai.Buffer) -> None:
+        """
+        Records latency (capture to now) and sequence number of a message received from the device.
+        """
+        try:
+            self.add_latency((dai.Clock.now() - msg.getTimestamp()).total_seconds())
+        except AttributeError:  # Message without timestamp
+            pass
+        try:
+            self.add_sequence_num(msg.getSequenceNum())
+        except AttributeError:
+            pass
+
+    def add_sequence_num(self, seq: int) -> None:
+        """
+        Counts messages that never reached this stage (eg. overwritten in a non-blocking device queue),
+        based on gaps in sequence numbers.
+        """
+        if self._last_seq is not None and self._last_seq < seq:
+            self.drops += seq - self._last_seq - 1
+        self._last_seq = seq
+
+    def mean_depth(self) -> float:
+        return self._depth_total / self._depth_count if self._depth_count else 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'drops': self.drops,
+            'latency': self.latency.snapshot(),
+            'processing': self.processing.snapshot(),
+            'mean_depth': self.mean_depth(),
+            'max_depth': self.max_depth,
+        }
+
+    def reset(self) -> None:
+        self.__init__(self.stream, self.stage)
+
+
+class PipelineStats:
+    """
+    Per-stream, per-stage instrumentation of the path from the device to the user code:
+
+    - ``xlink``: device output queue. Latency is the time from the capture (device timestamp, synced to the
+      host clock) to the host callback, drops are gaps in sequence numbers (eg. messages overwritten in the
+      ``maxSize=1, blocking=False`` output queue), processing is the time spent in all host callbacks.
+    - ``xout``: conversion of device messages into packets (``XoutBase.new_msg``), including syncing of
+      multiple messages inside Xouts.
+    - ``decode``: decoding of encoded frames on the FrameDecoder thread pool (if enabled). Latency is the time
+      a frame waited for a decoding thread, processing is the decoding itself.
+    - ``handler``: processing of packets by the packet handler (syncing, ``new_packet``, user callbacks).
+    - ``handoff``: queue between the callback thread and the main thread (or user's queue). Latency is the
+      time a packet waited in the queue, drops are packets discarded because the queue was full.
+    """
+
+    def __init__(self):
+        self.stages: Dict[Tuple[str, str], StageStats] = {}
+        self._lock = threading.Lock()
+        self._log_thread: Optional[threading.Thread] = None
+        self._log_stop = threading.Event()
+
+    def stage(self, stream: str, stage: str) -> StageStats:
+        """
+        Returns (and creates, if needed) statistics of the `stage` of the `stream`.
+        """
+        key = (stream, stage)
+        stats = self.stages.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(key, StageStats(stream, stage))
+        return stats
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        Returns snapshot of all statistics, as {stream: {stage: stats}}. Times are in seconds.
+        """
+        ret = {}
+        for (stream, stage), stats in list(self.stages.items()):
+            ret.setdefault(stream, {})[stage] = stats.snapshot()
+        return ret
+
+    def reset(self) -> None:
+        for stats in list(self.stages.values()):
+            stats.reset()
+
+    def summary(self) -> str:
+        lines = ['Pipeline stats:']
+        for (stream, stage), s in sorted(self.stages.items()):
+            line = f'  {stream} [{stage}] n={s.count} drops={s.drops}'
+            if s.latency.count:
+                line += f' latency p50={s.latency.percentile(50) * 1e3:.1f}ms' \
+                        f' p99={s.latency.percentile(99) * 1e3:.1f}ms'
+            if s.processing.count:
+                line += f' processing p50={s.processing.percentile(50) * 1e3:.2f}ms' \
+                        f' p99={s.processing.percentile(99) * 1e3:.2f}ms'
+            if s.max_depth:
+                line += f' depth mean={s.mean_depth():.1f} max={s.max_depth}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def start_logging(self, interval: float) -> None:
+        """
+        Periodically logs the summary (every `interval` seconds) from a background thread.
+        """
+        self.stop_logging()
+        self._log_stop.clear()
+        self._log_thread = threading.Thread(target=self._log_loop, args=(interval,), name='PipelineStats',
+                                            daemon=True)
+        self._log_thread.start()
+
+    def stop_logging(self) -> None:
+        if self._log_thread is not None:
+            self._log_stop.set()
+            self._log_thread.join()
+            self._log_thread = None
+
+    def _log_loop(self, interval: float) -> None:
+        while not self._log_stop.wait(interval):
+            LOGGER.info(self.summary())
@@ -1,91 +1,260 @@
 import threading
+from bisect import bisect_left, bisect_right
 from datetime import timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable, Union
+
+from depthai_sdk.classes.enum import SyncPolicy
+
+
+class SequenceNumRing:
+    """
+    Fixed-capacity ring buffer that maps sequence numbers to values. Slot for a sequence number is
+    `seq % capacity`, so lookup, insert and release are all O(1) and memory is bounded by `capacity`,
+    regardless of how many messages a stream drops.
+
+    Values that get overwritten before being released (or that arrive after a newer sequence number was
+    already released) are counted in `dropped`.
+    """
+
+    def __init__(self, capacity: int = 32):
+        if capacity < 1:
+            raise ValueError('SequenceNumRing capacity must be at least 1!')
+        self.capacity = capacity
+        self.dropped: int = 0
+
+        self._seqs: List[int] = [-1] * capacity
+        self._values: List[Any] = [None] * capacity
+        self._released: int = -1  # All sequence numbers <= _released are consumed
+
+    def get(self, seq: int) -> Optional[Any]:
+        """
+        Returns value stored for `seq`, or None if there is none.
+        """
+        idx = seq % self.capacity
+        if self._seqs[idx] == seq and seq > self._released:
+            return self._values[idx]
+        return None
+
+    def setdefault(self, seq: int, factory: Callable[[], Any]) -> Optional[Any]:
+        """
+        Returns value stored for `seq`. If there is none, a new value is created with `factory()`,
+        evicting (and counting as dropped) an older value that occupies the same slot.
+
+        Returns None if `seq` is older than the last released sequence number or older than the
+        value currently occupying its slot.
+        """
+        if seq <= self._released:
+            self.dropped += 1
+            return None
+
+        idx = seq % self.capacity
+        slot_seq = self._seqs[idx]
+        if slot_seq == seq:
+            return self._values[idx]
+        if slot_seq > seq:
+            # Stale message (more than `capacity` behind the newest one), drop it
+            self.dropped += 1
+            return None
+        if slot_seq != -1:
+            self.dropped += 1
+
+        self._seqs[idx] = seq
+        self._values[idx] = value = factory()
+        return value
+
+    def put(self, seq: int, value: Any) -> bool:
+        """
+        Stores `value` for `seq`. Returns False if the value was dropped (see `setdefault()`).
+        """
+        if self.setdefault(seq, lambda: value) is None:
+            return False
+        self._values[seq % self.capacity] = value
+        return True
+
+    def release(self, seq: int) -> Optional[Any]:
+        """
+        Removes and returns value stored for `seq`. All values with older sequence numbers are discarded
+        as well; they are counted as dropped lazily, once their slot gets reused.
+        """
+        value = self.get(seq)
+        if value is not None:
+            idx = seq % self.capacity
+            self._seqs[idx] = -1
+            self._values[idx] = None
+        self._released = max(self._released, seq)
+        return value
 
 
 class SequenceNumSync:
     """
-        self.msgs = {seqNum: {name: message}}
-        Example:
-
-        self.msgs = {
-            '1': {
-                'rgb': dai.Frame(),
-                'dets': dai.ImgDetections(),
-            ],
-            '2': {
-                'rgb': dai.Frame(),
-                'dets': dai.ImgDetections(),
-            }
+    Syncs messages from multiple streams based on their sequence number. Each stream gets its own
+    `SequenceNumRing`, so syncing a message is O(1) and memory is bounded to `capacity` messages per
+    stream, even if some stream drops messages.
+
+    Example of returned synced messages:
+
+        {
+            'rgb': dai.ImgFrame(),
+            'dets': dai.ImgDetections(),
         }
-        """
+    """
 
-    def __init__(self, stream_num: int):
-        self.msgs: Dict[str, Dict[str, Any]] = dict()
+    def __init__(self, stream_num: int, capacity: int = 32):
+        """
+        Args:
+            stream_num: Number of streams that need to be synced.
+            capacity: Maximum number of buffered messages per stream.
+        """
         self.stream_num: int = stream_num
+        self.capacity: int = capacity
         self.lock = threading.Lock()
 
-    def sync(self, seq_num: int, name: str, msg) -> Optional[Dict]:
-        seq_num = str(seq_num)
+        self._rings: Dict[str, SequenceNumRing] = dict()
 
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """
+        Number of messages per stream that were dropped because they couldn't be synced.
+        """
+        return {name: ring.dropped for name, ring in self._rings.items()}
+
+    def sync(self, seq_num: int, name: str, msg) -> Optional[Dict]:
         with self.lock:
-            if seq_num not in self.msgs:
-                self.msgs[seq_num] = dict()
+            ring = self._rings.get(name)
+            if ring is None:
+                ring = self._rings[name] = SequenceNumRing(self.capacity)
 
-            self.msgs[seq_num][name] = (msg)
+            if not ring.put(seq_num, msg):
+                return None
 
-            if self.stream_num == len(self.msgs[seq_num]):
-                # We have sequence num synced frames!
-                ret = self.msgs[seq_num]
+            if len(self._rings) < self.stream_num:
+                return None
 
-                # Remove previous msgs
-                new_msgs = {}
-                for name, msg in self.msgs.items():
-                    if int(name) > int(seq_num):
-                        new_msgs[name] = msg
-                self.msgs = new_msgs
+            for ring in self._rings.values():
+                if ring.get(seq_num) is None:
+                    return None
 
-                return ret
+            # We have sequence num synced frames! Older messages get discarded.
+            return {name: ring.release(seq_num) for name, ring in self._rings.items()}
 
-        return None
+
+class _TimestampBuffer:
+    """
+    Per-stream buffer of messages sorted by timestamp. Consumed messages are skipped by advancing `head`
+    instead of `list.pop(0)`, and the lists are compacted once more than half of them is consumed.
+    """
+
+    def __init__(self):
+        self.ts: List[float] = []
+        self.msgs: List[Any] = []
+        self.head: int = 0
+        self.dropped: int = 0
+
+    def __len__(self) -> int:
+        return len(self.ts) - self.head
+
+    def insert(self, ts: float, msg) -> None:
+        if not self.ts or self.ts[-1] <= ts:  # Common case, messages arrive in order
+            self.ts.append(ts)
+            self.msgs.append(msg)
+        else:
+            i = bisect_right(self.ts, ts, lo=self.head)
+            self.ts.insert(i, ts)
+            self.msgs.insert(i, msg)
+
+    def discard(self, count: int) -> None:
+        """
+        Discards `count` oldest messages.
+        """
+        self.head += count
+        if self.head > 16 and self.head * 2 > len(self.ts):
+            del self.ts[:self.head]
+            del self.msgs[:self.head]
+            self.head = 0
+
+    def find(self, ts: float, threshold: float, policy: SyncPolicy) -> Optional[int]:
+        """
+        Returns index of the message that is within `threshold` from `ts` (selected by `policy`), or None.
+        """
+        arr, head, end = self.ts, self.head, len(self.ts)
+        if head == end:
+            return None
+
+        if policy == SyncPolicy.EARLIEST:
+            i = bisect_right(arr, ts - threshold, lo=head)
+            return i if i < end and arr[i] - ts < threshold else None
+        elif policy == SyncPolicy.LATEST:
+            i = bisect_left(arr, ts + threshold, lo=head) - 1
+            return i if head <= i and ts - arr[i] < threshold else None
+
+        i = bisect_left(arr, ts, lo=head)
+        if i == end or (head < i and ts - arr[i - 1] <= arr[i] - ts):
+            i -= 1
+        return i if abs(arr[i] - ts) < threshold else None
 
 
 class TimestampSync:
-    def __init__(self, stream_num: int, ms_threshold: int):
-        self.msgs: Dict[str, Any] = dict()
+    """
+    Syncs messages from multiple streams based on their timestamps. Each stream keeps its messages in
+    a sorted buffer, so a new message is matched to the other streams with a binary search. Buffers are
+    bounded to `max_size` messages, older messages get dropped (and counted in `dropped`).
+    """
+
+    def __init__(self,
+                 stream_num: int,
+                 ms_threshold: int,
+                 policy: Union[str, SyncPolicy] = SyncPolicy.NEAREST,
+                 max_size: int = 32):
+        """
+        Args:
+            stream_num: Number of streams that need to be synced.
+            ms_threshold: Maximum time difference between synced messages in milliseconds.
+            policy: Which message to select when multiple ones are within the threshold.
+            max_size: Maximum number of buffered messages per stream.
+        """
         self.stream_num: int = stream_num
         self.ms_threshold = ms_threshold
+        self.policy = SyncPolicy.parse(policy)
+        self.max_size = max_size
 
-    def sync(self, timestamp, name: str, msg):
-        if name not in self.msgs:
-            self.msgs[name] = []
+        self._threshold: float = ms_threshold / 1000
+        self._buffers: Dict[str, _TimestampBuffer] = dict()
 
-        self.msgs[name].append((timestamp, msg))
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """
+        Number of messages per stream that were dropped because they couldn't be synced.
+        """
+        return {name: buffer.dropped for name, buffer in self._buffers.items()}
+
+    def sync(self, timestamp, name: str, msg) -> Optional[Dict]:
+        if isinstance(timestamp, timedelta):
+            timestamp = timestamp.total_seconds()
+
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = self._buffers[name] = _TimestampBuffer()
+
+        buffer.insert(timestamp, msg)
+        if len(buffer) > self.max_size:
+            buffer.dropped += 1
+            buffer.discard(1)
+
+        if len(self._buffers) < self.stream_num:
+            return None
 
         synced = {}
-        for name, arr in self.msgs.items():
-            # Go through all stored messages and calculate the time difference to the target msg.
-            # Then sort these self.msgs to find a msg that's closest to the target time, and check
-            # whether it's below 17ms which is considered in-sync.
-            diffs = []
-            for i, (msg_ts, msg) in enumerate(arr):
-                diffs.append(abs(msg_ts - timestamp))
-            if len(diffs) == 0:
-                break
-            diffs_sorted = diffs.copy()
-            diffs_sorted.sort()
-            dif = diffs_sorted[0]
-
-            if dif < timedelta(milliseconds=self.ms_threshold):
-                synced[name] = diffs.index(dif)
-
-        if len(synced) == self.stream_num:  # We have all synced streams
-            # Remove older self.msgs
-            for name, i in synced.items():
-                self.msgs[name] = self.msgs[name][i:]
-            ret = {}
-            for name, arr in self.msgs.items():
-                ts, synced_msg = arr.pop(0)
-                ret[name] = synced_msg
-            return ret
-        return None
+        for name, buffer in self._buffers.items():
+            i = buffer.find(timestamp, self._threshold, self.policy)
+            if i is None:
+                return None
+            synced[name] = i
+
+        # We have all synced streams, remove synced and older messages
+        ret = {}
+        for name, i in synced.items():
+            buffer = self._buffers[name]
+            ret[name] = buffer.msgs[i]
+            buffer.dropped += i - buffer.head
+            buffer.discard(i - buffer.head + 1)
+        return ret
@@ -1,3 +1,4 @@
+import time
 from abc import ABC, abstractmethod
 from typing import List, Optional, Callable
 
@@ -5,6 +6,7 @@ import depthai as dai
 
 from depthai_sdk.classes.packets import FramePacket
 from depthai_sdk.components.component import ComponentOutput
+from depthai_sdk.oak_outputs.stats import StageStats
 
 
 class StreamXout:
@@ -30,6 +32,9 @@ class XoutBase(ABC):
 
         # It will get assigned later inside the BasePacketHandler class
         self.new_packet_callback: Callable = lambda x: None
+        self.stats: Optional[StageStats] = None
+        # If set, encoded frames get decoded on its thread pool before the packets are passed on
+        self.decoder: Optional['FrameDecoder'] = None
 
     def get_packet_name(self) -> str:
         if self._packet_name is None:
@@ -65,22 +70,38 @@ class XoutBase(ABC):
         `new_packet` method.
         """
         # self._fps_counter[name].next_iter()
-        packet = self.new_msg(name, dai_message)
+        if self.stats is None:
+            packet = self.new_msg(name, dai_message)
+        else:
+            start = time.perf_counter()
+            packet = self.new_msg(name, dai_message)
+            self.stats.add_processing(time.perf_counter() - start)
+
         if packet is not None:
             # If not list, convert to list.
             # Some Xouts create multiple packets from a single message (example: IMU)
             if not isinstance(packet, list):
                 packet = [packet]
 
+            encoded = False
             for p in packet:
                 # In case we have encoded frames, we need to set the codec
                 if isinstance(p, FramePacket) and \
                         hasattr(self, 'get_codec') and \
                         self._fourcc is not None:
                     p.set_decode_codec(self.get_codec)
+                    encoded = True
+
+            if encoded and self.decoder is not None:
+                self.decoder.submit(self, packet, self._deliver)
+                return
+
+            for p in packet:
+                self._deliver(p)
 
-                self.on_callback(p)
-                self.new_packet_callback(p)
+    def _deliver(self, packet) -> None:
+        self.on_callback(packet)
+        self.new_packet_callback(packet)
 
     @abstractmethod
     def new_msg(self, name: str, msg) -> None:
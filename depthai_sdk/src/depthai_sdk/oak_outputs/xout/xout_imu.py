@@ -1,18 +1,23 @@
-from typing import List
+from typing import List, Optional, Dict
 
 import depthai as dai
 import numpy as np
-from ahrs.filters import Mahony
 
 from depthai_sdk.classes import IMUPacket
+from depthai_sdk.classes.orientation import OrientationFilter
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
 
 
 class XoutIMU(XoutBase):
-    def __init__(self, imu_xout: StreamXout, fps: int):
+    def __init__(self, imu_xout: StreamXout, fps: int, fusion: Optional[Dict] = None):
+        """
+        Args:
+            imu_xout: StreamXout object.
+            fps: IMU report rate (Hz).
+            fusion: Settings of the orientation filter (OrientationFilter arguments), Mahony filter by default.
+        """
         self.imu_out = imu_xout
-        self._ahrs = Mahony(frequency=fps)
-        self._ahrs.Q = np.array([1, 0, 0, 0], dtype=np.float64)
+        self._ahrs = OrientationFilter(frequency=fps, **(fusion or {}))
 
         super().__init__()
         self.name = 'IMU'
@@ -24,15 +29,18 @@ class XoutIMU(XoutBase):
         if name not in self._streams:
             return
 
+        packets = msg.packets
+        values = np.array([(p.gyroscope.z, p.gyroscope.x, p.gyroscope.y,
+                            p.acceleroMeter.z, p.acceleroMeter.x, p.acceleroMeter.y) for p in packets],
+                          dtype=np.float64).reshape(-1, 6)
+        quaternions = self._ahrs.update(values[:, :3], values[:, 3:]).tolist()
+
         arr = []
-        for packet in msg.packets:
-            gyro_vals = np.array([packet.gyroscope.z, packet.gyroscope.x, packet.gyroscope.y])
-            accelero_vals = np.array([packet.acceleroMeter.z, packet.acceleroMeter.x, packet.acceleroMeter.y])
-            self._ahrs.Q = self._ahrs.updateIMU(self._ahrs.Q, gyro_vals, accelero_vals)
+        for packet, (w, x, y, z) in zip(packets, quaternions):
             rotation = dai.IMUReportRotationVectorWAcc()
-            rotation.i = self._ahrs.Q[0]
-            rotation.j = self._ahrs.Q[1]
-            rotation.k = self._ahrs.Q[2]
-            rotation.real = self._ahrs.Q[3]
+            rotation.i = x
+            rotation.j = y
+            rotation.k = z
+            rotation.real = w
             arr.append(IMUPacket(self.get_packet_name(), packet, rotation=rotation))
         return arr
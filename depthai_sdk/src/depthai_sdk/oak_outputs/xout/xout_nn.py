@@ -15,7 +15,7 @@ from depthai_sdk.classes.packets import (
     TwoStagePacket,
     NNDataPacket
 )
-from depthai_sdk.oak_outputs.syncing import SequenceNumSync
+from depthai_sdk.oak_outputs.syncing import SequenceNumSync, SequenceNumRing
 from depthai_sdk.oak_outputs.xout.xout_base import XoutBase, StreamXout
 from depthai_sdk.oak_outputs.xout.xout_depth import XoutDisparityDepth
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
@@ -167,9 +167,11 @@ class XoutTwoStage(XoutNnResults):
     Each detection (if not on blacklist) will crop the original frame and forward it to the second (stage) NN for
     inferencing.
 
+    Messages are buffered per sequence number inside a `SequenceNumRing`:
+
     msgs = {
-        '1': TwoStageSyncPacket(),
-        '2': TwoStageSyncPacket(),
+        1: {'frames': dai.ImgFrame(), 'dets': dai.ImgDetections(), 'second_nn': [dai.NNData(), ...]},
+        2: {...},
     }
     """
 
@@ -186,7 +188,7 @@ class XoutTwoStage(XoutNnResults):
         # Save StreamXout before initializing super()!
         super().__init__(det_nn, frames, det_out, bbox)
 
-        self.msgs: Dict[str, Dict[str, Any]] = dict()
+        self.msgs = SequenceNumRing(self.capacity)
         self.det_nn = det_nn
         self.second_nn = second_nn
         self.name = 'Two-stage detection'
@@ -211,19 +213,19 @@ class XoutTwoStage(XoutNnResults):
             return  # From Replay modules. TODO: better handling?
 
         # TODO: what if msg doesn't have sequence num?
-        seq = str(msg.getSequenceNum())
+        seq = msg.getSequenceNum()
 
-        if seq not in self.msgs:
-            self.msgs[seq] = dict()
-            self.msgs[seq][self.second_nn_out.name] = []
-            self.msgs[seq][self.nn_results.name] = None
+        with self.lock:
+            seq_msgs = self.msgs.setdefault(seq, self._new_seq_msgs)
+        if seq_msgs is None:
+            return  # Too old, already synced or evicted
 
         if name == self.second_nn_out.name:
             fn = self.second_nn._decode_fn
             if fn is not None:
-                self.msgs[seq][name].append(fn(msg))
+                seq_msgs[name].append(fn(msg))
             else:
-                self.msgs[seq][name].append(msg)
+                seq_msgs[name].append(msg)
 
         elif name == self.nn_results.name:
             fn = self.det_nn._decode_fn
@@ -269,7 +271,7 @@ class XoutTwoStage(XoutNnResults):
 
                     if i == 0:
                         try:
-                            frame = self.msgs[seq][self.frames.name]
+                            frame = seq_msgs[self.frames.name]
                         except KeyError:
                             continue
 
@@ -279,34 +281,39 @@ class XoutTwoStage(XoutNnResults):
                     self.input_cfg_queue.send(cfg)
 
         elif name in self.frames.name:
-            self.msgs[seq][name] = msg
+            seq_msgs[name] = msg
         else:
             raise ValueError('Message from unknown stream name received by TwoStageSeqSync!')
 
         if self.synced(seq):
             # Frames synced!
-            dets = self.msgs[seq][self.nn_results.name]
+            dets = seq_msgs[self.nn_results.name]
             packet = TwoStagePacket(
                 self.get_packet_name(),
-                self.msgs[seq][self.frames.name],
+                seq_msgs[self.frames.name],
                 dets,
-                self.msgs[seq][self.second_nn_out.name],
+                seq_msgs[self.second_nn_out.name],
                 self.whitelist_labels,
                 self.bbox
             )
 
             with self.lock:
-                new_msgs = {}
-                for name, msg in self.msgs.items():
-                    if int(name) > int(seq):
-                        new_msgs[name] = msg
-                self.msgs = new_msgs
+                self.msgs.release(seq)
 
             return self._add_detections_to_packet(packet, dets)
 
-    def add_detections(self, seq: str, dets: dai.ImgDetections):
+    def _new_seq_msgs(self) -> Dict[str, Any]:
+        return {self.second_nn_out.name: [], self.nn_results.name: None}
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        return {self.get_packet_name(): self.msgs.dropped}
+
+    def add_detections(self, seq: int, dets: dai.ImgDetections):
         # Used to match the scaled bounding boxes by the 2-stage NN script node
-        self.msgs[seq][self.nn_results.name] = dets
+        seq_msgs = self.msgs.get(seq)
+        if seq_msgs is not None:  # None if evicted (counted as dropped), bounding boxes are still scaled for crops
+            seq_msgs[self.nn_results.name] = dets
 
         if isinstance(dets, dai.ImgDetections):
             if self.scale_bb is None:
@@ -320,14 +327,16 @@ class XoutTwoStage(XoutNnResults):
                 det.xmax += self.scale_bb[0] / 100
                 det.ymax += self.scale_bb[1] / 100
 
-    def synced(self, seq: str) -> bool:
+    def synced(self, seq: int) -> bool:
         """
         Messages are in sync if:
             - dets is not None
             - We have at least one ImgFrame
             - number of recognition msgs is sufficient
         """
-        packet = self.msgs[seq]
+        packet = self.msgs.get(seq)
+        if packet is None:
+            return False  # Evicted or already synced
 
         if self.frames.name not in packet:
             return False  # We don't have required ImgFrames
@@ -341,11 +350,14 @@ class XoutTwoStage(XoutNnResults):
         # print('Synced!')
         return True
 
-    def required_recognitions(self, seq: str) -> int:
+    def required_recognitions(self, seq: int) -> int:
         """
         Required recognition results for this packet, which depends on number of detections (and white-list labels)
         """
-        dets: List[dai.ImgDetection] = self.msgs[seq][self.nn_results.name].detections
+        seq_msgs = self.msgs.get(seq)
+        if seq_msgs is None or seq_msgs[self.nn_results.name] is None:
+            return 0
+        dets: List[dai.ImgDetection] = seq_msgs[self.nn_results.name].detections
         if self.whitelist_labels:
             return len([det for det in dets if det.label in self.whitelist_labels])
         else:
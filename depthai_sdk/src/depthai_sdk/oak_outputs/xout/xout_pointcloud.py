@@ -1,10 +1,11 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import depthai as dai
 import numpy as np
 
 from depthai_sdk.classes.packets import PointcloudPacket
-from depthai_sdk.components.pointcloud_helper import create_xyz
+from depthai_sdk.components.pointcloud_helper import PointcloudEngine, from_pointcloud_frame
+from depthai_sdk.oak_outputs.syncing import SequenceNumSync
 from depthai_sdk.oak_outputs.xout.xout_base import StreamXout
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
 
@@ -14,18 +15,32 @@ except ImportError:
     cv2 = None
 
 
-class XoutPointcloud(XoutFrames):
+class XoutPointcloud(XoutFrames, SequenceNumSync):
     def __init__(self,
                  device: dai.Device,
                  depth_frames: StreamXout,
-                 color_frames: Optional[StreamXout] = None):
+                 color_frames: Optional[StreamXout] = None,
+                 postprocessing: Optional[Dict] = None,
+                 recorded: bool = False):
+        """
+        Args:
+            device: Device, from which calibration is read.
+            depth_frames: Depth stream.
+            color_frames: Optional color stream (aligned to depth), used to colorize the point cloud.
+            postprocessing: Keyword arguments for PointcloudEngine (range cropping, voxel downsampling, etc.).
+            recorded: Whether depth_frames is a replayed point cloud stream (point clouds packed into ImgFrames by
+                Replay) instead of depth, so point clouds aren't computed.
+        """
         self.color_frames = color_frames
         XoutFrames.__init__(self, frames=depth_frames)
         self.name = 'Pointcloud'
         self.device = device
-        self.xyz = None
+        self.postprocessing = postprocessing or {}
+        self.engine: Optional[PointcloudEngine] = None
+        self._calib: Optional[dai.CalibrationHandler] = None
+        self.recorded = recorded
 
-        self.msgs = dict()
+        SequenceNumSync.__init__(self, len(self.xstreams()))
 
     def xstreams(self) -> List[StreamXout]:
         if self.color_frames is not None:
@@ -37,42 +52,45 @@ class XoutPointcloud(XoutFrames):
             return  # From Replay modules. TODO: better handling?
 
         # TODO: what if msg doesn't have sequence num?
-        seq = str(msg.getSequenceNum())
+        if self.recorded:
+            return self._recorded_packet(msg)
 
-        if seq not in self.msgs:
-            self.msgs[seq] = dict()
-
-        if name == self.frames.name:
-            self.msgs[seq][name] = msg
-        elif name == self.color_frames.name:
-            self.msgs[seq][name] = msg
-        else:
+        if name != self.frames.name and (self.color_frames is None or name != self.color_frames.name):
             raise ValueError('Message from unknown stream name received by XOutPointcloud!')
 
-        if len(self.msgs[seq]) == len(self.xstreams()):
+        synced = self.sync(msg.getSequenceNum(), name, msg)
+        if synced:
             # Frames synced!
-            depth_frame: dai.ImgFrame = self.msgs[seq][self.frames.name]
+            depth_frame: dai.ImgFrame = synced[self.frames.name]
 
             color_frame = None
             if self.color_frames is not None:
-                color_frame: dai.ImgFrame = self.msgs[seq][self.color_frames.name]
-
-            if self.xyz is None:
-                self.xyz = create_xyz(self.device, depth_frame.getWidth(), depth_frame.getHeight())
+                color_frame: dai.ImgFrame = synced[self.color_frames.name]
 
-            pcl = self.xyz * np.expand_dims(np.array(depth_frame.getFrame()), axis=-1)
-
-            # TODO: postprocessing
-            # Cleanup
-            new_msgs = {}
-            for name, msg in self.msgs.items():
-                if int(name) > int(seq):
-                    new_msgs[name] = msg
-            self.msgs = new_msgs
+            depth = depth_frame.getFrame()
+            points, indices = self._get_engine(depth.shape[1], depth.shape[0]).process(depth)
 
             return PointcloudPacket(
                 self.get_packet_name(),
-                pcl,
+                points,
                 depth_map=depth_frame,
-                colorize_frame=color_frame
+                colorize_frame=color_frame,
+                indices=indices
             )
+
+    def _get_engine(self, width: int, height: int) -> PointcloudEngine:
+        # Engine (and its cached projection grid/buffers) only gets recreated if the depth resolution changes
+        if self.engine is None or self.engine.shape != (height, width):
+            if self._calib is None:
+                self._calib = self.device.readCalibration()
+            camera_matrix = self._calib.getCameraIntrinsics(dai.CameraBoardSocket.RIGHT, dai.Size2f(width, height))
+            self.engine = PointcloudEngine(np.array(camera_matrix), **self.postprocessing)
+        return self.engine
+
+    def _recorded_packet(self, msg: dai.ImgFrame) -> PointcloudPacket:
+        # Replay packs Nx3 (or Nx6, with BGR colors) float32 point cloud into an ImgFrame
+        frame = msg.getData().view(np.float32).reshape(msg.getHeight(), -1)
+        points, colors = from_pointcloud_frame(frame)
+        packet = PointcloudPacket(self.get_packet_name(), points, depth_map=msg, colorize_frame=None)
+        packet.colorize_frame = colors  # Already one color per point
+        return packet
@@ -16,7 +16,6 @@ class XoutSeqSync(XoutBase, SequenceNumSync):
         # Save StreamXout before initializing super()!
         XoutBase.__init__(self)
         SequenceNumSync.__init__(self, len(self.streams))
-        self.msgs = dict()
 
     @abstractmethod
     def package(self, msgs: Union[List, Dict]):
@@ -1,6 +1,7 @@
 import math
+from collections import deque
 from datetime import timedelta
-from typing import Dict, Optional, List, Union, Tuple
+from typing import Deque, Dict, Optional, List, Tuple
 
 import depthai as dai
 import numpy as np
@@ -10,124 +11,155 @@ from depthai_sdk.classes.packets import TrackingDetection
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_base import StreamXout
 from depthai_sdk.oak_outputs.xout.xout_nn import XoutNnResults
-from depthai_sdk.tracking import KalmanFilter
+from depthai_sdk.tracking import BatchedKalmanFilter
 from depthai_sdk.visualize.bbox import BoundingBox
 
 
 class TrackedObject:
-    def __init__(self, baseline: float, focal: float, apply_kalman: bool, calculate_speed: bool):
-        # Point
-        self.kalman_3d: Optional[KalmanFilter] = None
-        # BBox
-        self.kalman_2d: Optional[KalmanFilter] = None
-
-        self.previous_detections: List[TrackingDetection] = []
+    def __init__(self, history_length: int = 100):
+        # Bounded history, oldest detections get discarded
+        self.previous_detections: Deque[TrackingDetection] = deque(maxlen=history_length)
         self.blacklist = False
         self.lost_counter = 0
 
-        self.baseline = baseline
-        self.focal = focal
-        self.apply_kalman = apply_kalman
-        self.calculate_speed = calculate_speed
+        # Speeds (m/s) between consecutive detections in the last second, keyed by time of the older detection
+        self._speeds: Deque[Tuple[timedelta, float]] = deque()
+        self._speed_sum = 0.0
+        self._last_coords: Optional[Tuple[timedelta, Tuple[float, float, float]]] = None
 
-    def new_tracklet(self, tracklet: dai.Tracklet, ts: timedelta, color: Tuple, label: str):
-        is_3d = self._is_3d(tracklet)
-        tracking_det = TrackingDetection(
-            img_detection=tracklet.srcImgDetection,
-            label_str=label,
-            confidence=tracklet.srcImgDetection.confidence,
-            color=color,
-            bbox=BoundingBox(tracklet.srcImgDetection),
-            angle=None,
-            tracklet=tracklet,
-            ts=ts,
-            filtered_2d=self._calc_kalman_2d(tracklet, ts) if self.apply_kalman else None,
-            filtered_3d=self._calc_kalman_3d(tracklet, ts) if self.apply_kalman and is_3d else None,
-            speed=None,
-        )
-        self.previous_detections.append(tracking_det)
-        # Calc speed should be called after adding new TrackingDetection to self.previous_detections
-        tracking_det.speed = self.calc_speed(ts) if (self.calculate_speed and is_3d) else None
-
-    def calc_speed(self, ts: timedelta) -> Union[float, np.ndarray]:
+    def calc_speed(self, ts: timedelta, coords: Tuple[float, float, float]) -> float:
         """
-        Should be called after adding new TrackingDetection to self.previous_detections
+        Adds new position (in mm) of the object and returns its mean speed (in m/s) over the last second.
+        Updated incrementally, so the cost doesn't depend on the length of the history.
         """
-
-        def get_coords(det) -> dai.Point3f:
-            return det.filtered_3d or det.tracklet.spatialCoordinates
-
-        def get_dist(p1: dai.Point3f, p2: dai.Point3f) -> float:
-            return np.sqrt((p2.x - p1.x) ** 2 + (p2.y - p1.y) ** 2 + (p2.z - p1.z) ** 2) / 1000
-
-        speeds = []
-        for i in range(len(self.previous_detections) - 1):
-            d1 = self.previous_detections[i]
-            # if d1 timestamp is older than 1 second, skip
-            if (ts - d1.ts).total_seconds() > 1:
-                continue
-            d2 = self.previous_detections[i + 1]
-            distance = get_dist(get_coords(d1), get_coords(d2))
-            time = (d2.ts - d1.ts).total_seconds()
-            speeds.append(distance / time)
-
-        if len(speeds) == 0:
+        if self._last_coords is not None:
+            last_ts, last = self._last_coords
+            time = (ts - last_ts).total_seconds()
+            if 0 < time:
+                distance = math.sqrt((coords[0] - last[0]) ** 2 +
+                                     (coords[1] - last[1]) ** 2 +
+                                     (coords[2] - last[2]) ** 2) / 1000
+                self._speeds.append((last_ts, distance / time))
+                self._speed_sum += distance / time
+        self._last_coords = (ts, coords)
+
+        # Skip speeds whose older detection is more than 1 second old
+        while self._speeds and 1 < (ts - self._speeds[0][0]).total_seconds():
+            self._speed_sum -= self._speeds.popleft()[1]
+
+        if len(self._speeds) == 0:
+            self._speed_sum = 0.0  # Don't accumulate rounding errors
             return 0.0
+        return self._speed_sum / len(self._speeds)
 
-        window_size = 3
-        window = np.hanning(window_size)
-        window /= window.sum()
 
-        smoothed = np.convolve(speeds, window, mode='same')
-        return np.mean(smoothed)
+class TrackedObjects:
+    """
+    Host-side state of all tracked objects: detection history, Kalman filtering (of the bounding box, and of the
+    spatial coordinates for spatial tracklets) and speed estimation. Filters of all objects are stepped together
+    as one batched operation per frame.
+    """
 
-    def _is_3d(self, tracklet: dai.Tracklet) -> bool:
-        return (tracklet.spatialCoordinates.x != 0.0 or
-                tracklet.spatialCoordinates.y != 0.0 or
-                tracklet.spatialCoordinates.z != 0.0)
-
-    def _calc_kalman_3d(self, tracklet: dai.Tracklet, ts: timedelta) -> Union[None, dai.Point3f]:
-        x_space = tracklet.spatialCoordinates.x
-        y_space = tracklet.spatialCoordinates.y
-        z_space = tracklet.spatialCoordinates.z
-        meas_vec_space = np.array([[x_space], [y_space], [z_space]])
-        meas_std_space = z_space ** 2 / (self.baseline * self.focal)
-
-        if self.kalman_3d is None:
-            self.kalman_3d = KalmanFilter(10, 0.1, meas_vec_space, ts)
-            return None
-
-        dt = (ts - self.kalman_3d.time).total_seconds()
-        self.kalman_3d.predict(dt)
-        self.kalman_3d.update(meas_vec_space)
-        self.kalman_3d.time = ts
-        self.kalman_3d.meas_std = meas_std_space
-        vec_space = self.kalman_3d.x
-        return dai.Point3f(vec_space[0], vec_space[1], vec_space[2])
-
-    def _calc_kalman_2d(self, tracklet: dai.Tracklet, ts: timedelta) -> Union[None, BoundingBox]:
-        bb = BoundingBox(tracklet.srcImgDetection)
-        x_mid, y_mid = bb.get_centroid().to_tuple()
-
-        meas_vec_bbox = np.array([[x_mid], [y_mid], [bb.width], [bb.height]])
-
-        if self.kalman_2d is None:
-            self.kalman_2d = KalmanFilter(10, 0.1, meas_vec_bbox, ts)
-            return None
+    def __init__(self,
+                 baseline: float,
+                 focal: float,
+                 apply_kalman: bool = False,
+                 forget_after_n_frames: Optional[int] = None,
+                 calculate_speed: bool = False,
+                 history_length: int = 100):
+        self.baseline = baseline
+        self.focal = focal
+        self.apply_kalman = apply_kalman
+        self.forget_after_n_frames = forget_after_n_frames
+        self.calculate_speed = calculate_speed
+        self.history_length = history_length
+
+        self.objects: Dict[int, TrackedObject] = {}
+        # Bounding box: (x_mid, y_mid, width, height)
+        self.kalman_2d = BatchedKalmanFilter(4, 10, 0.1)
+        # Spatial coordinates: (x, y, z)
+        self.kalman_3d = BatchedKalmanFilter(3, 10, 0.1)
+
+    def update(self,
+               tracklets: List[dai.Tracklet],
+               ts: timedelta,
+               labels: Optional[List[Tuple[str, Tuple[int, int, int]]]] = None
+               ) -> None:
+        if len(tracklets) == 0:
+            return
+
+        ids = [t.id for t in tracklets]
+        bboxes = [BoundingBox(t.srcImgDetection) for t in tracklets]
+        coords = [t.spatialCoordinates for t in tracklets]
+        coords = [(c.x, c.y, c.z) for c in coords]
+        is_3d = np.array([c[0] != 0.0 or c[1] != 0.0 or c[2] != 0.0 for c in coords])
+
+        filtered_2d = [None] * len(tracklets)
+        filtered_3d = [None] * len(tracklets)
+        if self.apply_kalman:
+            filtered_2d = self._filter_2d(ids, bboxes, ts)
+            if is_3d.any():
+                for i, point in zip(np.flatnonzero(is_3d), self._filter_3d(ids, coords, is_3d, ts)):
+                    filtered_3d[i] = point
+
+        for i, tracklet in enumerate(tracklets):
+            # If there is no id in self.objects, create new TrackedObject. This could happen if
+            # TrackingStatus.NEW, or we removed it (too many lost frames)
+            obj = self.objects.get(tracklet.id)
+            if obj is None:
+                obj = self.objects[tracklet.id] = TrackedObject(self.history_length)
 
-        dt = (ts - self.kalman_2d.time).total_seconds()
+            if tracklet.status == dai.Tracklet.TrackingStatus.TRACKED:
+                obj.lost_counter = 0
+            elif tracklet.status == dai.Tracklet.TrackingStatus.LOST:
+                obj.lost_counter += 1
 
-        self.kalman_2d.predict(dt)
-        self.kalman_2d.update(meas_vec_bbox)
-        self.kalman_2d.time = ts
-        vec_bbox = self.kalman_2d.x
+            img_d = tracklet.srcImgDetection
+            tracking_det = TrackingDetection(
+                img_detection=img_d,
+                label_str=labels[img_d.label][0] if labels else str(img_d.label),
+                confidence=img_d.confidence,
+                color=labels[img_d.label][1] if labels else (255, 255, 255),
+                bbox=bboxes[i],
+                angle=None,
+                tracklet=tracklet,
+                ts=ts,
+                filtered_2d=filtered_2d[i],
+                filtered_3d=filtered_3d[i],
+                speed=None,
+            )
+            obj.previous_detections.append(tracking_det)
+            if self.calculate_speed and is_3d[i]:
+                point = filtered_3d[i]
+                tracking_det.speed = obj.calc_speed(ts, (point.x, point.y, point.z) if point is not None else coords[i])
 
-        return BoundingBox([
-            vec_bbox[0][0] - vec_bbox[2][0] / 2,
-            vec_bbox[1][0] - vec_bbox[3][0] / 2,
-            vec_bbox[0][0] + vec_bbox[2][0] / 2,
-            vec_bbox[1][0] + vec_bbox[3][0] / 2,
-        ])
+            if tracklet.status == dai.Tracklet.TrackingStatus.REMOVED or \
+                    (self.forget_after_n_frames is not None and
+                     self.forget_after_n_frames <= obj.lost_counter):
+                # Remove TrackedObject
+                self.objects.pop(tracklet.id)
+                self.kalman_2d.remove(tracklet.id)
+                self.kalman_3d.remove(tracklet.id)
+
+    def _filter_2d(self, ids: List[int], bboxes: List[BoundingBox], ts: timedelta) -> List[Optional[BoundingBox]]:
+        meas = np.array([[(bb.xmin + bb.xmax) / 2, (bb.ymin + bb.ymax) / 2, bb.width, bb.height] for bb in bboxes])
+        filtered, valid = self.kalman_2d.step(ids, meas, ts.total_seconds())
+        ret = [None] * len(ids)
+        for i in np.flatnonzero(valid):
+            x, y, w, h = filtered[i].tolist()
+            ret[i] = BoundingBox([x - w / 2, y - h / 2, x + w / 2, y + h / 2])
+        return ret
+
+    def _filter_3d(self,
+                   ids: List[int],
+                   coords: List[Tuple[float, float, float]],
+                   is_3d: np.ndarray,
+                   ts: timedelta) -> List[Optional[dai.Point3f]]:
+        idx = np.flatnonzero(is_3d)
+        meas = np.array([coords[i] for i in idx])
+        meas_std = meas[:, 2] ** 2 / (self.baseline * self.focal)
+        filtered, valid = self.kalman_3d.step([ids[i] for i in idx], meas, ts.total_seconds(), meas_std)
+        return [dai.Point3f(*filtered[i].tolist()) if valid[i] else None for i in range(len(idx))]
 
 
 class XoutTracker(XoutNnResults):
@@ -140,53 +172,28 @@ class XoutTracker(XoutNnResults):
                  apply_kalman: bool = False,
                  forget_after_n_frames: Optional[int] = None,
                  calculate_speed: bool = False,
+                 history_length: int = 100,
                  ):
         """
         apply_kalman: Whether to apply kalman filter to tracklets
         forget_after_n_frames: If tracklet is lost for n frames, remove it from tracked_objects
-
+        calculate_speed: Whether to calculate speed of spatial tracklets
+        history_length: Number of past detections kept (and sent in TrackerPacket) for each tracked object
         """
         super().__init__(det_nn, frames, tracklets, bbox)
         self.name = 'Object Tracker'
         self.__read_device_calibration(device)
 
-        self.tracked_objects: Dict[int, TrackedObject] = {}
-
-        self.apply_kalman = apply_kalman
-        self.forget_after_n_frames = forget_after_n_frames
-        self.calculate_speed = calculate_speed
+        self.tracker = TrackedObjects(self.baseline, self.focal,
+                                      apply_kalman=apply_kalman,
+                                      forget_after_n_frames=forget_after_n_frames,
+                                      calculate_speed=calculate_speed,
+                                      history_length=history_length)
+        self.tracked_objects: Dict[int, TrackedObject] = self.tracker.objects
 
     def package(self, msgs: Dict) -> TrackerPacket:
         tracklets: dai.Tracklets = msgs[self.nn_results.name]
-
-        for tracklet in tracklets.tracklets:
-            # If there is no id in self.tracked_objects, create new TrackedObject. This could happen if
-            # TrackingStatus.NEW, or we removed it (too many lost frames)
-            if tracklet.id not in self.tracked_objects:
-                self.tracked_objects[tracklet.id] = TrackedObject(self.baseline, self.focal, self.apply_kalman,
-                                                                  self.calculate_speed)
-
-            if tracklet.status == dai.Tracklet.TrackingStatus.NEW:
-                pass
-            elif tracklet.status == dai.Tracklet.TrackingStatus.TRACKED:
-                self.tracked_objects[tracklet.id].lost_counter = 0
-            elif tracklet.status == dai.Tracklet.TrackingStatus.LOST:
-                self.tracked_objects[tracklet.id].lost_counter += 1
-
-            img_d = tracklet.srcImgDetection
-            # When adding new tracklet, TrackletObject class will also perform filtering
-            # and speed estimation
-            self.tracked_objects[tracklet.id] \
-                .new_tracklet(tracklet,
-                              tracklets.getTimestamp(),
-                              self.labels[img_d.label][1] if self.labels else (255, 255, 255),
-                              self.labels[img_d.label][0] if self.labels else str(img_d.label)
-                              )
-            if tracklet.status == dai.Tracklet.TrackingStatus.REMOVED or \
-                    (self.forget_after_n_frames is not None and \
-                     self.forget_after_n_frames <= self.tracked_objects[tracklet.id].lost_counter):
-                # Remove TrackedObject
-                self.tracked_objects.pop(tracklet.id)
+        self.tracker.update(tracklets.tracklets, tracklets.getTimestamp(), self.labels)
 
         packet = TrackerPacket(
             self.get_packet_name(),
@@ -196,10 +203,7 @@ class XoutTracker(XoutNnResults):
         )
 
         for obj_id, tracked_obj in self.tracked_objects.items():
-            if obj_id not in packet.tracklets:
-                packet.tracklets[obj_id] = []
-            for tracking_det in tracked_obj.previous_detections:
-                packet.tracklets[obj_id].append(tracking_det)
+            packet.tracklets[obj_id] = list(tracked_obj.previous_detections)
 
         return packet
 
@@ -1,10 +1,12 @@
 import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 
 import numpy as np
 
+from depthai_sdk.readers.recording_index import RecordingIndex
+
 
 class AbstractReader(ABC):
     @abstractmethod
@@ -32,6 +34,13 @@ class AbstractReader(ABC):
         """
         return None
 
+    def is_pointcloud(self, name: str) -> bool:
+        """
+        Whether the stream is a recorded point cloud. Its frames are Nx3 (or Nx6 with BGR colors) float32 arrays,
+        see to_pointcloud_frame().
+        """
+        return False
+
     @abstractmethod
     def get_message_size(self, name: str) -> int:
         """
@@ -51,6 +60,22 @@ class AbstractReader(ABC):
         """
         pass
 
+    def build_index(self) -> Optional[RecordingIndex]:
+        """
+        Builds an index of the recording (timestamps, offsets and keyframes of each stream), which is required
+        for seeking. Shouldn't change the current read position.
+        @return: RecordingIndex, or None if the reader doesn't support seeking.
+        """
+        return None
+
+    def seek(self, index: RecordingIndex, frames: Dict[str, int]):
+        """
+        Seek to the specified frames, so the next read() returns them.
+        @param index: Index of the recording, built by build_index()
+        @param frames: Frame number for each stream
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support seeking!')
+
     def _fileWithExt(self, folder: Path, ext: str) -> str:
         for f in os.listdir(str(folder)):
             if f.endswith(ext):
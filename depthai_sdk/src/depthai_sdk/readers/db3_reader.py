@@ -1,3 +1,5 @@
+import sqlite3
+from contextlib import closing
 from pathlib import Path
 from typing import Generator, List, Dict, Tuple, Optional
 
@@ -6,12 +8,14 @@ import numpy as np
 from rosbags.rosbag2 import Reader
 from rosbags.serde import deserialize_cdr
 
+from depthai_sdk.components.pointcloud_helper import decode_pointcloud, to_pointcloud_frame
 from depthai_sdk.previews import PreviewDecoder
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex, StreamIndex
 
 
 class Db3Reader(AbstractReader):
-    STREAMS = ['left', 'right', 'rgb', 'depth']
+    STREAMS = ['left', 'right', 'rgb', 'depth', 'pointcloud']
     generators: Dict[str, Generator] = {}
     frames = None  # For shapes
 
@@ -54,6 +58,10 @@ class Db3Reader(AbstractReader):
         Convert ROS message to cv2 frame (numpy array)
         """
         msg_type = str(type(msg))
+        if 'PointCloud2' in msg_type:
+            return to_pointcloud_frame(*decode_pointcloud([(f.name, f.offset, f.datatype) for f in msg.fields],
+                                                          msg.point_step, msg.data.tobytes(),
+                                                          msg.width * msg.height))
         data = np.frombuffer(msg.data, dtype=np.int8)
 
         if 'CompressedImage' in msg_type:
@@ -67,7 +75,10 @@ class Db3Reader(AbstractReader):
             return data.reshape((msg.height, msg.width))
             # msg.encoding
         else:
-            raise Exception('Only CompressedImage and Image ROS messages are currently supported.')
+            raise Exception('Only CompressedImage, Image and PointCloud2 ROS messages are currently supported.')
+
+    def is_pointcloud(self, name: str) -> bool:
+        return name == 'pointcloud'
 
     def getStreams(self) -> List[str]:
         streams = [name for name in self.frames]
@@ -83,5 +94,30 @@ class Db3Reader(AbstractReader):
             size *= shape
         return size
 
+    def build_index(self) -> RecordingIndex:
+        # Query timestamps directly from the sqlite database, so message data doesn't have to be read
+        streams = dict()
+        for con in self.reader.connections:
+            for stream in self.STREAMS:
+                if stream.lower() not in con.topic.lower() or stream.lower() not in self.generators:
+                    continue
+                rows = []
+                for path in self.reader.paths:
+                    with closing(sqlite3.connect(str(path))) as db:
+                        rows += db.execute('SELECT messages.timestamp, messages.id FROM messages '
+                                           'JOIN topics ON messages.topic_id = topics.id '
+                                           'WHERE topics.name = ? ORDER BY messages.timestamp',
+                                           (con.topic,)).fetchall()
+                streams[stream.lower()] = StreamIndex([ts for ts, _ in rows], offsets=[i for _, i in rows])
+        return RecordingIndex(streams)
+
+    def seek(self, index: RecordingIndex, frames: Dict[str, int]):
+        for con in self.reader.connections:
+            for stream in self.STREAMS:
+                name = stream.lower()
+                if name in con.topic.lower() and name in self.generators and name in frames:
+                    start = index.streams[name].timestamps[frames[name]]
+                    self.generators[name] = self.reader.messages([con], start=start)
+
     def close(self):
         self.reader.close()
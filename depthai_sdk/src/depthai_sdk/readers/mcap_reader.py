@@ -1,5 +1,6 @@
+import struct
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterator, Any, Optional
 
 import cv2
 import numpy as np
@@ -7,22 +8,43 @@ from mcap.mcap0.reader import make_reader
 from mcap.mcap0.stream_reader import StreamReader
 from mcap_ros1.decoder import Decoder
 
+from depthai_sdk.components.pointcloud_helper import decode_pointcloud, to_pointcloud_frame
 from depthai_sdk.previews import PreviewDecoder
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex, StreamIndex
+from depthai_sdk.recorders.video_writers.av_writer import is_keyframe
+
+KEYFRAMES_METADATA = 'depthai_sdk.keyframes'
+VIDEO_SCHEMA = 'foxglove_msgs/CompressedVideo'
+POINTCLOUD_SCHEMA = 'sensor_msgs/PointCloud2'
+
+
+def _topic_name(topic: str) -> str:
+    return topic.strip('/').split('/')[0]
 
 
 class McapReader(AbstractReader):
     """
     Reads all saved streams from .mcap recording.
-    Supported ROS messages: Image (depth), CompressedImage (left, right, color, disparity)
+    Supported ROS messages: Image (depth), CompressedImage (left, right, color, disparity),
+    foxglove_msgs/CompressedVideo (H.264/H.265, decoded with PyAV), PointCloud2 (Nx3/Nx6 point cloud frames)
     """
 
     def __init__(self, folder: Path) -> None:
+        self._path = folder
+        self._file = None  # Opened on seek()
+        self._seek_times: Dict[str, int] = dict()  # Skip messages older than these log times (after seek())
+        self._decoders: Dict[str, Any] = dict()  # av.CodecContext for each video stream
+
         # Get available topics
         with open(folder, "rb") as file:
             reader = make_reader(file)
-            channels = reader.get_summary().channels
-            self._topics = [c.topic.split('/')[0] for _, c in channels.items()]
+            summary = reader.get_summary()
+            self._topics = [_topic_name(c.topic) for _, c in summary.channels.items()]
+            self._video_topics = [_topic_name(c.topic) for _, c in summary.channels.items()
+                                  if summary.schemas[c.schema_id].name == VIDEO_SCHEMA]
+            self._pointcloud_topics = [_topic_name(c.topic) for _, c in summary.channels.items()
+                                       if summary.schemas[c.schema_id].name == POINTCLOUD_SCHEMA]
 
         self._readFrames = dict()
 
@@ -50,15 +72,27 @@ class McapReader(AbstractReader):
         to get one of each buffered frame.
         """
         while not self._framesReady():
-            topic, _, msg = next(self.msgs)
-            name = topic.split('/')[0]
-            self._readFrames[name].append(self._getCvFrame(msg, name))
+            topic, record, msg = next(self.msgs)
+            name = _topic_name(topic)
+            if record.log_time < self._seek_times.get(name, 0):
+                if name in self._video_topics:
+                    self._decode_video(msg, name)  # Frames since the keyframe are needed to decode the target
+                continue
+            frame = self._getCvFrame(msg, name)
+            if frame is not None:
+                self._readFrames[name].append(frame)
 
     def _getCvFrame(self, msg, name: str):
         """
         Convert ROS message to cv2 frame (numpy array)
         """
         msgType = str(type(msg))
+        if 'CompressedVideo' in msgType:
+            return self._decode_video(msg, name)
+        if 'PointCloud2' in msgType:
+            fields = [(f.name, f.offset, f.datatype) for f in msg.fields]
+            return to_pointcloud_frame(*decode_pointcloud(fields, msg.point_step, bytes(msg.data),
+                                                          msg.width * msg.height))
         data = np.frombuffer(msg.data, dtype=np.int8)
         if 'CompressedImage' in msgType:
             if name == 'color':
@@ -71,7 +105,23 @@ class McapReader(AbstractReader):
             return data.reshape((msg.height, msg.width))
             # msg.encoding
         else:
-            raise Exception('Only CompressedImage and Image ROS messages are currently supported.')
+            raise Exception('Only CompressedImage, CompressedVideo, Image and PointCloud2 ROS messages '
+                            'are currently supported.')
+
+    def _decode_video(self, msg, name: str) -> Optional[np.ndarray]:
+        """
+        Decodes H.264/H.265 access unit, returns BGR frame, or None if the decoder didn't output a frame (yet).
+        """
+        import av
+        decoder = self._decoders.get(name)
+        if decoder is None:
+            decoder = self._decoders[name] = av.CodecContext.create('hevc' if msg.format == 'h265' else 'h264', 'r')
+
+        # Each message is a whole access unit, so it's decoded directly (parser would hold it until the next one)
+        frame = None
+        for av_frame in decoder.decode(av.Packet(bytes(msg.data))):
+            frame = av_frame.to_ndarray(format='bgr24')
+        return frame
 
     def _framesReady(self):
         """
@@ -96,6 +146,9 @@ class McapReader(AbstractReader):
         """
         return [name for name in self._topics]
 
+    def is_pointcloud(self, name: str) -> bool:
+        return name in self._pointcloud_topics
+
     def getShape(self, name: str) -> Tuple[int, int]:
         frame = self._readFrames[name][0]
         return (frame.shape[1], frame.shape[0])
@@ -106,5 +159,80 @@ class McapReader(AbstractReader):
             size *= shape
         return size
 
+    def build_index(self) -> RecordingIndex:
+        timestamps: Dict[str, List[int]] = {topic: [] for topic in self._topics}
+        keyframes: Optional[Dict[str, List[int]]] = None
+        with open(self._path, "rb") as file:
+            reader = make_reader(file)
+            # Keyframes saved by McapRecorder, otherwise they are found by parsing the bitstream
+            for metadata in reader.iter_metadata():
+                if metadata.name == KEYFRAMES_METADATA:
+                    keyframes = {_topic_name(topic): [int(i) for i in frames.split(',') if i]
+                                 for topic, frames in metadata.metadata.items()}
+            parse_keyframes = keyframes is None
+            if parse_keyframes:
+                keyframes = {topic: [] for topic in self._video_topics}
+
+            for _, channel, record in reader.iter_messages():
+                name = _topic_name(channel.topic)
+                if name not in timestamps:
+                    continue
+                if parse_keyframes and name in keyframes and is_keyframe(*self._video_payload(record.data)):
+                    keyframes[name].append(len(timestamps[name]))
+                timestamps[name].append(record.log_time)
+
+        return RecordingIndex({name: StreamIndex(ts, keyframes.get(name)) for name, ts in timestamps.items()})
+
+    @staticmethod
+    def _video_payload(data: bytes) -> Tuple[bytes, str]:
+        """
+        Returns bitstream and format of serialized CompressedVideo message
+        (time timestamp, string frame_id, uint8[] data, string format).
+        """
+        frame_id_len, = struct.unpack_from('<I', data, 8)
+        offset = 12 + frame_id_len
+        size, = struct.unpack_from('<I', data, offset)
+        offset += 4 + size
+        fmt_len, = struct.unpack_from('<I', data, offset)
+        return data[offset - size:offset], data[offset + 4:offset + 4 + fmt_len].decode()
+
+    def seek(self, index: RecordingIndex, frames: Dict[str, int]):
+        self._seek_times = {name: index.streams[name].timestamps[frame]
+                            for name, frame in frames.items()
+                            if name in self._readFrames and name in index.streams
+                            and frame < len(index.streams[name].timestamps)}
+        if not self._seek_times:
+            raise ValueError(f"Can't seek, none of the streams {list(frames)} has indexed frames "
+                             f"in '{self._path}' (streams: {self._topics})!")
+        for arr in self._readFrames.values():
+            arr.clear()
+
+        # Video streams are decoded from the closest keyframe, frames before the target are decoded and dropped
+        start_times = list(self._seek_times.values())
+        for name in self._video_topics:
+            if name in self._seek_times:
+                stream = index.streams[name]
+                start_times.append(stream.timestamps[stream.keyframe_before(frames[name])])
+        self._decoders.clear()
+
+        # Summary section of the MCAP contains chunk indexes, so only chunks after the target time are read
+        if self._file is None:
+            self._file = open(self._path, "rb")
+        reader = make_reader(self._file)
+        self.msgs = self._decode(reader.iter_messages(start_time=min(start_times)))
+
+    def _decode(self, messages: Iterator) -> Iterator[Tuple[str, Any, Any]]:
+        """
+        Deserializes ROS1 messages, yields (topic, record, msg) like mcap_ros1 Decoder.
+        """
+        from genpy import dynamic
+        msg_types = dict()
+        for schema, channel, record in messages:
+            if schema.name not in msg_types:
+                msg_types[schema.name] = dynamic.generate_dynamic(schema.name, schema.data.decode())[schema.name]
+            yield channel.topic, record, msg_types[schema.name]().deserialize(record.data)
+
     def close(self):
-        pass
+        if self._file is not None:
+            self._file.close()
+            self._file = None
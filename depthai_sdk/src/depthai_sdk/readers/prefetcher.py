@@ -0,0 +1,132 @@
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from depthai_sdk.logger import LOGGER
+from depthai_sdk.readers.abstract_reader import AbstractReader
+
+_END = object()  # Marks the end of the recording
+
+
+class ReaderPrefetcher:
+    """
+    Reads (and decodes) frames from a Reader ahead of time on a separate thread. Each stream then gets its own
+    worker thread that prepares frames for the device (eg. resizing, conversion to planar, ImgFrame creation).
+    Stages are connected with bounded queues, so at most `queue_size` frames per stream are read ahead.
+
+    Most of the heavy lifting (video decoding, cv2 resizing, numpy copies) releases the GIL, so stages run in
+    parallel with each other and with the thread that sends frames to the device.
+    """
+
+    def __init__(self,
+                 reader: AbstractReader,
+                 streams: List[str],
+                 prepare: Callable[[str, np.ndarray], Any],
+                 queue_size: int = 4):
+        """
+        Args:
+            reader: Reader from which frames are read.
+            streams: Names (lowercase) of streams that will be prefetched.
+            prepare: Function that gets called on a stream worker thread with (stream_name, frame).
+            queue_size: Maximum number of frames per stream that are read ahead.
+        """
+        self.reader = reader
+        self.streams = streams
+        self.prepare = prepare
+
+        self._stop_event = Event()
+        self._read_queues: Dict[str, Queue] = {name: Queue(maxsize=queue_size) for name in streams}
+        self._ready_queues: Dict[str, Queue] = {name: Queue(maxsize=queue_size) for name in streams}
+        self._threads: List[Thread] = []
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._threads = [Thread(target=self._read_loop, name='ReplayReader', daemon=True)]
+        for name in self.streams:
+            self._threads.append(Thread(target=self._prepare_loop, args=(name,), name=f'ReplayPrepare-{name}',
+                                        daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops all threads and discards frames that were read ahead.
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        for q in list(self._read_queues.values()) + list(self._ready_queues.values()):
+            while not q.empty():
+                q.get_nowait()
+
+    def get(self) -> Optional[Dict[str, Tuple[np.ndarray, Any]]]:
+        """
+        Blocks until the next frame of every stream is prepared.
+
+        Returns:
+            Dict of stream name -> (frame, prepared frame), or None at the end of the recording. Streams that
+            weren't read by the reader have (None, None) as their value.
+        """
+        ret = dict()
+        for name, q in self._ready_queues.items():
+            item = self._get(q)
+            if item is _END:
+                return None
+            ret[name] = item
+        return ret
+
+    def qsize(self) -> int:
+        """
+        Number of frames that are prepared and ready to be sent (minimum over all streams).
+        """
+        return min((q.qsize() for q in self._ready_queues.values()), default=0)
+
+    def _read_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                frames = self.reader.read()
+            except StopIteration:
+                frames = None
+            except Exception as e:
+                LOGGER.error(f'Error while reading the recording: {e}')
+                frames = None
+
+            if not frames:
+                for q in self._read_queues.values():
+                    self._put(q, _END)
+                break
+
+            frames = {name.lower(): frame for name, frame in frames.items()}
+            for name, q in self._read_queues.items():
+                self._put(q, frames.get(name, None))
+
+    def _prepare_loop(self, name: str) -> None:
+        read_q, ready_q = self._read_queues[name], self._ready_queues[name]
+        while not self._stop_event.is_set():
+            frame = self._get(read_q)
+            if frame is _END:
+                self._put(ready_q, _END)
+                break
+
+            prepared = self.prepare(name, frame) if frame is not None else None
+            self._put(ready_q, (frame, prepared))
+
+    def _put(self, q: Queue, item) -> None:
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def _get(self, q: Queue):
+        while not self._stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except Empty:
+                pass
+        return _END
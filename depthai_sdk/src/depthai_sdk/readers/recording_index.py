@@ -0,0 +1,181 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from depthai_sdk.logger import LOGGER
+
+INDEX_FILE_NAME = '.replay_index.json'
+_INDEX_VERSION = 1
+
+
+class StreamIndex:
+    """
+    Index of a single recorded stream. Frame number `i` was recorded at `timestamps[i]` (nanoseconds) and is
+    stored at `offsets[i]` (byte offset/record id, reader specific).
+    """
+
+    def __init__(self,
+                 timestamps: List[int],
+                 keyframes: Optional[List[int]] = None,
+                 offsets: Optional[List[int]] = None):
+        """
+        Args:
+            timestamps: Timestamp (in nanoseconds) of each frame, sorted.
+            keyframes: Sorted frame numbers of keyframes. None if every frame is a keyframe (eg. MJPEG, raw frames).
+            offsets: File offset (or record id) of each frame. None if the reader doesn't use them.
+        """
+        self.timestamps = timestamps
+        self.keyframes = keyframes
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def frame_at(self, timestamp: int) -> int:
+        """
+        Returns number of the first frame recorded at or after `timestamp` (nanoseconds).
+        """
+        return min(bisect_left(self.timestamps, timestamp), max(len(self.timestamps) - 1, 0))
+
+    def keyframe_before(self, frame: int) -> int:
+        """
+        Returns number of the closest keyframe at or before `frame`, from which decoding of `frame` can start.
+        """
+        if self.keyframes is None:
+            return frame
+        i = bisect_right(self.keyframes, frame) - 1
+        return self.keyframes[i] if 0 <= i else 0
+
+    def to_dict(self) -> Dict:
+        return {'timestamps': self.timestamps, 'keyframes': self.keyframes, 'offsets': self.offsets}
+
+    @staticmethod
+    def from_dict(d: Dict) -> 'StreamIndex':
+        return StreamIndex(d['timestamps'], d.get('keyframes'), d.get('offsets'))
+
+
+class RecordingIndex:
+    """
+    Index of a recording that maps timestamps and frame numbers of each stream to file offsets and keyframes,
+    so readers can seek without decoding everything before the target frame. Built by
+    `AbstractReader.build_index()` and persisted next to the recording, so it only has to be built once.
+    """
+
+    def __init__(self, streams: Dict[str, StreamIndex], signature: Optional[List] = None):
+        """
+        Args:
+            streams: Index of each stream, keyed by the stream name used by the reader.
+            signature: Name, size and modification time of recorded files, used to detect stale indexes.
+        """
+        self.streams = streams
+        self.signature = signature
+
+    @property
+    def start(self) -> int:
+        """
+        Timestamp (nanoseconds) of the first recorded frame.
+        """
+        return min((s.timestamps[0] for s in self.streams.values() if len(s)), default=0)
+
+    @property
+    def end(self) -> int:
+        """
+        Timestamp (nanoseconds) of the last recorded frame.
+        """
+        return max((s.timestamps[-1] for s in self.streams.values() if len(s)), default=0)
+
+    def duration(self) -> float:
+        """
+        Duration of the recording in seconds.
+        """
+        return (self.end - self.start) / 1e9
+
+    def reference_stream(self) -> str:
+        """
+        Stream that frame numbers (eg. `Replay.seek(frame=...)`) refer to.
+        """
+        return next(iter(self.streams))
+
+    def frames_at(self, time: float) -> Dict[str, int]:
+        """
+        Returns number of the first frame of each stream that was recorded at or after `time`
+        (seconds since the start of the recording).
+        """
+        timestamp = self.start + int(time * 1e9)
+        return {name: stream.frame_at(timestamp) for name, stream in self.streams.items()}
+
+    def frames_before(self, time: float) -> int:
+        """
+        Returns number of frames of the reference stream that were recorded before `time`
+        (seconds since the start of the recording).
+        """
+        timestamps = self.streams[self.reference_stream()].timestamps
+        return bisect_left(timestamps, self.start + int(time * 1e9))
+
+    def time_of(self, frame: int, stream: Optional[str] = None) -> float:
+        """
+        Returns time (seconds since the start of the recording) of the frame number `frame` of the `stream`
+        (reference stream by default).
+        """
+        timestamps = self.streams[stream or self.reference_stream()].timestamps
+        if not 0 <= frame < len(timestamps):
+            raise ValueError(f'Frame {frame} is out of range, recording has {len(timestamps)} frames!')
+        return (timestamps[frame] - self.start) / 1e9
+
+    def save(self, path: Path) -> None:
+        data = {
+            'version': _INDEX_VERSION,
+            'signature': self.signature,
+            'streams': {name: stream.to_dict() for name, stream in self.streams.items()}
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f)
+        except OSError as e:
+            LOGGER.warning(f'Could not save recording index to {path}: {e}')
+
+    @staticmethod
+    def load(path: Path, signature: Optional[List] = None) -> Optional['RecordingIndex']:
+        """
+        Loads an index from `path`. Returns None if there's no index, or if it was built for a different
+        version of the recording (signature mismatch).
+        """
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.warning(f'Could not load recording index {path}: {e}')
+            return None
+
+        if data.get('version') != _INDEX_VERSION or data.get('signature') != signature:
+            return None
+
+        streams = {name: StreamIndex.from_dict(d) for name, d in data['streams'].items()}
+        return RecordingIndex(streams, signature)
+
+
+def recording_signature(path: Path) -> List:
+    """
+    Returns name, size and modification time of each recorded file in `path` (file or folder).
+    """
+    files = [path] if path.is_file() else sorted(f for f in path.iterdir() if f.is_file())
+    signature = []
+    for f in files:
+        if f.name == INDEX_FILE_NAME:
+            continue
+        stat = os.stat(f)
+        signature.append([f.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def index_path(path: Path) -> Path:
+    """
+    Returns path of the sidecar index file for the recording at `path` (file or folder).
+    """
+    if path.is_file():
+        return path.with_name(f'.{path.name}.index.json')
+    return path / INDEX_FILE_NAME
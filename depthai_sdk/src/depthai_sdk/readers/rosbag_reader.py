@@ -1,44 +1,97 @@
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Iterator, Optional
 
 import numpy as np
 from rosbags.rosbag1 import Reader
 from rosbags.serde import deserialize_cdr, ros1_to_cdr
 
+from depthai_sdk.components.pointcloud_helper import decode_pointcloud, to_pointcloud_frame
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex, StreamIndex
+
+_DEPTH_TOPIC = '/device_0/sensor_0/Depth_0/image/data'
+_POINTCLOUD_TYPE = 'sensor_msgs/msg/PointCloud2'
 
 
 class RosbagReader(AbstractReader):
     """
+    Reads depth (RealSense depth topic) and point clouds (PointCloud2 topics, eg. /pointcloud/raw) from .bag recording.
     TODO: make the stream selectable, add function that returns all available streams
     """
 
     def __init__(self, folder: Path) -> None:
+        if folder.is_dir():
+            folder = folder / self._fileWithExt(folder, '.bag')
         self.reader = Reader(folder)
         self.reader.open()
-        if '/device_0/sensor_0/Depth_0/image/data' not in self.reader.topics:
-            raise Exception("Provided rosbag can't find required topic (`/device_0/sensor_0/Depth_0/image/data`)")
-        self.generator = self.reader.messages('/device_0/sensor_0/Depth_0/image/data')
 
-    def read(self):
-        connection, _, rawdata = next(self.generator)
-        msg = deserialize_cdr(ros1_to_cdr(rawdata, connection.msgtype), connection.msgtype)
-        return {
-            'depth': msg.data.view(np.int16).reshape((msg.height, msg.width))
-        }
+        self._connections: Dict[str, List] = dict()  # Stream name -> connections
+        depth = [con for con in self.reader.connections if con.topic == _DEPTH_TOPIC]
+        if depth:
+            self._connections['depth'] = depth
+        for con in self.reader.connections:
+            if con.msgtype == _POINTCLOUD_TYPE:
+                self._connections.setdefault(con.topic.strip('/').split('/')[0], []).append(con)
+        if not self._connections:
+            raise Exception(f"Provided rosbag can't find required topic (`{_DEPTH_TOPIC}`) or point cloud topics")
+
+        self.generators: Dict[str, Iterator] = {name: self.reader.messages(cons)
+                                                for name, cons in self._connections.items()}
+
+    def read(self) -> Optional[Dict[str, np.ndarray]]:
+        frames = dict()
+        try:
+            for name, gen in self.generators.items():
+                connection, _, rawdata = next(gen)
+                frames[name] = self._get_frame(self._deserialize(connection, rawdata))
+        except StopIteration:
+            return None
+        return frames
+
+    def _deserialize(self, connection, rawdata: bytes):
+        return deserialize_cdr(ros1_to_cdr(rawdata, connection.msgtype), connection.msgtype)
+
+    def _get_frame(self, msg) -> np.ndarray:
+        if 'PointCloud2' in str(type(msg)):
+            return to_pointcloud_frame(*decode_pointcloud([(f.name, f.offset, f.datatype) for f in msg.fields],
+                                                          msg.point_step, msg.data.tobytes(),
+                                                          msg.width * msg.height))
+        return msg.data.view(np.int16).reshape((msg.height, msg.width))
+
+    def _first_msg(self, name: str):
+        connection, _, rawdata = next(self.reader.messages(self._connections[name]))
+        return self._deserialize(connection, rawdata)
 
     def getStreams(self) -> List[str]:
-        return ["depth"]  # Only depth recording is supported
+        return list(self.generators)
+
+    def is_pointcloud(self, name: str) -> bool:
+        return self._connections[name][0].msgtype == _POINTCLOUD_TYPE
 
     def getShape(self, name: str) -> Tuple[int, int]:
-        connection, _, rawdata = next(self.reader.messages('/device_0/sensor_0/Depth_0/image/data'))
-        msg = deserialize_cdr(ros1_to_cdr(rawdata, connection.msgtype), connection.msgtype)
+        msg = self._first_msg(name)
         return msg.width, msg.height
 
     def get_message_size(self, name: str) -> int:
-        connection, _, rawdata = next(self.reader.messages('/device_0/sensor_0/Depth_0/image/data'))
-        msg = deserialize_cdr(ros1_to_cdr(rawdata, connection.msgtype), connection.msgtype)
-        return len(msg.data)  # TODO: test
+        return len(self._first_msg(name).data)  # TODO: test
+
+    def disableStream(self, name: str):
+        self.generators.pop(name, None)
+
+    def build_index(self) -> RecordingIndex:
+        # Bag already contains index records with timestamps and chunk positions of all messages
+        streams = dict()
+        for name in self.generators:
+            entries = sorted(entry for con in self._connections[name] for entry in self.reader.indexes[con.id])
+            streams[name] = StreamIndex([entry.time for entry in entries],
+                                        offsets=[entry.chunk_pos for entry in entries])
+        return RecordingIndex(streams)
+
+    def seek(self, index: RecordingIndex, frames: Dict[str, int]):
+        for name, frame in frames.items():
+            if name in self.generators:
+                start = index.streams[name].timestamps[frame]
+                self.generators[name] = self.reader.messages(self._connections[name], start=start)
 
     def close(self):
         self.reader.close()
@@ -9,7 +9,9 @@ try:
 except ImportError:
     cv2 = None
 
+from depthai_sdk.logger import LOGGER
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.recording_index import RecordingIndex, StreamIndex
 from depthai_sdk.components.parser import parse_camera_socket
 
 _videoExt = ['.mjpeg', '.avi', '.mp4', '.h265', '.h264']
@@ -33,7 +35,8 @@ class VideoCapReader(AbstractReader):
             stream_name = path.stem if (path.stem in ['left', 'right']) else 'color'
             self.videos[stream_name] = {
                 'reader': cv2.VideoCapture(str(path)),
-                'socket': dai.CameraBoardSocket.CAM_A
+                'socket': dai.CameraBoardSocket.CAM_A,
+                'path': path
             }
         else:
             for fileName in os.listdir(str(path)):
@@ -63,7 +66,8 @@ class VideoCapReader(AbstractReader):
                 #     stream = 'right'
                 self.videos[f_name.lower()] = {
                     'reader': cv2.VideoCapture(str(path / fileName)),
-                    'socket': socket
+                    'socket': socket,
+                    'path': path / fileName
                 }
 
         for name, video in self.videos.items():
@@ -83,6 +87,7 @@ class VideoCapReader(AbstractReader):
             if video['initialFrame'] is not None:
                 frames[name] = video['initialFrame'].copy()
                 video['initialFrame'] = None
+                continue
 
             if not video['reader'].isOpened():
                 return False
@@ -122,3 +127,69 @@ class VideoCapReader(AbstractReader):
     def get_message_size(self, name: str) -> int:
         video = self.videos[name.lower()]
         return video['shape'][0] * video['shape'][1] * (3 if video['is_color'] else 1)
+
+    def build_index(self) -> RecordingIndex:
+        return RecordingIndex({name: self._index_video(video['path']) for name, video in self.videos.items()})
+
+    def seek(self, index: RecordingIndex, frames: Dict[str, int]):
+        for name, frame in frames.items():
+            video = self.videos.get(name.lower())
+            if video is None:
+                continue
+            video['initialFrame'] = None
+
+            # Seek to the closest keyframe, then decode (grab) frames until the target frame
+            cap = video['reader']
+            keyframe = index.streams[name].keyframe_before(frame)
+            if not cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe) or int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != keyframe:
+                # Container doesn't support seeking (eg. raw h264/h265/mjpeg), decode from the start
+                cap.release()
+                cap = video['reader'] = cv2.VideoCapture(str(video['path']))
+                keyframe = 0
+            for _ in range(frame - keyframe):
+                cap.grab()
+
+    def _index_video(self, path: Path) -> StreamIndex:
+        """
+        Demuxes (without decoding) the video to get timestamps, byte offsets and keyframes of all frames.
+        Falls back to cv2 (frame count and FPS only) if PyAV isn't installed.
+        """
+        try:
+            import av
+        except ImportError:
+            LOGGER.info('Install PyAV (`pip install av`) for keyframe-aware seeking of video recordings.')
+            av = None
+
+        if av is None:
+            cap = cv2.VideoCapture(str(path))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if count <= 0:  # Raw streams don't have frame count, count them manually
+                count = 0
+                while cap.grab():
+                    count += 1
+            cap.release()
+            return StreamIndex([int(i / fps * 1e9) for i in range(count)])
+
+        packets = []  # (timestamp, keyframe, offset) in demux (decode) order
+        with av.open(str(path)) as container:
+            stream = container.streams.video[0]
+            rate = stream.average_rate or stream.guessed_rate or 30
+            for packet in container.demux(stream):
+                if packet.size == 0:  # Flushing packet
+                    continue
+                if packet.pts is not None and packet.time_base is not None:
+                    timestamp = int(packet.pts * packet.time_base * 1e9)
+                else:  # Raw streams don't have timestamps
+                    timestamp = int(len(packets) / rate * 1e9)
+                packets.append((timestamp, packet.is_keyframe, packet.pos if packet.pos is not None else -1))
+
+        # Frames are numbered in presentation order (as cv2 reads them), B-frames are demuxed before the frames
+        # they are displayed after
+        packets.sort(key=lambda p: p[0])
+        timestamps = [ts for ts, _, _ in packets]
+        keyframes = [i for i, (_, keyframe, _) in enumerate(packets) if keyframe]
+        offsets = [offset for _, _, offset in packets]
+
+        start = timestamps[0] if timestamps else 0
+        return StreamIndex([ts - start for ts in timestamps], keyframes or None, offsets)
@@ -1,35 +1,140 @@
 #!/usr/bin/env python3
+import time
 from enum import IntEnum
 from pathlib import Path
-from queue import Queue
-from threading import Thread
-from typing import List
+from queue import Queue, Full, Empty
+from threading import Thread, Lock
+from typing import Dict, List, Optional, Union
 
 import depthai as dai
 
-from depthai_sdk.classes.packets import FramePacket, IMUPacket
+from depthai_sdk.classes.enum import BackpressurePolicy, PointcloudEncoding
+from depthai_sdk.classes.packets import FramePacket, IMUPacket, PointcloudPacket
+from depthai_sdk.components.pointcloud_helper import PointcloudEncoder
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
 from depthai_sdk.recorders.abstract_recorder import Recorder
 
-def _run(recorder: Recorder, frame_queue: Queue):
+class StreamWriter:
     """
-    Start recording infinite loop
+    Writes messages of a single stream to the recorder from its own thread, through its own bounded queue,
+    so a slow stream (eg. lossless depth) doesn't hold back the others. Keeps write statistics of the stream.
     """
-    while True:
-        try:
-            frames = frame_queue.get()
-            if frames is None:  # Terminate app
+
+    def __init__(self,
+                 name: str,
+                 recorder: Recorder,
+                 max_queue_size: int = 20,
+                 backpressure: BackpressurePolicy = BackpressurePolicy.BLOCK,
+                 lock: Optional[Lock] = None):
+        """
+        Args:
+            name: Stream name.
+            recorder: Recorder that writes the messages.
+            max_queue_size: Max number of queued messages.
+            backpressure: What to do when the queue is full.
+            lock: Lock around recorder.write(), for recorders that don't support parallel writes.
+        """
+        self.name = name
+        self.recorder = recorder
+        self.backpressure = backpressure
+        self._lock = lock
+        self._queue = Queue(maxsize=max_queue_size)
+
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0  # Number of times producer had to wait for a full queue
+        self.bytes = 0
+        self.max_depth = 0
+        self.write_time = 0.0
+        self.max_write_time = 0.0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+        self._thread = Thread(target=self._run, name=f'RecordWriter-{name}', daemon=True)
+        self._thread.start()
+
+    def put(self, msg) -> None:
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+        if self.backpressure == BackpressurePolicy.BLOCK:
+            if self._queue.full():
+                self.blocked += 1
+            self._queue.put(msg)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(msg)
+                    break
+                except Full:
+                    if self.backpressure == BackpressurePolicy.DROP_NEWEST:
+                        self._count_drop()
+                        return
+                    try:
+                        self._queue.get_nowait()
+                        self._count_drop()
+                    except Empty:
+                        pass
+
+        depth = self._queue.qsize()
+        if self.max_depth < depth:
+            self.max_depth = depth
+
+    def _count_drop(self) -> None:
+        if self.dropped == 0:
+            LOGGER.warning(f'Recording queue of stream {self.name} is full, dropping frames. '
+                           'Disk or encoder is too slow for this stream.')
+        self.dropped += 1
+
+    def close(self) -> None:
+        """
+        Writes all queued messages and stops the thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self.end_time = time.perf_counter()
+
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            if msg is None:
                 break
+            start = time.perf_counter()
+            try:
+                if self._lock is None:
+                    self.recorder.write(self.name, msg)
+                else:
+                    with self._lock:
+                        self.recorder.write(self.name, msg)
+            except Exception as e:
+                LOGGER.error(f'Error while recording stream {self.name}: {e}')
+                continue
+            duration = time.perf_counter() - start
+
+            self.written += 1
+            self.write_time += duration
+            if self.max_write_time < duration:
+                self.max_write_time = duration
+            try:
+                self.bytes += msg.getData().nbytes
+            except AttributeError:  # IMU messages
+                pass
 
-            for name in frames:
-                # Save all synced frames into files
-                recorder.write(name, frames[name])
-        except KeyboardInterrupt:
-            break
-    # Close all recorders - Can't use ExitStack with VideoWriter
-    recorder.close()
-    LOGGER.info('Exiting store frame thread')
+    def get_stats(self) -> Dict[str, float]:
+        end = self.end_time or time.perf_counter()
+        duration = end - self.start_time if self.start_time is not None else 0.0
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'blocked': self.blocked,
+            'max_queue_depth': self.max_depth,
+            'fps': self.written / duration if duration else 0.0,
+            'throughput_mbps': self.bytes / duration / 1e6 if duration else 0.0,
+            'mean_write_ms': self.write_time / self.written * 1e3 if self.written else 0.0,
+            'max_write_ms': self.max_write_time * 1e3,
+            'utilization': self.write_time / duration if duration else 0.0,  # Share of time the writer was busy
+        }
 
 
 class RecordType(IntEnum):
@@ -46,21 +151,30 @@ class Record:
     It will also save calibration .json, so depth reconstruction will be possible.
     """
 
-    def __init__(self, path: Path, record_type: RecordType):
+    def __init__(self,
+                 path: Path,
+                 record_type: RecordType,
+                 max_queue_size: int = 20,
+                 backpressure: Union[str, BackpressurePolicy] = BackpressurePolicy.BLOCK):
         """
         Args:
             path (Path): Path to the recording folder
             record_type (RecordType): Recording type
+            max_queue_size (int): Max number of queued frames of each stream
+            backpressure (BackpressurePolicy): What to do when the queue of a stream is full - block, or drop frames
         """
         self.folder = path
         self.record_type = record_type
-        self.frame_q = None
+        self.max_queue_size = max_queue_size
+        self.backpressure = BackpressurePolicy.parse(backpressure)
+        self.writers: Dict[str, StreamWriter] = {}
+        self._write_lock = Lock()
         self.name_mapping = None  # XLinkOut stream name -> Friendly name mapping
 
         self.stream_num = None
         self.mxid = None
         self.path = None
-        self.process = None
+        self._started = False
 
         if self.record_type == RecordType.MCAP:
             from .recorders.mcap_recorder import McapRecorder
@@ -81,6 +195,8 @@ class Record:
             raise ValueError(f"Recording type '{self.record_type}' isn't supported!")
 
     def write(self, packets):
+        if not self._started:
+            return
         if not isinstance(packets, dict):
             packets = {packets.name: packets}
 
@@ -90,7 +206,16 @@ class Record:
                 msgs[name] = packet.msg
             elif isinstance(packet, IMUPacket):
                 msgs[name] = packet.packet
-        self.frame_q.put(msgs)
+            elif isinstance(packet, PointcloudPacket):
+                msgs[name] = packet
+
+        for name, msg in msgs.items():
+            writer = self.writers.get(name)
+            if writer is None:
+                lock = None if self.recorder.parallel_writes else self._write_lock
+                writer = self.writers[name] = StreamWriter(name, self.recorder, self.max_queue_size,
+                                                           self.backpressure, lock)
+            writer.put(msg)
 
     def start(self, device: dai.Device, xouts: List[XoutFrames]):
         """
@@ -103,23 +228,47 @@ class Record:
         calib_data.eepromToJsonFile(str(self.path / "calib.json"))
 
         self.recorder.update(self.path, device, xouts)
+        self._started = True
 
-        self.frame_q = Queue(maxsize=20)
-        self.process = Thread(target=_run, args=(self.recorder, self.frame_q))
-        self.process.start()
-
-    # TODO: support pointclouds in MCAP
     def config_mcap(self, pointcloud: bool):
+        """
+        Args:
+            pointcloud: Record depth as point cloud (computed on the host) instead of depth frames.
+        """
         if self.record_type != RecordType.MCAP:
             LOGGER.info(f"Recorder type is {self.record_type}, not MCAP! Config attempt ignored.")
             return
         self.recorder.set_pointcloud(pointcloud)
 
-    # TODO: implement config of BAG to either record depth as frame or pointcloud
-    # def config_bag(self, pointcloud: bool):
-    #     if self.type != RecordType.BAG:
-    #         print(f"Recorder type is {self.type}, not BAG! Config attempt ignored.")
-    #     self.recorder.set_pointcloud(pointcloud)
+    def config_bag(self, pointcloud: bool):
+        """
+        Args:
+            pointcloud: Record depth as point cloud (computed on the host) instead of depth frames.
+        """
+        if self.record_type not in [RecordType.ROSBAG, RecordType.DB3]:
+            LOGGER.info(f"Recorder type is {self.record_type}, not ROSBAG/DB3! Config attempt ignored.")
+            return
+        self.recorder.set_pointcloud(pointcloud)
+
+    def config_pointcloud(self,
+                          encoding: Union[str, PointcloudEncoding] = PointcloudEncoding.FLOAT32,
+                          decimation: int = 1,
+                          voxel_size: Optional[float] = None,
+                          colorize: bool = True):
+        """
+        Configures how point clouds (pointcloud component outputs, or depth if recorded as point cloud) are
+        recorded. Only MCAP and ROSBAG/DB3 recordings support point clouds.
+
+        Args:
+            encoding: FLOAT32 (meters, standard) or INT16 (millimeters, half the size).
+            decimation: Record every n-th point (every n-th row and column of organized point clouds).
+            voxel_size: Downsample point clouds to one point per voxel of this size (in mm) before recording.
+            colorize: Record colors of colorized point clouds.
+        """
+        if self.record_type not in [RecordType.MCAP, RecordType.ROSBAG, RecordType.DB3]:
+            LOGGER.info(f"Recorder type is {self.record_type}, point clouds aren't recorded! Config attempt ignored.")
+            return
+        self.recorder.pointcloud_encoder = PointcloudEncoder(encoding, decimation, voxel_size, colorize)
 
     def _create_folder(self, path: Path, mxid: str) -> Path:
         """
@@ -133,6 +282,30 @@ class Record:
                 recordings_path.mkdir(parents=True, exist_ok=False)
                 return recordings_path
 
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns write statistics of each stream: number of written/dropped frames, write throughput, etc.
+        """
+        return {name: writer.get_stats() for name, writer in self.writers.items()}
+
+    def summary(self) -> str:
+        lines = ['Recording summary:']
+        for name, s in self.get_stats().items():
+            lines.append(f'  {name}: {s["written"]} frames written, {s["dropped"]} dropped, '
+                         f'{s["fps"]:.1f} FPS, {s["throughput_mbps"]:.1f} MB/s, '
+                         f'write {s["mean_write_ms"]:.2f} ms (max {s["max_write_ms"]:.1f} ms), '
+                         f'writer busy {100 * s["utilization"]:.0f}%, max queue depth {s["max_queue_depth"]}'
+                         + (f', producer blocked {s["blocked"]}x' if s['blocked'] else ''))
+        return '\n'.join(lines)
+
     def close(self):
-        if self.frame_q:
-            self.frame_q.put(None)  # Close recorder and stop the thread
+        if not self._started:
+            return
+        self._started = False
+        # Write all queued frames, then close the recorder
+        for writer in self.writers.values():
+            writer.close()
+        self.recorder.close()
+        LOGGER.info(self.summary())
+        if any(writer.dropped for writer in self.writers.values()):
+            LOGGER.warning('Some frames were dropped while recording, see the recording summary.')
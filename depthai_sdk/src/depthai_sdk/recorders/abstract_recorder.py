@@ -6,9 +6,14 @@ from typing import List
 import depthai as dai
 
 import depthai_sdk.oak_outputs.xout as outputs
+import depthai_sdk.oak_outputs.xout.xout_pointcloud
 
 
 class Recorder(ABC):
+    # Whether write() can be called for different streams concurrently (from per-stream writer threads).
+    # Recorders that write all streams into a single file must be serialized.
+    parallel_writes = False
+
     @abstractmethod
     def write(self, name: str, frame: dai.ImgFrame):
         raise NotImplementedError()
@@ -30,9 +35,13 @@ class OakStream:
         H265 = 3
         DEPTH = 4  # 16 bit
         IMU = 5
+        POINTCLOUD = 6  # PointcloudPacket, computed on the host
 
     def __init__(self, xout: outputs.xout_base.XoutBase):
-        if isinstance(xout, outputs.xout_depth.XoutDisparityDepth):
+        if isinstance(xout, outputs.xout_pointcloud.XoutPointcloud):
+            self.xlink_name = xout.get_packet_name()
+            self.type = self.StreamType.POINTCLOUD
+        elif isinstance(xout, outputs.xout_depth.XoutDisparityDepth):
             self.xlink_name = xout.frames.name
             self.type = self.StreamType.DEPTH  # TODO is depth raw or should it be DEPTH?
         elif isinstance(xout, outputs.xout_disparity.XoutDisparity) and xout._fourcc is None:
@@ -85,3 +94,6 @@ class OakStream:
 
     def is_imu(self):
         return self.type == self.StreamType.IMU
+
+    def is_pointcloud(self) -> bool:
+        return self.type == self.StreamType.POINTCLOUD
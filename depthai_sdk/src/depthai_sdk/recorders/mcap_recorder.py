@@ -1,26 +1,110 @@
+import struct
+import time
+from datetime import timedelta
+from io import BytesIO
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, Union
 
 import depthai as dai
-from mcap_ros1.writer import Writer as Ros1Writer
+from mcap.mcap0.writer import Writer as McapWriter
+from sensor_msgs.msg import PointCloud2
 
+from depthai_sdk.classes.packets import PointcloudPacket
+from depthai_sdk.components.pointcloud_helper import EncodedPointcloud, PointcloudEncoder
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.integrations.ros.ros_base import RosBase
 # from depthai_sdk.integrations.ros.depthai2ros import DepthAi2Ros1
 from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
+from depthai_sdk.oak_outputs.xout.xout_pointcloud import XoutPointcloud
 from depthai_sdk.recorders.abstract_recorder import *
+from depthai_sdk.recorders.video_writers.av_writer import is_keyframe
+
+KEYFRAMES_METADATA = 'depthai_sdk.keyframes'  # MCAP metadata record: topic -> sequence numbers of keyframes
+
+
+class CompressedVideo:
+    """
+    foxglove_msgs/CompressedVideo ROS1 message, which Foxglove Studio can decode. Each message contains a single
+    H.264/H.265 access unit (Annex B), keyframes also contain SPS/PPS.
+    """
+    _type = 'foxglove_msgs/CompressedVideo'
+    _full_text = 'time timestamp\nstring frame_id\nuint8[] data\nstring format\n'
+
+    def __init__(self, secs: int, nsecs: int, frame_id: str, data: bytes, format: str):
+        self.secs = secs
+        self.nsecs = nsecs
+        self.frame_id = frame_id
+        self.data = data
+        self.format = format  # 'h264' or 'h265'
+
+    def serialize(self, buff: BytesIO):
+        frame_id = self.frame_id.encode()
+        fmt = self.format.encode()
+        buff.write(struct.pack(f'<IIi{len(frame_id)}si', self.secs, self.nsecs,
+                               len(frame_id), frame_id, len(self.data)))
+        buff.write(self.data)
+        buff.write(struct.pack(f'<i{len(fmt)}s', len(fmt), fmt))
+
+
+class Ros1PointCloud2:
+    """
+    sensor_msgs/PointCloud2 ROS1 message, unorganized (height=1) point cloud.
+    """
+    _type = 'sensor_msgs/PointCloud2'
+    _full_text = 'Header header\nuint32 height\nuint32 width\nPointField[] fields\nbool is_bigendian\n' \
+                 'uint32 point_step\nuint32 row_step\nuint8[] data\nbool is_dense\n' \
+                 '================================================================================\n' \
+                 'MSG: std_msgs/Header\nuint32 seq\ntime stamp\nstring frame_id\n' \
+                 '================================================================================\n' \
+                 'MSG: sensor_msgs/PointField\nuint8 INT8=1\nuint8 UINT8=2\nuint8 INT16=3\nuint8 UINT16=4\n' \
+                 'uint8 INT32=5\nuint8 UINT32=6\nuint8 FLOAT32=7\nuint8 FLOAT64=8\n' \
+                 'string name\nuint32 offset\nuint8 datatype\nuint32 count\n'
+
+    def __init__(self, secs: int, nsecs: int, seq: int, cloud: EncodedPointcloud):
+        self.secs = secs
+        self.nsecs = nsecs
+        self.seq = seq
+        self.cloud = cloud
+
+    def serialize(self, buff: BytesIO):
+        cloud = self.cloud
+        frame_id = str(self.seq).encode()
+        buff.write(struct.pack(f'<IIIi{len(frame_id)}sIIi', self.seq, self.secs, self.nsecs,
+                               len(frame_id), frame_id, 1, cloud.width, len(cloud.fields)))
+        for name, offset, datatype in cloud.fields:
+            buff.write(struct.pack(f'<i{len(name)}sIBI', len(name), name.encode(), offset, datatype, 1))
+        buff.write(struct.pack('<BIIi', 0, cloud.point_step, cloud.point_step * cloud.width, len(cloud.data)))
+        buff.write(cloud.data)
+        buff.write(struct.pack('<B', 1))  # is_dense
 
 
 class McapRecorder(Recorder, RosBase):
     """
     This is a helper class that lets you save frames into mcap (.mcap), which can be replayed using Foxglove studio app.
+
+    H.264/H.265 streams are written without transcoding, as foxglove_msgs/CompressedVideo messages (`/<name>/video`
+    topics). Sequence numbers of their keyframes are saved in the `depthai_sdk.keyframes` metadata record,
+    so readers can seek without scanning the bitstream.
+
+    Point clouds (pointcloud component outputs, or depth if `set_pointcloud(True)`) are written as
+    sensor_msgs/PointCloud2, encoded by `pointcloud_encoder`.
     """
 
     def __init__(self):
         self.path = None
         self.converter = None
         self.stream = None
-        self.ros_writer = None
+        self.writer: Optional[McapWriter] = None
+
+        self._schema_ids: Dict[str, int] = dict()
+        self._channel_ids: Dict[str, int] = dict()
+        self._video_streams: Dict[str, Tuple[str, str]] = dict()  # XLink name -> (topic, format)
+        self._sequence: Dict[str, int] = dict()  # Number of messages written to each video topic
+        self._keyframes: Dict[str, List[int]] = dict()  # Video topic -> sequence numbers of keyframes
+        self._pointcloud_topics: Dict[str, str] = dict()  # Packet name -> topic
+
+        self.pointcloud_encoder = PointcloudEncoder()
+        self._calib: Optional[dai.CalibrationHandler] = None  # For depth -> point cloud
 
         self._closed = False
         self._pcl = False
@@ -35,25 +119,92 @@ class McapRecorder(Recorder, RosBase):
             xouts (List['XoutFrames']): List of outputs, which are used to record
         """
         self.path = str(path / "recordings.mcap")
-        self.converter = Bridge(device)
         self.stream = open(self.path, "w+b")
-        self.ros_writer = Ros1Writer(output=self.stream)
+        self.writer = McapWriter(output=self.stream)
+        self.writer.start(profile="ros1", library="depthai-sdk")
 
         RosBase.__init__(self)
+        self.pointcloud = self._pcl
+        if self.pointcloud:
+            self._calib = device.readCalibration()
         RosBase.update(self, device, xouts)
 
         for xout in xouts:
-            if xout.is_h26x():
-                raise Exception("MCAP recording only supports MJPEG encoding!")
+            if isinstance(xout, XoutPointcloud):
+                for stream in xout.xstreams():
+                    self.streams.pop(stream.name, None)
+                self._pointcloud_topics[xout.get_packet_name()] = f'/{xout.name.lower()}/raw'
+            elif xout.is_h26x():
+                fmt = 'h265' if xout.is_h265() else 'h264'
+                for stream in xout.xstreams():
+                    self.streams.pop(stream.name, None)  # Not converted by the bridge
+                    self._video_streams[stream.name] = (f'/{xout.name.lower()}/video', fmt)
             if xout.is_mjpeg() and xout.lossless:
                 # Foxglove Studio doesn't (yet?) support Lossless MJPEG
                 raise Exception("MCAP recording doesn't support Lossless MJPEG encoding!")
 
     def write(self, name: str, frame: dai.ImgFrame):
-        self.new_msg(name, frame)  # To RosMsg which arrives to new_ros_msg()
+        if name in self._video_streams:
+            self._write_video(name, frame)
+        elif name in self._pointcloud_topics:
+            self._write_pointcloud(self._pointcloud_topics[name], frame)
+        elif name in self.streams and self.streams[name].ros_type == PointCloud2:  # Depth as point cloud
+            self._write_pointcloud(self.streams[name].topic, frame)
+        else:
+            self.new_msg(name, frame)  # To RosMsg which arrives to new_ros_msg()
 
     def new_ros_msg(self, topic: str, ros_msg):
-        self.ros_writer.write_message(topic, ros_msg)
+        self._write_message(topic, ros_msg)
+
+    def _write_video(self, name: str, frame: dai.ImgFrame):
+        topic, fmt = self._video_streams[name]
+        data = frame.getData()
+        keyframe = is_keyframe(data, fmt)
+        if topic not in self._sequence:
+            if not keyframe:  # Decoding can only start at a keyframe
+                return
+            self._sequence[topic] = 0
+            self._keyframes[topic] = []
+
+        sequence = self._sequence[topic]
+        if keyframe:
+            self._keyframes[topic].append(sequence)
+        self._sequence[topic] += 1
+
+        msg = CompressedVideo(*self._stamp(frame.getTimestamp()), str(frame.getSequenceNum()), data.tobytes(), fmt)
+        self._write_message(topic, msg, sequence)
+
+    def _write_pointcloud(self, topic: str, msg: Union[PointcloudPacket, dai.ImgFrame]):
+        if isinstance(msg, PointcloudPacket):
+            cloud = self.pointcloud_encoder.encode(msg.points, msg.get_colors())
+            msg = msg.depth_map
+        else:  # Depth frame
+            cloud = self.pointcloud_encoder.encode_depth(msg.getFrame(), self._calib)
+        self._write_message(topic, Ros1PointCloud2(*self._stamp(msg.getTimestamp()), msg.getSequenceNum(), cloud))
+
+    def _stamp(self, ts: timedelta) -> Tuple[int, int]:
+        """
+        Seconds and nanoseconds since the start of the recording, same as timestamps of the bridge.
+        """
+        ts = max(ts - self.bridge.start_time, timedelta(0))
+        return ts.days * 86400 + ts.seconds, ts.microseconds * 1000
+
+    def _write_message(self, topic: str, ros_msg, sequence: int = 0):
+        """
+        Writes ROS1 message, registers its schema and channel on first use.
+        """
+        if ros_msg._type not in self._schema_ids:
+            self._schema_ids[ros_msg._type] = self.writer.register_schema(
+                name=ros_msg._type, encoding="ros1msg", data=type(ros_msg)._full_text.encode())
+        if topic not in self._channel_ids:
+            self._channel_ids[topic] = self.writer.register_channel(
+                topic=topic, message_encoding="ros1", schema_id=self._schema_ids[ros_msg._type])
+
+        buffer = BytesIO()
+        ros_msg.serialize(buffer)
+        log_time = time.time_ns()
+        self.writer.add_message(channel_id=self._channel_ids[topic], log_time=log_time, publish_time=log_time,
+                                sequence=sequence, data=buffer.getvalue())
 
     def set_pointcloud(self, enable: bool):
         """
@@ -86,6 +237,9 @@ class McapRecorder(Recorder, RosBase):
     def close(self) -> None:
         if self._closed: return
         self._closed = True
-        self.ros_writer.finish()
+        if self._keyframes:
+            self.writer.add_metadata(KEYFRAMES_METADATA, {topic: ','.join(str(i) for i in keyframes)
+                                                          for topic, keyframes in self._keyframes.items()})
+        self.writer.finish()
         self.stream.close()
         LOGGER.info(f'.MCAP recording saved at {self.path}')
@@ -5,7 +5,7 @@ import datetime
 import os
 import time
 from pathlib import Path
-from typing import List, Any, Dict, Union
+from typing import List, Any, Dict, Optional, Union
 
 import depthai as dai
 import numpy as np
@@ -26,12 +26,16 @@ from rosbags.typesys.types import std_msgs__msg__UInt32 as UInt32
 from rosbags.typesys.types import sensor_msgs__msg__Image as Image
 from rosbags.typesys.types import sensor_msgs__msg__CompressedImage as CompressedImage
 from rosbags.typesys.types import sensor_msgs__msg__PointCloud2 as PointCloud2
+from rosbags.typesys.types import sensor_msgs__msg__PointField as PointField
 from rosbags.typesys.types import sensor_msgs__msg__Imu as Imu
 
 from rosbags.typesys.types import diagnostic_msgs__msg__KeyValue as KeyValue
 
+from depthai_sdk.classes.packets import PointcloudPacket
+from depthai_sdk.components.pointcloud_helper import PointcloudEncoder, EncodedPointcloud
 from depthai_sdk.logger import LOGGER
 from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, ImuSyncMethod
+from depthai_sdk.oak_outputs.xout.xout_pointcloud import XoutPointcloud
 from depthai_sdk.recorders.abstract_recorder import Recorder
 
 CAMERA_INFO = """
@@ -229,7 +233,9 @@ class _RosbagBaseRecorder(Recorder):
         self.path: str = None
         self.start_nanos = None
 
-        self.pointcloud = False
+        self.pointcloud = False  # Record depth as point cloud
+        self.pointcloud_encoder = PointcloudEncoder()
+        self._calib: Optional[dai.CalibrationHandler] = None  # For depth -> point cloud
 
         self._frame_init: List[str] = []
         self._closed = False
@@ -246,8 +252,17 @@ class _RosbagBaseRecorder(Recorder):
 
         self._frame_init = []
         self.start_nanos = 0
+        if self.pointcloud:
+            self._calib = device.readCalibration()
 
         for xout in xouts:
+            if isinstance(xout, XoutPointcloud):
+                rs = RosStream()
+                rs.topic = f'/{xout.name.lower()}/raw'
+                rs.ros_type = PointCloud2
+                self.streams[xout.get_packet_name()] = rs  # PointcloudPackets are written under the packet name
+                continue
+
             for stream in xout.xstreams():
                 rs = RosStream()
                 rs.datatype = stream.stream.possibleDatatypes[0].datatype
@@ -355,7 +370,14 @@ class _RosbagBaseRecorder(Recorder):
                                   )
             self.write_to_rosbag(name, stream.ros_type.__msgtype__, msg)
         elif stream.ros_type == PointCloud2:
-            raise Exception('PointCloud2 not yet implemented')
+            if isinstance(dai_msg, PointcloudPacket):
+                cloud = self.pointcloud_encoder.encode(dai_msg.points, dai_msg.get_colors())
+                ts, seq = dai_msg.get_timestamp(), dai_msg.get_sequence_num()
+            else:  # Depth frame
+                cloud = self.pointcloud_encoder.encode_depth(dai_msg.getFrame(), self._calib)
+                ts, seq = dai_msg.getTimestampDevice(), dai_msg.getSequenceNum()
+            msg = self.get_pointcloud2(cloud, ts, seq)
+            self.write_to_rosbag(name, stream.ros_type.__msgtype__, msg)
         elif stream.ros_type == Imu:
             packet: dai.IMUPacket = dai_msg
             report = packet.acceleroMeter or packet.gyroscope or packet.magneticField or packet.rotationVector
@@ -411,6 +433,24 @@ class _RosbagBaseRecorder(Recorder):
         #     'Time Of Arrival': int(time.time())
         # }, connection=True)
 
+    def set_pointcloud(self, enable: bool):
+        """
+        Whether to convert depth to pointcloud
+        """
+        self.pointcloud = enable
+
+    def get_pointcloud2(self, cloud: EncodedPointcloud, td: datetime.timedelta, sequence: int) -> PointCloud2:
+        return PointCloud2(header=self.get_header(td, sequence),
+                           height=1,
+                           width=cloud.width,
+                           fields=[PointField(name=name, offset=offset, datatype=datatype, count=1)
+                                   for name, offset, datatype in cloud.fields],
+                           is_bigendian=False,
+                           point_step=cloud.point_step,
+                           row_step=cloud.point_step * cloud.width,
+                           data=np.frombuffer(cloud.data, dtype=np.uint8),
+                           is_dense=True)
+
     def close(self):
         if self._closed: return
         self._closed = True
@@ -529,7 +569,7 @@ class Rosbag1Recorder(_RosbagBaseRecorder):
             # self.writer.set_compression(Writer.CompressionFormat.LZ4)
             self.writer.open()
             for _, stream in self.streams.items():
-                stream.connection = self.writer.add_connection(stream.topic, stream.ros_type.__msgtype__, latching=True)
+                stream.connection = self.writer.add_connection(stream.topic, stream.ros_type.__msgtype__, latching=1)
 
         self.writer.write(self.streams[name].connection, time.time_ns() - self.start_nanos, cdr_to_ros1(serialize_cdr(data, type), type))
 
@@ -1,4 +1,4 @@
-from typing import Union, Dict
+from typing import Union
 
 import numpy as np
 
@@ -10,6 +10,7 @@ class VideoRecorder(Recorder):
     """
     Writes video streams (.mjpeg/.h264/.hevc) or directly to mp4/avi container.
     """
+    parallel_writes = True  # Each stream has its own writer
 
     def __init__(self, lossless: bool = False):
         self.path = None
@@ -45,9 +46,13 @@ class VideoRecorder(Recorder):
             if file_name.startswith('CameraBoardSocket.'):
                 file_name = file_name[len('CameraBoardSocket.'):]
             stream = OakStream(xout)
+            if stream.is_pointcloud():
+                LOGGER.warning(f"Video recording doesn't support point clouds, '{xout_name}' won't be recorded. "
+                               f"Use RecordType.MCAP or RecordType.ROSBAG instead.")
+                continue
             fourcc = stream.fourcc()  # TODO add default fourcc? stream.fourcc() can be None.
 
-            print(fourcc, xout_name, stream.type)
+            LOGGER.debug(f'VideoRecorder: {xout_name}, fourcc {fourcc}, {stream.type.name}')
             if stream.is_raw() or stream.is_depth():
                 from .video_writers.video_writer import VideoWriter
                 self._writers[xout_name] = VideoWriter(self.path, file_name, self._lossless)
@@ -62,39 +67,9 @@ class VideoRecorder(Recorder):
                     from .video_writers.file_writer import FileWriter
                     self._writers[xout_name] = FileWriter(self.path, file_name, fourcc)
 
-    def create_files_for_buffer(self, subfolder: str, buf_name: str):
-        for _, writer in self._writers.items():
-            writer.create_file_for_buffer(subfolder, buf_name)
-
-    def create_file_for_buffer(self, wr_name: str, subfolder: str, buf_name: str):
-        self._writers[wr_name].create_file_for_buffer(subfolder, buf_name)
-
-    def create_file(self, wr_name: str, subfolder: str, frame: Union[np.ndarray, dai.ImgFrame]):
-        self._writers[wr_name].create_file(subfolder, frame)
-
-    def init_buffers(self, buffers: Dict[str, int]):
-        for _, writer in self._writers.items():
-            for name, max_seconds in buffers.items():
-                writer.init_buffer(name, max_seconds)
-
-    def add_to_buffers(self, buf_name: str, frames: Dict[str, Union[np.ndarray, dai.ImgFrame]]):
-        for name, writer in self._writers.items():
-            writer.add_to_buffer(buf_name, frames[name])
-
-    def add_to_buffer(self, wr_name: str, buf_name: str, frame: Union[np.ndarray, dai.ImgFrame]):
-        self._writers[wr_name].add_to_buffer(buf_name, frame)
-
-    def is_buffer_full(self, wr_name: str, buf_name: str):
-        return self._writers[wr_name].is_buffer_full(buf_name)
-
-    def is_buffer_empty(self, wr_name: str, buf_name: str):
-        return self._writers[wr_name].is_buffer_empty(buf_name)
-
-    def write_from_buffer(self, wr_name: str, buf_name: str, n_elems: int):
-        self._writers[wr_name].write_from_buffer(buf_name, n_elems)
-
     def write(self, name: str, frame: Union[np.ndarray, dai.ImgFrame]):
-        self._writers[name].write(frame)
+        if name in self._writers:  # Point clouds aren't recorded
+            self._writers[name].write(frame)
 
     def close_files(self):
         for _, writer in self._writers.items():
@@ -12,33 +12,37 @@ from .base_writer import BaseWriter
 START_CODE_PREFIX = b"\x00\x00\x01"
 KEYFRAME_NAL_TYPE = 5
 NAL_TYPE_BITS = 5  # nal unit type is encoded in lower 5 bits
+H265_KEYFRAME_NAL_TYPES = range(16, 22)  # IRAP pictures (BLA, IDR, CRA)
 
 
-def is_keyframe(encoded_frame: np.array) -> bool:
+def is_keyframe(encoded_frame: np.array, fourcc: str = 'h264') -> bool:
     """
     Check if encoded frame is a keyframe.
     Args:
         encoded_frame: Encoded frame.
+        fourcc: Codec of the frame, 'h264' or 'hevc'/'h265'.
 
     Returns:
         True if encoded frame is a keyframe, False otherwise.
     """
-    byte_stream = bytearray(encoded_frame)
+    byte_stream = bytes(encoded_frame)
     size = len(byte_stream)
+    h265 = fourcc.lower() in ('hevc', 'h265')
 
     pos = 0
     while pos < size:
         retpos = byte_stream.find(START_CODE_PREFIX, pos)
-        if retpos == -1:
+        if retpos == -1 or size <= retpos + 3:
             return False
 
         # Skip start code
         pos = retpos + 3
 
-        # Extract the first 5 bits
-        type_ = byte_stream[pos] >> 3
-
-        if type_ == KEYFRAME_NAL_TYPE:
+        if h265:
+            # Type is in bits 1-6 of the first byte of the 2-byte NAL header
+            if (byte_stream[pos] >> 1) & 0x3F in H265_KEYFRAME_NAL_TYPES:
+                return True
+        elif byte_stream[pos] & 0x1F == KEYFRAME_NAL_TYPE:
             return True
 
     return False
@@ -126,7 +130,7 @@ class AvWriter(BaseWriter):
 
         if self.start_ts is None:
             # For H26x, wait for a keyframe
-            if self._fourcc != 'mjpeg' and not is_keyframe(frame_data):
+            if self._fourcc != 'mjpeg' and not is_keyframe(frame_data, self._fourcc):
                 return
 
         packet = av.Packet(frame_data)  # Create new packet with byte array
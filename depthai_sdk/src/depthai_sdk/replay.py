@@ -1,7 +1,7 @@
 import os
-import os
 import time
-from threading import Thread
+from datetime import timedelta
+from threading import Thread, RLock
 from time import monotonic
 from typing import Callable
 
@@ -9,7 +9,10 @@ import depthai as dai
 
 from depthai_sdk.classes.enum import ResizeMode
 from depthai_sdk.logger import LOGGER
+from depthai_sdk.oak_outputs.fps import FPS
 from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.prefetcher import ReaderPrefetcher
+from depthai_sdk.readers.recording_index import RecordingIndex, index_path, recording_signature
 from depthai_sdk.utils import *
 
 _fileTypes = ['color', 'left', 'right', 'disparity', 'depth']
@@ -18,11 +21,32 @@ _imageExt = ['.bmp', '.dib', '.jpeg', '.jpg', '.jpe', '.jp2', '.png', '.webp', '
              '.pnm', '.pfm', '.sr', '.ras', '.tiff', '.tif', '.exr', '.hdr', '.pic']
 
 
-def _run(delay: float, sendFrames: Callable):
-    while True:
-        if not sendFrames():
-            break
-        time.sleep(delay)
+_MAX_LAG = 1.0  # If replay lags behind the schedule by more than this (seconds), the schedule gets reset
+
+
+def _run(replay: 'Replay', sendFrames: Callable):
+    """
+    Sends frames to the device at replay.fps. Frames are scheduled against a monotonic clock, so time spent
+    reading/sending frames doesn't lower the effective FPS.
+    """
+    deadline = monotonic()
+    while not replay._stop:
+        with replay._seek_lock:
+            if not sendFrames():
+                break
+        replay._fps.next_iter()
+
+        deadline += 1.0 / replay.fps
+        lag = monotonic() - deadline
+        if lag < 0:
+            time.sleep(-lag)
+            lag = 0.0
+        elif _MAX_LAG < lag:
+            # Way behind the schedule (eg. paused by a debugger), don't try to catch up
+            deadline = monotonic()
+
+        replay._lag = lag
+        replay._max_lag = max(replay._max_lag, lag)
     LOGGER.info('Replay `run` thread stopped')
 
 
@@ -42,6 +66,7 @@ class ReplayStream:
         self.resize_mode: ResizeMode = None
         self._shape: Tuple[int, int] = None
         self.callbacks: List[Callable] = []
+        self.is_pointcloud = False  # Recorded point cloud, only sent to host callbacks
 
         self.frame: np.ndarray  # Last read frame from Reader (ndarray)
         self.imgFrame: dai.ImgFrame  # Last read ImgFrame from Reader (dai.ImgFrame)
@@ -86,6 +111,17 @@ class Replay:
         self.thread: Optional[Thread] = None
         self._stop: bool = False  # Stop the thread that's sending frames to the OAK camera
 
+        self._prefetch_size: int = 4  # Number of frames per stream that are read & prepared ahead
+        self._prefetcher: Optional[ReaderPrefetcher] = None
+        self._fps = FPS()  # Achieved FPS
+        self._lag: float = 0.0  # How far (in seconds) replay lags behind the schedule
+        self._max_lag: float = 0.0
+
+        self._index: Optional[RecordingIndex] = None  # Lazily loaded/built on first seek
+        self._seek_lock = RLock()
+        self._frame_num: int = 0  # Frame number (of the reference stream) of the next read frame
+        self._end_frame: Optional[int] = None  # Stop replaying at this frame number
+
         self.xins: List[str] = []  # Name of XLinkIn streams
 
         self.reader: Optional[AbstractReader] = None
@@ -143,6 +179,9 @@ class Replay:
             stream._shape = self.reader.getShape(stream_name)
             stream.size_bytes = self.reader.get_message_size(stream_name)
             stream.camera_socket = self.reader.get_socket(stream_name)
+            if self.reader.is_pointcloud(stream_name):
+                stream.is_pointcloud = True
+                stream.disabled = True  # Device can't consume point clouds
             self.streams[stream_name.lower()] = stream
 
     def _get_path(self, path: str) -> Path:
@@ -208,9 +247,105 @@ class Replay:
         else:
             raise RuntimeError('Looping is only supported for video files.')
 
+    def set_prefetch(self, queue_size: int):
+        """
+        Sets how many frames per stream are read, decoded and prepared ahead of time on worker threads.
+        Default is 4. Setting it to 0 disables prefetching, so frames are read on the thread that sends them.
+        Has to be called before the replay is started.
+        """
+        self._prefetch_size = queue_size
+
     def get_fps(self) -> float:
         return self.fps
 
+    def get_achieved_fps(self) -> float:
+        """
+        Returns the FPS at which frames were actually sent to the device.
+        """
+        return self._fps.fps()
+
+    def get_lag(self) -> float:
+        """
+        Returns how far (in seconds) the replay lagged behind the schedule when sending the last frame.
+        """
+        return self._lag
+
+    def get_index(self) -> RecordingIndex:
+        """
+        Returns the index of the recording (timestamps, offsets and keyframes of each stream). The index is
+        built on the first call and saved next to the recording, so it's reused when the recording is opened again.
+        """
+        if self._index is not None:
+            return self._index
+
+        path = index_path(self.path)
+        signature = recording_signature(self.path)
+        self._index = RecordingIndex.load(path, signature)
+        if self._index is None:
+            LOGGER.info(f'Indexing recording {self.path}...')
+            self._index = self.reader.build_index()
+            if self._index is None:
+                raise NotImplementedError(f'{type(self.reader).__name__} does not support seeking!')
+            self._index.signature = signature
+            self._index.save(path)
+        return self._index
+
+    def seek(self, time: Union[float, timedelta, None] = None, frame: Optional[int] = None):
+        """
+        Seek to the specified time or frame of the recording. Next frames sent to the device will be the
+        first ones recorded at (or after) that time. Can be called before or during the replay.
+
+        Args:
+            time (float | timedelta, Optional): Time since the start of the recording, in seconds.
+            frame (int, Optional): Frame number of the first stream of the recording.
+        """
+        if (time is None) == (frame is None):
+            raise ValueError('Please specify either time or frame to seek to!')
+
+        index = self.get_index()
+        if frame is not None:
+            time = index.time_of(frame)
+        elif isinstance(time, timedelta):
+            time = time.total_seconds()
+
+        frames = index.frames_at(time)
+        with self._seek_lock:
+            if self._prefetcher:
+                self._prefetcher.stop()  # Discard frames that were read ahead
+
+            self.reader.seek(index, frames)
+            self._frame_num = frames[index.reference_stream()]
+
+            if self._prefetcher:
+                self._prefetcher.start()
+
+    def set_range(self,
+                  start: Union[float, timedelta, None] = None,
+                  end: Union[float, timedelta, None] = None):
+        """
+        Replay only part of the recording.
+
+        Args:
+            start (float | timedelta, Optional): Start time since the start of the recording, in seconds.
+            end (float | timedelta, Optional): End time since the start of the recording, in seconds.
+        """
+        index = self.get_index()
+        if isinstance(end, timedelta):
+            end = end.total_seconds()
+        self._end_frame = index.frames_before(end) if end is not None else None
+
+        if start is not None:
+            self.seek(time=start)
+
+    def get_pointcloud_stream(self) -> Optional[str]:
+        """
+        Returns name of the recorded point cloud stream, or None if the recording doesn't contain point clouds.
+        """
+        for name, stream in self.streams.items():
+            if stream.is_pointcloud:
+                return name
+        return None
+
     def _add_callback(self, stream_name: str, callback: Callable):
         self.streams[stream_name.lower()].callbacks.append(callback)
 
@@ -306,7 +441,17 @@ class Replay:
         """
         Start sending frames to the OAK device on a new thread
         """
-        self.thread = Thread(target=_run, args=(1.0 / self.fps, self.sendFrames,))
+        send_frames = self.sendFrames
+        if 0 < self._prefetch_size:
+            self._prefetcher = ReaderPrefetcher(self.reader,
+                                                list(self.streams.keys()),
+                                                self._prepareImgFrame,
+                                                self._prefetch_size)
+            self._prefetcher.start()
+            send_frames = self._sendPrefetchedFrames
+
+        self._fps = FPS()
+        self.thread = Thread(target=_run, args=(self, send_frames,))
         self.thread.start()
 
     def sendFrames(self) -> bool:
@@ -321,9 +466,46 @@ class Replay:
                 self._stop = True
                 return False  # End of the recording
 
+        self._sendImgFrames({name: self._createImgFrame(stream) for name, stream in self.streams.items()})
+        return True
+
+    def _sendPrefetchedFrames(self) -> bool:
+        """
+        Sends frames that were read and prepared ahead by the ReaderPrefetcher.
+
+        Returns:
+            bool: True if successful, otherwise False.
+        """
+        if self._pause:  # Resend the last read frames
+            return self.sendFrames()
+
+        frames = self._prefetcher.get() if not self._range_ended() else None
+        if frames is None:
+            self._stop = True
+            return False  # End of the recording
+        self._frame_num += 1
+
+        imgFrames = dict()
+        for name, (frame, imgFrame) in frames.items():
+            stream = self.streams[name]
+            if frame is not None:
+                stream.frame = frame
+            elif getattr(stream, 'frame', None) is not None:
+                imgFrame = self._prepareImgFrame(name, stream.frame)  # Reader didn't read this stream, resend
+            else:
+                continue
+            imgFrames[name] = imgFrame
+
+        self._sendImgFrames(imgFrames)
+        return True
+
+    def _sendImgFrames(self, imgFrames: Dict[str, dai.ImgFrame]):
         self._now = monotonic()
-        for stream_name, stream in self.streams.items():
-            stream.imgFrame = self._createImgFrame(stream)
+        for stream_name, imgFrame in imgFrames.items():
+            stream = self.streams[stream_name]
+            imgFrame.setTimestamp(self._now)
+            imgFrame.setSequenceNum(self._seqNum)
+            stream.imgFrame = imgFrame
             # Save the imgFrame
             for cb in stream.callbacks:  # callback
                 cb(stream_name.lower(), stream.imgFrame)
@@ -336,7 +518,6 @@ class Replay:
             stream.queue.send(stream.imgFrame)
 
         self._seqNum += 1
-        return True
 
     def createQueues(self, device: dai.Device):
         """
@@ -368,17 +549,33 @@ class Replay:
             return frame[start_h:h - start_h, start_w:w - start_w]
 
     def _createNewFrame(self, cvFrame) -> dai.ImgFrame:
+        # Timestamp and sequence number are set right before the frame is sent
         imgFrame = dai.ImgFrame()
         imgFrame.setData(cvFrame)
-        imgFrame.setTimestamp(self._now)
-        imgFrame.setSequenceNum(self._seqNum)
         shape = cvFrame.shape[::-1]
         imgFrame.setWidth(shape[0])
         imgFrame.setHeight(shape[1])
         return imgFrame
 
     def _createImgFrame(self, stream: ReplayStream) -> dai.ImgFrame:
-        cvFrame: np.ndarray = stream.frame
+        return self._prepareImgFrame(stream, stream.frame)
+
+    def _prepareImgFrame(self, stream: Union[str, ReplayStream], cvFrame: np.ndarray) -> dai.ImgFrame:
+        """
+        Converts a frame read from the Reader into an ImgFrame. Can be called from ReaderPrefetcher worker threads.
+        """
+        if isinstance(stream, str):
+            stream = self.streams[stream]
+
+        if stream.is_pointcloud:
+            # Nx3/Nx6 float32 point cloud, XoutPointcloud unpacks it back into a PointcloudPacket
+            imgFrame = dai.ImgFrame()
+            imgFrame.setData(np.ascontiguousarray(cvFrame, dtype=np.float32).view(np.uint8).reshape(-1))
+            imgFrame.setWidth(cvFrame.shape[1] * 4)  # Row size in bytes
+            imgFrame.setHeight(cvFrame.shape[0])
+            imgFrame.setType(dai.RawImgFrame.Type.RAW8)
+            return imgFrame
+
         if stream.resize:
             cvFrame = self._resize_frame(cvFrame, stream.resize, stream.resize_mode)
 
@@ -408,9 +605,13 @@ class Replay:
         Returns:
             bool: True if successful, otherwise False.
         """
+        if self._range_ended():
+            return False
+
         frames = self.reader.read()
         if not frames:
             return False  # No more frames!
+        self._frame_num += 1
 
         for name, frame in frames.items():
             self.streams[name.lower()].frame = frame
@@ -421,6 +622,9 @@ class Replay:
         #         self.frames[name] = frame[:, :, 0]  # All 3 planes are the same
         return True
 
+    def _range_ended(self) -> bool:
+        return self._end_frame is not None and self._end_frame <= self._frame_num
+
     def getShape(self, name: str) -> Tuple[int, int]:
         """
         Get shape of a stream
@@ -432,6 +636,12 @@ class Replay:
         Closes all video readers.
         """
         self._stop = True
-        self.reader.close()
+        if self._prefetcher:
+            self._prefetcher.stop()  # Also unblocks the thread that's waiting for prefetched frames
         if self.thread:
             self.thread.join()
+        self.reader.close()
+
+        if self.thread:
+            LOGGER.info(f'Replay sent frames at {self.get_achieved_fps():.1f} FPS (target {self.fps:.1f} FPS), '
+                        f'max lag behind the schedule was {self._max_lag * 1000:.1f} ms')
@@ -1 +1 @@
-from .kalman import KalmanFilter
+from .kalman import KalmanFilter, BatchedKalmanFilter
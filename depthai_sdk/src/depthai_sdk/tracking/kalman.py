@@ -1,6 +1,8 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
 import numpy as np
 
-__all__ = ['KalmanFilter']
+__all__ = ['KalmanFilter', 'BatchedKalmanFilter']
 
 
 class KalmanFilter:
@@ -49,3 +51,133 @@ class KalmanFilter:
         self.x = self.x + K @ (z - self.H @ self.x)
         I = np.eye(3 * self.dim_z)
         self.P = (I - K @ self.H) @ self.P @ (I - K @ self.H).T + K @ R @ K.T
+
+
+class BatchedKalmanFilter:
+    """
+    Kalman filters of many tracks, all stepped with a single set of stacked NumPy operations.
+
+    Uses the same constant-acceleration model as KalmanFilter. Since the state transition, noise and observation
+    matrices don't mix the measured axes, each track is stored as `dim_z` independent (position, velocity,
+    acceleration) filters, so the Kalman gain is a scalar division instead of a matrix inverse.
+    State of track is kept in preallocated arrays (grown on demand) and addressed by the track key.
+    """
+
+    def __init__(self, dim_z: int, acc_std: float, meas_std: float, capacity: int = 16):
+        self.dim_z = dim_z
+        self.acc_std = acc_std
+        self.meas_std = meas_std  # Measurement std of new tracks
+
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self.x = np.zeros((capacity, dim_z, 3))
+        self.P = np.zeros((capacity, dim_z, 3, 3))
+        self.time = np.zeros(capacity)
+        self.r = np.zeros(capacity)  # Measurement std, per track
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def remove(self, key: Hashable) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def step(self,
+             keys: Sequence[Hashable],
+             z: np.ndarray,
+             time: Union[float, np.ndarray],
+             next_meas_std: Optional[np.ndarray] = None
+             ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts state of tracks `keys` at `time` (seconds) and updates it with measurements `z` (N x dim_z).
+        Tracks that weren't seen before are initialized from their measurement.
+
+        Args:
+            keys: Track keys, one per measurement.
+            z: Measurements, N x dim_z.
+            time: Time of the measurements in seconds, scalar or one per measurement.
+            next_meas_std: Measurement std of each track, used from the next step on (same as setting
+                KalmanFilter.meas_std after update()).
+
+        Returns:
+            Filtered positions (N x dim_z) and a mask of filtered tracks. New tracks aren't filtered, their
+            rows are NaN.
+        """
+        n = len(keys)
+        z = np.asarray(z, dtype=np.float64).reshape(n, self.dim_z)
+        time = np.broadcast_to(np.asarray(time, dtype=np.float64), (n,))
+
+        slots = np.empty(n, dtype=np.intp)
+        known = np.empty(n, dtype=bool)
+        for i, key in enumerate(keys):
+            slot = self._slots.get(key)
+            known[i] = slot is not None
+            slots[i] = self._allocate(key) if slot is None else slot
+
+        new = slots[~known]
+        if new.size:
+            self.x[new] = 0
+            self.x[new, :, 0] = z[~known]
+            self.P[new] = 1e5  # Initial vector is a guess -> high estimate uncertainty
+            self.r[new] = self.meas_std
+
+        tracked = slots[known]
+        if tracked.size:
+            self._predict_update(tracked, z[known], time[known] - self.time[tracked])
+            if next_meas_std is not None:
+                self.r[tracked] = np.broadcast_to(next_meas_std, (n,))[known]
+        self.time[slots] = time
+
+        filtered = np.full((n, self.dim_z), np.nan)
+        filtered[known] = self.x[tracked, :, 0]
+        return filtered, known
+
+    def _predict_update(self, slots: np.ndarray, z: np.ndarray, dt: np.ndarray) -> None:
+        m = len(slots)
+        x = self.x[slots]  # m x dim_z x 3
+        P = self.P[slots]  # m x dim_z x 3 x 3
+
+        # State transition matrix of each track -> assuming acceleration is constant
+        F = np.zeros((m, 3, 3))
+        F[:, 0, 0] = F[:, 1, 1] = F[:, 2, 2] = 1
+        F[:, 0, 1] = F[:, 1, 2] = dt
+        F[:, 0, 2] = dt ** 2 / 2
+        # Process noise (acceleration only): acc_std^2 * F @ diag(0, 0, 1) @ F.T
+        f = F[:, :, 2]
+        Q = self.acc_std ** 2 * f[:, :, np.newaxis] * f[:, np.newaxis, :]
+
+        F = F[:, np.newaxis]
+        x = (F @ x[..., np.newaxis])[..., 0]
+        P = F @ P @ F.transpose(0, 1, 3, 2) + Q[:, np.newaxis]
+
+        # Observation matrix selects the position, so innovation covariance and gain are scalar per axis
+        r2 = (self.r[slots] ** 2)[:, np.newaxis]
+        K = P[..., :, 0] / (P[..., 0, 0] + r2)[..., np.newaxis]
+        x += K * (z - x[..., 0])[..., np.newaxis]
+
+        # Joseph form: (I - KH) P (I - KH)^T + K R K^T
+        A = np.broadcast_to(np.eye(3), P.shape).copy()
+        A[..., :, 0] -= K
+        KK = K[..., :, np.newaxis] * K[..., np.newaxis, :]
+        P = A @ P @ A.swapaxes(-1, -2) + r2[..., np.newaxis, np.newaxis] * KK
+
+        self.x[slots] = x
+        self.P[slots] = P
+
+    def _allocate(self, key: Hashable) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._slots)
+            if slot == len(self.time):  # Grow all arrays 2x
+                grow = max(1, slot)
+                self.x = np.concatenate([self.x, np.zeros_like(self.x[:grow])])
+                self.P = np.concatenate([self.P, np.zeros_like(self.P[:grow])])
+                self.time = np.concatenate([self.time, np.zeros(grow)])
+                self.r = np.concatenate([self.r, np.zeros(grow)])
+        self._slots[key] = slot
+        return slot
@@ -1,23 +1,101 @@
-import time
+from collections import deque
 from datetime import timedelta, datetime
 from pathlib import Path
-from threading import Thread
-from typing import Union, Callable, Dict, List
+from queue import Queue
+from threading import Thread, Lock
+from typing import Union, Callable, Dict, List, Optional, Deque
 
 import depthai as dai
 
 from depthai_sdk.classes import FramePacket
 from depthai_sdk.components import Component
 from depthai_sdk.logger import LOGGER
+from depthai_sdk.recorders.abstract_recorder import OakStream
 from depthai_sdk.recorders.video_recorder import VideoRecorder
+from depthai_sdk.recorders.video_writers.av_writer import is_keyframe
 from depthai_sdk.trigger_action.actions.abstract_action import Action
 
 __all__ = ['RecordAction']
 
 
+class PreTriggerBuffer:
+    """
+    Ring buffer of the most recent frames of a single stream, bounded by duration and by memory budget.
+    Frames are kept as they arrive from the device, so encoded (H.264/H.265/MJPEG) streams are buffered as bitstream.
+    H.264/H.265 frames are kept in whole GOPs, so the buffer always starts at a keyframe; when a limit is exceeded,
+    the oldest GOP gets dropped.
+    """
+
+    def __init__(self, max_seconds: float, max_bytes: int, fourcc: Optional[str] = None):
+        """
+        Args:
+            max_seconds: Duration of the buffered frames. Buffer starts at the last keyframe before this window.
+            max_bytes: Memory budget, in bytes.
+            fourcc: Codec of the stream ('h264', 'hevc', 'mjpeg'), None for unencoded frames.
+        """
+        self.max_seconds = timedelta(seconds=max_seconds)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        self._h26x = fourcc in ('h264', 'hevc')
+        self._fourcc = fourcc
+        self._gops: Deque[List[dai.ImgFrame]] = deque()  # Each GOP starts with a keyframe
+        self._gop_bytes: Deque[int] = deque()
+        self._warned = False
+
+    def add(self, frame: dai.ImgFrame) -> None:
+        data = frame.getData()
+        if not self._h26x or is_keyframe(data, self._fourcc):
+            self._gops.append([])
+            self._gop_bytes.append(0)
+        elif not self._gops:
+            return  # Wait for a keyframe, frames before it can't be decoded
+
+        self._gops[-1].append(frame)
+        self._gop_bytes[-1] += data.nbytes
+        self.nbytes += data.nbytes
+        self._trim(frame.getTimestamp())
+
+    def _trim(self, now: timedelta) -> None:
+        # Oldest GOP isn't needed anymore once the next one starts before the time window
+        while 1 < len(self._gops) and self.max_seconds <= now - self._gops[1][0].getTimestamp():
+            self._drop_oldest()
+
+        while self.max_bytes < self.nbytes:
+            if len(self._gops) == 1 and not self._warned:
+                self._warned = True
+                LOGGER.warning(f'Pre-trigger buffer of {self.max_bytes / 2 ** 20:.1f} MB can\'t hold a single GOP, '
+                               f'increase the memory budget or the keyframe frequency of the encoder.')
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        self._gops.popleft()
+        self.nbytes -= self._gop_bytes.popleft()
+
+    def frames(self) -> List[dai.ImgFrame]:
+        """
+        Returns buffered frames, oldest first. Frames stay in the buffer, so they can be used by the next trigger too.
+        """
+        return [frame for gop in self._gops for frame in gop]
+
+    def __len__(self) -> int:
+        return sum(len(gop) for gop in self._gops)
+
+
+class _Recording:
+    def __init__(self, subfolder: str, end: timedelta):
+        self.subfolder = subfolder
+        self.end = end  # Frames up to this timestamp are recorded
+        self.frames: Queue = Queue()  # (stream name, frame), None when there are no more frames
+
+
 class RecordAction(Action):
     """
     Action that records video from specified inputs for a specified duration before and after trigger event.
+
+    Frames before the trigger are kept in memory (see PreTriggerBuffer), so encoded outputs (eg. color.out.encoded)
+    allow much longer pre-trigger durations than unencoded frames. Files are written on a background thread,
+    so triggering never blocks, and a new recording can be triggered while the previous one is still being written.
     """
 
     def __init__(self,
@@ -26,6 +104,7 @@ class RecordAction(Action):
                  duration_before_trigger: Union[int, timedelta],
                  duration_after_trigger: Union[timedelta, int],
                  on_finish_callback: Callable[[Union[Path, str]], None] = None,
+                 max_buffer_size: int = 512 * 2 ** 20,
                  ):
         """
         Args:
@@ -34,6 +113,8 @@ class RecordAction(Action):
             duration_before_trigger: Duration of video to record before trigger event.
             duration_after_trigger: Duration of video to record after trigger event.
             on_finish_callback: Callback function that will be called when recording is finished. Should accept a single argument - path to the folder with recorded video files.
+            max_buffer_size: Memory budget (in bytes) of the pre-trigger buffer, split evenly between the inputs.
+                Oldest frames are dropped if the budget is exceeded, which shortens the recording before the trigger.
         """
         super().__init__(inputs)
         self.path = Path(dir_path).resolve()
@@ -47,75 +128,75 @@ class RecordAction(Action):
         else:
             raise ValueError("Recording durations before and after trigger must be positive integers "
                              "or timedelta objects representing positive time difference")
-        self.recorder = VideoRecorder()
+        self.max_buffer_size = max_buffer_size
         self.stream_names = []  # will be assigned during recorder setup
-        self.buffers_status: Dict[str, Dict[str, Union[int, List[int]]]] = {}
+        self.buffers: Dict[str, PreTriggerBuffer] = {}
         self.on_finish_callback = on_finish_callback
 
+        self._device: Optional[dai.Device] = None
+        self._xouts: List['XoutFrames'] = []
+        self._recordings: List[_Recording] = []  # Recordings that are still waiting for frames after the trigger
+        self._lock = Lock()  # Trigger and action packets can arrive on different threads
+        self._queue: Queue = Queue()  # Recordings to be written, None stops the writer thread
+        self._thread: Optional[Thread] = None
+
     def _run(self):
         """
-        Starts recording video from specified inputs for a specified duration before and after trigger event.
+        Writes triggered recordings, one after another. Sleeps until frames of the recording arrive.
         """
         while True:
-            rbt_ids = self.buffers_status['ready']['before_t']
-
-            # Wait until there is at least one ready before trigger buffer
-            while not len(rbt_ids):
-                time.sleep(0.01)
-            rbt_id = rbt_ids.pop(0)
-
-            # Create file for every stream
-            buf_name = f'before_t_{rbt_id}'
-            subfolder = f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}'
-            self.recorder.create_files_for_buffer(subfolder=subfolder, buf_name=buf_name)
-
-            # Write before trigger buffer into file for every stream
-            for stream_name in self.stream_names:
-                while not self.recorder.is_buffer_empty(stream_name, buf_name):
-                    self.recorder.write_from_buffer(wr_name=stream_name,
-                                                    buf_name=buf_name,
-                                                    n_elems=1)
-                    time.sleep(0.01)
-
-            # Wait until after trigger buffer with the same id is ready
-            while rbt_id not in self.buffers_status['ready']['after_t']:
-                time.sleep(0.01)
-
-            # Write after trigger buffer into the same file for every stream
-            buf_name = f'after_t_{rbt_id}'
-            for stream_name in self.stream_names:
-                while not self.recorder.is_buffer_empty(stream_name, buf_name):
-                    self.recorder.write_from_buffer(wr_name=stream_name,
-                                                    buf_name=buf_name,
-                                                    n_elems=1)
-                    time.sleep(0.01)
-
-            # Close files
-            LOGGER.debug(f'Saved to {str(self.path / subfolder)}')
-            self.recorder.close_files()
-
-            # Call on_finish_callback if it is specified
-            if self.on_finish_callback is not None:
-                self.on_finish_callback(str(self.path / subfolder))
+            recording: _Recording = self._queue.get()
+            if recording is None:
+                break
 
-    def activate(self):
-        # Setup for the current recording
-        wbt_id = self.buffers_status['writing']['before_t']
-        self.buffers_status['ready']['before_t'].append(wbt_id)
-        self.buffers_status['writing']['after_t'].append(wbt_id)
+            try:
+                self._write(recording)
+            except Exception as e:
+                LOGGER.error(f'RecordAction: writing recording {recording.subfolder} failed: {e}')
+                continue
 
-        # Setup for the next recording
-        new_id = wbt_id + 1
-        buffers = {f'before_t_{new_id}': self.duration_bt,
-                   f'after_t_{new_id}': self.duration_at}
+            LOGGER.debug(f'Saved to {str(self.path / recording.subfolder)}')
+            if self.on_finish_callback is not None:
+                self.on_finish_callback(str(self.path / recording.subfolder))
+
+    def _write(self, recording: _Recording):
+        recorder = VideoRecorder()
+        recorder.update(self.path / recording.subfolder, self._device, self._xouts)
+        try:
+            while True:
+                item = recording.frames.get()
+                if item is None:
+                    break
+                recorder.write(*item)
+        finally:
+            recorder.close()
 
-        self.recorder.init_buffers(buffers)
-        self.buffers_status['writing']['before_t'] = new_id
+    def activate(self):
+        recording = _Recording(self._create_subfolder(), dai.Clock.now() + timedelta(seconds=self.duration_at))
+        with self._lock:
+            for name, buffer in self.buffers.items():
+                for frame in buffer.frames():
+                    recording.frames.put((name, frame))
+            self._recordings.append(recording)
+        self._queue.put(recording)
+
+    def _create_subfolder(self) -> str:
+        """
+        Creates folder of a new recording, named after the trigger time. Recordings can overlap, so if a folder
+        of the same name exists (triggers within the same millisecond), a counter is appended.
+        """
+        now = datetime.now()
+        name = f'{now.strftime("%Y-%m-%d_%H-%M-%S")}_{now.microsecond // 1000:03d}'
+        subfolder, i = name, 1
+        while True:
+            try:
+                (self.path / subfolder).mkdir(parents=True)
+                return subfolder
+            except FileExistsError:
+                subfolder = f'{name}-{i}'
+                i += 1
 
     def on_new_packets(self, packets: Dict[str, FramePacket]):
-        # Write into the only writing before trigger buffer
-        wbt_id = self.buffers_status['writing']['before_t']
-
         # Extract imgFrames from packets --> Syncing packets is redundant for RecordAction, just sync frames
         frames = dict.fromkeys(self.stream_names)
         for name, _ in frames.items():
@@ -129,33 +210,43 @@ class RecordAction(Action):
             if frame is None:
                 raise Exception("Extracting msg from packets failed, check if all streams are present")
 
-        self.recorder.add_to_buffers(f'before_t_{wbt_id}', frames)  # does for every stream
-
-        # Write into all writing after trigger buffers
-        wat_ids = self.buffers_status['writing']['after_t']
-        for i, buffer_id in enumerate(list(wat_ids)):
-            buf_name = f'after_t_{buffer_id}'
-            all_streams_ready = True
-            for stream_name in self.stream_names:
-                if not self.recorder.is_buffer_full(stream_name, buf_name):
-                    self.recorder.add_to_buffer(stream_name, buf_name, frames[stream_name])
-                    all_streams_ready = False
-            if all_streams_ready:
-                wat_ids.pop(i)
-                self.buffers_status['ready']['after_t'].append(buffer_id)
+        timestamp = next(iter(frames.values())).getTimestamp()
+        with self._lock:
+            for name, frame in frames.items():
+                self.buffers[name].add(frame)
+
+            # Pass frames to the recordings after the trigger
+            for recording in list(self._recordings):
+                if recording.end < timestamp:
+                    recording.frames.put(None)
+                    self._recordings.remove(recording)
+                    continue
+                for name, frame in frames.items():
+                    recording.frames.put((name, frame))
 
     def setup(self, device: dai.Device, xouts: List['XoutFrames']):
         self.stream_names = [xout.name for xout in xouts]  # e.g., [color_video, color_bitstream]
         LOGGER.debug(f'RecordAction: stream_names = {self.stream_names}')
-        self.recorder.update(self.path, device, xouts)
+        self._device = device
+        self._xouts = xouts
+        max_bytes = self.max_buffer_size // max(len(xouts), 1)
+        self.buffers = {xout.name: PreTriggerBuffer(self.duration_bt, max_bytes, OakStream(xout).fourcc())
+                        for xout in xouts}
         self._run_thread()
 
     def _run_thread(self):
-        buffers = {'before_t_1': self.duration_bt, 'after_t_1': self.duration_at}
-        self.recorder.init_buffers(buffers)  # does for every stream
-        self.buffers_status = {'writing': {'before_t': 1, 'after_t': []},
-                               # there is always only one writing before trigger buffer
-                               'ready': {'before_t': [], 'after_t': []}}
-
-        process = Thread(target=self._run)
-        process.start()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Finishes the recordings (they end early if the duration after trigger hasn't passed yet) and waits
+        until they are written.
+        """
+        with self._lock:
+            for recording in self._recordings:
+                recording.frames.put(None)
+            self._recordings.clear()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+Colormap = Union[int, np.ndarray]  # cv2.COLORMAP_* or 256x1x3 BGR array
+
+
+class DisparityColorizer:
+    """
+    Colorizes disparity frames (or depth frames, converted to disparity) with lookup tables, instead of
+    floating-point normalization of the whole frame:
+
+    - 256 (uint8 frames) or 65536 (uint16 depth frames) entry table maps each value to the normalized 8-bit
+      disparity (`value * multiplier`, or `depth_factor / value * multiplier` for depth, clipped to 0..255),
+    - 256 entry table of the colormap maps the 8-bit disparity to BGR color (cv2.applyColorMap).
+
+    Tables are computed once per frame type, multiplier and colormap, and shared by all packets/visualizers.
+    Results can be written into reusable output buffers (`out`).
+    """
+
+    def __init__(self, max_tables: int = 32):
+        """
+        Args:
+            max_tables: Max number of cached lookup tables, least recently used ones are evicted.
+        """
+        self.max_tables = max_tables
+        self._tables: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scale_table(self, size: int, multiplier: float, depth_factor: Optional[float] = None) -> np.ndarray:
+        """
+        Returns table (`size` uint8 values) of the normalized 8-bit disparity of each frame value.
+
+        Args:
+            size: Number of values, 256 for uint8 frames, 65536 for uint16 frames.
+            multiplier: Multiplier of the disparity (255 / max disparity).
+            depth_factor: If set, frame values are depth, and disparity is `depth_factor / depth`.
+        """
+        key = ('scale', size, multiplier, depth_factor)
+        table = self._get(key)
+        if table is None:
+            values = np.arange(size, dtype=np.float64)
+            if depth_factor is not None:
+                with np.errstate(divide='ignore'):
+                    values = depth_factor / values
+                values[0] = 0  # Invalid depth
+            table = self._put(key, np.clip(values * multiplier, 0, 255).astype(np.uint8))
+        return table
+
+    def colormap_table(self, colormap: Colormap) -> np.ndarray:
+        """
+        Returns 256x1x3 BGR table of the colormap, which can be passed to cv2.applyColorMap as a user colormap.
+        """
+        if isinstance(colormap, np.ndarray):
+            return np.ascontiguousarray(colormap, dtype=np.uint8).reshape(256, 1, 3)
+
+        key = ('colormap', colormap)
+        table = self._get(key)
+        if table is None:
+            table = self._put(key, cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), colormap))
+        return table
+
+    def normalize(self, frame: np.ndarray, multiplier: float, depth_factor: Optional[float] = None,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns normalized 8-bit disparity of the frame, written into `out` if its shape matches.
+        """
+        if out is None or out.shape != frame.shape or out.dtype != np.uint8:
+            out = np.empty(frame.shape, dtype=np.uint8)
+        if frame.dtype == np.uint8:
+            return cv2.LUT(frame, self.scale_table(256, multiplier, depth_factor), dst=out)
+        if frame.dtype == np.uint16 and depth_factor is None:
+            # Linear scaling of 16-bit disparity (subpixel) is faster than indexing the 65536 entry table.
+            # Values are rounded instead of truncated, so they can be 1 higher than the table, which is one colormap
+            # step (up to ~5 BGR levels with COLORMAP_JET).
+            return cv2.convertScaleAbs(frame, out, alpha=multiplier)
+        if frame.dtype == np.uint16:
+            # All uint16 values are in the table, so 'clip' only skips the bounds checks
+            return np.take(self.scale_table(65536, multiplier, depth_factor), frame, out=out, mode='clip')
+
+        # Other types (eg. float disparity) can't be indexed, so they are normalized directly
+        if depth_factor is not None:
+            with np.errstate(divide='ignore'):
+                frame = np.where(frame == 0, 0, depth_factor / frame)
+        np.copyto(out, np.clip(frame * multiplier, 0, 255), casting='unsafe')
+        return out
+
+    def colorize(self, frame: np.ndarray, multiplier: float, colormap: Colormap,
+                 depth_factor: Optional[float] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns colorized (BGR) frame, written into `out` if its shape matches.
+
+        Args:
+            frame: Disparity (or depth, if `depth_factor` is set) frame, uint8 or uint16 use lookup tables.
+            multiplier: Multiplier of the disparity (255 / max disparity).
+            colormap: cv2.COLORMAP_* or 256x1x3 BGR array.
+            depth_factor: If set, frame is depth and disparity is `depth_factor / depth`.
+            out: Output buffer (HxWx3 uint8).
+        """
+        normalized = self.normalize(frame, multiplier, depth_factor)
+        return self.apply_colormap(normalized, colormap, out)
+
+    def apply_colormap(self, normalized: np.ndarray, colormap: Colormap,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        shape = normalized.shape + (3,)
+        if out is None or out.shape != shape or out.dtype != np.uint8:
+            out = np.empty(shape, dtype=np.uint8)
+        return cv2.applyColorMap(normalized, self.colormap_table(colormap), dst=out)
+
+    def _get(self, key) -> Optional[np.ndarray]:
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+            return table
+
+    def _put(self, key, table: np.ndarray) -> np.ndarray:
+        table.setflags(write=False)  # Shared by all users
+        with self._lock:
+            self._tables[key] = table
+            while self.max_tables < len(self._tables):
+                self._tables.popitem(last=False)
+        return table
+
+
+# Shared by all packets, so tables are computed once per process
+disparity_colorizer = DisparityColorizer()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 
 import cv2
 import numpy as np
@@ -21,6 +21,10 @@ from depthai_sdk.visualize.visualizers.opencv_text import OpenCvTextVis
 
 
 class OpenCvVisualizer(Visualizer):
+    def __init__(self, scale: float = None, fps: bool = False):
+        super().__init__(scale, fps)
+        self._stereo_buffers: Dict[str, np.ndarray] = {}  # Reused colorized disparity frame of each stream
+
     def draw(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         Draw all objects on the frame if the platform is PC. Otherwise, serialize the objects
@@ -82,7 +86,13 @@ class OpenCvVisualizer(Visualizer):
             self.add_text(text=f'FPS: {fps:.1f}', position=TextPosition.TOP_LEFT)
 
         if isinstance(packet, DisparityPacket):
-            frame = packet.get_colorized_frame(self)
+            # Overlays are drawn on the buffer of the visualizer, memoized frame of the packet stays intact
+            buffer = self._stereo_buffers.get(packet.name)
+            if buffer is None:
+                frame = packet.get_colorized_frame(self).copy()
+            else:
+                frame = packet.get_colorized_frame(self, out=buffer)
+            self._stereo_buffers[packet.name] = frame
         elif isinstance(packet, FramePacket):
             frame = packet.decode()
         else:
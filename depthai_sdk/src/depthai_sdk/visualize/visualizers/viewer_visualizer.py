@@ -67,7 +67,8 @@ class DepthaiViewerVisualizer(Visualizer):
             if packet.colorize_frame is not None:
                 rgb_frame = packet.colorize_frame[..., ::-1]
                 viewer.log_image(f'color', rgb_frame)
-                viewer.log_points(packet.name, packet.points.reshape(-1, 3) / 1000, colors=rgb_frame.reshape(-1, 3))
+                viewer.log_points(packet.name, packet.points.reshape(-1, 3) / 1000,
+                                  colors=packet.get_colors()[..., ::-1])
             else:
                 viewer.log_points(packet.name, packet.points.reshape(-1, 3) / 1000)
 
@@ -1,4 +1,6 @@
 import argparse
+import json
+from pathlib import Path
 
 import depthai_sdk
 
@@ -10,6 +12,22 @@ def main():
     sentry_parser = subparsers.add_parser('sentry', help='Enable or disable Sentry reporting')
     sentry_parser.add_argument('action', choices=['enable', 'disable', 'status'], help='Action to perform')
 
+    blobs_parser = subparsers.add_parser('blobs', help='Manage the local NN blob cache (for offline use)')
+    blobs_parser.add_argument('--cache-dir', type=Path, help='Blob cache directory (default: ~/.depthai_sdk/blobs)')
+    blobs_subparsers = blobs_parser.add_subparsers(dest='action', required=True)
+    blobs_subparsers.add_parser('list', help='List cached blobs')
+    prefetch_parser = blobs_subparsers.add_parser('prefetch', help='Download blobs of models into the cache')
+    prefetch_parser.add_argument('models', nargs='+',
+                                 help='SDK model names, OpenVINO/DepthAI zoo model names, or paths to config.json')
+    prefetch_parser.add_argument('--shaves', type=int, default=6, help='Number of shaves (zoo models only)')
+    prefetch_parser.add_argument('--version', help='OpenVINO version, eg. 2021.4 (default: from the model config)')
+    prefetch_parser.add_argument('--zoo-type', default='intel', help='Model zoo type (zoo models only)')
+    export_parser = blobs_subparsers.add_parser('export', help='Export cached blobs into a tar archive')
+    export_parser.add_argument('archive', type=Path)
+    import_parser = blobs_subparsers.add_parser('import', help='Import blobs from a tar archive')
+    import_parser.add_argument('archive', type=Path)
+    blobs_subparsers.add_parser('clear', help='Remove all cached blobs')
+
     args = parser.parse_args()
 
     if args.command == 'sentry':
@@ -22,6 +40,49 @@ def main():
         elif args.action == 'status':
             status = depthai_sdk.get_config_field("sentry")
             print(f'Sentry is {"enabled" if status else "disabled"}.')
+    elif args.command == 'blobs':
+        blobs_command(args)
+    else:
+        parser.print_help()
+
+
+def blobs_command(args: argparse.Namespace) -> None:
+    from depthai_sdk import blob_cache
+    from depthai_sdk.components.nn_helper import getSupportedModels
+
+    cache = blob_cache.BlobCache(args.cache_dir)
+    if args.action == 'list':
+        for key, entry in sorted(cache.entries().items()):
+            print(f'{key:<70} {entry["size"] / 1e6:>8.1f} MB  {entry["sha256"][:12]}')
+        print(f'Total: {cache.size() / 1e6:.1f} MB in {cache.path}')
+    elif args.action == 'prefetch':
+        models = getSupportedModels(printModels=False)
+        for model in args.models:
+            config_path = Path(model)
+            if model in models:
+                config_path = models[model] / 'config.json'
+            if config_path.suffix == '.json' and config_path.exists():
+                config = json.loads(config_path.read_text())
+                section = config['model']
+                for name in ['xml', 'bin']:  # Paths are relative to the config
+                    if name in section:
+                        section[name] = str((config_path.parent / section[name]).resolve())
+                if 'blob' in section:
+                    print(f'{model}: blob is part of the model, nothing to download')
+                    continue
+                path = blob_cache.from_model_config(section, args.version or config.get('openvino_version'),
+                                                    cache=cache)
+            else:
+                path = blob_cache.from_zoo(model, shaves=args.shaves, version=args.version,
+                                           zoo_type=args.zoo_type, cache=cache)
+            print(f'{model}: {path}')
+    elif args.action == 'export':
+        print(f'Exported {cache.export(args.archive)} blobs to {args.archive}')
+    elif args.action == 'import':
+        print(f'Imported {cache.import_(args.archive)} blobs from {args.archive}')
+    elif args.action == 'clear':
+        cache.clear()
+        print(f'Removed all blobs from {cache.path}')
 
 
 if __name__ == '__main__':
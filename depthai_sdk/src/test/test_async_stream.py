@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import timedelta
+
+import depthai as dai
+
+from depthai_sdk.classes.packet_handlers import AsyncQueuePacketHandler
+from depthai_sdk.classes.packets import FramePacket
+from depthai_sdk.oak_outputs.stats import PipelineStats
+
+
+def create_packet(seq: int) -> FramePacket:
+    frame = dai.ImgFrame()
+    frame.setSequenceNum(seq)
+    frame.setTimestamp(timedelta(seconds=seq / 30))
+    return FramePacket('color', frame)
+
+
+def produce(handler: AsyncQueuePacketHandler, count: int, interval: float = 0.0, close: bool = True):
+    """
+    Feeds packets from another thread, as the XLink callback thread would.
+    """
+
+    def run():
+        for seq in range(count):
+            handler._new_packet_callback(create_packet(seq))
+            time.sleep(interval)
+        if close:
+            handler.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestAsyncQueuePacketHandler(unittest.TestCase):
+
+    def test_async_for(self):
+        async def consume():
+            handler = AsyncQueuePacketHandler([], max_size=4)
+            handler._packet_names = {'color': True}
+            handler.stats = PipelineStats()
+            produce(handler, 20, interval=0.002)
+            packets = [packet.get_sequence_num() async for packet in handler]
+            return handler, packets
+
+        handler, packets = asyncio.run(consume())
+        self.assertEqual(packets, list(range(20)))
+        self.assertEqual(handler.drops, 0)
+        self.assertEqual(handler.stats.stage('color', 'handoff').latency.count, 20)
+
+    def test_drop_oldest(self):
+        async def consume():
+            handler = AsyncQueuePacketHandler([], max_size=4)
+            produce(handler, 10).join()  # Consumer doesn't read while packets arrive
+            return handler, [packet.get_sequence_num() async for packet in handler]
+
+        handler, packets = asyncio.run(consume())
+        self.assertEqual(packets, [6, 7, 8, 9])
+        self.assertEqual(handler.drops, 6)
+
+    def test_drop_newest(self):
+        async def consume():
+            handler = AsyncQueuePacketHandler([], max_size=4, policy='drop_newest')
+            produce(handler, 10).join()
+            return handler, [packet.get_sequence_num() async for packet in handler]
+
+        handler, packets = asyncio.run(consume())
+        self.assertEqual(packets, [0, 1, 2, 3])
+        self.assertEqual(handler.drops, 6)
+
+    def test_block(self):
+        async def consume():
+            handler = AsyncQueuePacketHandler([], max_size=2, policy='block')
+            thread = produce(handler, 10)
+            await asyncio.sleep(0.05)
+            self.assertTrue(thread.is_alive())  # Waiting for the consumer
+            self.assertEqual(handler.qsize(), 2)
+            packets = []
+            async for packet in handler:
+                packets.append(packet.get_sequence_num())
+                await asyncio.sleep(0.001)
+            return handler, packets
+
+        handler, packets = asyncio.run(consume())
+        self.assertEqual(packets, list(range(10)))
+        self.assertEqual(handler.drops, 0)
+
+    def test_multiple_consumers(self):
+        async def consume(handler, packets):
+            async for packet in handler:
+                packets.append(packet.get_sequence_num())
+                await asyncio.sleep(0)
+
+        async def run():
+            handler = AsyncQueuePacketHandler([], max_size=4, policy='block')
+            first, second = [], []
+            consumers = asyncio.gather(consume(handler, first), consume(handler, second))
+            await asyncio.sleep(0.01)  # Both consumers are waiting
+            produce(handler, 20, interval=0.001)
+            await asyncio.wait_for(consumers, timeout=5)  # Both stop once the stream is closed
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertEqual(sorted(first + second), list(range(20)))  # Each packet consumed exactly once
+        self.assertTrue(first and second)
+
+    def test_close_wakes_all_consumers(self):
+        async def run():
+            handler = AsyncQueuePacketHandler([])
+            consumers = asyncio.gather(*[handler.get() for _ in range(3)])
+            await asyncio.sleep(0.01)
+            handler.close()
+            return await asyncio.wait_for(consumers, timeout=5)
+
+        self.assertEqual(asyncio.run(run()), [None, None, None])
+
+    def test_cancelled_consumer(self):
+        async def run():
+            handler = AsyncQueuePacketHandler([])
+            cancelled = asyncio.ensure_future(handler.get())
+            waiting = asyncio.ensure_future(handler.get())
+            await asyncio.sleep(0.01)
+            handler._new_packet_callback(create_packet(0))
+            cancelled.cancel()  # Woken for the packet, but cancelled before taking it
+            packet = await asyncio.wait_for(waiting, timeout=5)
+            return packet.get_sequence_num()
+
+        self.assertEqual(asyncio.run(run()), 0)
+
+    def test_closed(self):
+        async def consume():
+            handler = AsyncQueuePacketHandler([])
+            handler.close()
+            return await handler.get()
+
+        self.assertIsNone(asyncio.run(consume()))
+
+    def test_unbound(self):
+        handler = AsyncQueuePacketHandler([])  # Created outside of the event loop
+        handler._new_packet_callback(create_packet(0))
+        self.assertEqual(handler.drops, 1)
+
+        loop = asyncio.new_event_loop()
+        handler.bind(loop)
+        with self.assertRaises(RuntimeError):
+            handler.bind(asyncio.new_event_loop())
+        loop.close()
+        handler._new_packet_callback(create_packet(1))  # Loop closed, packet dropped instead of raising
+        self.assertEqual(handler.drops, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import warnings
+from unittest.mock import patch
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.oak_outputs.bandwidth import (
+    LINK_BUDGETS,
+    BandwidthProfiler,
+    BandwidthWarning,
+    estimate_bandwidth,
+    link_budget,
+    message_size,
+    plan_bandwidth,
+)
+
+
+class Device:
+    """
+    Device connected with the given USB speed / protocol, only provides what link_budget() needs.
+    """
+
+    def __init__(self, usb_speed: dai.UsbSpeed, protocol: dai.XLinkProtocol = dai.XLinkProtocol.X_LINK_USB_VSC):
+        self.usb_speed = usb_speed
+        self.info = dai.DeviceInfo()
+        self.info.protocol = protocol
+
+    def getUsbSpeed(self):
+        return self.usb_speed
+
+    def getDeviceInfo(self):
+        return self.info
+
+
+def xlink(pipeline: dai.Pipeline, output: dai.Node.Output, name: str) -> dai.node.XLinkOut:
+    node = pipeline.createXLinkOut()
+    node.setStreamName(name)
+    output.link(node.input)
+    return node
+
+
+def create_pipeline() -> dai.Pipeline:
+    pipeline = dai.Pipeline()
+    color = pipeline.createColorCamera()
+    color.setResolution(dai.ColorCameraProperties.SensorResolution.THE_1080_P)
+    color.setFps(30)
+    color.setPreviewSize(300, 300)
+
+    encoder = pipeline.createVideoEncoder()
+    encoder.setDefaultProfilePreset(30, dai.VideoEncoderProperties.Profile.H264_MAIN)
+    encoder.setBitrateKbps(8000)
+    color.video.link(encoder.input)
+    xlink(pipeline, encoder.bitstream, 'h264')
+
+    left, right = pipeline.createMonoCamera(), pipeline.createMonoCamera()
+    for mono in (left, right):
+        mono.setResolution(dai.MonoCameraProperties.SensorResolution.THE_800_P)
+        mono.setFps(20)
+    stereo = pipeline.createStereoDepth()
+    left.out.link(stereo.left)
+    right.out.link(stereo.right)
+    xlink(pipeline, stereo.depth, 'depth').setFpsLimit(10)
+
+    nn = pipeline.createNeuralNetwork()
+    color.preview.link(nn.input)
+    xlink(pipeline, nn.passthrough, 'preview')
+    xlink(pipeline, nn.out, 'nn')
+    return pipeline
+
+
+class TestBandwidthProfiler(unittest.TestCase):
+
+    def test_message_size(self):
+        frame = dai.ImgFrame()
+        frame.setData(np.zeros(1000, dtype=np.uint8))
+        self.assertEqual(message_size(frame), 1000)
+        self.assertEqual(message_size(dai.IMUData()), 0)
+        self.assertEqual(message_size(None), 0)
+
+    def test_rates(self):
+        profiler = BandwidthProfiler(window=1.0)
+        for i in range(30):  # 30 FPS, 100 kB frames
+            profiler.stream('color').add(100_000, now=i / 30)
+        profiler.stream('nn').add(500, now=0.5)
+
+        stats = profiler.get_stats(now=1.0)
+        self.assertAlmostEqual(stats['color']['msgs_per_sec'], 30)
+        self.assertAlmostEqual(stats['color']['mbps'], 24)
+        self.assertEqual((stats['color']['count'], stats['color']['total_bytes']), (30, 3_000_000))
+        self.assertAlmostEqual(profiler.get_total(now=1.0), 24.008e6)  # nn: 500 B over 0.5 s
+        self.assertIn('color: 24.0 Mbps, 30.0 msg/s', profiler.summary(budget=240e6, now=1.0))
+
+        # Stream stopped, rates drop out of the window
+        stats = profiler.get_stats(now=3.0)
+        self.assertEqual((stats['color']['mbps'], stats['color']['count']), (0, 30))
+
+
+class TestBandwidthPlanner(unittest.TestCase):
+
+    def test_estimate(self):
+        estimates = {s.stream: s for s in estimate_bandwidth(create_pipeline())}
+
+        self.assertEqual(estimates['h264'].fps, 30)
+        self.assertAlmostEqual(estimates['h264'].bytes_per_sec, 8e6 / 8)
+        self.assertEqual(estimates['depth'].fps, 10)  # XLinkOut FPS limit
+        self.assertEqual(estimates['depth'].bytes_per_sec, 1280 * 800 * 2 * 10)
+        self.assertEqual(estimates['preview'].bytes_per_sec, 300 * 300 * 3 * 30)
+        self.assertEqual(estimates['nn'].bytes_per_sec, None)  # Size of raw NN outputs is unknown
+
+    def test_link_budget(self):
+        self.assertEqual(link_budget(Device(dai.UsbSpeed.HIGH)), ('usb2', LINK_BUDGETS['usb2']))
+        self.assertEqual(link_budget(Device(dai.UsbSpeed.SUPER))[0], 'usb3')
+        self.assertEqual(link_budget(Device(dai.UsbSpeed.UNKNOWN, dai.XLinkProtocol.X_LINK_TCP_IP))[0], 'poe')
+        self.assertEqual(link_budget(Device(dai.UsbSpeed.UNKNOWN)), (None, None))
+
+    def test_plan(self):
+        pipeline = create_pipeline()
+        plan = plan_bandwidth(pipeline, Device(dai.UsbSpeed.SUPER))
+        self.assertFalse(plan.exceeded)
+        self.assertEqual(plan.unknown, ['nn'])
+        self.assertIn('usb3 budget', plan.summary())
+
+        # Uncompressed 4K NV12 at 30 FPS doesn't fit into USB2
+        color = [node for node in pipeline.getAllNodes() if isinstance(node, dai.node.ColorCamera)][0]
+        color.setResolution(dai.ColorCameraProperties.SensorResolution.THE_4_K)
+        xlink(pipeline, color.video, 'video')
+        plan = plan_bandwidth(pipeline, Device(dai.UsbSpeed.HIGH))
+        self.assertTrue(plan.exceeded)
+        self.assertAlmostEqual(plan.total, (3840 * 2160 * 1.5 * 30 + 1e6 + 1280 * 800 * 20 + 300 * 300 * 90) * 8)
+
+    def test_check_failure_doesnt_abort_start(self):
+        from depthai_sdk import OakCamera
+        oak = OakCamera.__new__(OakCamera)  # Without a device
+        oak.pipeline, oak.device, oak.bandwidth_plan = create_pipeline(), Device(dai.UsbSpeed.SUPER), None
+        with patch('depthai_sdk.oak_camera.plan_bandwidth', side_effect=RuntimeError('unexpected node')), \
+                warnings.catch_warnings():
+            warnings.simplefilter('error')
+            oak._check_bandwidth()
+        self.assertIsNone(oak.bandwidth_plan)
+
+        oak.device = Device(dai.UsbSpeed.HIGH)
+        color = [node for node in oak.pipeline.getAllNodes() if isinstance(node, dai.node.ColorCamera)][0]
+        color.setResolution(dai.ColorCameraProperties.SensorResolution.THE_4_K)
+        xlink(oak.pipeline, color.video, 'video')
+        with self.assertWarns(BandwidthWarning):
+            oak._check_bandwidth()
+        self.assertTrue(oak.bandwidth_plan.exceeded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import depthai as dai
+
+from depthai_sdk.blob_cache import BlobCache, from_zoo, normalize_version
+
+
+class TestBlobCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.cache = BlobCache(self.tmp / 'cache')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def create_blob(self, name: str, size: int = 1000) -> Path:
+        path = self.tmp / name
+        path.write_bytes(name.encode() * (size // len(name)))
+        return path
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('model', '2021.4', 6))
+        path = self.cache.put(self.create_blob('a.blob'), 'model', dai.OpenVINO.Version.VERSION_2021_4, 6)
+        self.assertEqual(self.cache.get('model', 'VERSION_2021_4', 6), path)
+        self.assertEqual(path.read_bytes(), self.create_blob('a.blob').read_bytes())
+        # Key includes version and shaves
+        self.assertIsNone(self.cache.get('model', '2022.1', 6))
+        self.assertIsNone(self.cache.get('model', '2021.4', 8))
+
+    def test_content_addressed(self):
+        blob = self.create_blob('a.blob')
+        a = self.cache.put(blob, 'model', shaves=6)
+        b = self.cache.put(blob, 'model', shaves=7)
+        self.assertEqual(a, b)
+        self.assertEqual(len(self.cache.entries()), 2)
+        self.cache.remove(BlobCache.key('model', shaves=6))
+        self.assertTrue(b.exists())  # Still referenced
+        self.cache.remove(BlobCache.key('model', shaves=7))
+        self.assertFalse(b.exists())
+
+    def test_corrupted(self):
+        path = self.cache.put(self.create_blob('a.blob'), 'model')
+        path.write_bytes(b'x' * path.stat().st_size)
+        self.assertIsNone(self.cache.get('model'))
+        self.assertEqual(self.cache.entries(), {})
+        self.assertFalse(path.exists())
+
+    def test_lru_eviction(self):
+        self.cache.max_size = 2500
+        for name in ['a', 'b']:
+            self.cache.put(self.create_blob(f'{name}.blob'), name)
+            time.sleep(0.01)
+        self.cache.get('a')  # 'b' is now least recently used
+        self.cache.put(self.create_blob('c.blob'), 'c')
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertLessEqual(self.cache.size(), 2500)
+
+    def test_resolve_fetches_once(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return self.create_blob('zoo.blob')
+
+        a = self.cache.resolve(fetch, 'mobilenet-ssd', None, 6)
+        b = self.cache.resolve(fetch, 'mobilenet-ssd', None, 6)
+        self.assertEqual(a, b)
+        self.assertEqual(len(calls), 1)
+
+    def test_from_zoo_cached(self):
+        # Cached blob is returned without calling blobconverter (no network access)
+        path = self.cache.put(self.create_blob('zoo.blob'), 'face-detection-retail-0004', '2022.1', 6)
+        self.assertEqual(from_zoo('face-detection-retail-0004', shaves=6, cache=self.cache), path)
+        self.assertEqual(normalize_version(None), '2022.1')
+
+    def test_export_import(self):
+        self.cache.put(self.create_blob('a.blob'), 'a', '2021.4', 6)
+        self.cache.put(self.create_blob('b.blob'), 'b', '2022.1', 8)
+        archive = self.tmp / 'blobs.tar'
+        self.assertEqual(self.cache.export(archive), 2)
+
+        other = BlobCache(self.tmp / 'other')
+        self.assertEqual(other.import_(archive), 2)
+        self.assertIsNotNone(other.get('a', '2021.4', 6))
+        self.assertEqual(other.get('b', '2022.1', 8).read_bytes(), self.cache.get('b', '2022.1', 8).read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import multiprocessing
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packet_handlers import CallbackPacketHandler
+from depthai_sdk.classes.packets import FramePacket
+from depthai_sdk.oak_outputs.callback_executor import CallbackExecutor
+from depthai_sdk.oak_outputs.stats import PipelineStats
+
+
+def create_packet(name: str, seq: int) -> FramePacket:
+    frame = dai.ImgFrame()
+    frame.setSequenceNum(seq)
+    frame.setTimestamp(timedelta(seconds=seq / 30))
+    return FramePacket(name, frame)
+
+
+def frame_sum(results, frame: np.ndarray):
+    results.put(int(frame.sum()))
+
+
+class Recorder:
+    """
+    Callback that records the packets and the number of callbacks running at once.
+    """
+
+    def __init__(self, duration: float = 0.0):
+        self.duration = duration
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, packet):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.duration)
+        with self.lock:
+            self.running -= 1
+            self.calls.append((packet.name, packet.get_sequence_num()))
+
+    def sequence(self, name: str):
+        return [seq for n, seq in self.calls if n == name]
+
+
+class TestCallbackExecutor(unittest.TestCase):
+
+    def test_ordered_streams(self):
+        recorder = Recorder(duration=0.005)
+        executor = CallbackExecutor(recorder, max_workers=4, max_pending=100)
+        for seq in range(20):
+            executor.submit(create_packet('color', seq))
+            executor.submit(create_packet('depth', seq))
+        self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+
+        # Both streams in parallel, but each stream in order
+        self.assertEqual(recorder.sequence('color'), list(range(20)))
+        self.assertEqual(recorder.sequence('depth'), list(range(20)))
+        self.assertEqual(recorder.max_running, 2)
+        self.assertEqual(executor.drops, 0)
+
+    def test_max_in_flight(self):
+        recorder = Recorder(duration=0.005)
+        executor = CallbackExecutor(recorder, max_workers=4, max_in_flight=3, max_pending=100, ordered=False)
+        for seq in range(30):
+            executor.submit(create_packet('color', seq))
+        self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+
+        self.assertEqual(len(recorder.calls), 30)
+        self.assertEqual(recorder.max_running, 3)
+
+    def test_latest_only(self):
+        recorder = Recorder(duration=0.05)
+        executor = CallbackExecutor(recorder)  # 1 pending packet, drop oldest
+        for seq in range(10):
+            executor.submit(create_packet('color', seq))
+        self.assertEqual(executor.in_flight, 1)
+        self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+
+        self.assertEqual(recorder.sequence('color'), [0, 9])
+        self.assertEqual(executor.drops, 8)
+
+    def test_drop_newest(self):
+        recorder = Recorder(duration=0.05)
+        executor = CallbackExecutor(recorder, max_pending=2, policy='drop_newest')
+        for seq in range(10):
+            executor.submit(create_packet('color', seq))
+        self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+
+        self.assertEqual(recorder.sequence('color'), [0, 1, 2])
+        self.assertEqual(executor.drops, 7)
+
+    def test_block(self):
+        recorder = Recorder(duration=0.002)
+        executor = CallbackExecutor(recorder, max_pending=2, policy='block')
+        for seq in range(20):
+            executor.submit(create_packet('color', seq))
+        self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+
+        self.assertEqual(recorder.sequence('color'), list(range(20)))
+        self.assertEqual(executor.drops, 0)
+
+    def test_failing_callback(self):
+        def callback(packet):
+            if packet.get_sequence_num() == 0:
+                raise RuntimeError('Callback failed')
+            recorder(packet)
+
+        recorder = Recorder()
+        executor = CallbackExecutor(callback, max_pending=10)
+        with self.assertLogs('depthai_sdk', level='ERROR'):
+            for seq in range(3):
+                executor.submit(create_packet('color', seq))
+            self.assertTrue(executor.wait_idle(timeout=5))
+        executor.close()
+        self.assertEqual(recorder.sequence('color'), [1, 2])
+
+    def test_process_pool(self):
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager, ProcessPoolExecutor(2, mp_context=context) as pool:
+            results = manager.Queue()
+            executor = CallbackExecutor(partial(frame_sum, results), max_pending=10, executor=pool,
+                                        prepare=lambda packet: np.full((4, 4), packet.get_sequence_num()))
+            for seq in range(5):
+                executor.submit(create_packet('color', seq))
+            self.assertTrue(executor.wait_idle(timeout=30))
+            executor.close()
+            self.assertEqual([results.get(timeout=10) for _ in range(5)], [seq * 16 for seq in range(5)])
+
+
+class TestHandlerExecutor(unittest.TestCase):
+
+    def test_handler(self):
+        recorder = Recorder(duration=0.02)
+        handler = CallbackPacketHandler([], callback=recorder).configure_executor(max_pending=2)
+        handler._packet_names = {'color': True}
+        handler.stats = PipelineStats()
+
+        start = time.perf_counter()
+        for seq in range(5):
+            handler._new_packet_callback(create_packet('color', seq))
+        self.assertLess(time.perf_counter() - start, 0.02)  # Callback thread doesn't wait for the callback
+        self.assertTrue(handler.executor.wait_idle(timeout=5))
+        handler.executor.close()
+
+        self.assertEqual(recorder.sequence('color'), [0, 3, 4])
+        self.assertEqual(handler.stats.stage('color', 'handoff').drops, 2)
+        self.assertEqual(handler.stats.stage('color', 'handler').processing.count, 3)
+
+    def test_main_thread(self):
+        with self.assertRaises(ValueError):
+            CallbackPacketHandler([], callback=print, main_thread=True).configure_executor()
+
+
+if __name__ == '__main__':
+    unittest.main()
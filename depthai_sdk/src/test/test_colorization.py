@@ -0,0 +1,135 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import cv2
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packets import DisparityDepthPacket, DisparityPacket
+from depthai_sdk.visualize.colorization import DisparityColorizer
+from depthai_sdk.visualize.configs import StereoColor, VisConfig
+from depthai_sdk.visualize.visualizers.opencv_visualizer import OpenCvVisualizer
+
+VISUALIZER = SimpleNamespace(config=VisConfig())
+
+
+def depth_frame(depth: np.ndarray) -> dai.ImgFrame:
+    frame = dai.ImgFrame()
+    frame.setType(dai.ImgFrame.Type.RAW16)
+    frame.setWidth(depth.shape[1])
+    frame.setHeight(depth.shape[0])
+    frame.setData(depth.view(np.uint8).ravel())
+    return frame
+
+
+class TestDisparityColorizer(unittest.TestCase):
+
+    def setUp(self):
+        self.colorizer = DisparityColorizer()
+        self.rnd = np.random.default_rng(0)
+
+    def test_disparity(self):
+        disparity = self.rnd.integers(0, 96, (40, 64)).astype(np.uint8)
+        colorized = self.colorizer.colorize(disparity, 255 / 95, cv2.COLORMAP_JET)
+        expected = cv2.applyColorMap((disparity * (255 / 95)).astype(np.uint8), cv2.COLORMAP_JET)
+        np.testing.assert_array_equal(colorized, expected)
+
+    def test_subpixel_disparity(self):
+        disparity = self.rnd.integers(0, 95 * 8 + 1, (40, 64)).astype(np.uint16)
+        normalized = self.colorizer.normalize(disparity, 255 / 95 / 8)
+        # Rounded instead of truncated
+        np.testing.assert_array_equal(normalized, np.round(disparity * (255 / 95 / 8)).astype(np.uint8))
+
+    def test_depth(self):
+        depth = self.rnd.integers(0, 10000, (40, 64)).astype(np.uint16)
+        depth_factor = 880 * 7.5 * 10
+        with np.errstate(divide='ignore'):
+            disparity = np.where(depth == 0, 0, depth_factor / depth)
+        expected = np.clip(disparity * 255 / 95, 0, 255).astype(np.uint8)
+        np.testing.assert_array_equal(self.colorizer.normalize(depth, 255 / 95, depth_factor), expected)
+
+    def test_tables_cached(self):
+        first = self.colorizer.scale_table(65536, 1.5)
+        self.assertIs(self.colorizer.scale_table(65536, 1.5), first)
+        self.assertFalse(first.flags.writeable)
+
+        colorizer = DisparityColorizer(max_tables=2)
+        for multiplier in [1, 2, 3]:
+            colorizer.scale_table(256, multiplier)
+        self.assertEqual(len(colorizer._tables), 2)
+
+    def test_out_buffer(self):
+        disparity = self.rnd.integers(0, 96, (40, 64)).astype(np.uint8)
+        out = np.empty((40, 64, 3), dtype=np.uint8)
+        self.assertIs(self.colorizer.colorize(disparity, 1, cv2.COLORMAP_JET, out=out), out)
+        self.assertIsNot(self.colorizer.colorize(disparity, 1, cv2.COLORMAP_JET, out=out[:10]), out)
+
+
+class TestDisparityPacketColorization(unittest.TestCase):
+
+    def test_memoized(self):
+        disparity = np.random.default_rng(0).integers(0, 96, (40, 64)).astype(np.uint8)
+        packet = DisparityPacket('disparity', dai.ImgFrame(), 255 / 95, disparity_map=disparity,
+                                 colorize=StereoColor.RGB)
+
+        colorized = packet.get_colorized_frame(VISUALIZER)
+        self.assertIs(packet.get_colorized_frame(VISUALIZER), colorized)
+        colormap = VISUALIZER.config.stereo.colormap
+        np.testing.assert_array_equal(colorized, cv2.applyColorMap((disparity * (255 / 95)).astype(np.uint8),
+                                                                  colormap))
+
+        out = np.zeros_like(colorized)
+        self.assertIs(packet.get_colorized_frame(VISUALIZER, out=out), out)
+        np.testing.assert_array_equal(out, colorized)
+        self.assertIs(packet.get_colorized_frame(VISUALIZER), colorized)  # Still memoized, `out` is a copy
+        self.assertIsNot(packet.get_colorized_frame(VISUALIZER, out=out[:10]), colorized)
+
+        packet.colorize = StereoColor.GRAY  # Different settings aren't served from the memo
+        self.assertEqual(packet.get_colorized_frame(VISUALIZER).shape, disparity.shape)
+
+    def test_depth_packet(self):
+        depth = np.random.default_rng(0).integers(0, 10000, (40, 64)).astype(np.uint16)
+        packet = DisparityDepthPacket('depth', depth_frame(depth), colorize=StereoColor.RGB,
+                                      colormap=cv2.COLORMAP_JET, disp_scale_factor=880 * 7.5 * 10)
+
+        with np.errstate(divide='ignore'):
+            disparity = packet.disp_scale_factor / depth
+        disparity[disparity == np.inf] = 0
+        expected = cv2.applyColorMap(np.clip(disparity * 255 / 95, 0, 255).astype(np.uint8), cv2.COLORMAP_JET)
+        np.testing.assert_array_equal(packet.get_colorized_frame(VISUALIZER), expected)
+        self.assertIs(packet.get_disparity(), packet.get_disparity())
+
+    def test_out_not_memoized(self):
+        disparity = np.random.default_rng(0).integers(0, 96, (40, 64)).astype(np.uint8)
+        packet = DisparityPacket('disparity', dai.ImgFrame(), 255 / 95, disparity_map=disparity,
+                                 colorize=StereoColor.RGB)
+        out = np.zeros((40, 64, 3), dtype=np.uint8)
+        self.assertIs(packet.get_colorized_frame(VISUALIZER, out=out), out)  # Colorized straight into `out`
+        expected = out.copy()
+        out[:] = 255  # Caller draws on its buffer
+        np.testing.assert_array_equal(packet.get_colorized_frame(VISUALIZER), expected)
+
+    def test_visualizer_buffer(self):
+        rnd = np.random.default_rng(0)
+        packets = [DisparityPacket('disparity', dai.ImgFrame(), 255 / 95, colorize=StereoColor.RGB,
+                                   disparity_map=rnd.integers(0, 96, (40, 64)).astype(np.uint8))
+                   for _ in range(2)]
+        visualizer = OpenCvVisualizer()
+
+        with patch('cv2.imshow'):
+            visualizer.add_circle((20, 20), 10, color=(255, 255, 255), thickness=-1)
+            visualizer.show(packets[0])
+            first = packets[0].get_colorized_frame(visualizer).copy()
+
+            visualizer.add_circle((20, 20), 10, color=(255, 255, 255), thickness=-1)
+            visualizer.show(packets[1])  # Reuses the buffer of the stream
+
+        # Colorized frame of the first packet doesn't get colors or overlays of the second one
+        np.testing.assert_array_equal(packets[0].get_colorized_frame(visualizer), first)
+        self.assertFalse((first[20, 20] == 255).all())
+        self.assertIsNot(visualizer._stereo_buffers['disparity'], packets[1].get_colorized_frame(visualizer))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+from datetime import timedelta
+
+import av
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.oak_outputs.frame_decoder import FrameDecoder
+from depthai_sdk.oak_outputs.stats import PipelineStats
+from depthai_sdk.oak_outputs.xout.xout_base import ReplayStream
+from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
+from video_helper import encode_video
+
+
+def encode(count: int, codec: str = 'h264'):
+    """
+    Returns encoded frames (ImgFrames) of a moving gradient, and the frames before encoding.
+    """
+    packets, images = encode_video(count, codec, {'g': '10', 'bf': '0'} if codec == 'h264' else None)
+    img_frames = []
+    for i, data in enumerate(packets):
+        frame = dai.ImgFrame()
+        frame.setData(np.frombuffer(data, dtype=np.uint8))
+        frame.setSequenceNum(i)
+        frame.setTimestamp(dai.Clock.now())
+        frame.setTimestampDevice(timedelta(seconds=i / 30))
+        img_frames.append(frame)
+    return img_frames, images
+
+
+def wait_for(condition, timeout: float = 5):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+
+
+class TestFrameDecoder(unittest.TestCase):
+
+    def test_decoded_in_order(self):
+        img_frames, images = encode(30)
+        stats = PipelineStats()
+        decoder = FrameDecoder(max_workers=2, thread_type='slice', stats=stats)
+
+        xout = XoutFrames(ReplayStream('color'), fourcc='h264')
+        xout.decoder = decoder
+        packets = []
+        xout.new_packet_callback = packets.append
+        for frame in img_frames:
+            xout.device_msg_callback('color', frame)
+        wait_for(lambda: len(packets) == len(img_frames))
+        decoder.close()
+
+        self.assertEqual([p.get_sequence_num() for p in packets], list(range(len(img_frames))))
+        self.assertEqual(xout.get_codec().thread_type, av.codec.context.ThreadType.SLICE)
+        # H.264 parser outputs an access unit once the next one starts, so frames are one packet late
+        self.assertIsNone(packets[0].frame)
+        for packet, image in zip(packets[1:], images):
+            # Frame is ready, accessing it doesn't decode it again
+            packet._get_codec = None
+            self.assertEqual(packet.frame.shape, image.shape)
+            self.assertLess(np.abs(packet.frame.astype(int) - image).mean(), 8)
+
+        decode_stats = stats.get_stats()['color']['decode']
+        self.assertEqual(decode_stats['count'], len(img_frames))
+        self.assertGreater(decode_stats['processing']['mean'], 0)
+
+    def test_streams_decoded_in_parallel(self):
+        decoder = FrameDecoder(max_workers=2, max_pending=2)
+        xouts, received = [], {}
+        for name in ['color', 'left']:
+            xout = XoutFrames(ReplayStream(name), fourcc='mjpeg')
+            xout.decoder = decoder
+            xout.new_packet_callback = lambda p, name=name: received.setdefault(name, []).append(threading.get_ident())
+            xouts.append(xout)
+
+        img_frames, _ = encode(10, codec='mjpeg')
+        for frame in img_frames:
+            for xout in xouts:
+                xout.device_msg_callback(xout.name, frame)
+        wait_for(lambda: sum(len(v) for v in received.values()) == 2 * len(img_frames))
+        decoder.close()
+
+        self.assertEqual(len(received['color']), len(img_frames))
+        self.assertEqual(len(received['left']), len(img_frames))
+        self.assertNotIn(threading.get_ident(), received['color'] + received['left'])
+
+    def test_unencoded_not_submitted(self):
+        decoder = FrameDecoder(max_workers=1)
+        xout = XoutFrames(ReplayStream('color'))
+        xout.decoder = decoder
+        packets = []
+        xout.new_packet_callback = packets.append
+        xout.device_msg_callback('color', dai.ImgFrame())
+        self.assertEqual(len(packets), 1)  # Delivered directly, on the calling thread
+        decoder.close()
+
+    def test_close_discards_pending(self):
+        img_frames, _ = encode(10, codec='mjpeg')
+        decoder = FrameDecoder(max_workers=1, max_pending=1)
+        xout = XoutFrames(ReplayStream('color'), fourcc='mjpeg')
+        xout.decoder = decoder
+        started, release = threading.Event(), threading.Event()
+
+        def callback(packet):
+            started.set()
+            release.wait()
+
+        xout.new_packet_callback = callback
+        xout.device_msg_callback('color', img_frames[0])
+        started.wait(5)
+        xout.device_msg_callback('color', img_frames[1])  # Pending
+
+        blocked = threading.Thread(target=xout.device_msg_callback, args=('color', img_frames[2]))
+        blocked.start()  # Waits, max_pending reached
+        time.sleep(0.05)
+        self.assertTrue(blocked.is_alive())
+
+        closing = threading.Thread(target=decoder.close)
+        closing.start()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        release.set()
+        closing.join(5)
+        self.assertFalse(closing.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
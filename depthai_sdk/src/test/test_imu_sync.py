@@ -0,0 +1,145 @@
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes import IMUPacket
+from depthai_sdk.classes.imu_sync import ImuBuffer, ImuSeries, slerp
+from depthai_sdk.integrations.ros.imu_interpolation import ImuInterpolation, ImuSyncMethod
+
+
+def set_timestamp(report, seconds: float):
+    report.tsDevice.sec = int(seconds)
+    report.tsDevice.nsec = int(round((seconds - int(seconds)) * 1e9))
+
+
+def imu_packet(accel_t: float, accel, gyro_t: float, gyro) -> dai.IMUPacket:
+    packet = dai.IMUPacket()
+    a, g = packet.acceleroMeter, packet.gyroscope
+    set_timestamp(a, accel_t)
+    a.x, a.y, a.z = accel
+    set_timestamp(g, gyro_t)
+    g.x, g.y, g.z = gyro
+    packet.acceleroMeter, packet.gyroscope = a, g
+    return packet
+
+
+def axis_angle(axis, angle: float) -> np.ndarray:
+    axis = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    return np.array([np.cos(angle / 2), *(np.sin(angle / 2) * axis)])
+
+
+class TestImuSeries(unittest.TestCase):
+
+    def test_linear(self):
+        series = ImuSeries(8, 3)
+        t = np.arange(5) * 0.01 + 1
+        series.extend(t, np.column_stack([t, 2 * t, -t]))
+        values, valid = series.interpolate([1.005, 1.0325, 0.5, 2.0])
+        np.testing.assert_allclose(values[:2], [[1.005, 2.01, -1.005], [1.0325, 2.065, -1.0325]])
+        np.testing.assert_allclose(values[2:], [[1, 2, -1], [1.04, 2.08, -1.04]])  # Nearest sample
+        np.testing.assert_array_equal(valid, [True, True, False, False])
+
+    def test_ring_buffer(self):
+        series = ImuSeries(8, 1)
+        for start in range(0, 30, 3):
+            t = np.arange(start, start + 3, dtype=np.float64)
+            self.assertEqual(series.extend(t, t), 3)
+        np.testing.assert_array_equal(series.timestamps, np.arange(22, 30))
+        np.testing.assert_array_equal(series.values[:, 0], np.arange(22, 30))
+
+        # Old and repeated samples are skipped
+        self.assertEqual(series.extend([29, 28, 30, 30, 31], [0, 0, 30, 0, 31]), 2)
+        np.testing.assert_array_equal(series.timestamps, np.arange(24, 32))
+        np.testing.assert_array_equal(series.values[:, 0], np.arange(24, 32))
+
+        t, values = series.between(25, 28)
+        np.testing.assert_array_equal(t, [26, 27, 28])
+        self.assertEqual(len(series.between(40, 50)[0]), 0)
+
+        self.assertEqual(series.extend(np.arange(100, 120), np.arange(100, 120)), 8)
+        np.testing.assert_array_equal(series.timestamps, np.arange(112, 120))
+
+    def test_slerp(self):
+        q0 = axis_angle([0, 0, 1], 0.2)
+        q1 = axis_angle([0, 0, 1], 1.4)
+        q = slerp(np.tile(q0, (3, 1)), np.tile(q1, (3, 1)), [0, 0.25, 1])
+        np.testing.assert_allclose(q, [q0, axis_angle([0, 0, 1], 0.5), q1], atol=1e-12)
+
+        # Shorter arc, -q1 is the same rotation
+        q = slerp(q0[None], -q1[None], [0.25])
+        np.testing.assert_allclose(q[0], axis_angle([0, 0, 1], 0.5), atol=1e-12)
+
+        # Identical rotations
+        np.testing.assert_allclose(slerp(q0[None], q0[None], [0.5])[0], q0)
+
+
+class TestImuBuffer(unittest.TestCase):
+
+    def test_packets(self):
+        imu_buffer = ImuBuffer()
+        # Gyroscope at 400 Hz, accelerometer at 200 Hz (repeated in two packets)
+        packets = [imu_packet(0.005 * (i // 2) + 1, [i // 2, 0, 9.81], 0.0025 * i + 1, [0, 0, i]) for i in range(10)]
+        imu_buffer.add(packets)
+        self.assertEqual(len(imu_buffer.gyroscope), 10)
+        self.assertEqual(len(imu_buffer.accelerometer), 5)
+        self.assertEqual(len(imu_buffer.rotation), 0)
+        self.assertAlmostEqual(imu_buffer.latest_timestamp(), 1.02)
+
+        samples = imu_buffer.at(timedelta(seconds=1.0075))
+        np.testing.assert_allclose(samples.accelerometer, [[1.5, 0, 9.81]])
+        np.testing.assert_allclose(samples.gyroscope, [[0, 0, 3]])
+        self.assertTrue(np.isnan(samples.rotation).all())
+        self.assertTrue(samples.valid[0])
+        self.assertFalse(imu_buffer.at(1.021).valid[0])
+
+    def test_rotation(self):
+        imu_buffer = ImuBuffer()
+        for i, angle in enumerate([0.0, 0.4, 0.8]):
+            packet = dai.IMUPacket()
+            rotation = packet.rotationVector
+            set_timestamp(rotation, 1 + i * 0.01)
+            rotation.real, rotation.i, rotation.j, rotation.k = axis_angle([1, 0, 0], angle)
+            packet.rotationVector = rotation
+            imu_buffer.add(packet)
+
+        samples = imu_buffer.interpolate([1.005, 1.0175])
+        np.testing.assert_allclose(samples.rotation, [axis_angle([1, 0, 0], 0.2), axis_angle([1, 0, 0], 0.7)],
+                                   atol=1e-12)
+
+    def test_sdk_packet(self):
+        # Rotation computed on the host (XoutIMU) has no timestamp of its own
+        rotation = dai.IMUReportRotationVectorWAcc()
+        rotation.real, rotation.i, rotation.j, rotation.k = axis_angle([0, 1, 0], 0.3)
+        packet = IMUPacket('imu', imu_packet(2.0, [0, 0, 9.81], 2.0, [0, 0.1, 0]), rotation=rotation)
+        imu_buffer = ImuBuffer()
+        imu_buffer.add(packet)
+        np.testing.assert_allclose(imu_buffer.at(2.0).rotation[0], axis_angle([0, 1, 0], 0.3))
+
+
+class TestImuInterpolation(unittest.TestCase):
+
+    def ros_msg(self):
+        vector = lambda: SimpleNamespace(x=0.0, y=0.0, z=0.0)
+        return SimpleNamespace(linear_acceleration=vector(), angular_velocity=vector(),
+                               orientation=SimpleNamespace(x=0.0, y=0.0, z=0.0, w=1.0))
+
+    def test_interpolate_accel(self):
+        interpolation = ImuInterpolation()
+        msg = self.ros_msg()
+        interpolation.Imu(msg, imu_packet(1.0, [0, 0, 9.0], 1.0, [0, 0, 0]))
+        interpolation.Imu(msg, imu_packet(1.01, [1.0, 0, 10.0], 1.0025, [0, 0, 1]))
+        self.assertAlmostEqual(msg.linear_acceleration.x, 0.25)
+        self.assertAlmostEqual(msg.linear_acceleration.z, 9.25)
+        self.assertEqual(msg.angular_velocity.z, 1)
+        self.assertEqual(msg.orientation_covariance[0], -1)
+
+        msg = self.ros_msg()
+        interpolation.Imu(msg, imu_packet(1.01, [1.0, 0, 10.0], 1.0025, [0, 0, 1]), ImuSyncMethod.COPY)
+        self.assertEqual(msg.linear_acceleration.x, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from depthai_sdk.classes.openpose import OpenPoseDecoder
+
+POSE_PAIRS = [[1, 2], [1, 5], [2, 3], [3, 4], [5, 6], [6, 7], [1, 8], [8, 9], [9, 10], [1, 11], [11, 12], [12, 13],
+              [1, 0], [0, 14], [14, 16], [0, 15], [15, 17], [2, 17], [5, 16]]
+MAP_IDX = [[31, 32], [39, 40], [33, 34], [35, 36], [41, 42], [43, 44], [19, 20], [21, 22], [23, 24], [25, 26],
+           [27, 28], [29, 30], [47, 48], [49, 50], [53, 54], [51, 52], [55, 56], [37, 38], [45, 46]]
+INPUT_SIZE = (456, 256)
+SKELETON = np.array([[0, 0], [0, 0.15], [-0.12, 0.15], [-0.18, 0.33], [-0.2, 0.5], [0.12, 0.15], [0.18, 0.33],
+                     [0.2, 0.5], [-0.08, 0.5], [-0.09, 0.72], [-0.1, 0.95], [0.08, 0.5], [0.09, 0.72], [0.1, 0.95],
+                     [-0.06, -0.05], [0.06, -0.05], [-0.11, -0.02], [0.11, -0.02]])
+
+
+def create_outputs(noses, size=24):
+    """
+    Returns NN outputs (1 x 57 x 32 x 57) of people standing next to each other, and their keypoints in input pixels.
+    """
+    outputs = np.zeros((1, 57, 32, 57), dtype=np.float32)
+    ys, xs = np.mgrid[:32, :57]
+    people = []
+    for nose in noses:
+        keypoints = np.array(nose) + SKELETON * size
+        people.append((keypoints + 0.5) * 8 - 0.5)
+        for part, (x, y) in enumerate(keypoints):
+            outputs[0, part] = np.maximum(outputs[0, part], np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / 1.28))
+        for (a, b), (ch_x, ch_y) in zip(POSE_PAIRS, MAP_IDX):
+            d = keypoints[b] - keypoints[a]
+            length = np.linalg.norm(d)
+            rx, ry = xs - keypoints[a][0], ys - keypoints[a][1]
+            along = (rx * d[0] + ry * d[1]) / length
+            on_limb = (-0.5 <= along) & (along <= length + 0.5) & (np.abs(rx * d[1] - ry * d[0]) / length <= 1)
+            outputs[0, ch_x][on_limb] = d[0] / length
+            outputs[0, ch_y][on_limb] = d[1] / length
+    return outputs, people
+
+
+class TestOpenPoseDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = OpenPoseDecoder(POSE_PAIRS, MAP_IDX, INPUT_SIZE, threshold=0.3)
+
+    def test_people(self):
+        outputs, people = create_outputs([(8.3, 1.2), (22.6, 2), (37.1, 1.5), (50, 1)])
+        detected, personwise, keypoints = self.decoder.decode(outputs)
+
+        self.assertEqual([len(k) for k in detected], [4] * 18)
+        self.assertEqual(personwise.shape, (4, 19))
+        self.assertFalse((personwise[:, :18] == -1).any())
+        for person in personwise[np.argsort(keypoints[personwise[:, 1].astype(int), 0])]:
+            expected = people.pop(0)
+            np.testing.assert_array_less(np.abs(keypoints[person[:18].astype(int), :2] - expected), 8)
+
+        # Keypoint ids index keypoints
+        for part, part_keypoints in enumerate(detected):
+            for x, y, confidence, i in part_keypoints:
+                self.assertEqual((x, y, confidence), tuple(keypoints[i]))
+
+    def test_keypoint_location(self):
+        outputs, _ = create_outputs([(20.3, 2.4)])
+        keypoints, parts = self.decoder.get_keypoints(outputs)
+        np.testing.assert_array_equal(parts, np.arange(18))
+
+        # Same location as in the heatmap resized to the input and smoothed
+        heatmap = cv2.GaussianBlur(cv2.resize(outputs[0, 3], INPUT_SIZE), (3, 3), 0, 0)
+        y, x = np.unravel_index(heatmap.argmax(), heatmap.shape)
+        self.assertEqual(tuple(keypoints[3, :2]), (x, y))
+
+    def test_empty(self):
+        detected, personwise, keypoints = self.decoder.decode(np.zeros((1, 57, 32, 57), dtype=np.float32))
+        self.assertEqual(detected, [[]] * 18)
+        self.assertEqual(personwise.shape, (0, 19))
+        self.assertEqual(keypoints.shape, (0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
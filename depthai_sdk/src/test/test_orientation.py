@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+from ahrs.filters import Madgwick, Mahony
+
+from depthai_sdk.classes.orientation import OrientationFilter
+
+
+def imu_samples(n: int = 300):
+    rnd = np.random.default_rng(0)
+    gyro = rnd.normal(0, 0.5, (n, 3))
+    accel = np.array([0, 0, 9.81]) + rnd.normal(0, 0.5, (n, 3))
+    gyro[10] = 0  # Not rotating
+    accel[20] = 0  # No accelerometer data
+    return gyro, accel
+
+
+def ahrs_orientations(ahrs, gyro, accel):
+    q = np.array([1, 0, 0, 0], dtype=np.float64)
+    out = []
+    for g, a in zip(gyro, accel):
+        q = ahrs.updateIMU(q, g, a)
+        out.append(q.copy())  # updateIMU updates q in place
+    return np.array(out)
+
+
+class TestOrientationFilter(unittest.TestCase):
+
+    def test_mahony(self):
+        gyro, accel = imu_samples()
+        expected = ahrs_orientations(Mahony(frequency=400), gyro, accel)
+        result = OrientationFilter('mahony', frequency=400).update(gyro, accel)
+        np.testing.assert_allclose(result, expected, atol=1e-9)
+
+    def test_madgwick(self):
+        gyro, accel = imu_samples()
+        expected = ahrs_orientations(Madgwick(frequency=100), gyro, accel)
+        result = OrientationFilter('madgwick', frequency=100).update(gyro, accel)
+        np.testing.assert_allclose(result, expected, atol=1e-9)
+
+    def test_state_between_batches(self):
+        gyro, accel = imu_samples()
+        whole = OrientationFilter('madgwick').update(gyro, accel)
+        fusion = OrientationFilter('madgwick')
+        batches = np.concatenate([fusion.update(gyro[i:i + 7], accel[i:i + 7]) for i in range(0, len(gyro), 7)])
+        np.testing.assert_array_equal(batches, whole)
+        np.testing.assert_array_equal(fusion.q, whole[-1])
+
+        fusion.reset()
+        np.testing.assert_array_equal(fusion.q, [1, 0, 0, 0])
+        self.assertEqual(fusion.update(np.empty((0, 3)), np.empty((0, 3))).shape, (0, 4))
+
+    def test_not_rotating(self):
+        q0 = np.array([0, 1, 0, 0])
+        result = OrientationFilter('mahony', q0=q0).update(np.zeros((3, 3)), [[0, 0, 9.81]] * 3)
+        np.testing.assert_array_equal(result, [q0] * 3)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            OrientationFilter('kalman')
+
+
+if __name__ == '__main__':
+    unittest.main()
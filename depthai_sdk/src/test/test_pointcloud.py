@@ -0,0 +1,198 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packets import PointcloudPacket
+from depthai_sdk.classes.enum import PointcloudEncoding
+from depthai_sdk.components.pointcloud_helper import PointcloudEncoder, PointcloudEngine, decode_pointcloud, \
+    voxel_downsample
+from depthai_sdk.visualize.bbox import BoundingBox
+
+CAMERA_MATRIX = np.array([[400.0, 0, 32], [0, 400.0, 24], [0, 0, 1]])
+
+
+def create_depth(seed: int = 0) -> np.ndarray:
+    rnd = np.random.default_rng(seed)
+    depth = rnd.integers(200, 5000, (48, 64)).astype(np.uint16)
+    depth[rnd.random((48, 64)) < 0.2] = 0
+    return depth
+
+
+def reference_points(depth: np.ndarray) -> np.ndarray:
+    h, w = depth.shape
+    u, v = np.meshgrid(np.arange(w), np.arange(h))
+    x = (u - CAMERA_MATRIX[0, 2]) / CAMERA_MATRIX[0, 0]
+    y = (v - CAMERA_MATRIX[1, 2]) / CAMERA_MATRIX[1, 1]
+    return np.stack([x, y, np.ones_like(x)], axis=-1) * depth[..., np.newaxis]
+
+
+class TestPointcloudEngine(unittest.TestCase):
+
+    def test_organized(self):
+        depth = create_depth()
+        points, indices = PointcloudEngine(CAMERA_MATRIX).process(depth)
+        self.assertIsNone(indices)
+        self.assertEqual(points.shape, (48, 64, 3))
+        self.assertEqual(points.dtype, np.float32)
+        np.testing.assert_allclose(points, reference_points(depth), rtol=1e-5)
+
+    def test_range(self):
+        depth = create_depth()
+        points, _ = PointcloudEngine(CAMERA_MATRIX, min_range=400, max_range=4000).process(depth)
+        expected = reference_points(depth)
+        expected[(depth < 400) | (4000 < depth)] = 0
+        np.testing.assert_allclose(points, expected, rtol=1e-5)
+
+    def test_sparse(self):
+        depth = create_depth()
+        points, indices = PointcloudEngine(CAMERA_MATRIX, sparse=True, max_range=3000).process(depth)
+        valid = (depth > 0) & (depth <= 3000)
+        np.testing.assert_array_equal(indices, np.flatnonzero(valid))
+        np.testing.assert_allclose(points, reference_points(depth)[valid], rtol=1e-5)
+
+    def test_reuse_buffers(self):
+        engine = PointcloudEngine(CAMERA_MATRIX, reuse_buffers=2)
+        a, _ = engine.process(create_depth(0))
+        b, _ = engine.process(create_depth(1))
+        c, _ = engine.process(create_depth(2))
+        self.assertIsNot(a, b)
+        self.assertIs(a, c)
+
+    def test_resolution_change(self):
+        engine = PointcloudEngine(CAMERA_MATRIX)
+        engine.process(create_depth())
+        points, _ = engine.process(np.ones((24, 32), dtype=np.uint16))
+        self.assertEqual(points.shape, (24, 32, 3))
+
+
+class TestVoxelDownsample(unittest.TestCase):
+
+    def test_centroids(self):
+        points = np.array([[1, 1, 1], [3, 3, 3], [11, 1, 1], [-1, -1, -1]], dtype=np.float32)
+        centroids, kept = voxel_downsample(points, 10, np.array([0, 1, 2, 3]))
+        order = np.argsort(centroids[:, 0])
+        np.testing.assert_allclose(centroids[order], [[-1, -1, -1], [2, 2, 2], [11, 1, 1]])
+        self.assertEqual(sorted(kept[order][[0, 2]]), [2, 3])
+        self.assertIn(kept[order][1], [0, 1])
+
+    def test_matches_unique(self):
+        depth = create_depth()
+        points, indices = PointcloudEngine(CAMERA_MATRIX, voxel_size=100).process(depth)
+
+        sparse, _ = PointcloudEngine(CAMERA_MATRIX, sparse=True).process(depth)
+        _, inverse = np.unique(np.floor(sparse / 100).astype(np.int64), axis=0, return_inverse=True)
+        self.assertEqual(len(points), inverse.max() + 1)
+        self.assertEqual(len(indices), len(points))
+
+    def test_sorted_matches_dense(self):
+        points, _ = PointcloudEngine(CAMERA_MATRIX, sparse=True).process(create_depth())
+        indices = np.arange(len(points))
+        dense, dense_kept = voxel_downsample(points, 50, indices)
+        with patch('depthai_sdk.components.pointcloud_helper._DENSE_VOXEL_LIMIT', 0):  # Large grids are sorted
+            sorted_, sorted_kept = voxel_downsample(points, 50, indices)
+
+        dense_order, sorted_order = np.lexsort(dense.T), np.lexsort(sorted_.T)
+        np.testing.assert_allclose(sorted_[sorted_order], dense[dense_order], rtol=1e-6)
+        # Kept pixels belong to the same voxels
+        cells = np.floor(points / 50)
+        np.testing.assert_array_equal(cells[sorted_kept[sorted_order]], cells[dense_kept[dense_order]])
+
+
+class TestPointcloudPacket(unittest.TestCase):
+
+    def test_sparse_crop_and_colors(self):
+        depth = create_depth()
+        frame = dai.ImgFrame()
+        frame.setWidth(64)
+        frame.setHeight(48)
+        organized, _ = PointcloudEngine(CAMERA_MATRIX).process(depth)
+        points, indices = PointcloudEngine(CAMERA_MATRIX, sparse=True).process(depth)
+        packet = PointcloudPacket('pcl', points, frame, None, indices=indices)
+
+        bb = BoundingBox((0.25, 0.25, 0.5, 0.75))
+        cropped = packet.crop_points(bb)
+        expected = organized[12:36, 16:32].reshape(-1, 3)
+        np.testing.assert_allclose(cropped, expected[expected[:, 2] > 0])
+
+        packet.colorize_frame = np.arange(48 * 64 * 3, dtype=np.uint8).reshape(48, 64, 3)
+        np.testing.assert_array_equal(packet.get_colors(), packet.colorize_frame.reshape(-1, 3)[indices])
+
+
+class TestPointcloudEncoder(unittest.TestCase):
+
+    def setUp(self):
+        self.points, _ = PointcloudEngine(CAMERA_MATRIX).process(create_depth())
+        self.colors = np.random.default_rng(1).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        self.valid = self.points[..., 2] > 0
+
+    def roundtrip(self, encoder: PointcloudEncoder, colors=None):
+        cloud = encoder.encode(self.points, colors)
+        self.assertEqual(len(cloud.data), cloud.point_step * cloud.width)
+        return decode_pointcloud(cloud.fields, cloud.point_step, cloud.data)
+
+    def test_float32(self):
+        points, colors = self.roundtrip(PointcloudEncoder(), self.colors)
+        np.testing.assert_allclose(points, self.points[self.valid], atol=1e-3)
+        np.testing.assert_array_equal(colors, self.colors[self.valid])
+
+    def test_int16(self):
+        encoder = PointcloudEncoder(PointcloudEncoding.INT16, colorize=False)
+        cloud = encoder.encode(self.points, self.colors)
+        self.assertEqual(cloud.point_step, 6)
+        points, colors = decode_pointcloud(cloud.fields, cloud.point_step, cloud.data)
+        self.assertIsNone(colors)
+        np.testing.assert_allclose(points, self.points[self.valid], atol=0.5 + 1e-3)
+
+    def test_decimation(self):
+        points, _ = self.roundtrip(PointcloudEncoder(decimation=2))
+        decimated = self.points[::2, ::2]
+        np.testing.assert_allclose(points, decimated[decimated[..., 2] > 0], atol=1e-3)
+
+
+class TestPointcloudRecording(unittest.TestCase):
+
+    def test_rosbag_replay(self):
+        from depthai_sdk.oak_outputs.xout.xout_base import ReplayStream
+        from depthai_sdk.oak_outputs.xout.xout_pointcloud import XoutPointcloud
+        from depthai_sdk.readers.rosbag_reader import RosbagReader
+        from depthai_sdk.recorders.rosbag_recorder import Rosbag1Recorder
+        from depthai_sdk.replay import Replay, ReplayStream as ReplayedStream
+
+        points, _ = PointcloudEngine(CAMERA_MATRIX, sparse=True).process(create_depth())
+        depth = dai.ImgFrame()
+        depth.setTimestampDevice(timedelta(seconds=1))
+        packet = PointcloudPacket('depth', points, depth, None)
+        packet.colorize_frame = np.random.default_rng(1).integers(0, 256, (len(points), 3), dtype=np.uint8)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            xout = XoutPointcloud(None, ReplayStream('depth'))
+            recorder = Rosbag1Recorder()
+            recorder.pointcloud_encoder = PointcloudEncoder(PointcloudEncoding.INT16)
+            recorder.update(Path(tmp), None, [xout])
+            recorder.write(xout.get_packet_name(), packet)
+            recorder.close()
+
+            reader = RosbagReader(Path(tmp))
+            self.assertEqual(reader.getStreams(), ['pointcloud'])
+            self.assertTrue(reader.is_pointcloud('pointcloud'))
+            frame = reader.read()['pointcloud']
+            reader.close()
+
+        # Replay packs the frame into an ImgFrame, XoutPointcloud unpacks it back into a PointcloudPacket
+        replay = Replay.__new__(Replay)
+        stream = ReplayedStream()
+        stream.is_pointcloud = True
+        img_frame = replay._prepareImgFrame(stream, frame)
+        replayed = XoutPointcloud(None, ReplayStream('pointcloud'), recorded=True).new_msg('pointcloud', img_frame)
+
+        np.testing.assert_allclose(replayed.points, points, atol=0.5 + 1e-3)
+        np.testing.assert_array_equal(replayed.get_colors(), packet.colorize_frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from depthai_sdk.classes.ransac import PlaneRansac
+
+
+def create_scene(seed: int = 0):
+    rnd = np.random.default_rng(seed)
+    plane = np.column_stack([rnd.uniform(-500, 500, (2000, 2)), np.full(2000, 800.0)])
+    clutter = rnd.uniform([-500, -500, 0], [500, 500, 700], (500, 3))
+    points = np.concatenate([plane, clutter])
+    points[:2000, 2] += rnd.normal(0, 1, 2000)
+    return points
+
+
+class TestPlaneRansac(unittest.TestCase):
+
+    def test_fixed_normal(self):
+        points = create_scene()
+        ransac = PlaneRansac(3, 300, normal=[0, 0, 2], seed=0)
+        eq, inliers = ransac.fit(points)
+        np.testing.assert_array_equal(eq[:3], [0, 0, 2])
+        self.assertAlmostEqual(-eq[3] / 2, 800, delta=3)
+        self.assertGreaterEqual(np.isin(np.arange(2000), inliers).mean(), 0.95)
+        self.assertLess(ransac.iterations, 300)  # Stopped early
+
+    def test_free_plane(self):
+        points = create_scene()
+        eq, inliers = PlaneRansac(3, 300, seed=0).fit(points)
+        np.testing.assert_allclose(np.abs(eq), [0, 0, 1, 800], atol=0.01, rtol=0.01)
+        self.assertGreaterEqual(len(inliers), 1900)
+
+    def test_deterministic(self):
+        points = create_scene()
+        a = PlaneRansac(3, 100, seed=42).fit(points)
+        b = PlaneRansac(3, 100, seed=42).fit(points)
+        np.testing.assert_array_equal(a[0], b[0])
+        np.testing.assert_array_equal(a[1], b[1])
+
+    def test_inliers_match_brute_force(self):
+        # Without early stopping, the best hypothesis has at least as many inliers as the best sampled point
+        points = create_scene()
+        ransac = PlaneRansac(3, 64, normal=[0, 0, 1], confidence=1, batch_size=16, seed=1)
+        eq, inliers = ransac.fit(points)
+        self.assertEqual(ransac.iterations, 64)
+
+        samples = np.random.default_rng(1)
+        best = 0
+        for _ in range(4):
+            z = points[samples.integers(0, len(points), 16), 2]
+            counts = (np.abs(points[:, 2][:, np.newaxis] - z) <= 3).sum(axis=0)
+            best = max(best, counts.max())
+        self.assertEqual(len(inliers), best)
+
+    def test_too_few_points(self):
+        eq, inliers = PlaneRansac(3).fit(np.zeros((2, 3)))
+        self.assertEqual(len(inliers), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from depthai_sdk.readers.abstract_reader import AbstractReader
+from depthai_sdk.readers.prefetcher import ReaderPrefetcher
+
+
+class CounterReader(AbstractReader):
+    """
+    Returns `count` frames for 'left' and 'right' streams, each frame filled with its index.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.i = 0
+
+    def read(self):
+        if self.count <= self.i:
+            return False
+        frames = {'left': np.full((2, 2), self.i), 'RIGHT': np.full((2, 2), self.i)}
+        self.i += 1
+        return frames
+
+    def getStreams(self):
+        return ['left', 'right']
+
+    def getShape(self, name: str):
+        return 2, 2
+
+    def get_message_size(self, name: str) -> int:
+        return 4
+
+    def close(self):
+        pass
+
+    def disableStream(self, name: str):
+        pass
+
+
+class TestReaderPrefetcher(unittest.TestCase):
+
+    def test_order_and_end(self):
+        prefetcher = ReaderPrefetcher(CounterReader(10), ['left', 'right'], lambda name, f: (name, int(f[0, 0])),
+                                      queue_size=2)
+        prefetcher.start()
+        for i in range(10):
+            frames = prefetcher.get()
+            self.assertEqual(frames['left'][1], ('left', i))
+            self.assertEqual(frames['right'][1], ('right', i))
+        self.assertIsNone(prefetcher.get())
+        prefetcher.stop()
+
+    def test_missing_stream(self):
+        prefetcher = ReaderPrefetcher(CounterReader(1), ['left', 'color'], lambda name, f: f)
+        prefetcher.start()
+        frames = prefetcher.get()
+        self.assertEqual(frames['color'], (None, None))
+        prefetcher.stop()
+
+    def test_stop_while_reading(self):
+        prefetcher = ReaderPrefetcher(CounterReader(1000), ['left', 'right'], lambda name, f: f, queue_size=1)
+        prefetcher.start()
+        prefetcher.get()
+        prefetcher.stop()
+        self.assertIsNone(prefetcher.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from pathlib import Path
+from typing import List
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.enum import BackpressurePolicy
+from depthai_sdk.classes.packets import FramePacket
+from depthai_sdk.record import Record, RecordType, StreamWriter
+from depthai_sdk.recorders.abstract_recorder import Recorder
+
+
+class SlowRecorder(Recorder):
+    def __init__(self, delay: float = 0.0, parallel_writes: bool = True):
+        self.delay = delay
+        self.parallel_writes = parallel_writes
+        self.written = {}
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def write(self, name: str, frame: dai.ImgFrame):
+        self.release.wait()
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.written.setdefault(name, []).append(frame.getSequenceNum())
+
+    def close(self):
+        self.closed = True
+
+    def update(self, path: Path, device: dai.Device, xouts: List['XoutFrames']):
+        pass
+
+
+def create_frame(seq: int) -> dai.ImgFrame:
+    frame = dai.ImgFrame()
+    frame.setSequenceNum(seq)
+    frame.setData(np.zeros(1000, dtype=np.uint8))
+    return frame
+
+
+class TestStreamWriter(unittest.TestCase):
+
+    def write_blocked(self, policy: BackpressurePolicy) -> StreamWriter:
+        recorder = SlowRecorder()
+        recorder.release.clear()  # Writer thread takes the first frame and waits
+        writer = StreamWriter('color', recorder, max_queue_size=3, backpressure=policy)
+        writer.put(create_frame(0))
+        time.sleep(0.05)
+        for seq in range(1, 11):
+            writer.put(create_frame(seq))
+        recorder.release.set()
+        writer.close()
+        self.recorder = recorder
+        return writer
+
+    def test_drop_oldest(self):
+        writer = self.write_blocked(BackpressurePolicy.DROP_OLDEST)
+        self.assertEqual(self.recorder.written['color'], [0, 8, 9, 10])
+        self.assertEqual(writer.dropped, 7)
+        self.assertEqual(writer.get_stats()['written'], 4)
+        self.assertGreater(writer.get_stats()['throughput_mbps'], 0)
+
+    def test_drop_newest(self):
+        writer = self.write_blocked(BackpressurePolicy.DROP_NEWEST)
+        self.assertEqual(self.recorder.written['color'], [0, 1, 2, 3])
+        self.assertEqual(writer.dropped, 7)
+
+    def test_block(self):
+        recorder = SlowRecorder(delay=0.002)
+        writer = StreamWriter('color', recorder, max_queue_size=2, backpressure=BackpressurePolicy.BLOCK)
+        for seq in range(20):
+            writer.put(create_frame(seq))
+        writer.close()
+        self.assertEqual(recorder.written['color'], list(range(20)))
+        self.assertEqual(writer.dropped, 0)
+        self.assertGreater(writer.blocked, 0)
+        self.assertLessEqual(writer.max_depth, 2)
+
+
+class TestRecord(unittest.TestCase):
+
+    def record(self, parallel_writes: bool) -> SlowRecorder:
+        record = Record(Path('.'), RecordType.VIDEO)
+        record.recorder = recorder = SlowRecorder(delay=0.005, parallel_writes=parallel_writes)
+        record._started = True
+        for seq in range(5):
+            record.write({name: FramePacket(name, create_frame(seq)) for name in ['color', 'left', 'right']})
+        record.close()
+        self.assertTrue(recorder.closed)
+        for name in ['color', 'left', 'right']:
+            self.assertEqual(recorder.written[name], list(range(5)))
+            self.assertEqual(record.get_stats()[name]['written'], 5)
+        self.assertIn('color: 5 frames written, 0 dropped', record.summary())
+        return recorder
+
+    def test_parallel_streams(self):
+        self.assertGreater(self.record(parallel_writes=True).max_active, 1)
+
+    def test_serialized_streams(self):
+        self.assertEqual(self.record(parallel_writes=False).max_active, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
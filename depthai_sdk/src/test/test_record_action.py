@@ -0,0 +1,117 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.oak_outputs.xout.xout_base import ReplayStream
+from depthai_sdk.oak_outputs.xout.xout_frames import XoutFrames
+from depthai_sdk.trigger_action.actions.record_action import PreTriggerBuffer, RecordAction
+
+IDR = b'\x00\x00\x00\x01\x65'  # H.264 IDR slice NAL unit
+NON_IDR = b'\x00\x00\x00\x01\x41'
+
+
+def create_frame(data: bytes, timestamp: float) -> dai.ImgFrame:
+    frame = dai.ImgFrame()
+    frame.setData(np.frombuffer(data, dtype=np.uint8))
+    frame.setTimestamp(timedelta(seconds=timestamp))
+    frame.setTimestampDevice(timedelta(seconds=timestamp))
+    return frame
+
+
+def h264_frames(count: int, gop: int = 10, fps: float = 30, size: int = 100, start: int = 0):
+    for i in range(start, start + count):
+        header = IDR if i % gop == 0 else NON_IDR
+        yield i, create_frame(header + bytes(size - len(header)), i / fps)
+
+
+class TestPreTriggerBuffer(unittest.TestCase):
+
+    def test_duration_aligned_to_keyframe(self):
+        buffer = PreTriggerBuffer(max_seconds=1, max_bytes=10 ** 6, fourcc='h264')
+        for _, frame in h264_frames(95):
+            buffer.add(frame)
+
+        frames = buffer.frames()
+        # Last frame is at 94/30 s, so the window starts at 64/30 s and the buffer at the keyframe before it
+        self.assertEqual(frames[0].getTimestamp(), timedelta(seconds=60 / 30))
+        self.assertEqual(len(frames), 35)
+        self.assertEqual(buffer.nbytes, 35 * 100)
+
+    def test_starts_at_keyframe(self):
+        buffer = PreTriggerBuffer(max_seconds=1, max_bytes=10 ** 6, fourcc='h264')
+        for _, frame in h264_frames(15, start=5):
+            buffer.add(frame)
+        self.assertEqual(len(buffer), 10)
+        self.assertEqual(bytes(buffer.frames()[0].getData()[:5]), IDR)
+
+    def test_memory_budget(self):
+        buffer = PreTriggerBuffer(max_seconds=10, max_bytes=2500, fourcc='h264')
+        for _, frame in h264_frames(95):
+            buffer.add(frame)
+
+        # Only whole GOPs (of 1000 bytes) are dropped
+        self.assertEqual(buffer.nbytes, 2500)
+        self.assertEqual(len(buffer), 25)
+        self.assertEqual(bytes(buffer.frames()[0].getData()[:5]), IDR)
+
+    def test_unencoded(self):
+        buffer = PreTriggerBuffer(max_seconds=0.5, max_bytes=10 ** 6)
+        for i in range(30):
+            buffer.add(create_frame(bytes(10), i / 30))
+        self.assertEqual(len(buffer), 16)
+
+
+class TestRecordAction(unittest.TestCase):
+
+    def test_record(self):
+        jpeg = cv2.imencode('.jpg', np.zeros((64, 96, 3), dtype=np.uint8))[1].tobytes()
+        finished = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            xout = XoutFrames(ReplayStream('color'), fourcc='mjpeg')
+            action = RecordAction(None, tmp, duration_before_trigger=1, duration_after_trigger=1,
+                                  on_finish_callback=finished.append)
+            action.setup(None, [xout])
+
+            start = dai.Clock.now().total_seconds()
+            for i in range(60):
+                if i == 45:
+                    action.activate()
+                frame = create_frame(jpeg, start - 1.5 + i / 30)
+                action.on_new_packets({'color': SimpleNamespace(msg=frame)})
+            self.assertEqual(len(action.buffers['color']), 31)
+            action.close()
+
+            self.assertEqual(len(finished), 1)
+            self.assertTrue(list(Path(finished[0]).glob('color.*')))
+
+    def test_overlapping_recordings(self):
+        jpeg = cv2.imencode('.jpg', np.zeros((64, 96, 3), dtype=np.uint8))[1].tobytes()
+        finished = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            xout = XoutFrames(ReplayStream('color'), fourcc='mjpeg')
+            action = RecordAction(None, tmp, duration_before_trigger=1, duration_after_trigger=1,
+                                  on_finish_callback=finished.append)
+            action.setup(None, [xout])
+
+            start = dai.Clock.now().total_seconds()
+            for i in range(60):
+                if i in (40, 41):  # Triggered twice within the same second
+                    action.activate()
+                action.on_new_packets({'color': SimpleNamespace(msg=create_frame(jpeg, start - 1.5 + i / 30))})
+            action.close()
+
+            self.assertEqual(len(set(finished)), 2)  # Each recording got its own folder
+            for folder in finished:
+                self.assertTrue(list(Path(folder).glob('color.*')))
+
+
+if __name__ == '__main__':
+    unittest.main()
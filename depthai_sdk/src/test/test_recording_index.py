@@ -0,0 +1,195 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.readers.recording_index import RecordingIndex, StreamIndex, index_path, recording_signature
+from depthai_sdk.readers.videocap_reader import VideoCapReader
+from depthai_sdk.recorders.video_writers.av_writer import is_keyframe
+from video_helper import encode_video
+
+try:
+    from mcap.mcap0.writer import Writer as McapWriter
+    from depthai_sdk.readers.mcap_reader import McapReader
+    from depthai_sdk.recorders.mcap_recorder import McapRecorder
+except ImportError:
+    McapReader = None
+
+# Keyframe every 10 frames, no B-frames
+X264_OPTIONS = {'bframes': '0', 'g': '10', 'sc_threshold': '0', 'tune': 'zerolatency'}
+X265_OPTIONS = {'x265-params': 'bframes=0:keyint=10:log-level=none'}
+
+
+def create_index() -> RecordingIndex:
+    # 'color' at 10 FPS (keyframe every 5 frames), 'left' at 20 FPS starting 50ms later
+    color = StreamIndex([i * 100_000_000 for i in range(20)], keyframes=[0, 5, 10, 15])
+    left = StreamIndex([50_000_000 + i * 50_000_000 for i in range(40)])
+    return RecordingIndex({'color': color, 'left': left})
+
+
+class TestRecordingIndex(unittest.TestCase):
+
+    def test_frames_at(self):
+        index = create_index()
+        self.assertEqual(index.frames_at(1.0), {'color': 10, 'left': 19})
+        self.assertEqual(index.frames_at(100.0), {'color': 19, 'left': 39})  # Clamped to the last frame
+        self.assertAlmostEqual(index.duration(), 2.0)
+
+    def test_time_of(self):
+        index = create_index()
+        self.assertAlmostEqual(index.time_of(12), 1.2)
+        self.assertAlmostEqual(index.time_of(1, 'left'), 0.1)
+        with self.assertRaises(ValueError):
+            index.time_of(20)
+
+    def test_keyframe_before(self):
+        index = create_index()
+        self.assertEqual(index.streams['color'].keyframe_before(7), 5)
+        self.assertEqual(index.streams['color'].keyframe_before(15), 15)
+        self.assertEqual(index.streams['left'].keyframe_before(7), 7)
+
+    def test_frames_before(self):
+        index = create_index()
+        self.assertEqual(index.frames_before(1.05), 11)
+        self.assertEqual(index.frames_before(100.0), 20)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'index.json'
+            index = create_index()
+            index.signature = [['color.mp4', 100, 1]]
+            index.save(path)
+
+            loaded = RecordingIndex.load(path, [['color.mp4', 100, 1]])
+            self.assertEqual(loaded.streams['color'].keyframes, [0, 5, 10, 15])
+            self.assertEqual(loaded.frames_at(1.0), index.frames_at(1.0))
+
+            # Recording changed, index is stale
+            self.assertIsNone(RecordingIndex.load(path, [['color.mp4', 200, 2]]))
+
+
+class TestVideoCapReaderSeek(unittest.TestCase):
+
+    def test_seek(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            writer = cv2.VideoWriter(str(path / 'color.avi'), cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+            for i in range(60):
+                writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+            writer.release()
+
+            reader = VideoCapReader(path)
+            sequential = [reader.read()['color'][0, 0, 0] for _ in range(60)]
+
+            index = reader.build_index()
+            self.assertEqual(len(index.streams['color']), 60)
+            reader.seek(index, {'color': 42})
+            self.assertEqual(reader.read()['color'][0, 0, 0], sequential[42])
+            reader.seek(index, index.frames_at(1.0))
+            self.assertEqual(reader.read()['color'][0, 0, 0], sequential[30])
+            reader.close()
+
+            sidecar = index_path(path)
+            self.assertEqual(sidecar.name, '.replay_index.json')
+            self.assertEqual(recording_signature(path)[0][0], 'color.avi')
+
+    def test_index_b_frames(self):
+        try:
+            import av
+        except ImportError:
+            self.skipTest('PyAV is not installed')
+        if 'libx264' not in av.codecs_available:
+            self.skipTest('PyAV was built without libx264')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            with av.open(str(path / 'color.mp4'), 'w') as container:
+                stream = container.add_stream('libx264', rate=30)
+                stream.width, stream.height, stream.pix_fmt = 64, 48, 'yuv420p'
+                stream.options = {'bf': '2', 'g': '10', 'sc_threshold': '0'}
+                for i in range(30):
+                    frame = av.VideoFrame.from_ndarray(np.full((48, 64, 3), i * 8, dtype=np.uint8), format='bgr24')
+                    container.mux(stream.encode(frame))
+                container.mux(stream.encode(None))
+
+            reader = VideoCapReader(path)
+            index = reader.build_index()
+            reader.close()
+            color = index.streams['color']
+            self.assertEqual(len(color), 30)
+            self.assertEqual(color.timestamps, sorted(color.timestamps))  # Presentation order, not decode order
+            self.assertEqual(color.keyframes, [0, 10, 20])
+            self.assertEqual(index.frames_at(0.5)['color'], 15)
+
+
+class TestKeyframeDetection(unittest.TestCase):
+
+    def test_h264(self):
+        packets, _ = encode_video(30, 'libx264', X264_OPTIONS)
+        self.assertEqual([i for i, p in enumerate(packets) if is_keyframe(p, 'h264')], [0, 10, 20])
+
+    def test_h265(self):
+        packets, _ = encode_video(30, 'libx265', X265_OPTIONS)
+        self.assertEqual([i for i, p in enumerate(packets) if is_keyframe(p, 'hevc')], [0, 10, 20])
+        self.assertFalse(any(is_keyframe(p, 'h264') for p in packets[1:10]))
+
+
+
+@unittest.skipIf(McapReader is None, 'mcap.mcap0 is not installed')
+class TestMcapVideoSeek(unittest.TestCase):
+
+    def record(self, path: Path, fmt: str, packets):
+        """
+        Writes access units with McapRecorder, as they would arrive from the VideoEncoder.
+        """
+        recorder = McapRecorder()
+        recorder.path = str(path)
+        recorder.stream = open(recorder.path, 'w+b')
+        recorder.writer = McapWriter(output=recorder.stream)
+        recorder.writer.start(profile='ros1', library='depthai-sdk')
+        recorder.bridge = SimpleNamespace(start_time=timedelta(0))  # Set by update() from the device
+        recorder._video_streams['color_bitstream'] = ('/color/video', fmt)
+        for i, packet in enumerate(packets):
+            frame = dai.ImgFrame()
+            frame.setData(np.frombuffer(packet, dtype=np.uint8))
+            frame.setSequenceNum(i)
+            frame.setTimestamp(timedelta(seconds=i / 30))
+            recorder.write('color_bitstream', frame)
+        recorder.close()
+
+    def check_seek(self, fmt: str, packets, images):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'recordings.mcap'
+            self.record(path, fmt, packets)
+
+            reader = McapReader(path)
+            sequential = [reader.read()['color'] for _ in range(len(packets))]
+            reader.close()
+
+            reader = McapReader(path)
+            index = reader.build_index()
+            self.assertEqual(len(index.streams['color']), 30)
+            self.assertEqual(index.streams['color'].keyframes, [0, 10, 20])
+            for frame in [15, 3, 27]:  # Middle of a GOP, decoded from the previous keyframe
+                reader.seek(index, {'color': frame})
+                decoded = reader.read()['color']
+                np.testing.assert_array_equal(decoded, sequential[frame])
+                self.assertLess(np.abs(decoded.astype(int) - images[frame]).mean(), 3)
+
+            with self.assertRaises(ValueError):
+                reader.seek(index, {'left': 0})  # Not in the recording
+            reader.close()
+
+    def test_h264(self):
+        self.check_seek('h264', *encode_video(30, 'libx264', X264_OPTIONS))
+
+    def test_h265(self):
+        self.check_seek('h265', *encode_video(30, 'libx265', X265_OPTIONS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import socket
+import struct
+import threading
+import unittest
+from datetime import timedelta
+
+from depthai_sdk.integrations.rtsp.rtp import RtpPacketizer, split_nal_units
+from depthai_sdk.integrations.rtsp.server import RtspClient, RtspServer
+
+SPS = bytes([0x67, 0x64, 0x00, 0x28, 0xAC, 0xD9])
+PPS = bytes([0x68, 0xEB, 0xE3, 0xCB])
+
+
+def nal(nal_type: int, size: int) -> bytes:
+    # Payload without any 00 00 0x sequences, like a real (emulation prevented) NAL unit
+    return bytes([0x60 | nal_type]) + bytes((i % 250) + 2 for i in range(size - 1))
+
+
+def access_unit(keyframe: bool, size: int = 5000) -> bytes:
+    if keyframe:
+        return b'\x00\x00\x00\x01' + SPS + b'\x00\x00\x00\x01' + PPS + b'\x00\x00\x01' + nal(5, size)
+    return b'\x00\x00\x00\x01' + nal(1, size)
+
+
+def depacketize(packets):
+    """
+    Reassembles NAL units from H.264 RTP packets (single NAL unit and FU-A packets).
+    """
+    nals, fragment = [], b''
+    for packet in packets:
+        payload = packet[12:]
+        if payload[0] & 0x1F == 28:
+            if payload[1] & 0x80:
+                fragment = bytes([(payload[0] & 0xE0) | (payload[1] & 0x1F)])
+            fragment += payload[2:]
+            if payload[1] & 0x40:
+                nals.append(fragment)
+        else:
+            nals.append(payload)
+    return nals
+
+
+class TestRtp(unittest.TestCase):
+
+    def test_split_nal_units(self):
+        nals = split_nal_units(access_unit(True, 100))
+        self.assertEqual([bytes(n) for n in nals], [SPS, PPS, nal(5, 100)])
+
+    def test_fragmentation(self):
+        frame = access_unit(True)
+        packetizer = RtpPacketizer(mtu=1000, ssrc=1)
+        packets = [b''.join(bytes(b) for b in p) for p in packetizer.packetize(split_nal_units(frame), 1234)]
+
+        self.assertTrue(all(len(p) <= 12 + 1000 for p in packets))
+        self.assertEqual(depacketize(packets), [SPS, PPS, nal(5, 5000)])
+        markers = [p[1] & 0x80 for p in packets]
+        self.assertEqual(markers[-1], 0x80)
+        self.assertFalse(any(markers[:-1]))
+        seqs = [struct.unpack('!H', p[2:4])[0] for p in packets]
+        self.assertEqual(seqs, [(seqs[0] + i) & 0xFFFF for i in range(len(packets))])
+
+
+class TestRtspClient(unittest.TestCase):
+
+    def test_slow_client_drops_until_keyframe(self):
+        client = RtspClient('1', False, None, threading.Lock(), max_queue_size=2)  # Sending thread not started
+        client.push([], 0, keyframe=False)  # Waits for the first keyframe
+        for i in range(4):
+            client.push([], i, keyframe=i == 0)
+        self.assertEqual(client.dropped, 1)
+        client.push([], 5, keyframe=False)  # Skipped, waiting for the next keyframe after the drop
+        self.assertEqual(client._queue.qsize(), 2)
+        self.assertEqual(client.dropped, 1)
+
+
+class TestRtspServer(unittest.TestCase):
+
+    def request(self, sock, reader, method, url, headers=''):
+        self.cseq = getattr(self, 'cseq', 0) + 1
+        sock.sendall(f'{method} {url} RTSP/1.0\r\nCSeq: {self.cseq}\r\n{headers}\r\n'.encode())
+        status = reader.readline().decode()
+        response = {}
+        while True:
+            line = reader.readline().decode().strip()
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            response[key.lower()] = value.strip()
+        body = reader.read(int(response.get('content-length', 0))).decode()
+        self.assertIn('200 OK', status)
+        self.assertEqual(response['cseq'], str(self.cseq))
+        return response, body
+
+    def test_loopback_tcp(self):
+        server = RtspServer(port=0, host='127.0.0.1')
+        server.add_stream('Color_bitstream')
+        server.start()
+        server.send('color_bitstream', access_unit(True), timedelta(seconds=1))  # Caches SPS/PPS for the SDP
+
+        url = f'rtsp://127.0.0.1:{server.port}/color_bitstream'
+        sock = socket.create_connection(('127.0.0.1', server.port), timeout=5)
+        reader = sock.makefile('rb')
+        try:
+            self.request(sock, reader, 'OPTIONS', url)
+            _, sdp = self.request(sock, reader, 'DESCRIBE', url, 'Accept: application/sdp\r\n')
+            self.assertIn('H264/90000', sdp)
+            self.assertIn('sprop-parameter-sets=', sdp)
+            response, _ = self.request(sock, reader, 'SETUP', url + '/trackID=0',
+                                       'Transport: RTP/AVP/TCP;unicast;interleaved=0-1\r\n')
+            session = response['session'].split(';')[0]
+            self.request(sock, reader, 'PLAY', url, f'Session: {session}\r\n')
+
+            server.send('color_bitstream', access_unit(False), timedelta(seconds=1))  # Skipped, not a keyframe
+            server.send('color_bitstream', access_unit(True), timedelta(seconds=2))
+
+            packets = []
+            while not packets or not packets[-1][1] & 0x80:  # Until the marker bit
+                magic, channel, length = struct.unpack('!cBH', reader.read(4))
+                self.assertEqual((magic, channel), (b'$', 0))
+                packets.append(reader.read(length))
+
+            self.assertEqual(depacketize(packets), [SPS, PPS, nal(5, 5000)])
+            self.assertEqual(struct.unpack('!I', packets[0][4:8])[0], 2 * 90000)
+
+            self.request(sock, reader, 'TEARDOWN', url, f'Session: {session}\r\n')
+        finally:
+            reader.close()
+            sock.close()
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import unittest
+from datetime import timedelta
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.classes.packet_handlers import SharedMemoryPacketHandler
+from depthai_sdk.classes.packets import DisparityDepthPacket, FramePacket, PointcloudPacket
+from depthai_sdk.oak_outputs.shared_memory import SharedMemoryPublisher, SharedMemorySubscriber, packet_arrays
+
+
+def unique_name(name: str) -> str:
+    return f'test_{os.getpid()}_{name}'
+
+
+def img_frame(data: np.ndarray, frame_type: dai.ImgFrame.Type, seq: int = 0) -> dai.ImgFrame:
+    frame = dai.ImgFrame()
+    frame.setType(frame_type)
+    frame.setWidth(data.shape[1])
+    frame.setHeight(data.shape[0])
+    frame.setData(data.view(np.uint8).ravel())
+    frame.setSequenceNum(seq)
+    frame.setTimestampDevice(timedelta(seconds=seq / 30))
+    return frame
+
+
+def subscriber_process(name: str, count: int, results):
+    with SharedMemorySubscriber(name) as sub:
+        results.put('ready')
+        for _ in range(count):
+            packet = sub.next(timeout=10)
+            results.put((packet.index, int(packet.frame.sum()), packet.sequence_num))
+
+
+class TestSharedMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.name = unique_name(self.id().split('.')[-1])
+        self.publisher = SharedMemoryPublisher(self.name, slot_size=10000, num_slots=4)
+
+    def tearDown(self):
+        self.publisher.close()
+
+    def test_roundtrip(self):
+        sub = SharedMemorySubscriber(self.name)
+        self.assertIsNone(sub.latest())
+        points = np.random.default_rng(0).random((100, 3)).astype(np.float32)
+        self.assertTrue(self.publisher.publish({'points': points, 'indices': np.arange(100)},
+                                               {'name': 'pcl', 'timestamp': 1.5, 'sequence_num': 7}))
+
+        packet = sub.next(timeout=1)
+        np.testing.assert_array_equal(packet.points, points)
+        np.testing.assert_array_equal(packet.indices, np.arange(100))
+        self.assertEqual((packet.name, packet.timestamp, packet.sequence_num), ('pcl', timedelta(seconds=1.5), 7))
+        self.assertIsNone(sub.next(timeout=0.01))
+        sub.close()
+
+    def test_ring_overflow(self):
+        sub = SharedMemorySubscriber(self.name)
+        for i in range(10):
+            self.publisher.publish({'frame': np.full((4, 4), i, dtype=np.uint8)})
+        # Slots of the 3 newest packets are safe to read, the 4th might be being written
+        self.assertEqual([sub.next(timeout=0).frame[0, 0] for _ in range(3)], [7, 8, 9])
+        self.assertEqual(sub.missed, 7)
+        self.assertEqual(sub.latest().frame[0, 0], 9)
+        sub.close()
+
+    def test_zero_copy_overwritten(self):
+        sub = SharedMemorySubscriber(self.name)
+        self.publisher.publish({'frame': np.zeros((4, 4), dtype=np.uint8)})
+        packet = sub.next(timeout=0, copy=False)
+        self.assertTrue(packet.is_valid())
+        for i in range(4):
+            self.publisher.publish({'frame': np.full((4, 4), 1, dtype=np.uint8)})
+        self.assertFalse(packet.is_valid())
+        del packet
+        sub.close()
+
+    def test_too_large_dropped(self):
+        self.assertFalse(self.publisher.publish({'frame': np.zeros(20000, dtype=np.uint8)}))
+        self.assertEqual((self.publisher.dropped, self.publisher.published), (1, 0))
+
+    def test_closed(self):
+        sub = SharedMemorySubscriber(self.name)
+        self.publisher.publish({'frame': np.zeros(4)})
+        self.publisher.close()
+        self.assertEqual(len(list(sub)), 1)
+        self.assertTrue(sub.closed)
+        sub.close()
+
+    def test_other_process(self):
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        process = ctx.Process(target=subscriber_process, args=(self.name, 3, results))
+        process.start()
+        self.assertEqual(results.get(timeout=30), 'ready')
+
+        for i in range(3):
+            self.publisher.publish({'frame': np.full((40, 50), i + 1, dtype=np.uint8)}, {'sequence_num': i})
+        process.join(timeout=30)
+        self.assertEqual([results.get(timeout=1) for _ in range(3)],
+                         [(i, (i + 1) * 2000, i) for i in range(3)])
+        # Subscriber exiting must not unlink the publisher's segment
+        SharedMemorySubscriber(self.name, timeout=0).close()
+
+
+class TestSharedMemoryPacketHandler(unittest.TestCase):
+
+    def test_packets(self):
+        prefix = unique_name('handler')
+        handler = SharedMemoryPacketHandler([], prefix=prefix)
+        depth = np.arange(48 * 64, dtype=np.uint16).reshape(48, 64)
+        color = np.full((48, 64, 3), 100, dtype=np.uint8)
+
+        frame_packet = FramePacket('color', img_frame(color, dai.ImgFrame.Type.BGR888i, seq=3))
+        frame_packet.frame = color
+        depth_packet = DisparityDepthPacket('depth', img_frame(depth, dai.ImgFrame.Type.RAW16))
+        points = np.random.default_rng(0).random((500, 3)).astype(np.float32)
+        pcl_packet = PointcloudPacket('pcl', points, img_frame(depth, dai.ImgFrame.Type.RAW16), None,
+                                      indices=np.arange(500))
+        np.testing.assert_array_equal(packet_arrays(depth_packet)['depth'], depth)
+
+        subs = {}
+        try:
+            for packet in (frame_packet, depth_packet, pcl_packet):
+                handler.new_packet(packet)  # Segment is created with the first packet
+                subs[packet.name] = SharedMemorySubscriber(f'{prefix}_{packet.name}')
+                handler.new_packet(packet)
+
+            color_packet = subs['color'].next(timeout=1)
+            np.testing.assert_array_equal(color_packet.frame, color)
+            self.assertEqual((color_packet.type, color_packet.sequence_num), ('FramePacket', 3))
+            self.assertEqual(color_packet.timestamp, timedelta(seconds=0.1))
+            np.testing.assert_array_equal(subs['depth'].next(timeout=1).depth, depth)
+            pcl = subs['pcl'].next(timeout=1)
+            np.testing.assert_array_equal(pcl.points, points)
+            np.testing.assert_array_equal(pcl.indices, np.arange(500))
+            self.assertEqual(handler.get_segment_names(), [])  # Names come from outputs, none given here
+        finally:
+            for sub in subs.values():
+                sub.close()
+            handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
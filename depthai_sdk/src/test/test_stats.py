@@ -0,0 +1,88 @@
+import unittest
+from datetime import timedelta
+
+import depthai as dai
+
+from depthai_sdk.classes.packet_handlers import CallbackPacketHandler
+from depthai_sdk.classes.packets import FramePacket
+from depthai_sdk.oak_outputs.stats import Histogram, PipelineStats, StageStats
+
+
+def create_packet(seq: int) -> FramePacket:
+    frame = dai.ImgFrame()
+    frame.setSequenceNum(seq)
+    frame.setTimestamp(dai.Clock.now() - timedelta(milliseconds=20))
+    return FramePacket('color', frame)
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        hist = Histogram()
+        for i in range(1, 101):
+            hist.add(i / 1000)  # 1..100 ms
+
+        self.assertEqual(hist.count, 100)
+        self.assertAlmostEqual(hist.mean(), 0.0505)
+        self.assertAlmostEqual(hist.max, 0.1)
+        # Percentiles are accurate to the bucket width (25%)
+        self.assertAlmostEqual(hist.percentile(50), 0.05, delta=0.05 * 0.25)
+        self.assertAlmostEqual(hist.percentile(99), 0.099, delta=0.099 * 0.25)
+        self.assertEqual(hist.percentile(100), 0.1)
+        self.assertEqual(sum(c for _, c in hist.buckets()), 100)
+
+        hist.reset()
+        self.assertEqual(hist.count, 0)
+        self.assertEqual(hist.percentile(50), 0.0)
+
+
+class TestStageStats(unittest.TestCase):
+
+    def test_device_msg(self):
+        stats = StageStats('color', 'xlink')
+        for seq in [0, 1, 2, 5, 6, 10]:
+            stats.add_device_msg(create_packet(seq).msg)
+
+        self.assertEqual(stats.drops, 5)  # 3, 4, 7, 8, 9
+        self.assertEqual(stats.count, 6)
+        self.assertAlmostEqual(stats.latency.percentile(50), 0.02, delta=0.02 * 0.25)
+
+    def test_pipeline_stats(self):
+        stats = PipelineStats()
+        self.assertIs(stats.stage('color', 'xout'), stats.stage('color', 'xout'))
+        stats.stage('color', 'xout').add_processing(0.001)
+        self.assertEqual(stats.get_stats()['color']['xout']['processing']['count'], 1)
+        self.assertIn('color [xout] n=1', stats.summary())
+
+
+class TestHandlerStats(unittest.TestCase):
+
+    def test_handoff(self):
+        packets = []
+        handler = CallbackPacketHandler([], callback=packets.append, main_thread=True)
+        handler._packet_names = {'color': True}
+        handler.stats = PipelineStats()
+
+        for seq in range(5):
+            handler._new_packet_callback(create_packet(seq))
+        handler._poll()
+        handler._poll()
+        handler._poll()  # Queue is empty
+
+        self.assertEqual([p.get_sequence_num() for p in packets], [3, 4])
+        handoff = handler.stats.stage('color', 'handoff')
+        self.assertEqual(handoff.drops, 3)  # Queue(2) keeps only the newest 2 packets
+        self.assertEqual(handoff.max_depth, 2)
+        self.assertEqual(handoff.latency.count, 2)
+        self.assertEqual(handler.stats.stage('color', 'handler').processing.count, 2)
+
+    def test_disabled(self):
+        packets = []
+        handler = CallbackPacketHandler([], callback=packets.append)
+        handler._new_packet_callback(create_packet(0))
+        self.assertEqual(len(packets), 1)
+        self.assertIsNone(handler._handler_stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+
+import depthai as dai
+
+from depthai_sdk.classes.enum import SyncPolicy
+from depthai_sdk.oak_outputs.syncing import SequenceNumRing, SequenceNumSync, TimestampSync
+from depthai_sdk.oak_outputs.xout.xout_nn import XoutTwoStage
+
+
+class TestSequenceNumRing(unittest.TestCase):
+
+    def test_put_get(self):
+        ring = SequenceNumRing(4)
+        self.assertTrue(ring.put(1, 'a'))
+        self.assertEqual(ring.get(1), 'a')
+        self.assertIsNone(ring.get(2))
+        self.assertIsNone(ring.get(5))  # Same slot as 1
+
+    def test_evict_counts_dropped(self):
+        ring = SequenceNumRing(4)
+        ring.put(1, 'a')
+        ring.put(5, 'b')  # Evicts seq 1
+        self.assertEqual(ring.dropped, 1)
+        self.assertIsNone(ring.get(1))
+        self.assertEqual(ring.get(5), 'b')
+
+    def test_stale_message_dropped(self):
+        ring = SequenceNumRing(4)
+        ring.put(5, 'b')
+        self.assertFalse(ring.put(1, 'a'))
+        self.assertEqual(ring.get(5), 'b')
+        self.assertEqual(ring.dropped, 1)
+
+    def test_release_discards_older(self):
+        ring = SequenceNumRing(8)
+        ring.put(1, 'a')
+        ring.put(2, 'b')
+        self.assertEqual(ring.release(2), 'b')
+        self.assertIsNone(ring.get(1))
+        self.assertFalse(ring.put(2, 'c'))
+
+    def test_setdefault(self):
+        ring = SequenceNumRing(4)
+        value = ring.setdefault(3, list)
+        value.append(1)
+        self.assertEqual(ring.setdefault(3, list), [1])
+
+
+class TestSequenceNumSync(unittest.TestCase):
+
+    def test_sync(self):
+        sync = SequenceNumSync(2)
+        self.assertIsNone(sync.sync(1, 'rgb', 'rgb1'))
+        self.assertIsNone(sync.sync(2, 'rgb', 'rgb2'))
+        self.assertEqual(sync.sync(2, 'dets', 'dets2'), {'rgb': 'rgb2', 'dets': 'dets2'})
+        # Seq 1 is older than the last synced one
+        self.assertIsNone(sync.sync(1, 'dets', 'dets1'))
+        self.assertEqual(sync.dropped['dets'], 1)
+
+    def test_bounded_memory(self):
+        sync = SequenceNumSync(2, capacity=8)
+        for seq in range(100):
+            sync.sync(seq, 'rgb', seq)
+        self.assertEqual(sync.dropped['rgb'], 92)
+        self.assertEqual(sync.sync(99, 'dets', 'dets99'), {'rgb': 99, 'dets': 'dets99'})
+        self.assertIsNone(sync.sync(50, 'dets', 'dets50'))
+
+
+def ms(value: float) -> timedelta:
+    return timedelta(milliseconds=value)
+
+
+class TestTwoStageSync(unittest.TestCase):
+
+    def create_xout(self, capacity: int) -> XoutTwoStage:
+        xout = XoutTwoStage.__new__(XoutTwoStage)  # Without NN components and device
+        xout.msgs = SequenceNumRing(capacity)
+        xout.frames, xout.nn_results, xout.second_nn_out = [SimpleNamespace(name=name)
+                                                           for name in ['frames', 'dets', 'second_nn']]
+        xout.scale_bb = None
+        xout.whitelist_labels = None
+        return xout
+
+    def test_evicted_seq(self):
+        xout = self.create_xout(2)
+        for seq in range(3):  # Seq 0 gets evicted
+            xout.msgs.setdefault(seq, xout._new_seq_msgs)
+
+        dets = dai.ImgDetections()
+        dets.detections = [dai.ImgDetection()]
+        xout.add_detections(0, dets)  # Late detections of an evicted seq are ignored
+        self.assertFalse(xout.synced(0))
+        self.assertEqual(xout.required_recognitions(0), 0)
+        self.assertEqual(xout.msgs.dropped, 1)
+
+        xout.add_detections(2, dets)
+        xout.msgs.get(2)['frames'] = dai.ImgFrame()
+        self.assertEqual(xout.required_recognitions(2), 1)
+        self.assertFalse(xout.synced(2))
+        xout.msgs.get(2)['second_nn'].append(dai.NNData())
+        self.assertTrue(xout.synced(2))
+
+
+class TestTimestampSync(unittest.TestCase):
+
+    def test_nearest(self):
+        sync = TimestampSync(2, 17)
+        self.assertIsNone(sync.sync(ms(0), 'left', 'l0'))
+        self.assertIsNone(sync.sync(ms(33), 'left', 'l33'))
+        self.assertEqual(sync.sync(ms(30), 'right', 'r30'), {'left': 'l33', 'right': 'r30'})
+        self.assertEqual(sync.dropped, {'left': 1, 'right': 0})
+
+    def test_out_of_threshold(self):
+        sync = TimestampSync(2, 17)
+        sync.sync(ms(0), 'left', 'l0')
+        self.assertIsNone(sync.sync(ms(20), 'right', 'r20'))
+
+    def test_policies(self):
+        for policy, expected in [('earliest', 'l0'), ('latest', 'l20'), (SyncPolicy.NEAREST, 'l10')]:
+            sync = TimestampSync(2, 17, policy)
+            sync.sync(ms(0), 'left', 'l0')
+            sync.sync(ms(10), 'left', 'l10')
+            sync.sync(ms(20), 'left', 'l20')
+            self.assertEqual(sync.sync(ms(11), 'right', 'r11')['left'], expected)
+
+    def test_out_of_order(self):
+        sync = TimestampSync(2, 5)
+        sync.sync(ms(20), 'left', 'l20')
+        sync.sync(ms(0), 'left', 'l0')
+        self.assertEqual(sync.sync(ms(1), 'right', 'r1'), {'left': 'l0', 'right': 'r1'})
+        self.assertEqual(sync.sync(ms(21), 'right', 'r21'), {'left': 'l20', 'right': 'r21'})
+
+    def test_bounded_memory(self):
+        sync = TimestampSync(2, 17, max_size=4)
+        for i in range(100):
+            sync.sync(ms(i * 33), 'left', i)
+        self.assertEqual(sync.dropped['left'], 96)
+        self.assertEqual(sync.sync(ms(99 * 33), 'right', 'r'), {'left': 99, 'right': 'r'})
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            TimestampSync(2, 17, 'closest')
+
+
+if __name__ == '__main__':
+    unittest.main()
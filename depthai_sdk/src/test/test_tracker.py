@@ -0,0 +1,91 @@
+import unittest
+from datetime import timedelta
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.oak_outputs.xout.xout_tracker import TrackedObjects
+from depthai_sdk.tracking import BatchedKalmanFilter, KalmanFilter
+
+
+def create_tracklet(obj_id: int, coords=(0, 0, 0), status=dai.Tracklet.TrackingStatus.TRACKED) -> dai.Tracklet:
+    det = dai.ImgDetection()
+    det.xmin, det.ymin, det.xmax, det.ymax = 0.1, 0.2, 0.3, 0.5
+    tracklet = dai.Tracklet()
+    tracklet.id = obj_id
+    tracklet.status = status
+    tracklet.srcImgDetection = det
+    tracklet.spatialCoordinates = dai.Point3f(*coords)
+    return tracklet
+
+
+class TestBatchedKalmanFilter(unittest.TestCase):
+
+    def test_matches_kalman_filter(self):
+        rnd = np.random.default_rng(0)
+        batched = BatchedKalmanFilter(3, 10, 0.1, capacity=1)
+        filters = {}
+        t = 0.0
+        for step in range(30):
+            t += rnd.uniform(0.02, 0.05)
+            keys = [k for k in range(6) if rnd.random() < 0.8]
+            z = rnd.normal(1000, 50, (len(keys), 3))
+            meas_std = z[:, 2] ** 2 / (75 * 440)
+            filtered, valid = batched.step(keys, z, t, meas_std)
+
+            for i, key in enumerate(keys):
+                if key not in filters:
+                    filters[key] = KalmanFilter(10, 0.1, z[i][:, np.newaxis], t)
+                    self.assertFalse(valid[i])
+                    self.assertTrue(np.isnan(filtered[i]).all())
+                    continue
+                kf = filters[key]
+                kf.predict(t - kf.time)
+                kf.update(z[i][:, np.newaxis])
+                kf.time = t
+                kf.meas_std = meas_std[i]
+                self.assertTrue(valid[i])
+                np.testing.assert_allclose(filtered[i], kf.x[:3, 0], rtol=1e-9)
+
+            if step == 10:
+                batched.remove(2)
+                filters.pop(2, None)
+
+        self.assertEqual(len(batched), len(filters))
+
+
+class TestTrackedObjects(unittest.TestCase):
+
+    def test_history_and_speed(self):
+        tracker = TrackedObjects(75, 440, apply_kalman=False, calculate_speed=True, history_length=5)
+        for f in range(20):
+            # Object 1 moves 100 mm per 100 ms -> 1 m/s
+            tracker.update([create_tracklet(1, (f * 100, 0, 1000))], timedelta(milliseconds=100 * f))
+
+        dets = tracker.objects[1].previous_detections
+        self.assertEqual(len(dets), 5)
+        self.assertEqual(dets[-1].ts, timedelta(milliseconds=1900))
+        self.assertAlmostEqual(dets[-1].speed, 1.0)
+
+    def test_kalman_and_removal(self):
+        tracker = TrackedObjects(75, 440, apply_kalman=True, forget_after_n_frames=2)
+        tracker.update([create_tracklet(1, (100, 0, 1000)), create_tracklet(2)], timedelta(0))
+        tracker.update([create_tracklet(1, (100, 0, 1000)), create_tracklet(2)], timedelta(milliseconds=33))
+
+        first, second = tracker.objects[1].previous_detections
+        self.assertIsNone(first.filtered_2d)
+        self.assertIsNone(first.filtered_3d)
+        self.assertAlmostEqual(second.filtered_2d.xmin, 0.1, places=5)
+        self.assertAlmostEqual(second.filtered_3d.x, 100, places=3)
+        self.assertIsNone(tracker.objects[2].previous_detections[-1].filtered_3d)  # Not spatial
+
+        lost = dai.Tracklet.TrackingStatus.LOST
+        for f in range(2):
+            tracker.update([create_tracklet(1, (100, 0, 1000), lost)], timedelta(milliseconds=66 + 33 * f))
+        self.assertNotIn(1, tracker.objects)
+        self.assertNotIn(1, tracker.kalman_2d)
+        self.assertNotIn(1, tracker.kalman_3d)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import depthai as dai
+import numpy as np
+
+from depthai_sdk.components.undistort import MeshCache, _get_mesh, calibration_hash
+
+
+def legacy_mesh(mapX: np.ndarray, mapY: np.ndarray, mesh_cell_size: int = 16) -> np.ndarray:
+    # Previous implementation, loop over every pixel
+    mesh0 = []
+    for y in range(mapX.shape[0] + 1):
+        if y % mesh_cell_size == 0:
+            row_left = []
+            for x in range(mapX.shape[1] + 1):
+                if x % mesh_cell_size == 0:
+                    if y == mapX.shape[0] and x == mapX.shape[1]:
+                        row_left.append(mapY[y - 1, x - 1])
+                        row_left.append(mapX[y - 1, x - 1])
+                    elif y == mapX.shape[0]:
+                        row_left.append(mapY[y - 1, x])
+                        row_left.append(mapX[y - 1, x])
+                    elif x == mapX.shape[1]:
+                        row_left.append(mapY[y, x - 1])
+                        row_left.append(mapX[y, x - 1])
+                    else:
+                        row_left.append(mapY[y, x])
+                        row_left.append(mapX[y, x])
+            if (mapX.shape[1] % mesh_cell_size) % 2 != 0:
+                row_left.append(0)
+                row_left.append(0)
+            mesh0.append(row_left)
+    return np.array(mesh0)
+
+
+class TestMesh(unittest.TestCase):
+
+    def test_same_as_loop(self):
+        rnd = np.random.default_rng(0)
+        for height, width, step in [(400, 640, 16), (90, 130, 16), (97, 145, 16), (64, 49, 8)]:
+            map_x = rnd.uniform(0, width, (height, width)).astype(np.float32)
+            map_y = rnd.uniform(0, height, (height, width)).astype(np.float32)
+            mesh = _get_mesh(map_x, map_y, step)
+            self.assertEqual(mesh.dtype, np.float32)
+            np.testing.assert_array_equal(mesh, legacy_mesh(map_x, map_y, step))
+
+
+class TestMeshCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MeshCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resolve(self):
+        calls = []
+
+        def create():
+            calls.append(1)
+            return {'left': np.ones((3, 4), dtype=np.float32), 'right': np.zeros((3, 4), dtype=np.float32)}
+
+        key = self.cache.key('abc', (640, 400), 16, M2_offset=0)
+        first = self.cache.resolve(key, create)
+        second = MeshCache(self.tmp.name).resolve(key, create)  # Eg. after pipeline restart
+        self.assertEqual(len(calls), 1)
+        np.testing.assert_array_equal(first['left'], second['left'])
+        np.testing.assert_array_equal(first['right'], second['right'])
+
+        self.assertNotEqual(key, self.cache.key('abc', (640, 400), 8, M2_offset=0))
+        self.assertNotEqual(key, self.cache.key('abc', (1280, 800), 16, M2_offset=0))
+        self.assertNotEqual(key, self.cache.key('abd', (640, 400), 16, M2_offset=0))
+        self.assertNotEqual(key, self.cache.key('abc', (640, 400), 16, M2_offset=10))
+
+    def test_corrupted(self):
+        key = self.cache.key('abc', (640, 400), 16)
+        (Path(self.tmp.name) / f'{key}.npz').write_bytes(b'not a npz file')
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse((Path(self.tmp.name) / f'{key}.npz').exists())
+
+    def test_calibration_hash(self):
+        calib = dai.CalibrationHandler()
+        self.assertEqual(calibration_hash(calib), calibration_hash(dai.CalibrationHandler()))
+        calib.setBoardInfo('OAK-D', 'R1')
+        self.assertNotEqual(calibration_hash(calib), calibration_hash(dai.CalibrationHandler()))
+
+
+if __name__ == '__main__':
+    unittest.main()
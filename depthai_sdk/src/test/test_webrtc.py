@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+import urllib.request
+from datetime import timedelta
+
+import numpy as np
+
+from depthai_sdk.classes.packet_handlers import StreamPacketHandler
+from depthai_sdk.integrations.rtsp.server import RtspServer
+from video_helper import encode_video
+
+try:
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+    from depthai_sdk.integrations.webrtc.server import EncodedVideoTrack, WebRtcPeer, WebRtcServer
+except ImportError:
+    RTCPeerConnection = None
+
+WIDTH, HEIGHT = 160, 96
+
+
+@unittest.skipIf(RTCPeerConnection is None, 'aiortc is not installed')
+class TestEncodedVideoTrack(unittest.TestCase):
+
+    def test_drop_until_keyframe(self):
+        track = EncodedVideoTrack(max_queue_size=2)
+        track.push(b'p', 0, keyframe=False)  # Waiting for the first keyframe, not a drop
+        track.push(b'i', 1, keyframe=True)
+        track.push(b'p', 2, keyframe=False)
+        track.push(b'p', 3, keyframe=False)  # Queue full
+        track.push(b'p', 4, keyframe=False)  # Waiting for keyframe
+        self.assertEqual(track.dropped, 2)
+        self.assertEqual(track.backlog(), 1)
+
+        packets = [asyncio.run(track.recv()) for _ in range(2)]
+        self.assertEqual([bytes(p) for p in packets], [b'i', b'p'])
+        self.assertEqual([p.pts for p in packets], [1, 2])
+
+        track.push(b'p', 5, keyframe=False)
+        track.push(b'i', 6, keyframe=True)
+        self.assertEqual(track.dropped, 3)
+        self.assertEqual(asyncio.run(track.recv()).pts, 6)
+
+    def test_congestion(self):
+        peer = WebRtcPeer(pc=None, max_loss=0.1, recover_intervals=2)
+        track = EncodedVideoTrack()
+        peer.add_track('color', track, sender=None)
+
+        self.assertFalse(peer.update_congestion('color', 0.0, 0.0))
+        self.assertTrue(peer.update_congestion('color', 0.2, 0.0))  # Packet loss
+        self.assertTrue(track.keyframes_only)
+        self.assertTrue(peer.update_congestion('color', 0.0, 0.0))
+        self.assertTrue(peer.update_congestion('color', 0.0, 0.6))  # Frames queue up
+        self.assertTrue(peer.update_congestion('color', 0.0, 0.0))
+        self.assertTrue(peer.update_congestion('color', 0.08, 0.0))  # Between thresholds, no change
+        self.assertFalse(peer.update_congestion('color', 0.0, 0.0))
+
+        track.keyframes_only = True
+        track.push(b'i', 0, keyframe=True)
+        track.push(b'p', 1, keyframe=False)
+        self.assertEqual((track.backlog() * track._queue.maxsize, track.dropped), (1, 1))
+
+    def test_recover_at_keyframe(self):
+        track = EncodedVideoTrack()
+        track.push(b'k', 0, keyframe=True)
+        track.push(b'p1', 1, keyframe=False)
+        track.keyframes_only = True  # Congested
+        track.push(b'p2', 2, keyframe=False)
+        track.push(b'p3', 3, keyframe=False)
+        track.keyframes_only = False  # Recovered, P-frames reference the dropped ones until the next keyframe
+        track.push(b'p4', 4, keyframe=False)
+        track.push(b'k', 5, keyframe=True)
+        track.push(b'p6', 6, keyframe=False)
+
+        packets = [asyncio.run(track.recv()) for _ in range(track._queue.qsize())]
+        self.assertEqual([p.pts for p in packets], [0, 1, 5, 6])
+        self.assertEqual(track.dropped, 3)
+
+    def test_h265_not_supported(self):
+        with self.assertRaises(ValueError):
+            WebRtcServer().add_stream('color', h265=True)
+
+    def test_overlays_require_support(self):
+        with self.assertRaises(ValueError):
+            StreamPacketHandler([], RtspServer(), overlays=[lambda device: None])
+
+
+@unittest.skipIf(RTCPeerConnection is None, 'aiortc is not installed')
+class TestWebRtcLoopback(unittest.TestCase):
+
+    def setUp(self):
+        self.server = WebRtcServer(port=0, host='127.0.0.1', stats_interval=0.2)
+        self.server.add_stream('color')
+        self.server.start()
+        self.stop = threading.Event()
+
+    def tearDown(self):
+        self.stop.set()
+        self.server.close()
+
+    def feed(self, frames):
+        # Device callback thread: encoded frames at 30 FPS, with an overlay for each frame
+        i = 0
+        while not self.stop.is_set():
+            frame = np.frombuffer(frames[i % len(frames)], dtype=np.uint8)
+            self.server.send('color', frame, timedelta(seconds=i / 30))
+            self.server.send_overlay(json.dumps({'frame_shape': [HEIGHT, WIDTH], 'objects': [], 'seq': i}))
+            i += 1
+            time.sleep(1 / 30)
+
+    async def client(self, frames):
+        pc = RTCPeerConnection()
+        pc.addTransceiver('video', direction='recvonly')
+        channel = pc.createDataChannel('overlays')
+        messages = []
+        channel.on('message', messages.append)
+        tracks = asyncio.Queue()
+        pc.on('track', tracks.put_nowait)
+
+        await pc.setLocalDescription(await pc.createOffer())
+        request = urllib.request.Request(f'http://127.0.0.1:{self.server.port}/offer',
+                                         json.dumps({'sdp': pc.localDescription.sdp, 'type': 'offer'}).encode(),
+                                         {'Content-Type': 'application/json'})
+        response = await asyncio.get_running_loop().run_in_executor(None, urllib.request.urlopen, request)
+        answer = json.loads(response.read())
+        self.assertIn('H264', answer['sdp'])
+        await pc.setRemoteDescription(RTCSessionDescription(**answer))
+
+        track = await asyncio.wait_for(tracks.get(), 10)
+        threading.Thread(target=self.feed, args=(frames,), daemon=True).start()
+        decoded = []
+        while len(decoded) < 15:
+            decoded.append(await asyncio.wait_for(track.recv(), 10))
+        while not messages:
+            await asyncio.sleep(0.05)
+        peers = list(self.server.peers)
+        await pc.close()
+        return decoded, messages, peers
+
+    def test_loopback(self):
+        frames, _ = encode_video(30, 'h264', {'g': '10', 'bf': '0', 'tune': 'zerolatency'}, WIDTH, HEIGHT)
+        decoded, messages, peers = asyncio.run(self.client(frames))
+
+        self.assertEqual((decoded[-1].width, decoded[-1].height), (WIDTH, HEIGHT))
+        self.assertEqual(json.loads(messages[0])['frame_shape'], [HEIGHT, WIDTH])
+        self.assertEqual(len(peers), 1)
+        stats = peers[0].get_stats()['streams']['color']
+        self.assertGreaterEqual(stats['sent'], 15)
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{self.server.port}/streams') as response:
+            self.assertEqual(json.loads(response.read()), ['color'])
+
+
+if __name__ == '__main__':
+    unittest.main()
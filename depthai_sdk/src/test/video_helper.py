@@ -0,0 +1,39 @@
+import unittest
+from fractions import Fraction
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def encode_video(count: int,
+                 codec: str = 'h264',
+                 options: Optional[dict] = None,
+                 width: int = 128,
+                 height: int = 96) -> Tuple[List[bytes], List[np.ndarray]]:
+    """
+    Returns encoded access units (Annex-B for H.264/H.265, as from the VideoEncoder) of a moving gradient,
+    and the BGR frames before encoding. Skips the test if PyAV or the codec isn't available.
+    """
+    try:
+        import av
+    except ImportError:
+        raise unittest.SkipTest('PyAV is not installed')
+    if codec not in av.codecs_available:
+        raise unittest.SkipTest(f'PyAV was built without {codec}')
+
+    context = av.CodecContext.create(codec, 'w')
+    context.width, context.height = width, height
+    context.pix_fmt = 'yuvj420p' if codec == 'mjpeg' else 'yuv420p'
+    context.time_base = Fraction(1, 30)
+    context.options = options or {}
+
+    packets, images = [], []
+    for i in range(count):
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        image[:, :, 1] = (np.arange(width) * 2 + i * 8) % 256
+        images.append(image)
+        video_frame = av.VideoFrame.from_ndarray(image, format='bgr24').reformat(format=context.pix_fmt)
+        video_frame.pts = i
+        packets += [bytes(p) for p in context.encode(video_frame)]
+    packets += [bytes(p) for p in context.encode(None)]
+    return packets, images